@@ -14,33 +14,39 @@ import app_config.reports
 import app_config.metadata
 
 # Re-exportar todo explícitamente
-from app_config.app import PAGE_CONFIG, STEPS, VERSION, VERSION_DATE, VERSION_NOTES
+from app_config.app import (
+    PAGE_CONFIG, STEPS, VERSION, VERSION_DATE, VERSION_NOTES, SHARED_DATASET_CACHE,
+    SESSION_MEMORY, DRIFT_STORE,
+)
 from app_config.paths import BASELINE_PATHS, SUPPORTED_EXTENSIONS
 from app_config.thresholds import (
-    WSTD_THRESHOLDS, VALIDATION_THRESHOLDS, VALIDATION_RMS_THRESHOLD,
+    WSTD_THRESHOLDS, VALIDATION_THRESHOLDS, VALIDATION_RMS_THRESHOLD, ALIGNMENT_CONVERGENCE,
     WHITE_REFERENCE_THRESHOLDS, DEFAULT_VALIDATION_THRESHOLDS,
     CRITICAL_REGIONS, OFFSET_LIMITS, DIAGNOSTIC_STATUS, VALIDATION_STATUS
 )
-from app_config.plotting import PLOT_CONFIG, BUCHI_COLORS, PLOTLY_TEMPLATE
+from app_config.plotting import PLOT_CONFIG, BUCHI_COLORS, PLOTLY_TEMPLATE, PREVIEW_FIGURE_CACHE, SPECTRA_PREVIEW
 from app_config.messages import MESSAGES, INSTRUCTIONS, SPECIAL_IDS
-from app_config.reports import REPORT_STYLE
+from app_config.reports import (
+    REPORT_STYLE, REPORT_SECTION_STYLE_VERSION, REPORT_SECTION_CACHE, REPORT_SIDECAR
+)
 from app_config.metadata import DEFAULT_CSV_METADATA, CONTROL_SAMPLES_CONFIG
 
 __all__ = [
     # App
-    'PAGE_CONFIG', 'STEPS', 'VERSION', 'VERSION_DATE', 'VERSION_NOTES',
+    'PAGE_CONFIG', 'STEPS', 'VERSION', 'VERSION_DATE', 'VERSION_NOTES', 'SHARED_DATASET_CACHE',
+    'SESSION_MEMORY', 'DRIFT_STORE',
     # Paths
     'BASELINE_PATHS', 'SUPPORTED_EXTENSIONS',
     # Thresholds
-    'WSTD_THRESHOLDS', 'VALIDATION_THRESHOLDS', 'VALIDATION_RMS_THRESHOLD',
+    'WSTD_THRESHOLDS', 'VALIDATION_THRESHOLDS', 'VALIDATION_RMS_THRESHOLD', 'ALIGNMENT_CONVERGENCE',
     'WHITE_REFERENCE_THRESHOLDS', 'DEFAULT_VALIDATION_THRESHOLDS',
     'CRITICAL_REGIONS', 'OFFSET_LIMITS', 'DIAGNOSTIC_STATUS', 'VALIDATION_STATUS',
     # Plotting
-    'PLOT_CONFIG', 'BUCHI_COLORS', 'PLOTLY_TEMPLATE',
+    'PLOT_CONFIG', 'BUCHI_COLORS', 'PLOTLY_TEMPLATE', 'PREVIEW_FIGURE_CACHE', 'SPECTRA_PREVIEW',
     # Messages
     'MESSAGES', 'INSTRUCTIONS', 'SPECIAL_IDS',
     # Reports
-    'REPORT_STYLE',
+    'REPORT_STYLE', 'REPORT_SECTION_STYLE_VERSION', 'REPORT_SECTION_CACHE', 'REPORT_SIDECAR',
     # Metadata
     'DEFAULT_CSV_METADATA', 'CONTROL_SAMPLES_CONFIG',
 ]
\ No newline at end of file
@@ -3,6 +3,8 @@
 Configuración general de la aplicación
 """
 
+import os
+
 # ============================================================================
 # CONFIGURACIÓN DE LA PÁGINA (STREAMLIT)
 # ============================================================================
@@ -25,6 +27,48 @@ STEPS = {
     5: "Alineamiento de Baseline",
 }
 
+# ============================================================================
+# CACHÉ DE DATASETS COMPARTIDA ENTRE SESIONES
+# ============================================================================
+
+SHARED_DATASET_CACHE = {
+    'enabled': True,               # False = cada sesión parsea sus propios archivos
+    'max_entries': 32,             # Datasets en memoria (los que usa alguna sesión no se expulsan)
+    'max_bytes': 1_000_000_000,    # ~1 GB entre todos los datasets en memoria
+}
+
+# ============================================================================
+# MEMORIA DE SESIÓN
+# ============================================================================
+
+SESSION_MEMORY = {
+    'budget_bytes': 768_000_000,   # Por encima, se liberan los objetos más fríos
+    'check_interval_s': 30,        # Frecuencia máxima de la comprobación (medir no es gratis)
+    'debug_panel': False,          # Panel en el sidebar (también con ?debug=1)
+    # Clave de session_state -> acción al superar el presupuesto:
+    #   'spill' = texto a fichero temporal, 'evict' = borrar (se recalcula),
+    #   'clear' = vaciar la caché (invalidate()/clear())
+    'policies': {
+        'validation_report_html': 'spill',   # Informe del paso 4 (solo para descargar)
+        'validation_results': 'evict',       # Offset Adjustment: se recalcula en Análisis Global
+        'offset_original_metrics': 'evict',  # Offset Adjustment: métricas sin offset reutilizables
+        'preview_figures': 'clear',          # Figuras cacheadas de TSV Validation Reports
+    },
+}
+
+# ============================================================================
+# HISTÓRICO DE DERIVA POR SENSOR
+# ============================================================================
+
+DRIFT_STORE = {
+    'enabled': True,               # False = no se guarda el histórico de las visitas
+    'path': os.environ.get(        # Un Parquet por sensor (compartido entre sesiones)
+        'COREF_DRIFT_STORE', os.path.join(os.path.expanduser('~'), '.coref', 'drift_store')
+    ),
+    'n_regions': 8,                # Regiones espectrales (bandas de canales) para la tendencia
+    'trend_min_records': 3,        # Registros mínimos para mostrar tendencia y previsión
+}
+
 # ============================================================================
 # INFORMACIÓN DE VERSIÓN
 # ============================================================================
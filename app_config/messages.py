@@ -214,6 +214,13 @@ Vuelve al Paso 4 para realizar la validación primero
     'alignment_validation_loaded': "✅ Datos de validación cargados (White ID: {white_id})",
     'alignment_apply_correction': "### 3️⃣ Aplicar Corrección al Baseline",
     'alignment_correction_applied': "✅ Corrección aplicada al baseline",
+    'alignment_first_iteration': "ℹ️ Primera iteración: se aplica la diferencia completa. Tras la siguiente medida se estimará la respuesta del equipo para proponer una corrección que converja en menos iteraciones.",
+    'alignment_proposal_info': """
+Con las iteraciones anteriores se estima la **ganancia de respuesta** del equipo por región de píxeles
+(cuánto cambia la medida del White Standard por unidad de corrección aplicada al baseline).
+La corrección propuesta compensa esa ganancia: amplía la corrección donde el equipo responde de menos
+y la amortigua donde se pasa.
+    """,
 
     'alignment_dimension_error': """
 ❌ Error de dimensiones:
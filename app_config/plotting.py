@@ -55,4 +55,20 @@ PLOTLY_TEMPLATE = {
         'plot_bgcolor': 'white',
         'paper_bgcolor': 'white',
     }
-}
\ No newline at end of file
+}
+# ============================================================================
+# CACHÉ DE FIGURAS DE PREVISUALIZACIÓN (TSV Validation Reports)
+# ============================================================================
+
+# Figuras base por sesión, indexadas por (archivo, versión de datos, filtro
+# visual, parámetro, ventana de píxeles).
+PREVIEW_FIGURE_CACHE = {
+    'max_entries': 8,
+}
+
+# Vista interactiva de espectros (Scattergl + decimación en servidor)
+SPECTRA_PREVIEW = {
+    'line_buckets': 200,          # Buckets min/max por línea (2 puntos por bucket)
+    'max_line_points': 200_000,   # Presupuesto total de puntos de línea (todas las muestras)
+    'min_line_buckets': 25,       # Resolución mínima por línea aunque se supere el presupuesto
+}
@@ -30,4 +30,28 @@ tr:nth-child(even) { background-color: #f2f2f2; }
 .tag-ok { background:#e8f5e9; color:#2e7d32; border:1px solid #c8e6c9; }
 .tag-no { background:#fff3e0; color:#e65100; border:1px solid #ffe0b2; }
 img { max-width: 100%; height: auto; margin: 20px 0; }
-"""
\ No newline at end of file
+"""
+# ============================================================================
+# CACHÉ DE SECCIONES DE INFORMES
+# ============================================================================
+
+# Incrementar al cambiar el HTML/estilos de cualquier sección cacheada:
+# invalida todos los fragmentos renderizados previamente.
+REPORT_SECTION_STYLE_VERSION = 1
+
+REPORT_SECTION_CACHE = {
+    'max_entries': 256,          # Fragmentos máximos en memoria
+    'max_chars': 64_000_000,     # ~64 MB de HTML (caracteres) en total
+}
+
+# ============================================================================
+# SIDECAR JSON DE INFORMES
+# ============================================================================
+
+# Bloque <script type="application/json"> con métricas, estados e info de
+# servicio que cada generador embebe en su informe (lo lee el consolidador).
+REPORT_SIDECAR = {
+    'element_id': 'coref-report-data',
+    'schema': 'coref-report',
+    'schema_version': 1,
+}
@@ -68,6 +68,14 @@ VALIDATION_STATUS = {
 # Umbral crítico para decidir si necesita alineamiento en Paso 4
 VALIDATION_RMS_THRESHOLD = 0.005
 
+# Corrección propuesta en el Paso 5 a partir de las iteraciones anteriores
+ALIGNMENT_CONVERGENCE = {
+    'n_regions': 8,              # Regiones de píxeles con ganancia de respuesta propia
+    'damping': 1.0,              # Fracción de la corrección estimada que se propone (< 1 = más prudente)
+    'prior_weight': 0.25,        # Peso de la ganancia nominal (1.0), en iteraciones medidas
+    'gain_limits': (0.5, 2.0),   # Ganancias fuera de rango se recortan (medidas ruidosas)
+}
+
 WHITE_REFERENCE_THRESHOLDS = {
     'excellent': {'rms': 0.002, 'max_diff': 0.005, 'color': '#4caf50'},
     'good': {'rms': 0.005, 'max_diff': 0.01, 'color': '#8bc34a'},
@@ -0,0 +1,214 @@
+"""
+COREF - Alignment Convergence
+=============================
+Acelera el bucle de alineamiento de baseline (Pasos 4 y 5): medir el White
+Standard, calcular la diferencia, corregir el .ref y volver a medir.
+
+Si aplicar una corrección ``c`` al baseline cambiara la medida exactamente en
+``c``, una sola iteración bastaría. En la práctica el equipo responde con una
+ganancia ``g`` distinta de 1 (y distinta según la zona del detector), y el
+residuo tras corregir con la diferencia completa es ``r (1 - g)``: con g < 1
+el residuo baja despacio, con g > 1 la corrección se pasa de largo.
+
+``AlignmentHistory`` guarda, por iteración, el residuo medido (diferencia del
+White Standard en el Paso 4) y la corrección aplicada (Paso 5). Con cada par
+residuo -> corrección -> residuo siguiente se estima la ganancia por región de
+píxeles (mínimos cuadrados, con la ganancia nominal 1 como prior), y la
+corrección propuesta es ``damping * r / g``: extrapola donde el equipo
+responde de menos y amortigua donde se pasa, de modo que el residuo previsto
+tras la siguiente medida es (1 - damping) r.
+
+Sin iteraciones previas la propuesta es la diferencia completa (el
+comportamiento de siempre).
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app_config import ALIGNMENT_CONVERGENCE
+from core.drift_store import region_starts
+
+
+def _rms(vector: np.ndarray) -> float:
+    return float(np.sqrt(np.mean(np.square(vector))))
+
+
+@dataclass
+class ResponseGain:
+    """
+    Ganancia de respuesta estimada por región de píxeles.
+
+    Attributes:
+        starts: Primer píxel de cada región
+        gain: Ganancia de cada región (1 = el equipo sigue la corrección)
+        n_pairs: Iteraciones medidas usadas en la estimación
+        n_channels: Píxeles del espectro
+    """
+    starts: np.ndarray
+    gain: np.ndarray
+    n_pairs: int
+    n_channels: int
+
+    def curve(self) -> np.ndarray:
+        """
+        Ganancia por píxel: interpolación lineal entre los centros de las
+        regiones (sin saltos en los límites).
+        """
+        ends = np.append(self.starts[1:], self.n_channels)
+        centers = (self.starts + ends - 1) / 2.0
+        return np.interp(np.arange(self.n_channels), centers, self.gain)
+
+    def to_frame(self) -> pd.DataFrame:
+        ends = np.append(self.starts[1:], self.n_channels)
+        return pd.DataFrame({
+            'Píxeles': [f"{s + 1}-{e}" for s, e in zip(self.starts, ends)],
+            'Ganancia': self.gain,
+        })
+
+
+def estimate_response_gain(corrections: np.ndarray, changes: np.ndarray,
+                           n_regions: Optional[int] = None,
+                           prior_weight: Optional[float] = None,
+                           gain_limits: Optional[Tuple[float, float]] = None) -> ResponseGain:
+    """
+    Estima la ganancia por región a partir de correcciones aplicadas y del
+    cambio de residuo que produjeron.
+
+    Por región, ``g = sum(c * dr) / sum(c * c)`` sobre todos sus píxeles e
+    iteraciones, combinada con la ganancia nominal 1 como si fuera
+    ``prior_weight`` iteraciones más, y recortada a ``gain_limits``.
+
+    Args:
+        corrections: Correcciones aplicadas (iteraciones x píxeles)
+        changes: Residuo antes - residuo después (mismo tamaño)
+        n_regions: Regiones de píxeles (por defecto, ``ALIGNMENT_CONVERGENCE``)
+        prior_weight: Peso de la ganancia nominal
+        gain_limits: (mínima, máxima)
+
+    Returns:
+        ResponseGain
+    """
+    config = ALIGNMENT_CONVERGENCE
+    n_regions = n_regions or config['n_regions']
+    prior_weight = config['prior_weight'] if prior_weight is None else prior_weight
+    low, high = gain_limits or config['gain_limits']
+
+    corrections = np.atleast_2d(np.asarray(corrections, dtype=np.float64))
+    changes = np.atleast_2d(np.asarray(changes, dtype=np.float64))
+    n_pairs, n_channels = corrections.shape
+    starts = region_starts(n_channels, min(n_regions, n_channels))
+
+    if n_pairs == 0:
+        return ResponseGain(starts, np.ones(len(starts)), 0, n_channels)
+
+    s_cd = np.add.reduceat((corrections * changes).sum(axis=0), starts)
+    s_cc = np.add.reduceat((corrections * corrections).sum(axis=0), starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        measured = np.where(s_cc > 0, s_cd / s_cc, 1.0)
+    gain = (n_pairs * measured + prior_weight) / (n_pairs + prior_weight)
+    return ResponseGain(starts, np.clip(gain, low, high), n_pairs, n_channels)
+
+
+def propose_correction(residual: np.ndarray, gain: ResponseGain,
+                       damping: Optional[float] = None) -> np.ndarray:
+    """
+    Corrección que, con la ganancia estimada, deja un residuo previsto de
+    ``(1 - damping) * residual``.
+    """
+    damping = ALIGNMENT_CONVERGENCE['damping'] if damping is None else damping
+    return damping * np.asarray(residual, dtype=np.float64) / gain.curve()
+
+
+def predicted_residual(residual: np.ndarray, correction: np.ndarray, gain: ResponseGain) -> np.ndarray:
+    """Residuo previsto tras aplicar ``correction`` y volver a medir."""
+    return np.asarray(residual, dtype=np.float64) - gain.curve() * correction
+
+
+class AlignmentHistory:
+    """
+    Residuos medidos y correcciones aplicadas en las iteraciones de
+    alineamiento de una visita.
+
+    La iteración ``k`` es la del contador ``alignment_iterations``: el residuo
+    ``k`` se mide en el Paso 4 y la corrección ``k`` se aplica en el Paso 5
+    a partir de él; su efecto se ve en el residuo ``k + 1``.
+    """
+
+    def __init__(self):
+        self.residuals: Dict[int, np.ndarray] = {}
+        self.corrections: Dict[int, np.ndarray] = {}
+        self.white_id = None
+
+    def clear(self) -> None:
+        self.residuals.clear()
+        self.corrections.clear()
+        self.white_id = None
+
+    @property
+    def n_channels(self) -> Optional[int]:
+        first = next(iter(self.residuals.values()), None)
+        return None if first is None else len(first)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(v.nbytes for v in self.residuals.values()) + \
+            sum(v.nbytes for v in self.corrections.values())
+
+    def add_residual(self, iteration: int, residual, white_id=None) -> None:
+        """
+        Guarda el residuo medido en una iteración. Medir de nuevo una
+        iteración descarta las posteriores; cambiar de White Standard o de
+        número de píxeles empieza un histórico nuevo.
+        """
+        residual = np.asarray(residual, dtype=np.float64).ravel()
+        if self.residuals and (len(residual) != self.n_channels or white_id != self.white_id):
+            self.clear()
+        iteration = int(iteration)
+        for store in (self.residuals, self.corrections):
+            for k in [k for k in store if k > iteration]:
+                del store[k]
+        self.white_id = white_id
+        self.residuals[iteration] = residual
+
+    def add_correction(self, iteration: int, correction) -> None:
+        """Guarda la corrección aplicada al baseline en una iteración."""
+        correction = np.asarray(correction, dtype=np.float64).ravel()
+        if len(correction) == self.n_channels:
+            self.corrections[int(iteration)] = correction
+
+    def pairs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Correcciones con efecto ya medido y el cambio de residuo que
+        produjeron (iteraciones x píxeles).
+        """
+        ks = sorted(k for k in self.corrections
+                    if k in self.residuals and k + 1 in self.residuals)
+        n = self.n_channels or 0
+        if not ks:
+            return np.empty((0, n)), np.empty((0, n))
+        corrections = np.stack([self.corrections[k] for k in ks])
+        changes = np.stack([self.residuals[k] - self.residuals[k + 1] for k in ks])
+        return corrections, changes
+
+    def estimate_gain(self, **kwargs) -> ResponseGain:
+        return estimate_response_gain(*self.pairs(), **kwargs)
+
+    def summary(self) -> pd.DataFrame:
+        """Tabla por iteración: RMS del residuo, de la corrección y reducción obtenida."""
+        rows = []
+        for k in sorted(self.residuals):
+            rms = _rms(self.residuals[k])
+            correction = self.corrections.get(k)
+            following = self.residuals.get(k + 1)
+            rows.append({
+                'Iteración': k,
+                'RMS residuo': rms,
+                'RMS corrección': np.nan if correction is None else _rms(correction),
+                'RMS siguiente / actual': (np.nan if following is None or rms == 0
+                                           else _rms(following) / rms),
+            })
+        return pd.DataFrame(rows, columns=['Iteración', 'RMS residuo', 'RMS corrección',
+                                           'RMS siguiente / actual'])
@@ -0,0 +1,149 @@
+"""
+COREF - Shared Dataset Cache
+============================
+Caché de datasets parseados a nivel de proceso, compartida por todas las
+sesiones de Streamlit del servidor.
+
+Las sesiones de Streamlit son hilos del mismo proceso: varios técnicos que
+abren el mismo kit de referencia o el mismo journal comparten un único
+DataFrame parseado en lugar de guardar una copia por sesión.
+
+- Clave: handle de contenido (``core.spectral_workspace.content_handle``)
+- Conteo de referencias: cada workspace de sesión que usa un dataset lo
+  adquiere y lo libera al quitarlo o al cerrarse la sesión
+- Expulsión LRU solo de datasets sin referencias, por número y por bytes
+
+Los datasets compartidos son de solo lectura: las páginas trabajan con
+vistas (ver ``WorkspaceDataset.view``).
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app_config import SHARED_DATASET_CACHE
+
+
+@dataclass
+class _Entry:
+    value: Any
+    nbytes: int
+    refs: int = 0
+
+
+class SharedDatasetCache:
+    """
+    Caché LRU con conteo de referencias, segura entre hilos.
+
+    Args:
+        max_entries: Datasets en memoria como máximo
+        max_bytes: Tamaño total aproximado como máximo
+
+    Los datasets con referencias nunca se expulsan (los está usando alguna
+    sesión: liberarlos no ahorraría memoria), así que ambos límites pueden
+    superarse temporalmente.
+    """
+
+    def __init__(self, max_entries: int = 32, max_bytes: int = 1_000_000_000):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self._loading: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def acquire(self, key: str, load: Callable[[], Tuple[Any, int]]) -> Any:
+        """
+        Devuelve el dataset de ``key`` y suma una referencia; si no está, lo
+        carga con ``load`` (una sola vez aunque lo pidan varias sesiones a la vez).
+
+        Args:
+            key: Handle de contenido
+            load: Función sin argumentos que devuelve (valor, bytes)
+
+        Returns:
+            Valor cacheado
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refs += 1
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.value
+                pending = self._loading.get(key)
+                if pending is None:
+                    pending = self._loading[key] = threading.Event()
+                    break
+            # Otra sesión está parseando el mismo contenido: esperar y reintentar
+            pending.wait()
+
+        try:
+            value, nbytes = load()
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = _Entry(value, nbytes, refs=1)
+                self._bytes += nbytes
+                self._evict_locked()
+            return value
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            pending.set()
+
+    def release(self, key: str) -> None:
+        """Resta una referencia; el dataset queda candidato a expulsión en 0."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refs = max(0, entry.refs - 1)
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_entries and self._bytes <= self.max_bytes:
+                return
+            entry = self._entries[key]
+            if entry.refs == 0:
+                del self._entries[key]
+                self._bytes -= entry.nbytes
+
+    def clear(self) -> None:
+        """Descarta los datasets sin referencias."""
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e.refs == 0]:
+                self._bytes -= self._entries.pop(key).nbytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'referenced': sum(1 for e in self._entries.values() if e.refs),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_shared_cache: Optional[SharedDatasetCache] = None
+if SHARED_DATASET_CACHE.get('enabled', False):
+    _shared_cache = SharedDatasetCache(
+        max_entries=SHARED_DATASET_CACHE['max_entries'],
+        max_bytes=SHARED_DATASET_CACHE['max_bytes'],
+    )
+
+
+def get_shared_dataset_cache() -> Optional[SharedDatasetCache]:
+    """Caché compartida del proceso, o None si está desactivada."""
+    return _shared_cache
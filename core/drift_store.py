@@ -0,0 +1,409 @@
+"""
+COREF - Drift Store
+===================
+Histórico por sensor de las correcciones y diagnósticos de cada visita, para
+seguir la deriva del equipo entre servicios y anticipar cambios de lámpara.
+
+Cada registro es un vector espectral con su contexto:
+
+- ``wstd``: External White medido en el diagnóstico inicial (Paso 3)
+- ``validation``: diferencia del White Standard en la validación (Paso 4),
+  una por iteración
+- ``correction``: corrección aplicada a la baseline (Paso 5)
+- ``baseline``: baselines históricas importadas (``core.ref_baselines``)
+
+Almacenamiento columnar: un Parquet por sensor (pyarrow) con una fila por
+registro. Además del vector completo se guardan sus agregados (RMS, máximo
+absoluto, media) y la media por región espectral (``DRIFT_STORE['n_regions']``
+bandas contiguas de canales, comparables entre sensores con distinto número
+de píxeles). Las consultas de tendencia leen solo esas columnas.
+
+Consultas:
+
+- ``region_drift``: serie temporal de la media por región
+- ``trend``: regresión lineal frente al tiempo (pendiente por día) de todas
+  las columnas pedidas a la vez
+- ``time_to_threshold``: días estimados hasta cruzar un umbral, por sensor,
+  para toda la flota en una sola pasada agrupada
+"""
+
+import hashlib
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app_config import DRIFT_STORE
+
+KINDS = ('wstd', 'validation', 'correction', 'baseline')
+METRIC_COLUMNS = ['rms', 'max_abs', 'mean']
+
+_BASE_COLUMNS = ['sensor', 'timestamp', 'kind', 'label', 'iteration', 'key', 'n_channels']
+_SECONDS_PER_DAY = 86400.0
+
+
+def region_columns(n_regions: int) -> List[str]:
+    return [f'region_{i + 1}' for i in range(n_regions)]
+
+
+def region_starts(n_channels: int, n_regions: int) -> np.ndarray:
+    """Primer canal de cada región (bandas contiguas de tamaño casi igual)."""
+    return np.linspace(0, n_channels, n_regions + 1).astype(np.intp)[:-1]
+
+
+def _summaries(vectors: np.ndarray, n_channels: np.ndarray, n_regions: int) -> pd.DataFrame:
+    """
+    Agregados de cada vector (filas de ``vectors``, NaN a la derecha de
+    ``n_channels``): RMS, máximo absoluto, media y media por región.
+    """
+    with np.errstate(invalid='ignore'):
+        out = {
+            'rms': np.sqrt(np.nanmean(vectors ** 2, axis=1)),
+            'max_abs': np.nanmax(np.abs(vectors), axis=1),
+            'mean': np.nanmean(vectors, axis=1),
+        }
+    regions = np.full((len(vectors), n_regions), np.nan)
+    # Las filas con la misma longitud comparten los límites de región
+    for n in np.unique(n_channels):
+        rows = np.flatnonzero(n_channels == n)
+        starts = region_starts(int(n), n_regions)
+        sums = np.add.reduceat(vectors[rows, :n], starts, axis=1)
+        regions[rows] = sums / np.diff(np.append(starts, n))
+    out.update(zip(region_columns(n_regions), regions.T))
+    return pd.DataFrame(out)
+
+
+def _iteration(iteration) -> Optional[int]:
+    return None if iteration is None or pd.isna(iteration) else int(iteration)
+
+
+def record_key(sensor: str, kind: str, label: str, iteration, vector) -> str:
+    """Huella de un registro (evita duplicados al re-ejecutar la página)."""
+    h = hashlib.blake2b(digest_size=12)
+    h.update(repr((str(sensor), kind, str(label), _iteration(iteration))).encode())
+    h.update(np.ascontiguousarray(vector, dtype=np.float32).tobytes())
+    return h.hexdigest()
+
+
+def visit_key(sensor: str, kind: str, visit: str, iteration) -> str:
+    """Clave de un registro por visita e iteración (uno solo, el último)."""
+    h = hashlib.blake2b(digest_size=12)
+    h.update(repr(('visit', str(sensor), kind, str(visit), _iteration(iteration))).encode())
+    return h.hexdigest()
+
+
+def _fit_lines(t: np.ndarray, y: np.ndarray, groups: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Recta por mínimos cuadrados de cada columna de ``y`` frente a ``t`` (días),
+    por grupo si se indica (sumas agrupadas, sin bucle por grupo).
+
+    El tiempo se mide desde el primer registro de cada grupo (``t0``): con
+    días desde 1970 (~20000) las sumas de cuadrados pierden la precisión de
+    registros separados por minutos. ``intercept`` es el valor en ``t0`` y
+    ``span`` los días hasta el último registro del grupo.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    if y.ndim == 1:
+        y = y[:, None]
+    groups = np.zeros(len(t), dtype=np.intp) if groups is None else groups
+    n_groups = int(groups.max()) + 1 if len(groups) else 0
+
+    t0 = np.full(n_groups, np.inf)
+    np.minimum.at(t0, groups, t)
+    t = t - t0[groups]
+    span = np.zeros(n_groups)
+    np.maximum.at(span, groups, t)
+
+    valid = ~np.isnan(y)
+    tv = np.where(valid, t[:, None], 0.0)
+    yv = np.where(valid, y, 0.0)
+
+    def group_sum(values):
+        out = np.zeros((n_groups, values.shape[1]))
+        np.add.at(out, groups, values)
+        return out
+
+    n = group_sum(valid.astype(np.float64))
+    st, sy = group_sum(tv), group_sum(yv)
+    stt, sty, syy = group_sum(tv * tv), group_sum(tv * yv), group_sum(yv * yv)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var_t = stt - st * st / n
+        cov = sty - st * sy / n
+        var_y = syy - sy * sy / n
+        slope = np.where(var_t > 0, cov / var_t, np.nan)
+        intercept = (sy - slope * st) / n
+        r2 = np.where((var_t > 0) & (var_y > 0), cov * cov / (var_t * var_y), np.nan)
+    return {'n': n, 'slope': slope, 'intercept': intercept, 'r2': r2, 't0': t0, 'span': span}
+
+
+class DriftStore:
+    """
+    Histórico columnar de deriva por sensor.
+
+    Args:
+        path: Directorio de los Parquet (se crea al escribir)
+        n_regions: Número de regiones espectrales
+    """
+
+    def __init__(self, path: str, n_regions: int = 8):
+        self.path = path
+        self.n_regions = n_regions
+        self.regions = region_columns(n_regions)
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def _file(self, sensor: str) -> str:
+        safe = re.sub(r'[^\w.-]+', '_', str(sensor)).strip('._') or 'sensor'
+        return os.path.join(self.path, f'{safe}.parquet')
+
+    def _append(self, sensor: str, rows: pd.DataFrame, replace: bool = False) -> int:
+        """
+        Añade filas nuevas (por ``key``) al Parquet del sensor; con
+        ``replace``, las filas con la misma ``key`` sustituyen a las guardadas.
+        """
+        path = self._file(sensor)
+        with self._lock:
+            existing = pd.read_parquet(path) if os.path.exists(path) else None
+            if existing is not None and replace:
+                existing = existing[~existing['key'].isin(rows['key'])]
+            elif existing is not None:
+                rows = rows[~rows['key'].isin(existing['key'])]
+            rows = rows.drop_duplicates('key')
+            if rows.empty:
+                return 0
+            table = rows if existing is None else pd.concat([existing, rows], ignore_index=True)
+            os.makedirs(self.path, exist_ok=True)
+            tmp = f'{path}.tmp'
+            table.sort_values('timestamp', kind='stable').to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+        return len(rows)
+
+    def _rows(self, sensor: str, kind: str, vectors: np.ndarray, n_channels: np.ndarray,
+              timestamps, labels: Sequence[str], iterations: Sequence,
+              keys: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        if kind not in KINDS:
+            raise ValueError(f"Tipo de registro desconocido: {kind}")
+        vectors = np.asarray(vectors, dtype=np.float64)
+        rows = pd.DataFrame({
+            'sensor': str(sensor),
+            'timestamp': pd.to_datetime(pd.Series(timestamps)).astype('datetime64[us]'),
+            'kind': kind,
+            'label': [str(label) for label in labels],
+            'iteration': pd.array(list(iterations), dtype='Int64'),
+            'key': list(keys) if keys is not None else [
+                record_key(sensor, kind, label, iteration, vectors[i, :n_channels[i]])
+                for i, (label, iteration) in enumerate(zip(labels, iterations))
+            ],
+            'n_channels': n_channels.astype(np.int32),
+        })
+        rows = pd.concat([rows, _summaries(vectors, n_channels, self.n_regions)], axis=1)
+        rows['vector'] = [vectors[i, :n_channels[i]].astype(np.float32) for i in range(len(vectors))]
+        return rows
+
+    def record(self, sensor: str, kind: str, vector, label: str = '', iteration: Optional[int] = None,
+               timestamp: Optional[datetime] = None, visit: Optional[str] = None) -> bool:
+        """
+        Guarda un vector de la visita actual.
+
+        Args:
+            sensor: Número de serie
+            kind: Tipo de registro (ver ``KINDS``)
+            vector: Vector espectral (corrección, diferencia, medida...)
+            label: Etiqueta libre (ID del White Standard, lámpara...)
+            iteration: Iteración de alineamiento, si aplica
+            timestamp: Momento del registro (por defecto, ahora)
+            visit: Identificador de la visita. Con él se guarda un solo
+                registro por (tipo, visita, iteración): guardar de nuevo
+                sustituye al anterior (p. ej. si se cambia el White Standard)
+
+        Returns:
+            bool: False si ya existía un registro idéntico
+        """
+        vector = np.asarray(vector, dtype=np.float64).ravel()
+        keys = None if visit is None else [visit_key(sensor, kind, visit, iteration)]
+        rows = self._rows(
+            sensor, kind, vector[None, :], np.array([len(vector)]),
+            [timestamp or datetime.now()], [label], [iteration], keys=keys,
+        )
+        return self._append(sensor, rows, replace=visit is not None) > 0
+
+    def import_baselines(self, stack) -> int:
+        """
+        Importa baselines históricas (``core.ref_baselines.BaselineStack``)
+        como registros ``baseline`` de sus sensores.
+
+        Returns:
+            int: Registros nuevos
+        """
+        catalog = stack.catalog
+        added = 0
+        for sensor, rows in catalog[catalog['sensor'].notna()].groupby('sensor', sort=False).indices.items():
+            sub = catalog.iloc[rows]
+            labels = [f"L{lamp} {label}".strip() for lamp, label in zip(sub['lamp'], sub['label'])]
+            added += self._append(sensor, self._rows(
+                sensor, 'baseline', stack.spectra[rows], sub['n_channels'].to_numpy(),
+                sub['date'].to_numpy(), labels, [None] * len(rows),
+            ))
+        return added
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def sensors(self) -> List[str]:
+        if not os.path.isdir(self.path):
+            return []
+        files = sorted(f for f in os.listdir(self.path) if f.endswith('.parquet'))
+        return [pd.read_parquet(os.path.join(self.path, f), columns=['sensor'])['sensor'].iat[0]
+                for f in files]
+
+    def table(self, sensors: Optional[Iterable[str]] = None, kinds: Optional[Iterable[str]] = None,
+              columns: Optional[List[str]] = None, with_vectors: bool = False,
+              iteration: Optional[int] = None) -> pd.DataFrame:
+        """
+        Registros de uno o varios sensores (todos por defecto).
+
+        Sin ``with_vectors`` solo se leen las columnas escalares (contexto,
+        métricas y regiones), no los vectores completos. ``iteration`` filtra
+        una iteración de alineamiento (0 = estado encontrado en cada visita).
+        """
+        if sensors is None:
+            paths = [os.path.join(self.path, f) for f in sorted(os.listdir(self.path))
+                     if f.endswith('.parquet')] if os.path.isdir(self.path) else []
+        else:
+            paths = [p for p in map(self._file, sensors) if os.path.exists(p)]
+
+        scalar = _BASE_COLUMNS + METRIC_COLUMNS + self.regions
+        wanted = list(columns) if columns is not None else scalar + (['vector'] if with_vectors else [])
+        for col in ('sensor', 'timestamp', 'kind'):
+            if col not in wanted:
+                wanted.append(col)
+        if not paths:
+            return pd.DataFrame(columns=wanted)
+
+        filters = []
+        if kinds is not None:
+            filters.append(('kind', 'in', list(kinds)))
+        if iteration is not None:
+            filters.append(('iteration', '==', int(iteration)))
+        frames = [pd.read_parquet(p, columns=wanted, filters=filters or None) for p in paths]
+        table = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        return table.sort_values(['sensor', 'timestamp'], kind='stable', ignore_index=True)
+
+    def region_drift(self, sensor: str, kind: str = 'correction', relative: bool = False,
+                     iteration: Optional[int] = None) -> pd.DataFrame:
+        """
+        Media por región espectral de cada registro, en orden temporal.
+
+        Args:
+            sensor: Número de serie
+            kind: Tipo de registro
+            relative: Restar el primer registro (deriva acumulada; útil para
+                ``wstd`` y ``baseline``, que son niveles y no diferencias)
+            iteration: Solo esta iteración de alineamiento
+
+        Returns:
+            DataFrame (índice = timestamp, columnas = regiones)
+        """
+        table = self.table([sensor], [kind], columns=['timestamp'] + self.regions, iteration=iteration)
+        drift = table.set_index('timestamp')[self.regions]
+        if relative and len(drift):
+            drift = drift - drift.iloc[0]
+        return drift
+
+    def trend(self, sensor: str, kind: str = 'validation', columns: Optional[List[str]] = None,
+              iteration: Optional[int] = None) -> pd.DataFrame:
+        """
+        Tendencia lineal de métricas y regiones frente al tiempo.
+
+        Returns:
+            DataFrame (una fila por columna): n, slope_per_day, r2, last
+            (valor ajustado en el último registro) y forecast_30d
+        """
+        columns = columns or METRIC_COLUMNS + self.regions
+        table = self.table([sensor], [kind], columns=['timestamp'] + columns, iteration=iteration)
+        if table.empty:
+            return pd.DataFrame(columns=['n', 'slope_per_day', 'r2', 'last', 'forecast_30d'])
+
+        t = _days(table['timestamp'])
+        fit = _fit_lines(t, table[columns].to_numpy())
+        last = fit['intercept'][0] + fit['slope'][0] * fit['span'][0]
+        return pd.DataFrame({
+            'n': fit['n'][0].astype(int),
+            'slope_per_day': fit['slope'][0],
+            'r2': fit['r2'][0],
+            'last': last,
+            'forecast_30d': last + 30 * fit['slope'][0],
+        }, index=pd.Index(columns, name='column'))
+
+    def time_to_threshold(self, threshold: float, kind: str = 'validation', column: str = 'rms',
+                          sensors: Optional[Iterable[str]] = None, absolute: bool = True,
+                          iteration: Optional[int] = None) -> pd.DataFrame:
+        """
+        Días estimados hasta que ``column`` cruce ``threshold``, por sensor.
+
+        La tendencia se ajusta con todos los registros de cada sensor a la vez
+        (sumas agrupadas). Sensores con menos de 2 registros, o cuya tendencia
+        no se acerca al umbral, quedan con ``days`` = NaN.
+
+        Args:
+            threshold: Umbral (p. ej. ``VALIDATION_RMS_THRESHOLD``)
+            kind: Tipo de registro
+            column: Métrica o región
+            sensors: Sensores a evaluar (toda la flota por defecto)
+            absolute: Comparar el valor absoluto (regiones y medias con signo)
+            iteration: Solo esta iteración de alineamiento (0 = estado
+                encontrado, antes de corregir)
+
+        Returns:
+            DataFrame (índice = sensor): n, last_timestamp, current, slope_per_day,
+            days, eta
+        """
+        table = self.table(sensors, [kind], columns=['timestamp', column], iteration=iteration)
+        out_columns = ['n', 'last_timestamp', 'current', 'slope_per_day', 'days', 'eta']
+        if table.empty:
+            return pd.DataFrame(columns=out_columns)
+
+        codes, sensor_names = pd.factorize(table['sensor'])
+        t = _days(table['timestamp'])
+        y = table[column].to_numpy(dtype=np.float64)
+        if absolute:
+            y = np.abs(y)
+        fit = _fit_lines(t, y, groups=codes)
+        slope, intercept = fit['slope'][:, 0], fit['intercept'][:, 0]
+
+        current = intercept + slope * fit['span']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            days = np.where(current >= threshold, 0.0,
+                            np.where(slope > 0, (threshold - current) / slope, np.nan))
+        last_ts = pd.to_datetime(np.round((fit['t0'] + fit['span']) * _SECONDS_PER_DAY), unit='s')
+        return pd.DataFrame({
+            'n': fit['n'][:, 0].astype(int),
+            'last_timestamp': last_ts,
+            'current': current,
+            'slope_per_day': slope,
+            'days': days,
+            'eta': (last_ts + pd.to_timedelta(days, unit='D')).floor('min'),
+        }, index=pd.Index(sensor_names, name='sensor'), columns=out_columns)
+
+
+def _days(timestamps: pd.Series) -> np.ndarray:
+    """Timestamps como días (float) desde la época."""
+    return timestamps.to_numpy(dtype='datetime64[s]').astype(np.int64) / _SECONDS_PER_DAY
+
+
+_drift_store: Optional[DriftStore] = None
+if DRIFT_STORE.get('enabled', False):
+    _drift_store = DriftStore(DRIFT_STORE['path'], n_regions=DRIFT_STORE['n_regions'])
+
+
+def get_drift_store() -> Optional[DriftStore]:
+    """Histórico de deriva del proceso, o None si está desactivado."""
+    return _drift_store
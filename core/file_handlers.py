@@ -5,6 +5,7 @@ import pandas as pd
 import numpy as np
 import io
 import json
+import warnings
 from datetime import datetime
 from typing import List, Optional, Tuple
 from app_config import DEFAULT_CSV_METADATA
@@ -379,25 +380,7 @@ def load_csv_baseline(file):
                y spectrum es el array de datos espectrales de la última línea
     """
     try:
-        # Leer bytes primero (mejor para iOS)
-        file.seek(0)
-        raw_content = file.read()
-        
-        # Convertir a string si es necesario
-        if isinstance(raw_content, bytes):
-            # Probar UTF-8 primero, luego latin-1
-            try:
-                content = raw_content.decode('utf-8')
-            except UnicodeDecodeError:
-                content = raw_content.decode('latin-1')
-        else:
-            content = raw_content
-        
-        # Leer CSV desde string
-        df = pd.read_csv(io.StringIO(content))
-        
-        if 'data' not in df.columns:
-            raise ValueError("El archivo CSV no tiene la columna 'data'")
+        df = _read_baseline_csv(file)
         
         # Leer la ÚLTIMA línea (baseline más reciente)
         data_string = df['data'].iloc[-1]
@@ -409,6 +392,129 @@ def load_csv_baseline(file):
         raise ValueError(f"Error al cargar CSV baseline: {e}")
 
 
+def _read_baseline_csv(file):
+    """CSV de baseline completo (columna 'data' sin convertir)."""
+    # Leer bytes primero (mejor para iOS)
+    file.seek(0)
+    raw_content = file.read()
+    
+    # Convertir a string si es necesario
+    if isinstance(raw_content, bytes):
+        # Probar UTF-8 primero, luego latin-1
+        try:
+            content = raw_content.decode('utf-8')
+        except UnicodeDecodeError:
+            content = raw_content.decode('latin-1')
+    else:
+        content = raw_content
+    
+    # Leer CSV desde string
+    df = pd.read_csv(io.StringIO(content))
+    
+    if 'data' not in df.columns:
+        raise ValueError("El archivo CSV no tiene la columna 'data'")
+    return df
+
+
+def _read_baseline_rows(text, width):
+    """
+    Lector C de pandas para las filas de 'data' que ``np.fromstring`` no
+    convierte (valores no numéricos, texto no ASCII). Completa las filas
+    cortas con NaN (``names`` fija el ancho).
+    """
+    matrix = pd.read_csv(io.StringIO('\n'.join(text) + '\n'), header=None, names=range(width),
+                         float_precision='round_trip', skip_blank_lines=False)
+    return matrix.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+
+
+def parse_baseline_data(data):
+    """
+    Convierte la columna 'data' de un CSV de baseline (arrays JSON
+    '[a, b, ...]') en una matriz en una sola pasada.
+    
+    Los textos no vacíos se unen en un solo bloque separado por comas que
+    convierte ``np.fromstring`` (conversión exacta, igual que json.loads).
+    Los campos de cada fila se cuentan con las posiciones de las comas del
+    bloque, sin recorrer las filas en Python; con eso cada valor se coloca en
+    su fila, y las filas cortas o vacías quedan completadas con NaN. Si algún
+    valor no es numérico ('null'...) o hay texto no ASCII, se usa el lector C
+    de pandas.
+    
+    Args:
+        data (pd.Series): Columna 'data'
+        
+    Returns:
+        np.array: Matriz float64 (filas x píxeles); las filas más cortas se
+                  completan con NaN
+    """
+    text = data.fillna('').astype(str).str.strip().str.strip('[]').str.strip()
+    filled = (text != '').to_numpy()
+    rows = text[filled]
+    if len(rows) == 0:
+        return np.empty((len(text), 0))
+    
+    block = ','.join(rows)
+    try:
+        raw = np.frombuffer(block.encode('ascii'), dtype=np.uint8)
+    except UnicodeEncodeError:
+        # Texto no ASCII: sin conversión rápida, directamente el lector C
+        n_fields = rows.str.count(',').to_numpy() + 1
+        return _read_baseline_rows(text, int(n_fields.max()))
+    
+    # Campos por fila: comas dentro del tramo de cada fila en el bloque
+    lengths = rows.str.len().to_numpy()
+    starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+    commas = np.flatnonzero(raw == ord(','))
+    n_fields = np.searchsorted(commas, starts + lengths) - np.searchsorted(commas, starts) + 1
+    width = int(n_fields.max())
+    
+    try:
+        with warnings.catch_warnings():
+            # Un token no numérico detiene la conversión (aviso o ValueError según numpy)
+            warnings.simplefilter('ignore', DeprecationWarning)
+            values = np.fromstring(block, sep=',')
+    except ValueError:
+        values = None
+    
+    if values is None or len(values) != n_fields.sum():
+        return _read_baseline_rows(text, width)
+    
+    matrix = np.full((len(text), width), np.nan)
+    if (n_fields == width).all():
+        matrix[filled] = values.reshape(len(rows), width)
+    else:
+        row_index = np.repeat(np.flatnonzero(filled), n_fields)
+        offsets = np.repeat(np.cumsum(n_fields) - n_fields, n_fields)
+        matrix[row_index, np.arange(len(values)) - offsets] = values
+    return matrix
+
+
+def load_csv_baseline_history(file):
+    """
+    Carga el historial completo de un CSV de baseline (todas las líneas).
+    Compatible con iOS.
+    
+    Args:
+        file: Archivo subido por Streamlit
+        
+    Returns:
+        tuple: (df, spectra) donde df son los metadatos de cada línea (sin
+               'data', con 'time_stamp' como fecha) y spectra la matriz
+               (líneas x píxeles) en el mismo orden
+    """
+    try:
+        df = _read_baseline_csv(file)
+        spectra = parse_baseline_data(df['data'])
+        
+        meta = df.drop(columns=['data'])
+        if 'time_stamp' in meta.columns:
+            meta['time_stamp'] = pd.to_datetime(meta['time_stamp'], errors='coerce')
+        return meta, spectra
+        
+    except Exception as e:
+        raise ValueError(f"Error al cargar historial CSV baseline: {e}")
+
+
 def export_ref_file(spectrum, header):
     """
     Exporta un espectro como archivo .ref binario.
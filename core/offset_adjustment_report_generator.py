@@ -22,10 +22,23 @@ from core.report_utils import (
     evaluate_offset,
     format_change,
     generate_service_info_section,
+    service_info_rows,
+    generate_report_sidecar,
     generate_footer,
     start_html_template,
     calculate_global_metrics
 )
+from core.report_writer import ReportWriter
+from core.report_cache import cached_section
+
+
+def _correction_status(reduction_max, reduction_rms, global_offset_sim):
+    """Evaluación global del ajuste de offset (título del resumen ejecutivo)."""
+    if reduction_max > 0 and reduction_rms > 0 and abs(global_offset_sim) < 0.003:
+        return "✅ CORRECCIÓN EXCELENTE"
+    if reduction_max > 0 and reduction_rms > 0:
+        return "✅ MEJORA SIGNIFICATIVA"
+    return "⚠️ REQUIERE REVISIÓN"
 
 
 def generate_executive_summary(report_data):
@@ -74,8 +87,8 @@ def generate_executive_summary(report_data):
     """
     
     # Evaluación de la corrección
-    if reduction_max > 0 and reduction_rms > 0 and abs(global_offset_sim) < 0.003:
-        status = "✅ CORRECCIÓN EXCELENTE"
+    status = _correction_status(reduction_max, reduction_rms, global_offset_sim)
+    if status == "✅ CORRECCIÓN EXCELENTE":
         status_class = "success-box"
         explanation = f"""
             <p><strong>El ajuste de offset ha sido exitoso.</strong></p>
@@ -86,8 +99,7 @@ def generate_executive_summary(report_data):
             </ul>
             <p>El equipo está correctamente ajustado y listo para operación.</p>
         """
-    elif reduction_max > 0 and reduction_rms > 0:
-        status = "✅ MEJORA SIGNIFICATIVA"
+    elif status == "✅ MEJORA SIGNIFICATIVA":
         status_class = "success-box"
         explanation = f"""
             <p><strong>El ajuste de offset ha mejorado las métricas del equipo.</strong></p>
@@ -99,7 +111,6 @@ def generate_executive_summary(report_data):
             <p>Se recomienda validar con mediciones reales de los estándares usando el baseline ajustado.</p>
         """
     else:
-        status = "⚠️ REQUIERE REVISIÓN"
         status_class = "warning-box"
         explanation = f"""
             <p><strong>El offset aplicado no mejora consistentemente las métricas.</strong></p>
@@ -202,7 +213,7 @@ def generate_metrics_comparison(report_data):
     metrics_orig = calculate_global_metrics(validation_data_orig)
     metrics_sim = calculate_global_metrics(validation_data_sim)
     
-    html = f"""
+    html = ReportWriter(f"""
         <div class="info-box" id="comparacion-metricas">
             <h2>Comparación de Métricas: Original vs Simulado</h2>
             <p class="text-caption description-bottom-margin">
@@ -219,7 +230,7 @@ def generate_metrics_comparison(report_data):
                     <th>Desv. Est. Simulado</th>
                     <th>Cambio</th>
                 </tr>
-    """
+    """)
     
     # Usar formato_change para formatear cambios
     delta_corr = metrics_sim['corr_mean'] - metrics_orig['corr_mean']
@@ -391,14 +402,14 @@ def generate_global_overlay_plot(report_data):
     chart_html = fig.to_html(include_plotlyjs='cdn', div_id='global_overlay',
                              config={'displayModeBar': True, 'responsive': True})
     
-    html = """
+    html = ReportWriter("""
         <div class="info-box" id="vista-global">
             <h2>Vista Global de Espectros</h2>
             <p class="text-caption">
                 <em>Comparación simultánea de todos los espectros. Líneas sólidas: referencia (azul). 
                 Líneas discontinuas: actual sin offset (rojo). Líneas punteadas: actual con offset aplicado (verde).</em>
             </p>
-    """
+    """)
     html += wrap_chart_in_expandable(chart_html, "Ver comparación global de espectros (3 estados)",
                                      "global_overlay_expandable", default_open=False)
     html += "</div>"
@@ -415,7 +426,7 @@ def generate_baseline_adjustment_section(report_data):
     orig_mean = np.mean(baseline_original)
     adj_mean = np.mean(baseline_adjusted)
     
-    html = f"""
+    html = ReportWriter(f"""
         <div class="info-box" id="baseline-adjustment">
             <h2>Ajuste del Baseline</h2>
             <p class="text-caption">
@@ -433,7 +444,7 @@ def generate_baseline_adjustment_section(report_data):
             <p class="text-muted-small">
                 <em>Nota: La desviación estándar se mantiene constante, confirmando que la forma espectral ha sido preservada.</em>
             </p>
-    """
+    """)
     
     fig = create_baseline_comparison_plot(baseline_original, baseline_adjusted, offset_value)
     chart_html = fig.to_html(include_plotlyjs='cdn', div_id='baseline_comparison',
@@ -480,13 +491,13 @@ def generate_individual_analysis(report_data):
     validation_data_orig = report_data['validation_data_original']
     validation_data_sim = report_data['validation_data_simulated']
     
-    html = """
+    html = ReportWriter("""
         <div class="info-box" id="analisis-individual">
             <h2>Análisis Individual de Estándares</h2>
             <p class="text-caption">
                 <em>Análisis detallado de cada estándar mostrando el impacto del offset en las métricas de validación.</em>
             </p>
-    """
+    """)
     
     for i, (data_orig, data_sim) in enumerate(zip(validation_data_orig, validation_data_sim)):
         sample_id = data_orig['id']
@@ -511,6 +522,21 @@ def generate_individual_analysis(report_data):
     return html
 
 
+# Secciones pesadas (gráficos Plotly) y las claves de ``data`` de las que
+# dependen. Al regenerar el informe solo se renderizan de nuevo aquellas
+# cuyas entradas han cambiado (ver core.report_cache).
+_CACHED_SECTIONS = (
+    ('metrics_comparison', generate_metrics_comparison,
+     ('validation_data_original', 'validation_data_simulated', 'offset_value')),
+    ('global_overlay', generate_global_overlay_plot,
+     ('validation_data_original', 'validation_data_simulated', 'offset_value')),
+    ('baseline_adjustment', generate_baseline_adjustment_section,
+     ('baseline_original', 'baseline_adjusted', 'offset_value')),
+    ('individual_analysis', generate_individual_analysis,
+     ('validation_data_original', 'validation_data_simulated')),
+)
+
+
 def generate_recommendations(report_data):
     """Genera la sección de recomendaciones finales."""
     offset_value = report_data['offset_value']
@@ -553,6 +579,66 @@ def generate_recommendations(report_data):
         """
 
 
+# Métricas escalares por estándar incluidas en el sidecar (sin el vector 'diff')
+_SIDECAR_RESULT_KEYS = ('correlation', 'max_diff', 'rms', 'mean_diff')
+
+
+def generate_offset_sidecar(data: Dict, service_info: Dict) -> str:
+    """
+    Genera el sidecar JSON del informe de ajuste de offset.
+    
+    Args:
+        data: Datos del informe
+        service_info: Filas de información del servicio
+        
+    Returns:
+        str: Bloque <script type="application/json"> del informe
+    """
+    metrics_orig = calculate_global_metrics(data['validation_data_original'])
+    metrics_sim = calculate_global_metrics(data['validation_data_simulated'])
+    reduction_max = metrics_orig['max_mean'] - metrics_sim['max_mean']
+    reduction_rms = metrics_orig['rms_mean'] - metrics_sim['rms_mean']
+    status = _correction_status(reduction_max, reduction_rms, data['global_offset_simulated'])
+    
+    summary = {
+        'info_servicio': service_info,
+        'resumen_ejecutivo': {
+            'metricas': {
+                'Offset Aplicado (AU)': f"{data['offset_value']:+.6f}",
+                'Reducción Max Δ Media (AU)': f"{reduction_max:+.6f}",
+                'Reducción RMS Media': f"{reduction_rms:+.6f}",
+            },
+            'conclusion': status,
+        },
+        'estandares': [
+            {
+                'id': orig['id'],
+                'original': {k: orig['validation_results'][k] for k in _SIDECAR_RESULT_KEYS},
+                'simulado': {k: sim['validation_results'][k] for k in _SIDECAR_RESULT_KEYS},
+            }
+            for orig, sim in zip(data['validation_data_original'],
+                                 data['validation_data_simulated'])
+        ],
+    }
+    
+    return generate_report_sidecar(
+        'offset_adjustment',
+        summary=summary,
+        metrics={
+            'offset_value': data['offset_value'],
+            'global_offset_original': data['global_offset_original'],
+            'global_offset_simulated': data['global_offset_simulated'],
+            'reduction_max_mean': reduction_max,
+            'reduction_rms_mean': reduction_rms,
+            'original': metrics_orig,
+            'simulated': metrics_sim,
+        },
+        status='OK' if status.startswith('✅') else 'WARNING',
+        service_info=service_info,
+        tool_name="COREF Suite - Baseline Offset Adjustment Tool",
+    )
+
+
 def generate_offset_adjustment_report(data: Dict) -> str:
     """
     Genera un informe HTML completo de ajuste de offset.
@@ -564,6 +650,22 @@ def generate_offset_adjustment_report(data: Dict) -> str:
     Returns:
         String con contenido HTML del informe
     """
+    return write_offset_adjustment_report(data).getvalue()
+
+
+def write_offset_adjustment_report(data: Dict, writer: ReportWriter = None) -> ReportWriter:
+    """
+    Escribe el informe de ajuste de offset en un ReportWriter.
+    
+    Args:
+        data: Diccionario con toda la información necesaria
+        writer: Sumidero donde escribir (se crea uno nuevo si es None)
+        
+    Returns:
+        ReportWriter: Informe completo, listo para descargar con to_bytesio()
+    """
+    html = writer if writer is not None else ReportWriter()
+    
     # Construir sidebar usando función compartida
     sections = [
         ("info-servicio", "Información del Servicio"),
@@ -580,8 +682,8 @@ def generate_offset_adjustment_report(data: Dict) -> str:
     sidebar_html += '<li><a href="#recomendaciones">💡 Recomendaciones</a></li>'
     
     # Iniciar documento usando función compartida
-    html = start_html_template(title=f"Informe de Ajuste de Offset - {data['sensor_serial']}",
-                               sidebar_html=sidebar_html)
+    html += start_html_template(title=f"Informe de Ajuste de Offset - {data['sensor_serial']}",
+                                sidebar_html=sidebar_html)
     
     html += "<h1>Informe de Ajuste de Offset para Baseline NIR</h1>"
     
@@ -592,19 +694,24 @@ def generate_offset_adjustment_report(data: Dict) -> str:
         'Baseline Original': data['baseline_filename'],
         'Offset Aplicado': f'<span class="value-highlighted">{data["offset_value"]:+.6f} AU</span>'
     }
+    report_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     html += generate_service_info_section(data['sensor_serial'], data['customer_name'],
                                           data['technician_name'], data['service_notes'],
-                                          additional_info)
+                                          additional_info, report_date=report_date)
     
     # Secciones específicas
     html += generate_executive_summary(data)
     html += generate_offset_analysis(data)
-    html += generate_metrics_comparison(data)
-    html += generate_global_overlay_plot(data)
-    html += generate_baseline_adjustment_section(data)
-    html += generate_individual_analysis(data)
+    for name, render, keys in _CACHED_SECTIONS:
+        html += cached_section(f"offset_{name}", {key: data[key] for key in keys},
+                               lambda render=render: render(data))
     html += generate_recommendations(data)
     
+    # Sidecar JSON para el consolidador
+    html += generate_offset_sidecar(data, service_info_rows(
+        data['sensor_serial'], data['customer_name'], data['technician_name'],
+        data['service_notes'], additional_info, report_date=report_date))
+    
     # Footer usando función compartida
     html += generate_footer("COREF Suite - Baseline Offset Adjustment Tool")
     
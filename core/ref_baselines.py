@@ -0,0 +1,337 @@
+"""
+COREF - Batch .ref Baselines
+============================
+Carga, comparación y exportación en bloque de baselines ``.ref``.
+
+Un ``.ref`` es un array float32: 3 valores de cabecera + el espectro. La
+cabecera se interpreta como enteros int32 (X1 = código de formato, X2 =
+número de píxeles, X3) y se conserva tal cual al exportar.
+
+- ``load_ref_directory`` / ``load_ref_files``: un directorio (o varios
+  archivos subidos) en un único ``BaselineStack``: catálogo con la cabecera y
+  los datos del nombre (``<sensor>.<lámpara>.<fecha>[etiqueta].ref``) y una
+  matriz float32 (baselines x canales). Los archivos se leen con
+  ``np.memmap`` y se copian directamente a su fila
+- ``BaselineStack.pairwise_drift``: deriva entre todos los pares de baselines
+  (offset medio, RMS y diferencia máxima) con operaciones matriciales
+- ``BaselineStack.history``: historial por sensor y lámpara ordenado por
+  fecha, con la deriva respecto a la baseline anterior y a la primera
+- ``export_ref_zip``: baselines corregidas en un ZIP de ``.ref``
+
+Sensores con distinto número de píxeles pueden convivir en el mismo stack:
+las filas más cortas quedan con NaN a la derecha y ``n_channels`` indica la
+longitud real de cada una.
+"""
+
+import io
+import os
+import re
+import warnings
+import zipfile
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from core.file_handlers import export_ref_file
+
+REF_HEADER_SIZE = 3
+
+# <sensor>.<lámpara>.<fecha AAAA-MM-DD><etiqueta libre>
+REF_NAME_RE = re.compile(
+    r"^(?P<sensor>.+?)\.(?P<lamp>\d+)\.(?P<date>\d{4}-\d{2}-\d{2})(?P<label>.*)$"
+)
+
+CATALOG_COLUMNS = ['name', 'sensor', 'lamp', 'date', 'label', 'n_channels', 'x1', 'x2', 'x3']
+
+
+def parse_ref_name(name: str) -> dict:
+    """
+    Sensor, lámpara, fecha y etiqueta a partir del nombre de un ``.ref``.
+
+    Los nombres que no siguen el patrón de NIR-Online devuelven solo la
+    etiqueta (el nombre sin extensión).
+    """
+    stem = os.path.splitext(os.path.basename(name))[0]
+    m = REF_NAME_RE.match(stem)
+    if m is None:
+        return {'sensor': None, 'lamp': None, 'date': pd.NaT, 'label': stem}
+    return {
+        'sensor': m.group('sensor'),
+        'lamp': int(m.group('lamp')),
+        'date': pd.Timestamp(m.group('date')),
+        'label': m.group('label').strip(' _-'),
+    }
+
+
+@dataclass
+class BaselineStack:
+    """
+    Conjunto de baselines alineadas en una matriz.
+
+    Attributes:
+        catalog: Una fila por baseline (``CATALOG_COLUMNS`` y, si viene de
+            disco, ``path``)
+        spectra: float32 (baselines x canales), NaN a la derecha de
+            ``n_channels``
+        headers: float32 (baselines x 3) con la cabecera ``.ref`` original,
+            o None si las baselines no vienen de ``.ref``
+    """
+    catalog: pd.DataFrame
+    spectra: np.ndarray
+    headers: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.catalog)
+
+    @property
+    def names(self) -> List[str]:
+        return self.catalog['name'].tolist()
+
+    def spectrum(self, i: int) -> np.ndarray:
+        """Espectro ``i`` con su longitud real."""
+        return self.spectra[i, :int(self.catalog['n_channels'].iat[i])]
+
+    def select(self, rows) -> 'BaselineStack':
+        """
+        Subconjunto por máscara booleana o posiciones.
+
+        Las columnas que quedan vacías (píxeles que ninguna baseline del
+        subconjunto tiene) se recortan.
+        """
+        rows = np.flatnonzero(rows) if np.asarray(rows).dtype == bool else np.asarray(rows, dtype=np.intp)
+        catalog = self.catalog.iloc[rows].reset_index(drop=True)
+        width = int(catalog['n_channels'].max()) if len(catalog) else 0
+        return BaselineStack(
+            catalog=catalog,
+            spectra=self.spectra[rows, :width],
+            headers=None if self.headers is None else self.headers[rows],
+        )
+
+    def for_sensor(self, sensor: str, lamp: Optional[int] = None) -> 'BaselineStack':
+        """Baselines de un sensor (y opcionalmente una lámpara), por fecha."""
+        mask = (self.catalog['sensor'] == sensor).to_numpy()
+        if lamp is not None:
+            mask = mask & (self.catalog['lamp'] == lamp).to_numpy()
+        rows = np.flatnonzero(mask)
+        order = np.argsort(self.catalog['date'].to_numpy()[rows], kind='stable')
+        return self.select(rows[order])
+
+    def pairwise_drift(self) -> dict:
+        """
+        Deriva entre todos los pares de baselines (columna - fila).
+
+        Todas las baselines deben tener el mismo número de canales (p. ej. las
+        de un mismo sensor, ver ``for_sensor``).
+
+        Returns:
+            dict con DataFrames (baselines x baselines, índice = nombres):
+            'offset' (media de la diferencia), 'rms' y 'max_abs'
+
+        Raises:
+            ValueError: Si las baselines tienen distinto número de canales
+        """
+        n_channels = self.catalog['n_channels'].unique()
+        if len(n_channels) > 1:
+            raise ValueError(
+                f"Las baselines tienen distinto número de canales: {sorted(n_channels.tolist())}"
+            )
+        x = self.spectra.astype(np.float64)
+        n = x.shape[1]
+
+        # sum((b - a)^2) = |a|^2 + |b|^2 - 2 a.b
+        sq = np.einsum('ij,ij->i', x, x)
+        sum_sq = np.maximum(sq[:, None] + sq[None, :] - 2.0 * (x @ x.T), 0.0)
+        means = x.mean(axis=1)
+        # max |b - a| por pares, en bloques de filas para acotar la memoria
+        max_abs = np.empty((len(x), len(x)))
+        block = max(1, 2_000_000 // max(1, len(x) * n))
+        for start in range(0, len(x), block):
+            stop = start + block
+            max_abs[start:stop] = np.abs(x[None, :, :] - x[start:stop, None, :]).max(axis=2)
+
+        names = self.names
+        return {
+            'offset': pd.DataFrame(means[None, :] - means[:, None], index=names, columns=names),
+            'rms': pd.DataFrame(np.sqrt(sum_sq / n), index=names, columns=names),
+            'max_abs': pd.DataFrame(max_abs, index=names, columns=names),
+        }
+
+    def history(self) -> pd.DataFrame:
+        """
+        Historial de baselines por sensor y lámpara.
+
+        Returns:
+            Catálogo ordenado por (sensor, lamp, date) con la deriva respecto
+            a la baseline anterior del mismo sensor/lámpara (``offset_prev``,
+            ``rms_prev``, ``max_abs_prev``) y respecto a la primera
+            (``offset_first``, ``rms_first``). Las baselines sin sensor en el
+            nombre, o con otro número de canales que la anterior, quedan con
+            NaN.
+        """
+        catalog = self.catalog.reset_index(drop=True)
+        rows = catalog.sort_values(['sensor', 'lamp', 'date'], kind='stable').index.to_numpy()
+        history = catalog.iloc[rows].reset_index(drop=True)
+        groups = history.groupby(['sensor', 'lamp'], sort=False, dropna=False)
+
+        spectra = self.spectra[rows].astype(np.float64)
+        position = np.arange(len(history))
+        group_start = groups.cumcount().to_numpy()
+        prev = np.where(group_start > 0, position - 1, -1)
+        first = position - group_start
+
+        valid_group = history['sensor'].notna().to_numpy()
+        n_channels = history['n_channels'].to_numpy()
+        for prefix, other in (('prev', prev), ('first', first)):
+            ok = valid_group & (other >= 0) & (other != position)
+            ok &= n_channels == n_channels[np.maximum(other, 0)]
+            diff = np.full(spectra.shape, np.nan)
+            diff[ok] = spectra[ok] - spectra[other[ok]]
+            with warnings.catch_warnings():
+                # nanmean/nanmax de filas solo NaN (sin baseline de referencia)
+                warnings.simplefilter('ignore', RuntimeWarning)
+                history[f'offset_{prefix}'] = np.nanmean(diff, axis=1)
+                history[f'rms_{prefix}'] = np.sqrt(np.nanmean(diff ** 2, axis=1))
+                if prefix == 'prev':
+                    history['max_abs_prev'] = np.nanmax(np.abs(diff), axis=1)
+        return history
+
+
+# =============================================================================
+# CARGA
+# =============================================================================
+
+def _build_stack(names: Sequence[str], arrays: Sequence[np.ndarray],
+                 paths: Optional[Sequence[str]] = None) -> BaselineStack:
+    """Stack a partir de los arrays float32 completos (cabecera + espectro)."""
+    n_channels = np.array([len(a) - REF_HEADER_SIZE for a in arrays], dtype=np.int64)
+    width = int(n_channels.max()) if len(n_channels) else 0
+
+    spectra = np.full((len(arrays), width), np.nan, dtype=np.float32)
+    headers = np.empty((len(arrays), REF_HEADER_SIZE), dtype=np.float32)
+    for i, data in enumerate(arrays):
+        headers[i] = data[:REF_HEADER_SIZE]
+        spectra[i, :n_channels[i]] = data[REF_HEADER_SIZE:]
+
+    parsed = pd.DataFrame([parse_ref_name(name) for name in names],
+                          columns=['sensor', 'lamp', 'date', 'label'])
+    header_ints = headers.view(np.int32)
+    catalog = pd.DataFrame({
+        'name': [os.path.basename(name) for name in names],
+        'sensor': parsed['sensor'],
+        'lamp': parsed['lamp'].astype('Int64'),
+        'date': pd.to_datetime(parsed['date']),
+        'label': parsed['label'],
+        'n_channels': n_channels,
+        'x1': header_ints[:, 0],
+        'x2': header_ints[:, 1],
+        'x3': header_ints[:, 2],
+    }, columns=CATALOG_COLUMNS)
+    if paths is not None:
+        catalog['path'] = list(paths)
+    return BaselineStack(catalog=catalog, spectra=spectra, headers=headers)
+
+
+def load_ref_directory(directory: str, recursive: bool = True) -> BaselineStack:
+    """
+    Carga todos los ``.ref`` de un directorio en un único stack.
+
+    Args:
+        directory: Directorio raíz
+        recursive: Buscar también en subdirectorios
+
+    Returns:
+        BaselineStack (en el orden de las rutas)
+
+    Raises:
+        ValueError: Si algún archivo es demasiado pequeño o no es múltiplo de
+            4 bytes
+    """
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        paths.extend(os.path.join(root, f) for f in files if f.lower().endswith('.ref'))
+        if not recursive:
+            break
+    paths.sort()
+
+    arrays = []
+    for path in paths:
+        size = os.path.getsize(path)
+        if size % 4 or size // 4 <= REF_HEADER_SIZE:
+            raise ValueError(f"Archivo .ref inválido: {path}")
+        # Solo lectura y sin copia: la copia se hace al colocarlo en su fila
+        arrays.append(np.memmap(path, dtype=np.float32, mode='r'))
+    stack = _build_stack(paths, arrays, paths=paths)
+    # Soltar los mapas (en Windows bloquean los archivos mientras existen)
+    del arrays
+    return stack
+
+
+def load_ref_files(files: Iterable) -> BaselineStack:
+    """
+    Carga varios ``.ref`` subidos (objetos con ``name`` y ``read``/``getvalue``).
+
+    Raises:
+        ValueError: Si algún archivo no es un ``.ref`` válido
+    """
+    names, arrays = [], []
+    for file in files:
+        raw = file.getvalue() if hasattr(file, 'getvalue') else file.read()
+        if len(raw) % 4 or len(raw) // 4 <= REF_HEADER_SIZE:
+            raise ValueError(f"Archivo .ref inválido: {getattr(file, 'name', '?')}")
+        names.append(getattr(file, 'name', f'baseline_{len(names) + 1}.ref'))
+        arrays.append(np.frombuffer(raw, dtype=np.float32))
+    return _build_stack(names, arrays)
+
+
+# =============================================================================
+# EXPORTACIÓN
+# =============================================================================
+
+def export_ref_zip(stack: BaselineStack, offsets=None, corrected: Optional[np.ndarray] = None,
+                   suffix: str = '_BLAD') -> bytes:
+    """
+    Exporta baselines corregidas como ``.ref`` (cabecera original) en un ZIP.
+
+    Args:
+        stack: Baselines de origen (deben venir de ``.ref``)
+        offsets: Corrección a sumar: escalar, un valor por baseline o una
+            matriz (baselines x canales)
+        corrected: Espectros ya corregidos (alternativa a ``offsets``)
+        suffix: Sufijo añadido al nombre de cada archivo
+
+    Returns:
+        bytes: Contenido del ZIP
+
+    Raises:
+        ValueError: Si el stack no tiene cabeceras ``.ref``
+    """
+    if stack.headers is None:
+        raise ValueError("Las baselines no tienen cabecera .ref")
+    if corrected is None:
+        corrected = stack.spectra
+        if offsets is not None:
+            offsets = np.asarray(offsets, dtype=np.float32)
+            corrected = corrected + (offsets[:, None] if offsets.ndim == 1 else offsets)
+
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for i, file_name in enumerate(unique_names(stack.names, suffix, '.ref')):
+            n = int(stack.catalog['n_channels'].iat[i])
+            zf.writestr(file_name, export_ref_file(corrected[i, :n], stack.headers[i]))
+    return zip_buffer.getvalue()
+
+
+def unique_names(names: Sequence[str], suffix: str, extension: str) -> List[str]:
+    """
+    ``<nombre sin extensión><suffix><extension>`` para cada nombre, numerando
+    los repetidos (la misma baseline copiada en varias carpetas).
+    """
+    seen: dict = {}
+    out = []
+    for name in names:
+        stem = os.path.splitext(os.path.basename(name))[0] + suffix
+        count = seen[stem] = seen.get(stem, 0) + 1
+        out.append(f"{stem}{extension}" if count == 1 else f"{stem}_{count}{extension}")
+    return out
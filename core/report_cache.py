@@ -0,0 +1,223 @@
+"""
+Report Cache - Memoización de secciones de informes
+====================================================
+Cachea los fragmentos HTML ya renderizados de cada sección de un informe,
+indexados por una huella (hash) de sus entradas: el subconjunto de datos que
+pinta la sección, umbrales, etiquetas y la versión de estilos.
+
+Al regenerar un informe tras cambiar solo las etiquetas de un grupo o un
+único parámetro, las secciones cuyas entradas no han cambiado se reutilizan
+en lugar de volver a construir y serializar sus figuras Plotly.
+
+Las secciones con contenido dependiente del momento de generación (fecha en
+la info de servicio o el footer) NO deben cachearse.
+
+Usado por: offset_adjustment_report_generator, tsv_report_generator
+
+Author: Miquel
+Date: December 2024
+"""
+
+import hashlib
+from collections import OrderedDict
+from collections.abc import Mapping, Set as AbstractSet
+from typing import Any, Callable, Union
+
+import numpy as np
+import pandas as pd
+
+from app_config import VERSION, REPORT_SECTION_STYLE_VERSION, REPORT_SECTION_CACHE
+from core.report_writer import ReportWriter
+
+
+# ============================================================================
+# HUELLA DE ENTRADAS
+# ============================================================================
+
+def _update_hash(h, obj: Any) -> None:
+    """Alimenta el hash con una representación estable de ``obj``."""
+    if obj is None or isinstance(obj, (bool, int, float, str, bytes)):
+        h.update(type(obj).__name__.encode())
+        h.update(repr(obj).encode())
+    elif isinstance(obj, np.ndarray):
+        h.update(b'ndarray')
+        h.update(str(obj.dtype).encode())
+        h.update(repr(obj.shape).encode())
+        if obj.dtype == object:
+            h.update(repr(obj.tolist()).encode())
+        else:
+            h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (pd.DataFrame, pd.Series)):
+        h.update(type(obj).__name__.encode())
+        if isinstance(obj, pd.DataFrame):
+            h.update(repr(list(obj.columns)).encode())
+        else:
+            h.update(repr(obj.name).encode())
+        try:
+            h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+        except TypeError:
+            # Celdas no hashables (listas, arrays): representación textual
+            h.update(obj.astype(str).to_csv().encode())
+    elif isinstance(obj, Mapping):
+        # dict o vistas de solo lectura (p. ej. grupos de un SelectionState)
+        h.update(b'dict')
+        for key in sorted(obj, key=repr):
+            _update_hash(h, key)
+            _update_hash(h, obj[key])
+    elif isinstance(obj, (list, tuple, AbstractSet)):
+        h.update(type(obj).__name__.encode() if isinstance(obj, (list, tuple)) else b'set')
+        items = sorted(obj, key=repr) if isinstance(obj, AbstractSet) else obj
+        for item in items:
+            _update_hash(h, item)
+    elif isinstance(obj, np.generic):
+        _update_hash(h, obj.item())
+    else:
+        h.update(type(obj).__name__.encode())
+        h.update(repr(obj).encode())
+
+
+def fingerprint(*objs: Any) -> str:
+    """
+    Calcula la huella de un conjunto de entradas de sección.
+
+    Incluye siempre la versión de la aplicación y la de estilos de sección,
+    de modo que un cambio de plantilla invalida los fragmentos antiguos.
+
+    Args:
+        *objs: Entradas de la sección (DataFrames, arrays, dicts, escalares...)
+
+    Returns:
+        str: Digest hexadecimal (32 caracteres)
+    """
+    h = hashlib.blake2b(digest_size=16)
+    _update_hash(h, (VERSION, REPORT_SECTION_STYLE_VERSION))
+    for obj in objs:
+        _update_hash(h, obj)
+    return h.hexdigest()
+
+
+# ============================================================================
+# CACHÉ LRU DE FRAGMENTOS
+# ============================================================================
+
+def _fragment_size(value: Any) -> int:
+    """Tamaño aproximado (caracteres) de un valor cacheado."""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return sum(_fragment_size(v) for v in value)
+    if isinstance(value, dict):
+        return sum(_fragment_size(v) for v in value.values())
+    return 0
+
+
+class SectionCache:
+    """
+    Caché LRU de fragmentos renderizados, limitada por número de entradas y
+    por tamaño total (caracteres de HTML).
+    """
+
+    def __init__(self, max_entries: int = 256, max_chars: int = 64_000_000):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._entries: 'OrderedDict[str, tuple[Any, int]]' = OrderedDict()
+        self._chars = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: str, value: Any) -> None:
+        size = _fragment_size(value)
+        if size > self.max_chars:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._chars -= old[1]
+        self._entries[key] = (value, size)
+        self._chars += size
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._chars > self.max_chars
+        ):
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._chars -= evicted_size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._chars = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._entries),
+            'chars': self._chars,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_section_cache = SectionCache(**REPORT_SECTION_CACHE)
+
+
+def get_section_cache() -> SectionCache:
+    """Devuelve la caché de secciones compartida por los generadores."""
+    return _section_cache
+
+
+_MISSING = object()
+
+
+def cached_value(name: str, inputs: Any, compute: Callable[[], Any]) -> Any:
+    """
+    Devuelve un valor renderizado (HTML, tupla de fragmentos + métricas...),
+    calculándolo solo si sus entradas no se han visto antes.
+
+    Los valores cacheados se comparten entre informes: deben ser inmutables
+    (strings, números, tuplas), nunca figuras o DataFrames.
+
+    Args:
+        name: Identificador de la sección (forma parte de la clave)
+        inputs: Entradas que determinan el resultado (ver ``fingerprint``)
+        compute: Función sin argumentos que genera el valor
+
+    Returns:
+        Valor cacheado o recién calculado
+    """
+    key = f"{name}:{fingerprint(inputs)}"
+    value = _section_cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = compute()
+        _section_cache.put(key, value)
+    return value
+
+
+def cached_section(name: str, inputs: Any,
+                   render: Callable[[], Union[str, ReportWriter]]) -> str:
+    """
+    Devuelve el HTML de una sección, renderizándolo solo si sus entradas
+    no se han visto antes.
+
+    Args:
+        name: Identificador de la sección (forma parte de la clave)
+        inputs: Entradas que determinan el HTML (ver ``fingerprint``)
+        render: Función sin argumentos que genera la sección
+
+    Returns:
+        str: HTML de la sección
+    """
+    def _render() -> str:
+        rendered = render()
+        return rendered.getvalue() if isinstance(rendered, ReportWriter) else rendered
+
+    return cached_value(name, inputs, _render)
@@ -25,10 +25,13 @@ from core.report_utils import (
     build_sidebar_html,
     start_html_template,
     generate_client_info_section,
+    client_info_rows,
     generate_notes_section,
+    generate_report_sidecar,
     generate_footer,
     df_to_html_table
 )
+from core.report_writer import ReportWriter
 
 
 def generate_html_report(kit_data, baseline_data, ref_corrected, origin, validation_data=None):
@@ -45,6 +48,23 @@ def generate_html_report(kit_data, baseline_data, ref_corrected, origin, validat
     Returns:
         str: Contenido HTML del informe
     """
+    return write_html_report(kit_data, baseline_data, ref_corrected, origin,
+                             validation_data=validation_data).getvalue()
+
+
+def write_html_report(kit_data, baseline_data, ref_corrected, origin,
+                      validation_data=None, writer=None):
+    """
+    Escribe el informe de ajuste de baseline en un ReportWriter.
+    
+    Args:
+        kit_data, baseline_data, ref_corrected, origin, validation_data:
+            Igual que generate_html_report
+        writer (ReportWriter, optional): Sumidero donde escribir
+        
+    Returns:
+        ReportWriter: Informe completo, listo para descargar con to_bytesio()
+    """
     import streamlit as st
 
     # Contexto de sesión
@@ -91,7 +111,8 @@ def generate_html_report(kit_data, baseline_data, ref_corrected, origin, validat
         sections.append(("verification-section", "Verificación Post-Ajuste"))
 
     # Iniciar HTML con template estandarizado
-    html = start_html_template(
+    html = writer if writer is not None else ReportWriter()
+    html += start_html_template(
         title="Informe de Ajuste de Baseline NIR",
         sidebar_sections=sections,
         client_info=client_data
@@ -142,12 +163,135 @@ def generate_html_report(kit_data, baseline_data, ref_corrected, origin, validat
     if client_data.get("notes"):
         html += generate_notes_section(client_data["notes"])
 
+    # Sidecar JSON para el consolidador
+    html += generate_baseline_sidecar(
+        client_data, wstd_data,
+        kit_data=kit_data, ref_corrected=ref_corrected, header=header,
+        origin=origin, selected_ids=selected_ids,
+        validation_data=validation_data,
+        mean_diff_after=validation_data['diff'] if validation_data is not None else None
+    )
+
     # Footer
     html += generate_footer()
 
     return html
 
 
+def generate_baseline_sidecar(client_data, wstd_data, kit_data=None, ref_corrected=None,
+                              header=None, origin=None, selected_ids=None,
+                              validation_data=None, mean_diff_after=None):
+    """
+    Genera el sidecar JSON del informe de baseline (completo o parcial).
+    
+    El resumen replica la estructura de BaselineParser.parse() para que el
+    consolidador no tenga que recorrer las tablas del HTML.
+    
+    Returns:
+        str: Bloque <script type="application/json"> del informe
+    """
+    summary = {'info_cliente': client_info_rows(client_data or {})}
+    metrics = {}
+    status = None
+    
+    summary['diagnostico_wstd'] = {}
+    if isinstance(wstd_data, dict) and wstd_data.get('df') is not None:
+        df_wstd = wstd_data['df']
+        spectral_cols = wstd_data.get('spectral_cols', df_wstd.columns.tolist())
+        rows = _wstd_rows(df_wstd, spectral_cols)
+        summary['diagnostico_wstd']['metricas'] = {str(r['id']): f"{r['max']:.6f}" for r in rows}
+        estado = next((r['status_label'] for r in rows
+                       if r['status_class'] in ('status-good', 'status-warning')), None)
+        if estado is not None:
+            summary['diagnostico_wstd']['estado'] = estado
+        metrics['wstd'] = [
+            {k: r[k] for k in ('id', 'max', 'mean', 'std', 'status_class')} for r in rows
+        ]
+    
+    summary['detalles_proceso'] = {}
+    summary['estadisticas_correccion'] = {}
+    summary['baseline_generado'] = {}
+    if kit_data and ref_corrected is not None:
+        mean_diff = kit_data['mean_diff']
+        process = {
+            'Lámpara de Referencia': kit_data['lamp_ref'],
+            'Lámpara Nueva': kit_data['lamp_new'],
+            'Canales Espectrales': len(kit_data['spectral_cols']),
+            'Mediciones White Standard': len(kit_data['common_ids']),
+            'Mediciones usadas en corrección': len(selected_ids if selected_ids is not None
+                                                  else kit_data['common_ids']),
+            'Formato Baseline': f".{origin}",
+        }
+        summary['detalles_proceso'] = {k: str(v) for k, v in process.items()}
+        
+        correction = {
+            'max': np.max(np.abs(mean_diff)),
+            'mean': np.mean(np.abs(mean_diff)),
+            'std': np.std(mean_diff),
+        }
+        summary['estadisticas_correccion'] = {
+            'Corrección Máxima': f"{correction['max']:.6f}",
+            'Corrección Media': f"{correction['mean']:.6f}",
+            'Desviación Estándar': f"{correction['std']:.6f}",
+        }
+        
+        baseline = {'Puntos Espectrales': str(len(ref_corrected))}
+        if origin == 'ref' and header is not None:
+            for i in range(3):
+                baseline[f'Cabecera X{i + 1}'] = f"{header[i]:.6e}"
+        summary['baseline_generado'] = baseline
+        
+        metrics['process'] = process
+        metrics['correction'] = correction
+        metrics['baseline'] = {
+            'points': len(ref_corrected),
+            'header': list(header[:3]) if origin == 'ref' and header is not None else None,
+        }
+    
+    summary['verificacion'] = {}
+    if validation_data is not None and mean_diff_after is not None:
+        assessment = _assess_verification(validation_data, mean_diff_after)
+        verification = {
+            'metricas': {
+                'RMS': f"{assessment['rms']:.6f}",
+                'Diferencia Máxima': f"{assessment['max_diff']:.6f}",
+                'Diferencia Media': f"{assessment['mean_diff']:.6f}",
+            }
+        }
+        if assessment['final_status'] == 'FAILED_THRESHOLD':
+            verification['conclusion'] = ' '.join([
+                f"RMS: {assessment['rms']:.6f} AU (Umbral recomendado: < 0.005 AU)",
+                _FORCED_REPORT_NOTE, 'Razones posibles:', _FORCED_REPORT_RECOMMENDATION,
+            ])
+            verification['recomendaciones'] = list(_FORCED_REPORT_REASONS)
+            status = 'FAILED_THRESHOLD'
+        else:
+            lead, detail, items = _VERIFICATION_RECOMMENDATIONS[assessment['status_text']]
+            verification['conclusion'] = ' '.join([
+                f"RMS: {assessment['rms']:.6f} AU | "
+                f"Diferencia máxima: {assessment['max_diff']:.6f} AU",
+                lead, detail, *items,
+            ])
+            if items:
+                verification['recomendaciones'] = list(items)
+            status = assessment['status_text']
+        # Normalizar espacios de los textos multilínea del HTML
+        verification['conclusion'] = ' '.join(verification['conclusion'].split())
+        summary['verificacion'] = verification
+        metrics['verification'] = {
+            k: assessment[k] for k in ('rms', 'max_diff', 'mean_diff', 'final_status')
+        }
+    
+    return generate_report_sidecar(
+        'baseline',
+        summary=summary,
+        metrics=metrics,
+        status=status,
+        service_info=summary['info_cliente'],
+        thresholds={'wstd': WSTD_THRESHOLDS},
+    )
+
+
 def generate_wstd_section(wstd_data):
     """
     Genera la sección de diagnóstico WSTD.
@@ -156,12 +300,12 @@ def generate_wstd_section(wstd_data):
         wstd_data (dict): Datos del diagnóstico WSTD
         
     Returns:
-        str: HTML de la sección WSTD
+        ReportWriter: HTML de la sección WSTD
     """
     df_wstd = wstd_data['df']
     spectral_cols = wstd_data['spectral_cols']
     
-    html = """
+    html = ReportWriter("""
         <div class="warning-box" id="wstd-section">
             <h2>Diagnóstico Inicial - White Standard (sin línea base)</h2>
             <p><strong>Estado del sistema ANTES del ajuste:</strong></p>
@@ -173,29 +317,18 @@ def generate_wstd_section(wstd_data):
                     <th>Desv. Estándar</th>
                     <th>Estado</th>
                 </tr>
-    """
+    """)
     
     # Iterar sobre cada medición
-    for idx, row in df_wstd.iterrows():
-        spectrum = row[spectral_cols].values
-        max_val = np.max(np.abs(spectrum))
-        mean_val = np.mean(np.abs(spectrum))
-        std_val = np.std(spectrum)
-        
-        # Determinar estado
-        if max_val < WSTD_THRESHOLDS['good']:
-            status = '<span class="status-good">🟢 Bien ajustado</span>'
-        elif max_val < WSTD_THRESHOLDS['warning']:
-            status = '<span class="status-warning">🟡 Desviación moderada</span>'
-        else:
-            status = '<span class="status-bad">🔴 Requiere ajuste</span>'
+    for wstd_row in _wstd_rows(df_wstd, spectral_cols):
+        status = f'<span class="{wstd_row["status_class"]}">{wstd_row["status_label"]}</span>'
         
         html += f"""
             <tr>
-                <td><strong>{row['ID']}</strong></td>
-                <td>{max_val:.6f}</td>
-                <td>{mean_val:.6f}</td>
-                <td>{std_val:.6f}</td>
+                <td><strong>{wstd_row['id']}</strong></td>
+                <td>{wstd_row['max']:.6f}</td>
+                <td>{wstd_row['mean']:.6f}</td>
+                <td>{wstd_row['std']:.6f}</td>
                 <td>{status}</td>
             </tr>
         """
@@ -216,6 +349,37 @@ def generate_wstd_section(wstd_data):
     return html
 
 
+def _wstd_rows(df_wstd, spectral_cols):
+    """
+    Métricas y estado de cada medición WSTD (tabla HTML y sidecar JSON).
+    
+    Returns:
+        list[dict]: id, max, mean, std, status_class, status_label
+    """
+    rows = []
+    for _, row in df_wstd.iterrows():
+        spectrum = row[spectral_cols].values
+        max_val = np.max(np.abs(spectrum))
+        
+        # Determinar estado
+        if max_val < WSTD_THRESHOLDS['good']:
+            status_class, status_label = 'status-good', '🟢 Bien ajustado'
+        elif max_val < WSTD_THRESHOLDS['warning']:
+            status_class, status_label = 'status-warning', '🟡 Desviación moderada'
+        else:
+            status_class, status_label = 'status-bad', '🔴 Requiere ajuste'
+        
+        rows.append({
+            'id': row['ID'],
+            'max': max_val,
+            'mean': np.mean(np.abs(spectrum)),
+            'std': np.std(spectrum),
+            'status_class': status_class,
+            'status_label': status_label,
+        })
+    return rows
+
+
 def generate_wstd_charts(df_wstd, spectral_cols):
     """
     Genera los gráficos de WSTD para el reporte.
@@ -225,9 +389,9 @@ def generate_wstd_charts(df_wstd, spectral_cols):
         spectral_cols (list): Lista de columnas espectrales
         
     Returns:
-        str: HTML con los gráficos embebidos
+        ReportWriter: HTML con los gráficos embebidos
     """
-    html = "<h2>Gráficos de Diagnóstico WSTD</h2>"
+    html = ReportWriter("<h2>Gráficos de Diagnóstico WSTD</h2>")
     
     # Crear el gráfico
     fig = make_subplots(
@@ -400,9 +564,9 @@ def generate_white_correction_chart(df_ref_grouped, df_new_grouped, spectral_col
         selected_ids (list): IDs seleccionados
         
     Returns:
-        str: HTML con el gráfico embebido
+        ReportWriter: HTML con el gráfico embebido
     """
-    html = """
+    html = ReportWriter("""
         <div class="info-box" id="white-correction">
             <h2>Corrección con White Standard</h2>
             <h3>Mediciones White Standard Usadas en la Corrección</h3>
@@ -410,7 +574,7 @@ def generate_white_correction_chart(df_ref_grouped, df_new_grouped, spectral_col
                 <em>Comparación de las mediciones de white standard con baseline original (referencia) 
                 y baseline nueva (antes de corrección). Estas mediciones se usaron para calcular el vector de corrección.</em>
             </p>
-    """
+    """)
     
     fig = plot_kit_spectra(
         df_ref_grouped, df_new_grouped, spectral_cols,
@@ -499,14 +663,14 @@ def generate_correction_vector_section(df_ref_grouped, df_new_grouped, mean_diff
     # Identificar mediciones no usadas
     ids_not_used = [id_ for id_ in common_ids if id_ not in selected_ids]
     
-    html = """
+    html = ReportWriter("""
         <div class="info-box" id="correction-vector">
             <h2>Vector de Corrección</h2>
             <p class="text-caption">
                 <em>El vector de corrección representa el ajuste espectral calculado a partir de las 
                 diferencias entre las mediciones white standard con baseline original y baseline nueva.</em>
             </p>
-    """
+    """)
     
     # GRÁFICO 1: Mediciones usadas
     html += "<h3>Diferencias Espectrales - Mediciones Usadas</h3>"
@@ -570,7 +734,7 @@ def generate_baseline_info(ref_corrected, header, origin, ref_spectrum, spectral
     """
     Genera la sección de información del baseline generado con gráfico comparativo.
     """
-    html = f"""
+    html = ReportWriter(f"""
         <div class="info-box" id="baseline-info">
             <h2>Baseline Generado</h2>
             <table>
@@ -582,7 +746,7 @@ def generate_baseline_info(ref_corrected, header, origin, ref_spectrum, spectral
                     <td><strong>Puntos Espectrales</strong></td>
                     <td>{len(ref_corrected)}</td>
                 </tr>
-    """
+    """)
     
     if origin == 'ref' and header is not None:
         html += f"""
@@ -629,6 +793,83 @@ def generate_baseline_info(ref_corrected, header, origin, ref_spectrum, spectral
     return html
 
 
+# Recomendación por estado de verificación: (frase destacada, texto, acciones)
+_VERIFICATION_RECOMMENDATIONS = {
+    'EXCELENTE': (
+        'El ajuste de baseline es óptimo.',
+        'Las lámparas están perfectamente alineadas \n                y el sistema está listo para uso en producción.',
+        [],
+    ),
+    'BUENO': (
+        'El ajuste de baseline funciona correctamente.',
+        'Las lámparas están bien alineadas \n                y el sistema puede usarse con confianza.',
+        [],
+    ),
+    'ACEPTABLE': (
+        'Corrección aceptable pero mejorable.',
+        'Se recomienda:',
+        [
+            'Revisar la calidad de las mediciones white standard',
+            'Verificar las condiciones ambientales durante las mediciones',
+            'Evaluar el estado de las lámparas',
+        ],
+    ),
+    'REQUIERE REVISIÓN': (
+        'La corrección requiere revisión.',
+        'Acciones recomendadas:',
+        [
+            'Verificar que el baseline corregido se instaló correctamente',
+            'Reiniciar el equipo si es necesario',
+            'Asegurar condiciones estables durante las mediciones',
+            'Considerar repetir el proceso con nuevas mediciones',
+        ],
+    ),
+}
+
+_FORCED_REPORT_NOTE = (
+    'Este informe se generó a petición del usuario aunque el alineamiento \n'
+    '                    no cumple los criterios de calidad establecidos.'
+)
+_FORCED_REPORT_REASONS = [
+    'Limitaciones del equipo que impiden alcanzar el umbral ideal',
+    'Necesidad de documentar el estado actual para trazabilidad',
+    'Decisión operativa de continuar con el alineamiento actual',
+]
+_FORCED_REPORT_RECOMMENDATION = (
+    '⚠️ RECOMENDACIÓN: Se recomienda revisar el proceso de alineamiento \n'
+    '                    y considerar repetir el procedimiento en condiciones más estables.'
+)
+
+
+def _assess_verification(validation_data, mean_diff_after):
+    """
+    Métricas y estado de la verificación post-ajuste (HTML y sidecar JSON).
+    
+    Returns:
+        dict: rms, max_diff, mean_diff, final_status y, salvo informe forzado,
+              status_text / status_class / status_icon
+    """
+    assessment = {
+        'max_diff': np.max(np.abs(mean_diff_after)),
+        'mean_diff': np.mean(np.abs(mean_diff_after)),
+        'rms': np.sqrt(np.mean(mean_diff_after**2)),
+        # Detectar si se forzó el informe
+        'final_status': validation_data.get('final_status', 'SUCCESS'),
+    }
+    rms, max_diff = assessment['rms'], assessment['max_diff']
+    
+    if rms < 0.002 and max_diff < 0.005:
+        assessment.update(status_class='status-good', status_text='EXCELENTE', status_icon='🟢')
+    elif rms < 0.005 and max_diff < 0.01:
+        assessment.update(status_class='status-good', status_text='BUENO', status_icon='🟢')
+    elif rms < 0.01 and max_diff < 0.02:
+        assessment.update(status_class='status-warning', status_text='ACEPTABLE', status_icon='🟡')
+    else:
+        assessment.update(status_class='status-bad', status_text='REQUIERE REVISIÓN', status_icon='🔴')
+    
+    return assessment
+
+
 def generate_validation_section(validation_data, mean_diff_before, mean_diff_after):
     """
     Genera la sección de verificación post-ajuste.
@@ -641,15 +882,14 @@ def generate_validation_section(validation_data, mean_diff_before, mean_diff_aft
     spectral_cols = validation_data.get('spectral_cols', df_ref_val.columns.tolist())
     
     # Métricas del estado final
-    max_diff = np.max(np.abs(mean_diff_after))
-    mean_diff = np.mean(np.abs(mean_diff_after))
-    rms = np.sqrt(np.mean(mean_diff_after**2))
-    
-    # Detectar si se forzó el informe
-    final_status = validation_data.get('final_status', 'SUCCESS')
-    
-    if final_status == 'FAILED_THRESHOLD':
-        html = f"""
+    assessment = _assess_verification(validation_data, mean_diff_after)
+    max_diff = assessment['max_diff']
+    mean_diff = assessment['mean_diff']
+    rms = assessment['rms']
+    
+    if assessment['final_status'] == 'FAILED_THRESHOLD':
+        reasons = ''.join(f"\n                    <li>{reason}</li>" for reason in _FORCED_REPORT_REASONS)
+        html = ReportWriter(f"""
             <div class="warning-box verification-title" id="verification-section">
                 <h2>Verificación Post-Ajuste</h2>
                 <p><strong>Comprobación del ajuste de baseline con mediciones independientes:</strong></p>
@@ -687,23 +927,18 @@ def generate_validation_section(validation_data, mean_diff_before, mean_diff_aft
                     <strong>RMS:</strong> {rms:.6f} AU (Umbral recomendado: < 0.005 AU)
                 </p>
                 <p class="text-muted-note">
-                    Este informe se generó a petición del usuario aunque el alineamiento 
-                    no cumple los criterios de calidad establecidos.
+                    {_FORCED_REPORT_NOTE}
                 </p>
                 <p class="text-muted-note">
                     <strong>Razones posibles:</strong>
                 </p>
-                <ul class="list-spacious">
-                    <li>Limitaciones del equipo que impiden alcanzar el umbral ideal</li>
-                    <li>Necesidad de documentar el estado actual para trazabilidad</li>
-                    <li>Decisión operativa de continuar con el alineamiento actual</li>
+                <ul class="list-spacious">{reasons}
                 </ul>
                 <p class="text-muted-note">
-                    ⚠️ RECOMENDACIÓN: Se recomienda revisar el proceso de alineamiento 
-                    y considerar repetir el procedimiento en condiciones más estables.
+                    {_FORCED_REPORT_RECOMMENDATION}
                 </p>
             </div>
-        """
+        """)
         
         # Añadir gráficos
         html += generate_verification_charts(
@@ -715,57 +950,23 @@ def generate_validation_section(validation_data, mean_diff_before, mean_diff_aft
         return html
     
     # Evaluación normal
-    if rms < 0.002 and max_diff < 0.005:
-        status_class = "status-good"
-        status_text = "EXCELENTE"
-        status_icon = "🟢"
-        recommendation = """
-            <p class="text-muted-note">
-                <strong>El ajuste de baseline es óptimo.</strong> Las lámparas están perfectamente alineadas 
-                y el sistema está listo para uso en producción.
-            </p>
-        """
-    elif rms < 0.005 and max_diff < 0.01:
-        status_class = "status-good"
-        status_text = "BUENO"
-        status_icon = "🟢"
-        recommendation = """
-            <p class="text-muted-note">
-                <strong>El ajuste de baseline funciona correctamente.</strong> Las lámparas están bien alineadas 
-                y el sistema puede usarse con confianza.
-            </p>
-        """
-    elif rms < 0.01 and max_diff < 0.02:
-        status_class = "status-warning"
-        status_text = "ACEPTABLE"
-        status_icon = "🟡"
-        recommendation = """
+    status_class = assessment['status_class']
+    status_text = assessment['status_text']
+    status_icon = assessment['status_icon']
+    lead, detail, items = _VERIFICATION_RECOMMENDATIONS[status_text]
+    items_html = ""
+    if items:
+        items_html = ''.join(f"\n                    <li>{item}</li>" for item in items)
+        items_html = f"""
+                <ul class="list-spacious">{items_html}
+                </ul>"""
+    recommendation = f"""
             <p class="text-muted-note">
-                <strong>Corrección aceptable pero mejorable.</strong> Se recomienda:
-                <ul class="list-spacious">
-                    <li>Revisar la calidad de las mediciones white standard</li>
-                    <li>Verificar las condiciones ambientales durante las mediciones</li>
-                    <li>Evaluar el estado de las lámparas</li>
-                </ul>
-            </p>
-        """
-    else:
-        status_class = "status-bad"
-        status_text = "REQUIERE REVISIÓN"
-        status_icon = "🔴"
-        recommendation = """
-            <p class="text-muted-note">
-                <strong>La corrección requiere revisión.</strong> Acciones recomendadas:
-                <ul class="list-spacious">
-                    <li>Verificar que el baseline corregido se instaló correctamente</li>
-                    <li>Reiniciar el equipo si es necesario</li>
-                    <li>Asegurar condiciones estables durante las mediciones</li>
-                    <li>Considerar repetir el proceso con nuevas mediciones</li>
-                </ul>
+                <strong>{lead}</strong> {detail}{items_html}
             </p>
         """
     
-    html = f"""
+    html = ReportWriter(f"""
         <div class="warning-box verification-title" id="verification-section">
             <h2>Verificación Post-Ajuste</h2>
             <p><strong>Comprobación del ajuste de baseline con mediciones independientes:</strong></p>
@@ -799,7 +1000,7 @@ def generate_validation_section(validation_data, mean_diff_before, mean_diff_aft
                 <em>Umbrales basados en criterios de White Standard Reference.</em>
             </p>
         </div>
-    """
+    """)
     
     # Gráficos
     html += generate_verification_charts(
@@ -828,7 +1029,7 @@ def generate_verification_charts(df_ref_val, df_new_val, spectral_cols,
     """
     Genera los gráficos de verificación post-ajuste.
     """
-    html = "<h2>Análisis de Verificación</h2>"
+    html = ReportWriter("<h2>Análisis de Verificación</h2>")
     
     # Preparar datos
     spectra_ref = []
@@ -1086,6 +1287,33 @@ def generate_partial_report(
     Returns:
         str: HTML del informe parcial
     """
+    return write_partial_report(
+        kit_data=kit_data,
+        baseline_data=baseline_data,
+        ref_corrected=ref_corrected,
+        origin=origin,
+        validation_data=validation_data,
+        mean_diff_before=mean_diff_before,
+        mean_diff_after=mean_diff_after
+    ).getvalue()
+
+
+def write_partial_report(
+    kit_data=None,
+    baseline_data=None,
+    ref_corrected=None,
+    origin=None,
+    validation_data=None,
+    mean_diff_before=None,
+    mean_diff_after=None,
+    writer=None
+):
+    """
+    Escribe el informe parcial en un ReportWriter.
+    
+    Returns:
+        ReportWriter: Informe parcial
+    """
     import streamlit as st
 
     client_data = st.session_state.get('client_data', {})
@@ -1108,7 +1336,8 @@ def generate_partial_report(
         sections.append(("verification-section", "Verificación Post-Ajuste"))
 
     # Iniciar HTML
-    html = start_html_template(
+    html = writer if writer is not None else ReportWriter()
+    html += start_html_template(
         title="Informe de Ajuste de Baseline NIR",
         sidebar_sections=sections,
         client_info=client_data
@@ -1148,5 +1377,16 @@ def generate_partial_report(
                 </div>
             """
 
+    # Sidecar JSON para el consolidador
+    try:
+        html += generate_baseline_sidecar(
+            client_data or {}, wstd_data,
+            validation_data=validation_data if has_verification else None,
+            mean_diff_after=mean_diff_after
+        )
+    except Exception:
+        # El consolidador recurre al scraping del HTML
+        pass
+
     html += generate_footer()
     return html
\ No newline at end of file
@@ -9,16 +9,23 @@ Date: December 2024
 """
 
 from typing import Dict, List
+import json
+import re
 import pandas as pd
 import numpy as np
 from datetime import datetime
 
+from core.report_writer import ReportWriter
+
 
 def wrap_chart_in_expandable(chart_html: str, title: str, chart_id: str, 
-                             default_open: bool = False) -> str:
+                             default_open: bool = False) -> ReportWriter:
     """
     Envuelve un gráfico en un elemento expandible HTML.
     
+    El HTML del gráfico se añade como fragmento independiente del
+    ReportWriter, sin copiarlo dentro de un f-string.
+    
     Args:
         chart_html: HTML del gráfico
         title: Título del expandible
@@ -26,20 +33,23 @@ def wrap_chart_in_expandable(chart_html: str, title: str, chart_id: str,
         default_open: Si debe estar abierto por defecto
         
     Returns:
-        str: HTML con el gráfico en un expandible
+        ReportWriter: HTML con el gráfico en un expandible
     """
     open_attr = "open" if default_open else ""
     
-    return f"""
+    writer = ReportWriter(f"""
     <details class="chart-expandable" {open_attr}>
         <summary style="cursor: pointer; font-weight: bold; padding: 10px; background-color: #f8f9fa; border-radius: 5px; user-select: none; color: #333;">
             📊 {title}
         </summary>
         <div style="padding: 15px; margin-top: 10px;">
-            {chart_html}
+            """)
+    writer.write(chart_html)
+    writer.write("""
         </div>
     </details>
-    """
+    """)
+    return writer
 
 
 def load_buchi_css() -> str:
@@ -389,9 +399,38 @@ def format_change(delta: float, inverse: bool = False, show_sign: bool = False)
         return f'<span class="degradation">↓ {text}</span>'
 
 
+def service_info_rows(sensor_serial: str, customer_name: str,
+                      technician_name: str, service_notes: str,
+                      additional_info: Dict = None, report_date: str = None) -> Dict[str, str]:
+    """
+    Filas (campo -> valor) de la sección de información del servicio.
+    
+    Compartidas por la tabla HTML y el sidecar JSON del informe.
+    
+    Args:
+        sensor_serial, customer_name, technician_name, service_notes,
+        additional_info: Igual que generate_service_info_section
+        report_date: Fecha del informe (por defecto, ahora)
+        
+    Returns:
+        Dict[str, str]: Filas en orden de aparición (los valores pueden contener HTML)
+    """
+    rows = {
+        'Cliente': customer_name,
+        'Técnico': technician_name,
+        'Número de Serie': sensor_serial,
+        'Fecha del Informe': report_date or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    if additional_info:
+        rows.update(additional_info)
+    rows['Notas del Servicio'] = service_notes if service_notes else 'N/A'
+    return rows
+
+
 def generate_service_info_section(sensor_serial: str, customer_name: str, 
                                   technician_name: str, service_notes: str,
-                                  additional_info: Dict = None) -> str:
+                                  additional_info: Dict = None,
+                                  report_date: str = None) -> str:
     """
     Genera la sección de información del servicio.
     
@@ -401,30 +440,24 @@ def generate_service_info_section(sensor_serial: str, customer_name: str,
         technician_name: Nombre del técnico
         service_notes: Notas del servicio
         additional_info: Diccionario con información adicional a mostrar
+        report_date: Fecha del informe (por defecto, ahora)
         
     Returns:
         str: HTML de la sección de información
     """
-    report_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    rows = service_info_rows(sensor_serial, customer_name, technician_name,
+                             service_notes, additional_info, report_date)
     
-    html = f"""
+    html = """
         <div class="info-box" id="info-servicio">
             <h2>Información del Servicio</h2>
             <table>
                 <tr><th>Campo</th><th>Valor</th></tr>
-                <tr><td><strong>Cliente</strong></td><td>{customer_name}</td></tr>
-                <tr><td><strong>Técnico</strong></td><td>{technician_name}</td></tr>
-                <tr><td><strong>Número de Serie</strong></td><td>{sensor_serial}</td></tr>
-                <tr><td><strong>Fecha del Informe</strong></td><td>{report_date}</td></tr>
     """
+    for key, value in rows.items():
+        html += f"<tr><td><strong>{key}</strong></td><td>{value}</td></tr>\n"
     
-    # Añadir información adicional si se proporciona
-    if additional_info:
-        for key, value in additional_info.items():
-            html += f"<tr><td><strong>{key}</strong></td><td>{value}</td></tr>\n"
-    
-    html += f"""
-                <tr><td><strong>Notas del Servicio</strong></td><td>{service_notes if service_notes else 'N/A'}</td></tr>
+    html += """
             </table>
         </div>
     """
@@ -432,6 +465,79 @@ def generate_service_info_section(sensor_serial: str, customer_name: str,
     return html
 
 
+# ============================================================================
+# SIDECAR JSON
+# ============================================================================
+
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def html_to_text(value) -> str:
+    """Texto plano de un valor que puede contener etiquetas HTML."""
+    return _HTML_TAG_RE.sub('', str(value)).strip()
+
+
+def _to_jsonable(value):
+    """Convierte tipos numpy/pandas a tipos JSON (NaN/inf -> None)."""
+    if isinstance(value, dict):
+        return {str(k): _to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray, pd.Series)):
+        return [_to_jsonable(v) for v in list(value)]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.isoformat()
+    return str(value)
+
+
+def generate_report_sidecar(report_type: str, summary: Dict = None, metrics: Dict = None,
+                            status: str = None, service_info: Dict = None,
+                            thresholds: Dict = None, tool_name: str = None) -> str:
+    """
+    Genera el bloque JSON legible por máquina que acompaña al informe.
+    
+    El consolidador lo lee directamente (sin recorrer tablas) y solo vuelve
+    al scraping del HTML para informes antiguos que no lo incluyen.
+    
+    Args:
+        report_type: 'baseline', 'validation', 'offset_adjustment',
+            'tsv_validation' o 'predictions'
+        summary: Vista resumida con la forma que devuelven los parsers del consolidador
+        metrics: Métricas numéricas del informe
+        status: Estado global del informe
+        service_info: Información de servicio/cliente (campo -> valor)
+        thresholds: Umbrales aplicados
+        tool_name: Herramienta que generó el informe
+        
+    Returns:
+        str: Elemento <script type="application/json"> con el sidecar
+    """
+    from app_config import VERSION, REPORT_SIDECAR
+    
+    payload = {
+        'schema': REPORT_SIDECAR['schema'],
+        'schema_version': REPORT_SIDECAR['schema_version'],
+        'report_type': report_type,
+        'generator': tool_name or 'NIR ServiceKit',
+        'app_version': VERSION,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'status': status,
+        'service_info': {k: html_to_text(v) for k, v in (service_info or {}).items()},
+        'thresholds': thresholds or {},
+        'metrics': metrics or {},
+        'summary': summary or {},
+    }
+    data = json.dumps(_to_jsonable(payload), ensure_ascii=False, separators=(',', ':'))
+    # Evitar que un valor con "</script>" cierre el bloque
+    data = data.replace('</', '<\\/')
+    return (f'<script type="application/json" id="{REPORT_SIDECAR["element_id"]}">'
+            f'{data}</script>\n')
+
+
 def generate_footer(tool_name: str = "NIR ServiceKit") -> str:
     """
     Genera el footer del informe.
@@ -574,6 +680,24 @@ def calculate_global_metrics(validation_data: List[Dict]) -> Dict:
 # FUNCIONES NUEVAS PARA AÑADIR AL FINAL DE report_utils.py
 # ============================================================================
 
+def client_info_rows(client_data: dict) -> Dict[str, str]:
+    """
+    Filas (campo -> valor) de la sección de información del cliente.
+    
+    Compartidas por la tabla HTML y el sidecar JSON del informe.
+    """
+    return {
+        'Cliente': client_data.get('client_name', 'N/A'),
+        'Contacto': client_data.get('contact_person', 'N/A'),
+        'Email': client_data.get('contact_email', 'N/A'),
+        'N/S Sensor': client_data.get('sensor_sn', 'N/A'),
+        'Modelo': client_data.get('equipment_model', 'N/A'),
+        'Técnico': client_data.get('technician', 'N/A'),
+        'Ubicación': client_data.get('location', 'N/A'),
+        'Fecha del Proceso': client_data.get('date', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+    }
+
+
 def generate_client_info_section(client_data: dict) -> str:
     """
     Genera sección de información del cliente (reutilizable en todos los informes).
@@ -587,21 +711,17 @@ def generate_client_info_section(client_data: dict) -> str:
     Returns:
         str: HTML de la sección de información del cliente
     """
-    from datetime import datetime
+    rows = '\n'.join(
+        f"                <tr><td><strong>{key}</strong></td><td>{value}</td></tr>"
+        for key, value in client_info_rows(client_data).items()
+    )
     
     html = f"""
         <div class="info-box" id="info-cliente">
             <h2>Información del Cliente</h2>
             <table>
                 <tr><th>Campo</th><th>Valor</th></tr>
-                <tr><td><strong>Cliente</strong></td><td>{client_data.get('client_name', 'N/A')}</td></tr>
-                <tr><td><strong>Contacto</strong></td><td>{client_data.get('contact_person', 'N/A')}</td></tr>
-                <tr><td><strong>Email</strong></td><td>{client_data.get('contact_email', 'N/A')}</td></tr>
-                <tr><td><strong>N/S Sensor</strong></td><td>{client_data.get('sensor_sn', 'N/A')}</td></tr>
-                <tr><td><strong>Modelo</strong></td><td>{client_data.get('equipment_model', 'N/A')}</td></tr>
-                <tr><td><strong>Técnico</strong></td><td>{client_data.get('technician', 'N/A')}</td></tr>
-                <tr><td><strong>Ubicación</strong></td><td>{client_data.get('location', 'N/A')}</td></tr>
-                <tr><td><strong>Fecha del Proceso</strong></td><td>{client_data.get('date', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))}</td></tr>
+{rows}
             </table>
         </div>
     """
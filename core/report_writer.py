@@ -0,0 +1,153 @@
+"""
+Report Writer - Sumidero de informes HTML
+==========================================
+Acumula el HTML de los informes como una lista de fragmentos en lugar de
+concatenar strings con ``html += ...``.
+
+Cada ``write`` añade una referencia al fragmento (sin copiarlo), de modo que
+insertar gráficos Plotly de varios MB no provoca copias cuadráticas. El
+documento completo solo se materializa una vez, al pedir ``getvalue()``, o
+se vuelca directamente a un fichero / buffer de bytes para las descargas.
+
+Usado por: report_generator, validation_kit_report_generator,
+offset_adjustment_report_generator, tsv_report_generator,
+utils.prediction_reports y ReportConsolidatorV2
+
+Author: Miquel
+Date: December 2024
+"""
+
+from contextlib import contextmanager
+from io import BytesIO
+from typing import BinaryIO, Iterator, List, Optional, Union
+
+
+class ReportWriter:
+    """
+    Buffer de informe HTML basado en lista de fragmentos.
+
+    Soporta ``writer += "<p>...</p>"`` para que las funciones de sección
+    mantengan la misma forma que con strings, y acepta otro ``ReportWriter``
+    (sus fragmentos se enlazan sin copiar su contenido).
+    """
+
+    def __init__(self, initial: Optional[Union[str, 'ReportWriter']] = None):
+        self._chunks: List[str] = []
+        self._length = 0
+        if initial:
+            self.write(initial)
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+    def write(self, content: Union[str, 'ReportWriter', None]) -> 'ReportWriter':
+        """
+        Añade un fragmento al informe.
+
+        Args:
+            content: String HTML u otro ReportWriter (se enlazan sus fragmentos)
+
+        Returns:
+            ReportWriter: El propio writer (permite encadenar llamadas)
+        """
+        if not content:
+            return self
+        if isinstance(content, ReportWriter):
+            self._chunks.extend(content._chunks)
+            self._length += content._length
+        else:
+            self._chunks.append(content)
+            self._length += len(content)
+        return self
+
+    def writelines(self, fragments) -> 'ReportWriter':
+        """Añade varios fragmentos en orden."""
+        for fragment in fragments:
+            self.write(fragment)
+        return self
+
+    def __iadd__(self, content: Union[str, 'ReportWriter']) -> 'ReportWriter':
+        return self.write(content)
+
+    def __add__(self, content: Union[str, 'ReportWriter']) -> 'ReportWriter':
+        return ReportWriter(self).write(content)
+
+    def __radd__(self, content: str) -> 'ReportWriter':
+        # Permite "<div>" + writer (y html_str += writer) sin copiar el writer
+        return ReportWriter(content).write(self)
+
+    @contextmanager
+    def section(self, opening: str, closing: str = "</div>"):
+        """
+        Context manager para secciones HTML con apertura y cierre.
+
+        Example:
+            >>> with writer.section('<div class="info-box" id="x">'):
+            ...     writer.write(chart_html)
+        """
+        self.write(opening)
+        yield self
+        self.write(closing)
+
+    # ------------------------------------------------------------------
+    # Lectura / salida
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        """Número de caracteres acumulados."""
+        return self._length
+
+    def __bool__(self) -> bool:
+        return self._length > 0
+
+    def __str__(self) -> str:
+        return self.getvalue()
+
+    def iter_chunks(self) -> Iterator[str]:
+        """Itera los fragmentos en orden, sin unirlos."""
+        return iter(self._chunks)
+
+    def getvalue(self) -> str:
+        """
+        Materializa el informe como un único string (una sola copia lineal).
+
+        Returns:
+            str: HTML completo
+        """
+        if len(self._chunks) > 1:
+            # Compactar: llamadas repetidas no vuelven a unir los fragmentos
+            self._chunks = [''.join(self._chunks)]
+        return self._chunks[0] if self._chunks else ''
+
+    def write_to(self, sink: BinaryIO, encoding: str = 'utf-8') -> int:
+        """
+        Vuelca el informe en un sumidero binario (fichero, ZIP, BytesIO).
+
+        Args:
+            sink: Objeto file-like abierto en modo binario
+            encoding: Codificación de texto
+
+        Returns:
+            int: Bytes escritos
+        """
+        written = 0
+        for chunk in self._chunks:
+            data = chunk.encode(encoding)
+            sink.write(data)
+            written += len(data)
+        return written
+
+    def to_bytesio(self, encoding: str = 'utf-8') -> BytesIO:
+        """
+        Codifica el informe en un BytesIO listo para ``st.download_button``.
+
+        Returns:
+            BytesIO: Buffer posicionado al inicio
+        """
+        buffer = BytesIO()
+        self.write_to(buffer, encoding)
+        buffer.seek(0)
+        return buffer
+
+    def to_bytes(self, encoding: str = 'utf-8') -> bytes:
+        """Codifica el informe a bytes sin construir el string intermedio."""
+        return self.to_bytesio(encoding).getvalue()
@@ -0,0 +1,178 @@
+"""
+COREF - Result Strings
+======================
+Parser vectorizado de las columnas multivalor de NIR-Online (``Result``,
+``Original``...), donde cada celda trae varios valores en un solo texto::
+
+    '>19.9 ; 13.6 ; 16,6% ; <0.1 ; -.- ; 100ppm'
+
+Toda la columna se procesa con operaciones ``.str`` de pandas, sin recorrer
+filas en Python:
+
+- el texto se parte por el separador y cada token queda identificado por
+  (fila, posición)
+- cada token se reconoce con una sola expresión regular: signo de censura
+  (``>`` / ``<``), número (punto o coma decimal, exponente opcional) y unidad
+  (``%``, ``ppm``...)
+- los tokens que no son un número (``-.-``, ``NA``, vacíos) quedan como NaN
+- con ``embedded=True``, a esos tokens se les extrae el primer número que
+  contengan (``Outlier (16)`` -> 16, ``LOTE-2025-MAIZ-042`` -> -2025), como
+  hacía el parser antiguo de muestras de control; la máscara ``embedded``
+  los distingue de los valores reconocidos
+
+El resultado son tablas alineadas (filas del original x posición): el valor
+numérico, la censura (+1 ``>``, -1 ``<``, 0 sin censura), la unidad y la
+máscara ``embedded``. Los valores censurados conservan su límite como valor:
+cada consumidor decide si los usa o los descarta con la máscara ``censored``.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Token: [censura] número [unidad]
+TOKEN_PATTERN = (
+    r"^\s*(?P<censor>[<>])?\s*"
+    r"(?P<number>[-+]?(?:\d+(?:[.,]\d*)?|[.,]\d+)(?:[eE][-+]?\d+)?)"
+    r"\s*(?P<unit>[^\d\s]*)\s*$"
+)
+
+# Primer número dentro de un texto que no es un token válido ('Outlier (16)')
+EMBEDDED_NUMBER_PATTERN = r"([-+]?\d+(?:[.,]\d+)?)"
+
+_CENSOR_CODES = {'>': 1, '<': -1}
+
+
+@dataclass
+class ParsedValues:
+    """
+    Valores de una columna multivalor, por fila y posición.
+
+    Attributes:
+        values: float64 (NaN si el token falta o no es numérico)
+        censor: int8 (+1 ``>``, -1 ``<``, 0 sin censura)
+        units: Unidad de cada token (None si no tiene)
+        embedded: bool (valor extraído de un texto no numérico, p. ej.
+            ``Outlier (16)``; solo con ``embedded=True``)
+
+    Las cuatro tablas comparten el índice de la columna original y tienen una
+    columna por posición (0, 1, ...).
+    """
+    values: pd.DataFrame
+    censor: pd.DataFrame
+    units: pd.DataFrame
+    embedded: pd.DataFrame
+
+    @property
+    def censored(self) -> pd.DataFrame:
+        """Máscara de valores censurados (``>`` o ``<``)."""
+        return self.censor != 0
+
+    @property
+    def width(self) -> int:
+        """Número de posiciones (valores de la fila más larga)."""
+        return self.values.shape[1]
+
+
+def parse_value_tokens(tokens: pd.Series, embedded: bool = False) -> pd.DataFrame:
+    """
+    Reconoce tokens sueltos (un valor por elemento).
+
+    Args:
+        tokens: Serie de textos
+        embedded: Extraer el primer número de los tokens no reconocidos
+
+    Returns:
+        DataFrame alineado con ``tokens``: value (float64), censor (int8),
+        unit (texto o None) y embedded (bool)
+    """
+    text = tokens.astype('str')
+    parts = text.str.extract(TOKEN_PATTERN)
+    number = parts['number'].str.replace(',', '.', regex=False)
+    value = pd.to_numeric(number, errors='coerce').astype(np.float64)
+    unit = parts['unit'].astype(object)
+
+    found = np.zeros(len(tokens), dtype=bool)
+    if embedded:
+        missing = value.isna() & text.notna()
+        if missing.any():
+            loose = text[missing].str.replace(r'[<>]', '', regex=True).str.extract(EMBEDDED_NUMBER_PATTERN)[0]
+            loose = pd.to_numeric(loose.str.replace(',', '.', regex=False), errors='coerce')
+            value = value.copy()
+            value[missing] = loose.to_numpy(dtype=np.float64)
+            found = (missing & value.notna()).to_numpy()
+
+    return pd.DataFrame({
+        'value': value,
+        'censor': parts['censor'].map(_CENSOR_CODES).fillna(0).astype(np.int8),
+        'unit': unit.where(unit.notna() & (unit != ''), None),
+        'embedded': found,
+    }, index=tokens.index)
+
+
+def parse_multi_values(series: pd.Series, sep: Optional[str] = ';',
+                       skip_empty: bool = False, embedded: bool = False) -> ParsedValues:
+    """
+    Parte y convierte una columna de valores múltiples.
+
+    Args:
+        series: Columna original (texto; las columnas ya numéricas se
+            devuelven tal cual, sin censura ni unidades)
+        sep: Separador (expresión regular, p. ej. ``'[;,]'``); None si cada
+            celda tiene un solo valor
+        skip_empty: Si True, los tokens vacíos no ocupan posición
+            ('1;;2' -> posiciones 0 y 1); si False la posición es la del
+            token en el texto
+        embedded: Extraer el primer número de los tokens no reconocidos
+            (``Outlier (16)``); quedan marcados en ``embedded``
+
+    Returns:
+        ParsedValues
+    """
+    n = len(series)
+    if sep is None and pd.api.types.is_numeric_dtype(series.dtype):
+        values = pd.DataFrame({0: series.to_numpy(dtype=np.float64)}, index=series.index)
+        return ParsedValues(
+            values=values,
+            censor=pd.DataFrame({0: np.zeros(n, dtype=np.int8)}, index=series.index),
+            units=pd.DataFrame({0: np.full(n, None, dtype=object)}, index=series.index),
+            embedded=pd.DataFrame({0: np.zeros(n, dtype=bool)}, index=series.index),
+        )
+
+    # Un token por elemento, con la fila (posición en la serie) como índice
+    text = series.astype('str').reset_index(drop=True)
+    tokens = text if sep is None else text.str.split(sep, regex=True).explode()
+    tokens = tokens.str.strip()
+    position = tokens.groupby(level=0).cumcount().to_numpy()
+
+    keep = tokens.notna().to_numpy()
+    if skip_empty:
+        keep = keep & (tokens != '').to_numpy()
+    tokens, position = tokens[keep], position[keep]
+    if skip_empty:
+        position = tokens.groupby(level=0).cumcount().to_numpy()
+
+    rows = tokens.index.to_numpy()
+    parsed = parse_value_tokens(tokens.reset_index(drop=True), embedded=embedded)
+    width = int(position.max()) + 1 if len(position) else 0
+    if sep is None:
+        width = 1
+
+    values = np.full((n, width), np.nan)
+    censor = np.zeros((n, width), dtype=np.int8)
+    units = np.full((n, width), None, dtype=object)
+    found = np.zeros((n, width), dtype=bool)
+    values[rows, position] = parsed['value'].to_numpy()
+    censor[rows, position] = parsed['censor'].to_numpy()
+    units[rows, position] = parsed['unit'].to_numpy()
+    found[rows, position] = parsed['embedded'].to_numpy()
+
+    columns = pd.RangeIndex(width)
+    return ParsedValues(
+        values=pd.DataFrame(values, index=series.index, columns=columns),
+        censor=pd.DataFrame(censor, index=series.index, columns=columns),
+        units=pd.DataFrame(units, index=series.index, columns=columns, dtype=object),
+        embedded=pd.DataFrame(found, index=series.index, columns=columns),
+    )
@@ -9,6 +9,8 @@ FIXES (filtros + cloud + plotly_events):
 - extract_row_index_from_click: prioriza event["customdata"] y soporta pointIndex
 - extract_row_indices_*: fallback usa pointIndex si pointNumber no está
 - Todo defensivo y JSON-safe
+- Parity box/lasso: la geometría de la selección se resuelve en servidor con
+  un índice espacial (core.spatial_index) en lugar de punto a punto
 """
 
 from __future__ import annotations
@@ -17,6 +19,7 @@ from typing import List, Optional, Any, Tuple
 import json
 import hashlib
 
+import numpy as np
 import plotly.graph_objects as go
 
 
@@ -241,6 +244,55 @@ def extract_row_indices_from_parity_events(fig: go.Figure, events: List[dict]) -
     return _remove_duplicates_preserve_order(indices)
 
 
+# -----------------------------------------------------------------------------
+# Box / lasso resueltos en servidor (parity)
+# -----------------------------------------------------------------------------
+def create_selection_id(selection: Optional[dict]) -> str:
+    """
+    ID estable de una selección box/lasso de st.plotly_chart (solo geometría).
+    Devuelve "" si no hay box ni lasso.
+    """
+    if not selection:
+        return ""
+    shapes = {
+        "box": [[list(b.get("x", [])), list(b.get("y", []))] for b in selection.get("box", []) or []],
+        "lasso": [[list(l.get("x", [])), list(l.get("y", []))] for l in selection.get("lasso", []) or []],
+    }
+    if not shapes["box"] and not shapes["lasso"]:
+        return ""
+    s = json.dumps(shapes, ensure_ascii=True, sort_keys=True)
+    return hashlib.md5(s.encode("utf-8")).hexdigest()[:16]
+
+
+def extract_row_indices_from_parity_selection(spatial_index, selection: Optional[dict]) -> List[int]:
+    """
+    Resuelve una selección box/lasso del parity con el índice espacial del
+    parámetro, sin recorrer los puntos que devuelve el cliente.
+
+    Args:
+        spatial_index: GridIndex sobre (Reference, Result) con RowIndex como id
+        selection: ``event.selection`` de st.plotly_chart (claves "box"/"lasso")
+
+    Returns:
+        RowIndex seleccionados (sin duplicados, orden de consulta)
+    """
+    if not selection or spatial_index is None:
+        return []
+
+    found = []
+    for box in selection.get("box", []) or []:
+        xs, ys = box.get("x", []), box.get("y", [])
+        if len(xs) >= 2 and len(ys) >= 2:
+            found.append(spatial_index.query_box((min(xs), max(xs)), (min(ys), max(ys))))
+    for lasso in selection.get("lasso", []) or []:
+        found.append(spatial_index.query_polygon(lasso.get("x", []), lasso.get("y", [])))
+
+    if not found:
+        return []
+    ids = [_safe_int(v) for v in np.concatenate(found).tolist()]
+    return _remove_duplicates_preserve_order([i for i in ids if i is not None])
+
+
 # -----------------------------------------------------------------------------
 # Validation
 # -----------------------------------------------------------------------------
@@ -0,0 +1,247 @@
+"""
+COREF - Session Memory
+======================
+Contabilidad aproximada de la memoria que ocupa ``st.session_state`` y
+política de liberación bajo un presupuesto (``SESSION_MEMORY``).
+
+- ``estimate_size``: bytes aproximados de un objeto (DataFrames con
+  ``memory_usage(deep=True)``, arrays con ``nbytes``, contenedores y objetos
+  recorridos recursivamente sin contar dos veces el mismo objeto)
+- ``session_memory_report``: tabla por clave de session_state
+- ``enforce_memory_budget``: si el total supera el presupuesto, aplica la
+  acción configurada (spill / evict / clear) a las claves con política,
+  empezando por las que llevan más tiempo sin cambiar
+
+No se rastrean lecturas: la "temperatura" de una clave es el tiempo desde
+que se le asignó un objeto nuevo por última vez.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import weakref
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from app_config import SESSION_MEMORY
+
+_TRACKER_KEY = '_session_memory_tracker'
+_MAX_DEPTH = 8
+
+
+# ============================================================================
+# TAMAÑO APROXIMADO
+# ============================================================================
+
+def estimate_size(obj: Any, _seen: Optional[set] = None, _depth: int = 0) -> int:
+    """
+    Bytes aproximados que retiene ``obj``.
+
+    Args:
+        obj: Objeto a medir
+
+    Returns:
+        int: Tamaño estimado en bytes
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(index=True, deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+        return sys.getsizeof(obj)
+    if isinstance(obj, SpilledText):
+        return sys.getsizeof(obj.path)
+    if _depth >= _MAX_DEPTH:
+        return sys.getsizeof(obj)
+
+    nbytes = getattr(type(obj), 'nbytes', None)
+    if nbytes is not None and not callable(nbytes):
+        # Propiedad nbytes propia (SelectionHistory, SelectionState...)
+        try:
+            return int(obj.nbytes)
+        except Exception:
+            pass
+
+    if isinstance(obj, Mapping):
+        return sys.getsizeof(obj) + sum(
+            estimate_size(k, _seen, _depth + 1) + estimate_size(v, _seen, _depth + 1)
+            for k, v in list(obj.items())
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(estimate_size(v, _seen, _depth + 1) for v in list(obj))
+    if hasattr(obj, 'to_plotly_json'):
+        return estimate_size(obj.to_plotly_json(), _seen, _depth + 1)
+    if hasattr(obj, '__dict__'):
+        return sys.getsizeof(obj) + estimate_size(vars(obj), _seen, _depth + 1)
+    return sys.getsizeof(obj)
+
+
+def format_bytes(n: int) -> str:
+    """Tamaño legible (KB/MB/GB)."""
+    for unit in ('B', 'KB', 'MB'):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.2f} GB"
+
+
+# ============================================================================
+# SPILL A DISCO
+# ============================================================================
+
+class SpilledText:
+    """Texto grande (p. ej. HTML de un informe) volcado a un fichero temporal."""
+
+    def __init__(self, text: str):
+        fd, self.path = tempfile.mkstemp(prefix='coref_spill_', suffix='.txt')
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            fh.write(text)
+        self.length = len(text)
+        weakref.finalize(self, _remove_quietly, self.path)
+
+    def load(self) -> str:
+        with open(self.path, encoding='utf-8') as fh:
+            return fh.read()
+
+    def __bool__(self) -> bool:
+        return self.length > 0
+
+    def __len__(self) -> int:
+        return self.length
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def load_session_value(key: str, default: Any = None) -> Any:
+    """``st.session_state.get`` que recupera de disco los valores volcados."""
+    value = st.session_state.get(key, default)
+    return value.load() if isinstance(value, SpilledText) else value
+
+
+# ============================================================================
+# CONTABILIDAD Y PRESUPUESTO
+# ============================================================================
+
+def _tracker(state) -> Dict[str, tuple]:
+    if _TRACKER_KEY not in state:
+        state[_TRACKER_KEY] = {}
+    return state[_TRACKER_KEY]
+
+
+def _touch(state) -> Dict[str, float]:
+    """Actualiza la última asignación de cada clave; devuelve su antigüedad (s)."""
+    tracker = _tracker(state)
+    now = time.time()
+    ages = {}
+    for key in list(state.keys()):
+        if key == _TRACKER_KEY:
+            continue
+        ident = id(state[key])
+        seen = tracker.get(key)
+        if seen is None or seen[0] != ident:
+            tracker[key] = seen = (ident, now)
+        ages[key] = now - seen[1]
+    for key in [k for k in tracker if k and k not in ages]:
+        del tracker[key]
+    return ages
+
+
+def session_memory_report(state=None) -> pd.DataFrame:
+    """
+    Tamaño aproximado de cada clave de session_state.
+
+    Returns:
+        DataFrame (key, type, bytes, age_s, policy) ordenado por tamaño
+    """
+    state = st.session_state if state is None else state
+    ages = _touch(state)
+    policies = SESSION_MEMORY.get('policies', {})
+    rows = [
+        {
+            'key': key,
+            'type': type(state[key]).__name__,
+            'bytes': estimate_size(state[key]),
+            'age_s': round(ages[key], 1),
+            'policy': policies.get(key, ''),
+        }
+        for key in ages
+    ]
+    report = pd.DataFrame(rows, columns=['key', 'type', 'bytes', 'age_s', 'policy'])
+    return report.sort_values('bytes', ascending=False, ignore_index=True)
+
+
+def _apply_policy(state, key: str, action: str) -> bool:
+    value = state[key]
+    if action == 'spill':
+        if not isinstance(value, str) or not value:
+            return False
+        state[key] = SpilledText(value)
+    elif action == 'evict':
+        del state[key]
+    elif action == 'clear':
+        clear = getattr(value, 'invalidate', None) or getattr(value, 'clear', None)
+        if clear is None:
+            return False
+        clear()
+    else:
+        return False
+    return True
+
+
+def enforce_memory_budget(state=None, budget_bytes: Optional[int] = None,
+                          force: bool = False) -> List[str]:
+    """
+    Libera memoria si la sesión supera el presupuesto.
+
+    Se llama al inicio de cada ejecución (``initialize_session_state`` /
+    ``initialize_tsv_session_state``), pero mide como mucho una vez cada
+    ``SESSION_MEMORY['check_interval_s']`` segundos salvo ``force``.
+
+    Args:
+        state: session_state (por defecto ``st.session_state``)
+        budget_bytes: Presupuesto; por defecto ``SESSION_MEMORY['budget_bytes']``
+        force: Comprobar aunque no haya pasado el intervalo
+
+    Returns:
+        Lista de "clave:acción" aplicadas (vacía si no hizo falta)
+    """
+    state = st.session_state if state is None else state
+    tracker = _tracker(state)
+    now = time.time()
+    if not force and now - tracker.get('', (None, 0.0))[1] < SESSION_MEMORY.get('check_interval_s', 0):
+        return []
+    tracker[''] = (None, now)
+
+    budget = SESSION_MEMORY['budget_bytes'] if budget_bytes is None else budget_bytes
+    report = session_memory_report(state)
+    total = int(report['bytes'].sum())
+    if total <= budget:
+        return []
+
+    applied = []
+    candidates = report[report['policy'] != ''].sort_values('age_s', ascending=False)
+    for key, size, action in zip(candidates['key'], candidates['bytes'], candidates['policy']):
+        if total <= budget:
+            break
+        if _apply_policy(state, key, action):
+            after = estimate_size(state[key]) if key in state else 0
+            total -= size - after
+            applied.append(f"{key}:{action}")
+    return applied
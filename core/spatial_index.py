@@ -0,0 +1,128 @@
+"""
+COREF - Spatial Index
+=====================
+Índice espacial en rejilla para resolver en servidor las selecciones
+box/lasso de los gráficos de dispersión (parity Reference vs Result).
+
+El cliente solo envía el rectángulo o el polígono del lasso; los puntos
+candidatos salen de las celdas de la rejilla que cubren su bounding box y
+el test punto-en-polígono se hace vectorizado con NumPy.
+"""
+
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+
+def points_in_polygon(x: np.ndarray, y: np.ndarray,
+                      poly_x: Sequence[float], poly_y: Sequence[float]) -> np.ndarray:
+    """
+    Máscara de los puntos dentro de un polígono (regla par-impar, ray casting).
+
+    Args:
+        x, y: Coordenadas de los puntos
+        poly_x, poly_y: Vértices del polígono (cerrado implícitamente)
+
+    Returns:
+        Array bool de longitud len(x)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    px = np.asarray(poly_x, dtype=float)
+    py = np.asarray(poly_y, dtype=float)
+
+    inside = np.zeros(len(x), dtype=bool)
+    if len(px) < 3:
+        return inside
+
+    # Un paso por arista, vectorizado sobre todos los puntos
+    qx, qy = np.roll(px, 1), np.roll(py, 1)
+    for x1, y1, x2, y2 in zip(px, py, qx, qy):
+        crosses = (y1 > y) != (y2 > y)
+        if not crosses.any():
+            continue
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= crosses & (x < x_cross)
+    return inside
+
+
+class GridIndex:
+    """
+    Rejilla uniforme sobre un conjunto de puntos 2D.
+
+    Los puntos se ordenan por celda (fila mayor), de modo que las celdas de
+    una fila de la rejilla ocupan un tramo contiguo y una consulta por
+    rectángulo recorre solo una fila de celdas a la vez.
+
+    Args:
+        x, y: Coordenadas (se ignoran los puntos no finitos)
+        ids: Identificador de cada punto (p. ej. RowIndex); por defecto la posición
+        points_per_cell: Ocupación media objetivo por celda
+    """
+
+    def __init__(self, x: Iterable[float], y: Iterable[float],
+                 ids: Optional[Iterable] = None, points_per_cell: int = 8):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        ids = np.arange(len(x)) if ids is None else np.asarray(ids)
+
+        finite = np.isfinite(x) & np.isfinite(y)
+        self.x, self.y, self.ids = x[finite], y[finite], ids[finite]
+        n = len(self.x)
+
+        side = max(1, int(np.sqrt(n / max(points_per_cell, 1))))
+        self.nx = self.ny = side
+        if n:
+            self.x0, self.x1 = float(self.x.min()), float(self.x.max())
+            self.y0, self.y1 = float(self.y.min()), float(self.y.max())
+        else:
+            self.x0 = self.x1 = self.y0 = self.y1 = 0.0
+        self.cw = (self.x1 - self.x0) / self.nx or 1.0
+        self.ch = (self.y1 - self.y0) / self.ny or 1.0
+
+        cells = self._cell_y(self.y) * self.nx + self._cell_x(self.x)
+        order = np.argsort(cells, kind="stable")
+        self.x, self.y, self.ids = self.x[order], self.y[order], self.ids[order]
+        # Inicio de cada celda en el orden anterior (nx*ny + 1 fronteras)
+        self.cell_start = np.searchsorted(cells[order], np.arange(self.nx * self.ny + 1))
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def _cell_x(self, x) -> np.ndarray:
+        return np.clip(((np.asarray(x) - self.x0) / self.cw).astype(int), 0, self.nx - 1)
+
+    def _cell_y(self, y) -> np.ndarray:
+        return np.clip(((np.asarray(y) - self.y0) / self.ch).astype(int), 0, self.ny - 1)
+
+    def _candidates(self, x_min: float, x_max: float, y_min: float, y_max: float) -> np.ndarray:
+        """Posiciones de los puntos en las celdas que tocan el rectángulo."""
+        if not len(self) or x_max < self.x0 or x_min > self.x1 or y_max < self.y0 or y_min > self.y1:
+            return np.array([], dtype=np.intp)
+        cx0, cx1 = int(self._cell_x(x_min)), int(self._cell_x(x_max))
+        cy0, cy1 = int(self._cell_y(y_min)), int(self._cell_y(y_max))
+        spans = [
+            np.arange(self.cell_start[cy * self.nx + cx0], self.cell_start[cy * self.nx + cx1 + 1])
+            for cy in range(cy0, cy1 + 1)
+        ]
+        return np.concatenate(spans) if spans else np.array([], dtype=np.intp)
+
+    def query_box(self, x_range: Sequence[float], y_range: Sequence[float]) -> np.ndarray:
+        """Ids de los puntos dentro del rectángulo (bordes incluidos)."""
+        x_min, x_max = sorted(x_range)
+        y_min, y_max = sorted(y_range)
+        pos = self._candidates(x_min, x_max, y_min, y_max)
+        xs, ys = self.x[pos], self.y[pos]
+        hit = (xs >= x_min) & (xs <= x_max) & (ys >= y_min) & (ys <= y_max)
+        return self.ids[pos[hit]]
+
+    def query_polygon(self, poly_x: Sequence[float], poly_y: Sequence[float]) -> np.ndarray:
+        """Ids de los puntos dentro del polígono (lasso)."""
+        poly_x = np.asarray(poly_x, dtype=float)
+        poly_y = np.asarray(poly_y, dtype=float)
+        if len(poly_x) < 3:
+            return self.ids[:0]
+        pos = self._candidates(poly_x.min(), poly_x.max(), poly_y.min(), poly_y.max())
+        hit = points_in_polygon(self.x[pos], self.y[pos], poly_x, poly_y)
+        return self.ids[pos[hit]]
@@ -0,0 +1,134 @@
+"""
+COREF - Spectra Decimation
+==========================
+Reducción de puntos en servidor para dibujar muchos espectros a la vez sin
+que el navegador (ni los eventos de plotly_events) tengan que manejar la
+resolución completa.
+
+- ``minmax_decimate``: para las líneas. Conserva el mínimo y el máximo de
+  cada bucket de píxeles, de modo que picos y valles siguen visibles.
+- ``lttb_indices``: para los puntos seleccionables. Largest-Triangle-
+  Three-Buckets elige puntos reales del espectro (no promedios), así un
+  click o un lasso cae siempre sobre un valor medido.
+
+Todas las funciones trabajan sobre matrices (muestras × píxeles) y están
+vectorizadas por filas.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def window_slice(x: np.ndarray, x_range: Optional[Sequence[float]] = None) -> slice:
+    """
+    Columnas de ``x`` (ordenado ascendente) dentro de la ventana visible.
+
+    Args:
+        x: Eje X (píxeles)
+        x_range: (x_min, x_max) inclusivo; None = todo
+
+    Returns:
+        slice sobre las columnas
+    """
+    if x_range is None:
+        return slice(0, len(x))
+    lo = int(np.searchsorted(x, x_range[0], side="left"))
+    hi = int(np.searchsorted(x, x_range[1], side="right"))
+    return slice(lo, max(hi, lo))
+
+
+def minmax_decimate(x: np.ndarray, Y: np.ndarray, n_buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decimación min/max por bucket de píxeles.
+
+    Cada bucket aporta dos puntos (en el orden en que aparecen el mínimo y el
+    máximo de cada fila), situados en el primer y último píxel del bucket.
+
+    Args:
+        x: Eje X (n,)
+        Y: Matriz (filas, n); se admiten NaN
+        n_buckets: Número de buckets (la salida tiene 2 * n_buckets columnas)
+
+    Returns:
+        (x_out, Y_out): eje X decimado y matriz (filas, 2 * buckets)
+    """
+    x = np.asarray(x)
+    Y = np.asarray(Y, dtype=float)
+    n = Y.shape[1]
+    if n_buckets <= 0 or n <= 2 * n_buckets:
+        return x, Y
+
+    width = int(np.ceil(n / n_buckets))
+    nb = int(np.ceil(n / width))
+    padded = np.full((Y.shape[0], nb * width), np.nan)
+    padded[:, :n] = Y
+    blocks = padded.reshape(Y.shape[0], nb, width)
+
+    nan = np.isnan(blocks)
+    arg_min = np.where(nan, np.inf, blocks).argmin(axis=2)
+    arg_max = np.where(nan, -np.inf, blocks).argmax(axis=2)
+    v_min = np.take_along_axis(blocks, arg_min[..., None], axis=2)[..., 0]
+    v_max = np.take_along_axis(blocks, arg_max[..., None], axis=2)[..., 0]
+
+    min_first = arg_min <= arg_max
+    Y_out = np.empty((Y.shape[0], 2 * nb))
+    Y_out[:, 0::2] = np.where(min_first, v_min, v_max)
+    Y_out[:, 1::2] = np.where(min_first, v_max, v_min)
+
+    starts = np.arange(nb) * width
+    ends = np.minimum(starts + width - 1, n - 1)
+    x_out = np.empty(2 * nb, dtype=x.dtype)
+    x_out[0::2] = x[starts]
+    x_out[1::2] = x[ends]
+    return x_out, Y_out
+
+
+def lttb_indices(x: np.ndarray, Y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Índices de columna elegidos por LTTB para cada fila.
+
+    Args:
+        x: Eje X (n,)
+        Y: Matriz (filas, n); los NaN se sustituyen por la media de la fila
+        n_out: Puntos por fila (incluye el primero y el último)
+
+    Returns:
+        Array (filas, n_out) de índices de columna, crecientes por fila
+    """
+    x = np.asarray(x, dtype=float)
+    Y = np.asarray(Y, dtype=float)
+    rows, n = Y.shape
+    if n_out >= n or n_out < 3:
+        return np.tile(np.arange(n), (rows, 1))
+
+    if np.isnan(Y).any():
+        fill = np.nanmean(np.where(np.isnan(Y).all(axis=1, keepdims=True), 0.0, Y), axis=1)
+        Y = np.where(np.isnan(Y), np.nan_to_num(fill)[:, None], Y)
+
+    # Buckets interiores: [edges[i], edges[i+1]) entre el primer y el último punto
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+
+    out = np.empty((rows, n_out), dtype=np.intp)
+    out[:, 0] = 0
+    out[:, -1] = n - 1
+    r = np.arange(rows)
+    a = np.zeros(rows, dtype=np.intp)
+
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo = hi
+        nhi = edges[i + 2] if i + 2 < len(edges) else n
+        cx = x[nlo:nhi].mean()
+        cy = Y[:, nlo:nhi].mean(axis=1)
+
+        ax = x[a]
+        ay = Y[r, a]
+        bx = x[lo:hi]
+        by = Y[:, lo:hi]
+        area = np.abs((ax - cx)[:, None] * (by - ay[:, None])
+                      - (ax[:, None] - bx[None, :]) * (cy - ay)[:, None])
+        a = lo + area.argmax(axis=1)
+        out[:, i + 1] = a
+
+    return out
@@ -0,0 +1,225 @@
+"""
+COREF - Spectral Workspace
+==========================
+Registro de archivos cargados compartido por todas las páginas de la sesión.
+
+Cada archivo se parsea una sola vez y queda identificado por un handle
+estable derivado de su contenido (``<tipo>:<hash>``): volver a subir el mismo
+TSV en otra herramienta (Validation Standards, Offset Adjustment, Comparación
+de Espectros, Baseline, TSV Validation Reports) reutiliza el DataFrame ya
+parseado en lugar de leerlo y duplicarlo de nuevo.
+
+Las páginas reciben vistas (copias superficiales) del dataset: comparten los
+datos con el registro y deben tratarlos como de solo lectura (con pandas >= 3
+y Copy-on-Write cualquier escritura crea su propia copia).
+
+Si ``SHARED_DATASET_CACHE`` está activa, el DataFrame parseado sale de la
+caché del proceso (``core.dataset_cache``) y se comparte también con las
+demás sesiones que carguen el mismo contenido.
+"""
+
+import hashlib
+import io
+import weakref
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+import streamlit as st
+
+from core import file_handlers, tsv_processing
+from core.dataset_cache import get_shared_dataset_cache
+
+# Sin Copy-on-Write una vista superficial podría escribir en los datos
+# compartidos: en ese caso las páginas reciben copias completas
+_COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3 or bool(pd.options.mode.copy_on_write)
+
+
+# Tipo de dataset -> (parser, función de columnas espectrales)
+PARSERS: Dict[str, Tuple[Callable, Callable]] = {
+    # TSV tal cual (load_tsv_file): Baseline, Validation Standards, Offset, Comparación
+    'tsv': (file_handlers.load_tsv_file, file_handlers.get_spectral_columns),
+    # TSV limpiado para informes (clean_tsv_file): TSV Validation Reports
+    'tsv_clean': (tsv_processing.clean_tsv_file, tsv_processing.get_spectral_columns),
+}
+
+
+@dataclass
+class WorkspaceDataset:
+    """Archivo parseado registrado en el workspace."""
+    handle: str
+    name: str
+    kind: str
+    df: pd.DataFrame
+    spectral_cols: List[str]
+    nbytes: int
+    loaded_at: datetime = field(default_factory=datetime.now)
+
+    def view(self) -> pd.DataFrame:
+        """Vista del DataFrame (comparte los datos; copia completa sin Copy-on-Write)."""
+        return self.df.copy(deep=not _COPY_ON_WRITE)
+
+    @property
+    def label(self) -> str:
+        return f"{self.name} ({len(self.df)} filas)"
+
+
+def _read_bytes(file) -> bytes:
+    """Contenido completo de un archivo subido (deja el cursor al inicio)."""
+    if hasattr(file, 'getvalue'):
+        raw = file.getvalue()
+    else:
+        file.seek(0)
+        raw = file.read()
+        file.seek(0)
+    if isinstance(raw, str):
+        raw = raw.encode('utf-8')
+    return raw
+
+
+def content_handle(raw: bytes, kind: str) -> str:
+    """Handle estable de un contenido para un tipo de parser."""
+    return f"{kind}:{hashlib.blake2b(raw, digest_size=8).hexdigest()}"
+
+
+def _parse_sized(parser: Callable, buffer) -> Tuple[pd.DataFrame, int]:
+    df = parser(buffer)
+    return df, int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _release_all(shared, handles: set) -> None:
+    for handle in list(handles):
+        shared.release(handle)
+    handles.clear()
+
+
+class SpectralWorkspace:
+    """Registro de datasets de la sesión, indexado por handle."""
+
+    def __init__(self):
+        self._datasets: Dict[str, WorkspaceDataset] = {}
+        self.hits = 0
+        self.misses = 0
+        # Handles adquiridos en la caché compartida; se liberan al quitar el
+        # dataset o cuando la sesión (y con ella el workspace) desaparece
+        self._shared = get_shared_dataset_cache()
+        self._acquired: set = set()
+        if self._shared is not None:
+            weakref.finalize(self, _release_all, self._shared, self._acquired)
+
+    def __len__(self) -> int:
+        return len(self._datasets)
+
+    def __iter__(self) -> Iterator[WorkspaceDataset]:
+        return iter(list(self._datasets.values()))
+
+    def __contains__(self, handle: str) -> bool:
+        return handle in self._datasets
+
+    @property
+    def nbytes(self) -> int:
+        return sum(ds.nbytes for ds in self._datasets.values())
+
+    def open_file(self, file, kind: str = 'tsv') -> WorkspaceDataset:
+        """
+        Registra un archivo subido (o devuelve el ya registrado con el mismo
+        contenido).
+
+        Args:
+            file: Archivo subido por Streamlit (o cualquier objeto tipo archivo)
+            kind: Tipo de parser (ver ``PARSERS``)
+
+        Returns:
+            WorkspaceDataset
+
+        Raises:
+            ValueError: Si el parser no puede leer el archivo
+        """
+        parser, spectral_columns = PARSERS[kind]
+        raw = _read_bytes(file)
+        handle = content_handle(raw, kind)
+
+        dataset = self._datasets.get(handle)
+        if dataset is not None:
+            self.hits += 1
+            return dataset
+
+        self.misses += 1
+        buffer = io.BytesIO(raw)
+        buffer.name = getattr(file, 'name', handle)
+        if self._shared is None:
+            df = parser(buffer)
+        else:
+            df = self._shared.acquire(handle, lambda: _parse_sized(parser, buffer))
+            self._acquired.add(handle)
+        dataset = WorkspaceDataset(
+            handle=handle,
+            name=buffer.name,
+            kind=kind,
+            df=df,
+            spectral_cols=list(spectral_columns(df)),
+            nbytes=int(df.memory_usage(index=True, deep=True).sum()),
+        )
+        self._datasets[handle] = dataset
+        return dataset
+
+    def get(self, handle: str) -> Optional[WorkspaceDataset]:
+        return self._datasets.get(handle)
+
+    def datasets(self, kind: Optional[str] = None) -> List[WorkspaceDataset]:
+        """Datasets registrados (del más reciente al más antiguo)."""
+        found = [ds for ds in self._datasets.values() if kind is None or ds.kind == kind]
+        return sorted(found, key=lambda ds: ds.loaded_at, reverse=True)
+
+    def remove(self, handle: str) -> None:
+        self._datasets.pop(handle, None)
+        if handle in self._acquired:
+            self._acquired.discard(handle)
+            self._shared.release(handle)
+
+    def clear(self) -> None:
+        self._datasets.clear()
+        if self._shared is not None:
+            _release_all(self._shared, self._acquired)
+
+    def stats(self) -> dict:
+        return {
+            'datasets': len(self._datasets),
+            'bytes': self.nbytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+# =============================================================================
+# ACCESO DESDE LAS PÁGINAS
+# =============================================================================
+
+def get_workspace() -> SpectralWorkspace:
+    """Workspace de la sesión (se crea la primera vez)."""
+    if 'spectral_workspace' not in st.session_state:
+        st.session_state.spectral_workspace = SpectralWorkspace()
+    return st.session_state.spectral_workspace
+
+
+def open_dataset(source: Union[WorkspaceDataset, object], kind: str = 'tsv') -> WorkspaceDataset:
+    """Dataset de un archivo subido o de una selección del workspace."""
+    if isinstance(source, WorkspaceDataset):
+        return source
+    return get_workspace().open_file(source, kind)
+
+
+def open_tsv(source: Union[WorkspaceDataset, object], kind: str = 'tsv') -> pd.DataFrame:
+    """
+    Sustituto de ``load_tsv_file`` / ``clean_tsv_file`` respaldado por el
+    workspace: parsea solo la primera vez que se ve un contenido.
+
+    Args:
+        source: Archivo subido por Streamlit o WorkspaceDataset
+        kind: Tipo de parser (ver ``PARSERS``)
+
+    Returns:
+        pd.DataFrame: Vista del dataset
+    """
+    return open_dataset(source, kind).view()
@@ -0,0 +1,186 @@
+"""
+COREF - TSV Preview Figure Cache
+================================
+Caché por sesión de las figuras de previsualización de TSV Validation Reports
+(espectros y parity/residuum/histograma).
+
+Dos niveles de clave:
+
+- Clave de datos: (archivo, versión de datos, filtro visual, parámetro,
+  filas en vista). Si cambia, se reconstruye la base de la figura
+  (conversión a listas Python, customdata, hover...).
+- Clave de estilo: versión del editor (cambia con cada edición de la
+  selección), etiquetas de grupo y configuración de grupos. Si solo cambia
+  esta, se reutiliza la base: se re-estilan las trazas existentes o se
+  reparten de nuevo las muestras entre las trazas de cada grupo.
+
+Con ambas claves iguales (rerun provocado por otro widget) se devuelven los
+mismos objetos figura sin recalcular nada.
+
+Las figuras se mutan in situ: la caché debe vivir en ``st.session_state``
+(nunca compartida entre sesiones).
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+import pandas as pd
+import plotly.graph_objs as go
+
+from app_config import PREVIEW_FIGURE_CACHE
+from core.report_cache import fingerprint
+from core.tsv_plotting import (
+    comparison_base,
+    comparison_figures,
+    spectra_base,
+    style_spectra_figure,
+)
+
+
+class PreviewFigureCache:
+    """
+    Caché LRU de figuras base y de su último estilo aplicado.
+
+    Args:
+        max_entries: Número máximo de figuras base en memoria
+    """
+
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple, Dict[str, Any]]' = OrderedDict()
+        self.hits = 0
+        self.restyles = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Claves
+    # ------------------------------------------------------------------
+    @staticmethod
+    def data_key(file_name: str, data_version: int, visual_filter: str,
+                 df: pd.DataFrame, kind: str, param: Hashable = None) -> Tuple:
+        """Clave de datos; incluye las filas en vista (eliminaciones confirmadas)."""
+        return (kind, file_name, data_version, visual_filter, param,
+                fingerprint(df.index.to_numpy()))
+
+    @staticmethod
+    def style_key(editor_version: int, group_labels: Dict[str, str],
+                  sample_groups_cfg: Dict) -> str:
+        return fingerprint(editor_version, group_labels, sample_groups_cfg)
+
+    # ------------------------------------------------------------------
+    # LRU
+    # ------------------------------------------------------------------
+    def _get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key: Hashable, entry: Dict[str, Any]) -> None:
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, file_name: Optional[str] = None) -> None:
+        """Descarta las figuras de un archivo (o todas)."""
+        if file_name is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[1] == file_name]:
+            del self._entries[key]
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'restyles': self.restyles,
+            'misses': self.misses,
+        }
+
+    # ------------------------------------------------------------------
+    # Figuras
+    # ------------------------------------------------------------------
+    def spectra_figure(
+        self,
+        data_key: Tuple,
+        style_key: str,
+        df: pd.DataFrame,
+        removed_indices: Set[int],
+        sample_groups: Dict[int, str],
+        group_labels: Dict[str, str],
+        SAMPLE_GROUPS: Dict,
+        PIXEL_RE=None,
+        x_range: Optional[Tuple[int, int]] = None,
+    ) -> Optional[go.Figure]:
+        """
+        Figura de espectros (equivalente a ``build_spectra_figure_preview``).
+        ``x_range`` es la ventana de píxeles; debe formar parte de ``data_key``.
+        """
+        entry = self._get(data_key)
+        if entry is None:
+            self.misses += 1
+            entry = {'base': spectra_base(df, PIXEL_RE, x_range), 'style_key': None, 'result': None}
+            self._put(data_key, entry)
+        elif entry['style_key'] == style_key:
+            self.hits += 1
+            return entry['result']
+        else:
+            self.restyles += 1
+
+        if entry['base'] is not None:
+            entry['result'] = style_spectra_figure(
+                entry['base'], removed_indices, sample_groups, group_labels, SAMPLE_GROUPS
+            )
+        entry['style_key'] = style_key
+        return entry['result']
+
+    def comparison_figures(
+        self,
+        data_key: Tuple,
+        style_key: str,
+        df: pd.DataFrame,
+        result_col: str,
+        reference_col: str,
+        residuum_col: str,
+        removed_indices: Set[int],
+        sample_groups: Dict[int, str],
+        group_labels: Dict[str, str],
+        SAMPLE_GROUPS: Dict,
+    ) -> Optional[Tuple]:
+        """Gráficos de comparación (equivalente a ``plot_comparison_preview``)."""
+        entry = self._get(data_key)
+        if entry is None:
+            self.misses += 1
+            try:
+                base = comparison_base(df, result_col, reference_col, residuum_col)
+            except Exception:
+                base = None
+            entry = {'base': base, 'style_key': None, 'result': None}
+            self._put(data_key, entry)
+        elif entry['style_key'] == style_key:
+            self.hits += 1
+            return entry['result']
+        else:
+            self.restyles += 1
+
+        if entry['base'] is not None:
+            # El gráfico de residuos se reutiliza: solo cambia su array de colores
+            fig_res = entry['result'][1] if entry['result'] else None
+            entry['result'] = comparison_figures(
+                entry['base'], removed_indices, sample_groups, group_labels, SAMPLE_GROUPS,
+                fig_res=fig_res,
+            )
+        entry['style_key'] = style_key
+        return entry['result']
+
+    def parity_index(self, data_key: Tuple):
+        """Índice espacial (GridIndex) del parity cacheado para ``data_key``."""
+        entry = self._entries.get(data_key)
+        if entry is None or entry['base'] is None:
+            return None
+        return entry['base']['spatial_index']
+
+
+def new_preview_figure_cache() -> PreviewFigureCache:
+    """Crea una caché con la configuración de app_config."""
+    return PreviewFigureCache(**PREVIEW_FIGURE_CACHE)
@@ -0,0 +1,142 @@
+"""
+COREF - TSV Visual Filter Index
+===============================
+Índice precalculado para el filtro visual de TSV Validation Reports
+(años, meses, ID contiene, Note contiene).
+
+Se construye una vez por archivo procesado:
+
+- ``Date`` parseada a arrays de año y mes (sin volver a llamar a
+  ``pd.to_datetime`` en cada rerun)
+- ``ID`` y ``Note`` como códigos categóricos sobre sus valores únicos en
+  minúsculas
+- índice de trigramas sobre esos valores únicos para los filtros de texto
+
+Filtrar devuelve una máscara booleana por posición de fila; el DataFrame no
+se copia. Los filtros de texto son de subcadena literal (sin regex) y no
+distinguen mayúsculas.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+
+class _TextColumnIndex:
+    """Códigos categóricos + trigramas de una columna de texto."""
+
+    def __init__(self, values: pd.Series):
+        codes, uniques = pd.factorize(values.astype(str).str.lower(), sort=False)
+        self.codes = codes
+        self.uniques: List[str] = list(uniques)
+        self._trigrams: Optional[Dict[str, Set[int]]] = None
+
+    def _trigram_index(self) -> Dict[str, Set[int]]:
+        # Se construye con el primer filtro de 3+ caracteres
+        if self._trigrams is None:
+            index: Dict[str, Set[int]] = {}
+            for code, value in enumerate(self.uniques):
+                for i in range(len(value) - 2):
+                    index.setdefault(value[i:i + 3], set()).add(code)
+            self._trigrams = index
+        return self._trigrams
+
+    def matching_codes(self, text: str) -> np.ndarray:
+        """Códigos de los valores únicos que contienen ``text``."""
+        text = text.lower()
+        if len(text) < 3:
+            candidates: Iterable[int] = range(len(self.uniques))
+        else:
+            index = self._trigram_index()
+            sets = [index.get(text[i:i + 3], set()) for i in range(len(text) - 2)]
+            candidates = set.intersection(*sorted(sets, key=len))
+        return np.fromiter((c for c in candidates if text in self.uniques[c]), dtype=np.intp)
+
+    def contains(self, text: str) -> np.ndarray:
+        """Máscara por fila de ``text in valor`` (insensible a mayúsculas)."""
+        hit = np.zeros(len(self.uniques) + 1, dtype=bool)
+        hit[self.matching_codes(text)] = True
+        # El código -1 (NaN) cae en la última posición => False
+        return hit[self.codes]
+
+
+class VisualFilterIndex:
+    """
+    Índice del filtro visual de un DataFrame.
+
+    Args:
+        df: DataFrame procesado (se indexan sus filas en el orden actual)
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.index = df.index
+        n = len(df)
+
+        if "Date" in df.columns:
+            dates = pd.to_datetime(df["Date"], errors="coerce")
+            self.has_date = True
+            self.year = dates.dt.year.fillna(-1).to_numpy(dtype=np.int32)
+            self.month = dates.dt.month.fillna(-1).to_numpy(dtype=np.int8)
+        else:
+            self.has_date = False
+            self.year = np.full(n, -1, dtype=np.int32)
+            self.month = np.full(n, -1, dtype=np.int8)
+
+        self.id = _TextColumnIndex(df["ID"]) if "ID" in df.columns else None
+        self.note = _TextColumnIndex(df["Note"]) if "Note" in df.columns else None
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def available_years(self, index: Optional[pd.Index] = None) -> List[int]:
+        """Años presentes en ``Date`` (opcionalmente solo en las filas de ``index``)."""
+        year = self.year if index is None else self.year[self._positions(index)]
+        years = np.unique(year)
+        return years[years >= 0].tolist()
+
+    def _positions(self, index: pd.Index) -> np.ndarray:
+        """Posiciones en el índice de las etiquetas conocidas de ``index``."""
+        if index.equals(self.index):
+            return np.arange(len(self.index))
+        pos = self.index.get_indexer(index)
+        return pos[pos >= 0]
+
+    def mask(
+        self,
+        years: Iterable[int] = (),
+        months: Iterable[int] = (),
+        id_text: str = "",
+        note_text: str = "",
+    ) -> Optional[np.ndarray]:
+        """
+        Máscara de filas que cumplen el filtro.
+
+        Returns:
+            Array bool por posición, o None si no hay ningún filtro activo
+        """
+        years, months = list(years or ()), list(months or ())
+        if not years and not months and not id_text and not note_text:
+            return None
+
+        mask = np.ones(len(self.index), dtype=bool)
+        if self.has_date and years:
+            mask &= np.isin(self.year, years)
+        if self.has_date and months:
+            mask &= np.isin(self.month, months)
+        if id_text and self.id is not None:
+            mask &= self.id.contains(id_text)
+        if note_text and self.note is not None:
+            mask &= self.note.contains(note_text)
+        return mask
+
+    def mask_for(self, index: pd.Index, **filters) -> Optional[np.ndarray]:
+        """
+        Máscara alineada con otro índice (p. ej. el DataFrame de trabajo sin
+        las filas eliminadas); las etiquetas desconocidas quedan fuera.
+        """
+        mask = self.mask(**filters)
+        if mask is None or index.equals(self.index):
+            return mask
+        pos = self.index.get_indexer(index)
+        return np.where(pos >= 0, mask[pos], False)
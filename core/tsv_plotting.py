@@ -6,6 +6,9 @@ TSV Validation Reports - Plotting Functions (CLOUD + plotly_events SAFE)
 - spectra: idem
 - FIX CRÍTICO: Lasso/Box en espectros -> Plotly selecciona PUNTOS; con mode="lines" no suele haber selección.
   => usamos "lines+markers" con markers casi invisibles (size pequeño + opacity muy baja)
+- spectra con Scattergl: una traza de líneas y otra de puntos por grupo, decimadas en servidor
+  (min/max por bucket para líneas, LTTB para puntos) sobre la ventana de píxeles visible.
+  Cada punto lleva su RowIndex en customdata => extract_row_indices_from_spectra_events exacto.
 """
 
 from __future__ import annotations
@@ -17,6 +20,11 @@ import pandas as pd
 import plotly.graph_objs as go
 from sklearn.metrics import mean_squared_error, r2_score
 
+from app_config import SPECTRA_PREVIEW
+from core.spatial_index import GridIndex
+from core.spectra_decimation import lttb_indices, minmax_decimate, window_slice
+from core.tsv_selection import selection_arrays
+
 
 def create_layout(title: str, xaxis_title: str, yaxis_title: str) -> Dict:
     return {
@@ -44,254 +52,292 @@ def _ensure_sample_groups(sample_groups_cfg: Optional[Dict]) -> Dict:
     return sample_groups_cfg
 
 
-def plot_comparison_preview(
+# ============================================================================
+# PARITY / RESIDUUM / HISTOGRAMA
+# ============================================================================
+
+def comparison_base(
     df: pd.DataFrame,
     result_col: str,
     reference_col: str,
     residuum_col: str,
+) -> Optional[Dict]:
+    """
+    Parte de los gráficos de comparación que no depende de la selección:
+    valores parseados, métricas, customdata/hover y el histograma.
+
+    Se calcula una vez por (datos, filtro, parámetro); ``comparison_figures``
+    construye a partir de ella los gráficos para cada estado de selección.
+    """
+    # --- numérico robusto (coma decimal) ---
+    ref = pd.to_numeric(df[reference_col].astype(str).str.replace(",", ".", regex=False), errors="coerce")
+    res = pd.to_numeric(df[result_col].astype(str).str.replace(",", ".", regex=False), errors="coerce")
+    resid = pd.to_numeric(df[residuum_col].astype(str).str.replace(",", ".", regex=False), errors="coerce")
+
+    valid_mask = ref.notna() & res.notna() & resid.notna() & (ref != 0) & (res != 0)
+
+    x_s = ref.loc[valid_mask]
+    y_s = res.loc[valid_mask]
+    residuum_s = resid.loc[valid_mask]
+
+    if len(x_s) < 2:
+        return None
+
+    valid_index = df.index[valid_mask.to_numpy()]
+    original_indices: List[int] = [int(i) for i in valid_index.tolist()]
+
+    # hover aligned
+    if "ID" in df.columns:
+        hover_id = df.loc[valid_mask, "ID"].astype(str).tolist()
+    else:
+        hover_id = [str(i) for i in original_indices]
+
+    if "Date" in df.columns:
+        hover_date = df.loc[valid_mask, "Date"].astype(str).tolist()
+    else:
+        hover_date = [""] * len(x_s)
+
+    # métricas (forzamos float Python)
+    r2 = float(r2_score(x_s, y_s))
+    rmse = float(np.sqrt(mean_squared_error(x_s, y_s)))
+    bias = float(np.mean(y_s - x_s))
+    n = int(len(x_s))
+
+    # IMPORTANT: arrays base como LISTAS Python (plotly_events-safe)
+    x_all = x_s.to_numpy(dtype=float).tolist()
+    y_all = y_s.to_numpy(dtype=float).tolist()
+    residuum_all = residuum_s.to_numpy(dtype=float).tolist()
+
+    # [[row_index(int), date(str)], ...]
+    customdata = [[rid, d] for rid, d in zip(original_indices, hover_date)]
+
+    # Residuum vs N (ordenado por fecha)
+    if "Date" in df.columns:
+        sort_idx = np.argsort(np.asarray(hover_date, dtype=object), kind="stable")
+    else:
+        sort_idx = np.arange(n)
+    order = sort_idx.tolist()
+
+    residuum_sorted = [residuum_all[i] for i in order]
+    hovertext_res = [
+        f"RowIndex: {original_indices[i]}<br>Date: {hover_date[i]}<br>ID: {hover_id[i]}<br>Residuum: {residuum_all[i]:.2f}"
+        for i in order
+    ]
+
+    # histograma
+    fig_hist = go.Figure()
+    fig_hist.add_trace(go.Histogram(x=residuum_sorted, nbinsx=20, marker=dict(color="blue")))
+    layout_hist = create_layout("Residuum Histogram", "Residuum", "Count")
+    layout_hist["showlegend"] = False
+    fig_hist.update_layout(**layout_hist)
+
+    return {
+        "index": valid_index,
+        "x": x_all,
+        "y": y_all,
+        "customdata": customdata,
+        "sort_idx": sort_idx,
+        "residuum_sorted": residuum_sorted,
+        "hovertext_res": hovertext_res,
+        "fig_hist": fig_hist,
+        "metrics": (r2, rmse, bias, n),
+        # Box/lasso del parity resueltos en servidor (x = Reference, y = Result)
+        "spatial_index": GridIndex(x_s.to_numpy(dtype=float), y_s.to_numpy(dtype=float), original_indices),
+        "result_col": result_col,
+        "reference_col": reference_col,
+    }
+
+
+def comparison_figures(
+    base: Dict,
     removed_indices: Set[int] = None,
     sample_groups: Dict[int, str] = None,
     group_labels: Dict[str, str] = None,
     SAMPLE_GROUPS: Dict = None,
-) -> Optional[Tuple]:
-    if removed_indices is None:
-        removed_indices = set()
-    if sample_groups is None:
-        sample_groups = {}
+    fig_res: Optional[go.Figure] = None,
+) -> Tuple:
+    """
+    Gráficos de comparación para un estado de selección a partir de
+    ``comparison_base``.
+
+    Args:
+        base: Resultado de ``comparison_base``
+        fig_res: Gráfico de residuos ya construido para esta base; si se
+            pasa, solo se actualiza su array de colores
+
+    Returns:
+        (fig_parity, fig_res, fig_hist, r2, rmse, bias, n)
+    """
     if group_labels is None:
         group_labels = {}
 
     SAMPLE_GROUPS = _ensure_sample_groups(SAMPLE_GROUPS)
 
-    try:
-        # --- numérico robusto (coma decimal) ---
-        ref = pd.to_numeric(df[reference_col].astype(str).str.replace(",", ".", regex=False), errors="coerce")
-        res = pd.to_numeric(df[result_col].astype(str).str.replace(",", ".", regex=False), errors="coerce")
-        resid = pd.to_numeric(df[residuum_col].astype(str).str.replace(",", ".", regex=False), errors="coerce")
+    x_all, y_all, customdata = base["x"], base["y"], base["customdata"]
+    r2, rmse, bias, n = base["metrics"]
 
-        valid_mask = ref.notna() & res.notna() & resid.notna() & (ref != 0) & (res != 0)
+    # Clasificar puntos por grupo (posiciones sobre x_all/y_all)
+    removed_mask, groups = selection_arrays(base["index"], removed_indices, sample_groups)
+    groups = np.where(np.isin(groups, list(SAMPLE_GROUPS.keys())), groups, "none")
 
-        x_s = ref.loc[valid_mask]
-        y_s = res.loc[valid_mask]
-        residuum_s = resid.loc[valid_mask]
+    points_by_group = {
+        g: np.flatnonzero((groups == g) & ~removed_mask).tolist() for g in SAMPLE_GROUPS.keys()
+    }
+    points_by_group["delete"] = np.flatnonzero(removed_mask).tolist()
 
-        if len(x_s) < 2:
-            return None
+    def _make_cd(positions: list) -> list:
+        return [customdata[p] for p in positions]
 
-        original_indices: List[int] = [int(i) for i in df.loc[valid_mask].index.tolist()]
-        valid_removed_indices = removed_indices.intersection(set(original_indices))
+    def _xy_from_positions(positions: list) -> tuple[list, list]:
+        return ([x_all[p] for p in positions], [y_all[p] for p in positions])
 
-        # hover aligned
-        if "ID" in df.columns:
-            hover_id = df.loc[valid_mask, "ID"].astype(str).reset_index(drop=True)
-        else:
-            hover_id = pd.Series([str(i) for i in original_indices])
+    # -------------------------
+    # Parity plot
+    # -------------------------
+    fig_parity = go.Figure()
 
-        if "Date" in df.columns:
-            hover_date = df.loc[valid_mask, "Date"].astype(str).reset_index(drop=True)
-        else:
-            hover_date = pd.Series([""] * len(x_s))
-
-        # métricas (forzamos float Python)
-        r2 = float(r2_score(x_s, y_s))
-        rmse = float(np.sqrt(mean_squared_error(x_s, y_s)))
-        bias = float(np.mean(y_s - x_s))
-        n = int(len(x_s))
-
-        # IMPORTANT: arrays base como LISTAS Python (plotly_events-safe)
-        x_all = [float(v) for v in x_s.to_numpy()]
-        y_all = [float(v) for v in y_s.to_numpy()]
-        residuum_all = [float(v) for v in residuum_s.to_numpy()]
-
-        # Clasificar puntos por grupo (posiciones sobre x_all/y_all)
-        points_by_group = {g: [] for g in SAMPLE_GROUPS.keys()}
-        points_by_group["delete"] = []
-
-        for pos, idx in enumerate(original_indices):
-            if idx in valid_removed_indices:
-                points_by_group["delete"].append(pos)
-            else:
-                g = sample_groups.get(idx, "none")
-                if g not in points_by_group:
-                    g = "none"
-                points_by_group[g].append(pos)
-
-        def _make_cd(positions: list) -> list:
-            # [[row_index(int), date(str)], ...]
-            row_ids = [int(original_indices[p]) for p in positions]
-            dates = [str(hover_date.iloc[p]) for p in positions]
-            return [[rid, d] for rid, d in zip(row_ids, dates)]
-
-        def _xy_from_positions(positions: list) -> tuple[list, list]:
-            return ([x_all[p] for p in positions], [y_all[p] for p in positions])
-
-        # -------------------------
-        # Parity plot
-        # -------------------------
-        fig_parity = go.Figure()
-
-        # grupos (excluye none)
-        for group_name, group_config in SAMPLE_GROUPS.items():
-            if group_name == "none":
-                continue
-            pos = points_by_group.get(group_name, [])
-            if not pos:
-                continue
-
-            custom_label = group_labels.get(group_name, group_name)
-            display_label = f"{group_config.get('emoji','')} {custom_label}".strip()
-
-            xg, yg = _xy_from_positions(pos)
-            cd = _make_cd(pos)
-
-            fig_parity.add_trace(
-                go.Scatter(
-                    x=xg,
-                    y=yg,
-                    mode="markers",
-                    marker=dict(
-                        color=group_config.get("color", "gray"),
-                        size=group_config.get("size", 8),
-                        symbol=group_config.get("symbol", "circle"),
-                    ),
-                    name=display_label,
-                    customdata=cd,
-                    hovertemplate=(
-                        f"{display_label}<br>"
-                        "RowIndex: %{customdata[0]}<br>"
-                        "Date: %{customdata[1]}<br>"
-                        "Reference: %{x:.2f}<br>"
-                        "Result: %{y:.2f}<extra></extra>"
-                    ),
-                )
-            )
+    # grupos (excluye none)
+    for group_name, group_config in SAMPLE_GROUPS.items():
+        if group_name == "none":
+            continue
+        pos = points_by_group.get(group_name, [])
+        if not pos:
+            continue
 
-        # none
-        pos_none = points_by_group.get("none", [])
-        if pos_none:
-            cfg = SAMPLE_GROUPS["none"]
-            xg, yg = _xy_from_positions(pos_none)
-            cd = _make_cd(pos_none)
-
-            fig_parity.add_trace(
-                go.Scatter(
-                    x=xg,
-                    y=yg,
-                    mode="markers",
-                    marker=dict(
-                        color=cfg.get("color", "gray"),
-                        size=cfg.get("size", 8),
-                        symbol=cfg.get("symbol", "circle"),
-                    ),
-                    name="Sin grupo",
-                    showlegend=True,
-                    customdata=cd,
-                    hovertemplate=(
-                        "Sin grupo<br>"
-                        "RowIndex: %{customdata[0]}<br>"
-                        "Date: %{customdata[1]}<br>"
-                        "Reference: %{x:.2f}<br>"
-                        "Result: %{y:.2f}<extra></extra>"
-                    ),
-                )
-            )
+        custom_label = group_labels.get(group_name, group_name)
+        display_label = f"{group_config.get('emoji','')} {custom_label}".strip()
 
-        # delete
-        pos_del = points_by_group.get("delete", [])
-        if pos_del:
-            xd, yd = _xy_from_positions(pos_del)
-            cd = _make_cd(pos_del)
-
-            fig_parity.add_trace(
-                go.Scatter(
-                    x=xd,
-                    y=yd,
-                    mode="markers",
-                    marker=dict(color="red", size=10, symbol="x"),
-                    name="❌ Eliminar",
-                    customdata=cd,
-                    hovertemplate=(
-                        "⚠️ MARCADO PARA ELIMINAR<br>"
-                        "RowIndex: %{customdata[0]}<br>"
-                        "Date: %{customdata[1]}<br>"
-                        "Reference: %{x:.2f}<br>"
-                        "Result: %{y:.2f}<extra></extra>"
-                    ),
-                )
-            )
+        xg, yg = _xy_from_positions(pos)
+        cd = _make_cd(pos)
 
-        # líneas de referencia (listas Python)
         fig_parity.add_trace(
             go.Scatter(
-                x=x_all,
-                y=x_all,
-                mode="lines",
-                line=dict(dash="dash", color="gray"),
-                name="y = x",
-                showlegend=False,
+                x=xg,
+                y=yg,
+                mode="markers",
+                marker=dict(
+                    color=group_config.get("color", "gray"),
+                    size=group_config.get("size", 8),
+                    symbol=group_config.get("symbol", "circle"),
+                ),
+                name=display_label,
+                customdata=cd,
+                hovertemplate=(
+                    f"{display_label}<br>"
+                    "RowIndex: %{customdata[0]}<br>"
+                    "Date: %{customdata[1]}<br>"
+                    "Reference: %{x:.2f}<br>"
+                    "Result: %{y:.2f}<extra></extra>"
+                ),
             )
         )
+
+    # none
+    pos_none = points_by_group.get("none", [])
+    if pos_none:
+        cfg = SAMPLE_GROUPS["none"]
+        xg, yg = _xy_from_positions(pos_none)
+        cd = _make_cd(pos_none)
+
         fig_parity.add_trace(
             go.Scatter(
-                x=x_all,
-                y=[v + rmse for v in x_all],
-                mode="lines",
-                line=dict(dash="dash", color="orange"),
-                name="RMSE+",
-                showlegend=False,
+                x=xg,
+                y=yg,
+                mode="markers",
+                marker=dict(
+                    color=cfg.get("color", "gray"),
+                    size=cfg.get("size", 8),
+                    symbol=cfg.get("symbol", "circle"),
+                ),
+                name="Sin grupo",
+                showlegend=True,
+                customdata=cd,
+                hovertemplate=(
+                    "Sin grupo<br>"
+                    "RowIndex: %{customdata[0]}<br>"
+                    "Date: %{customdata[1]}<br>"
+                    "Reference: %{x:.2f}<br>"
+                    "Result: %{y:.2f}<extra></extra>"
+                ),
             )
         )
+
+    # delete
+    pos_del = points_by_group.get("delete", [])
+    if pos_del:
+        xd, yd = _xy_from_positions(pos_del)
+        cd = _make_cd(pos_del)
+
         fig_parity.add_trace(
             go.Scatter(
-                x=x_all,
-                y=[v - rmse for v in x_all],
-                mode="lines",
-                line=dict(dash="dash", color="orange"),
-                name="RMSE-",
-                showlegend=False,
+                x=xd,
+                y=yd,
+                mode="markers",
+                marker=dict(color="red", size=10, symbol="x"),
+                name="❌ Eliminar",
+                customdata=cd,
+                hovertemplate=(
+                    "⚠️ MARCADO PARA ELIMINAR<br>"
+                    "RowIndex: %{customdata[0]}<br>"
+                    "Date: %{customdata[1]}<br>"
+                    "Reference: %{x:.2f}<br>"
+                    "Result: %{y:.2f}<extra></extra>"
+                ),
             )
         )
 
-        fig_parity.update_layout(**create_layout("Parity Plot", reference_col, result_col))
-        fig_parity.update_layout(clickmode="event+select")
-
-        # -------------------------
-        # Residuum vs N (ordenado por fecha)
-        # -------------------------
-        if "Date" in df.columns:
-            # argsort devuelve numpy => convertir a lista de ints python
-            date_col = df.loc[valid_mask, "Date"].astype(str).reset_index(drop=True)
-            sort_idx = [int(i) for i in np.argsort(date_col.to_numpy())]
-
-            residuum_sorted = [residuum_all[i] for i in sort_idx]
-            hover_id_sorted = [str(hover_id.iloc[i]) for i in sort_idx]
-            hover_date_sorted = [str(hover_date.iloc[i]) for i in sort_idx]
-            original_indices_sorted = [int(original_indices[i]) for i in sort_idx]
-        else:
-            residuum_sorted = residuum_all
-            hover_id_sorted = [str(v) for v in hover_id.to_list()]
-            hover_date_sorted = [str(v) for v in hover_date.to_list()]
-            original_indices_sorted = [int(v) for v in original_indices]
-
-        hovertext_res = [
-            f"RowIndex: {idx}<br>Date: {d}<br>ID: {idv}<br>Residuum: {rv:.2f}"
-            for idx, idv, d, rv in zip(original_indices_sorted, hover_id_sorted, hover_date_sorted, residuum_sorted)
-        ]
-
-        colors = []
-        for idx in original_indices_sorted:
-            if idx in valid_removed_indices:
-                colors.append("red")
-            else:
-                g = sample_groups.get(idx, "none")
-                cfg = SAMPLE_GROUPS.get(g, SAMPLE_GROUPS["none"])
-                colors.append(cfg.get("color", "gray"))
+    # líneas de referencia (listas Python)
+    fig_parity.add_trace(
+        go.Scatter(
+            x=x_all,
+            y=x_all,
+            mode="lines",
+            line=dict(dash="dash", color="gray"),
+            name="y = x",
+            showlegend=False,
+        )
+    )
+    fig_parity.add_trace(
+        go.Scatter(
+            x=x_all,
+            y=[v + rmse for v in x_all],
+            mode="lines",
+            line=dict(dash="dash", color="orange"),
+            name="RMSE+",
+            showlegend=False,
+        )
+    )
+    fig_parity.add_trace(
+        go.Scatter(
+            x=x_all,
+            y=[v - rmse for v in x_all],
+            mode="lines",
+            line=dict(dash="dash", color="orange"),
+            name="RMSE-",
+            showlegend=False,
+        )
+    )
 
+    fig_parity.update_layout(**create_layout("Parity Plot", base["reference_col"], base["result_col"]))
+    fig_parity.update_layout(clickmode="event+select")
+
+    # -------------------------
+    # Residuum vs N: color por posición (eliminadas en rojo)
+    # -------------------------
+    group_colors = {g: cfg.get("color", "gray") for g, cfg in SAMPLE_GROUPS.items()}
+    colors_by_pos = np.array([group_colors[g] for g in groups], dtype=object)
+    colors_by_pos[removed_mask] = "red"
+    colors = colors_by_pos[base["sort_idx"]].tolist()
+
+    if fig_res is not None:
+        fig_res.data[0].marker.color = colors
+    else:
+        residuum_sorted = base["residuum_sorted"]
         fig_res = go.Figure(
             go.Bar(
                 x=list(range(len(residuum_sorted))),
                 y=residuum_sorted,
-                hovertext=hovertext_res,
+                hovertext=base["hovertext_res"],
                 hoverinfo="text",
                 name="Residuum",
                 marker=dict(color=colors),
@@ -299,159 +345,268 @@ def plot_comparison_preview(
         )
         fig_res.update_layout(**create_layout("Residuum vs N (ordenado por fecha)", "N", "Residuum"))
 
-        # histograma
-        fig_hist = go.Figure()
-        fig_hist.add_trace(go.Histogram(x=residuum_sorted, nbinsx=20, marker=dict(color="blue")))
-        layout_hist = create_layout("Residuum Histogram", "Residuum", "Count")
-        layout_hist["showlegend"] = False
-        fig_hist.update_layout(**layout_hist)
+    return fig_parity, fig_res, base["fig_hist"], r2, rmse, bias, n
 
-        return fig_parity, fig_res, fig_hist, r2, rmse, bias, n
 
-    except Exception:
-        return None
-
-
-def build_spectra_figure_preview(
+def plot_comparison_preview(
     df: pd.DataFrame,
+    result_col: str,
+    reference_col: str,
+    residuum_col: str,
     removed_indices: Set[int] = None,
     sample_groups: Dict[int, str] = None,
     group_labels: Dict[str, str] = None,
     SAMPLE_GROUPS: Dict = None,
-    PIXEL_RE=None,
-) -> Optional[go.Figure]:
-    import re
+) -> Optional[Tuple]:
+    try:
+        base = comparison_base(df, result_col, reference_col, residuum_col)
+        if base is None:
+            return None
+        return comparison_figures(base, removed_indices, sample_groups, group_labels, SAMPLE_GROUPS)
+    except Exception:
+        return None
 
-    if removed_indices is None:
-        removed_indices = set()
-    if sample_groups is None:
-        sample_groups = {}
-    if group_labels is None:
-        group_labels = {}
 
-    SAMPLE_GROUPS = _ensure_sample_groups(SAMPLE_GROUPS)
+# ============================================================================
+# ESPECTROS
+# ============================================================================
+
+def _pixel_columns(df: pd.DataFrame, PIXEL_RE=None) -> Tuple[List[str], List[int]]:
+    """Columnas de píxel ordenadas y su número de píxel."""
+    import re
 
     if PIXEL_RE is None:
         PIXEL_RE = re.compile(r"^(#)?\d+$")
 
-    def _is_pixel_col(col: str) -> bool:
-        return bool(PIXEL_RE.fullmatch(str(col)))
-
     def _pixnum(col: str) -> int:
         s = str(col)
         return int(s[1:]) if s.startswith("#") else int(s)
 
-    valid_removed = removed_indices.intersection(set(df.index))
+    pixel_cols = sorted((c for c in df.columns if PIXEL_RE.fullmatch(str(c))), key=_pixnum)
+    return pixel_cols, [_pixnum(c) for c in pixel_cols]
 
-    pixel_cols = [c for c in df.columns if _is_pixel_col(c)]
-    if not pixel_cols:
-        return None
 
-    pixel_cols = sorted(pixel_cols, key=_pixnum)
-    x_full = [_pixnum(c) for c in pixel_cols]  # python ints
+def spectra_pixel_bounds(df: pd.DataFrame, PIXEL_RE=None) -> Optional[Tuple[int, int]]:
+    """Primer y último píxel del archivo (None si no hay columnas espectrales)."""
+    _, pixels = _pixel_columns(df, PIXEL_RE)
+    return (pixels[0], pixels[-1]) if pixels else None
 
-    # Matriz espectral (igual que ya tenías)
-    spec = (
-        df[pixel_cols]
-        .astype(str)
-        .replace(",", ".", regex=True)
-        .apply(pd.to_numeric, errors="coerce")
-    )
 
-    hover_id = df["ID"].astype(str) if "ID" in df.columns else pd.Series([str(i) for i in df.index], index=df.index)
-    hover_date = df["Date"].astype(str) if "Date" in df.columns else pd.Series([""] * len(df), index=df.index)
-    hover_note = df["Note"].astype(str) if "Note" in df.columns else pd.Series([""] * len(df), index=df.index)
+def _none_for_nan(values: np.ndarray) -> list:
+    """Lista Python con None en lugar de NaN (huecos de línea, JSON-safe)."""
+    return [v if v == v else None for v in values.tolist()]
+
+
+def spectra_base(
+    df: pd.DataFrame,
+    PIXEL_RE=None,
+    x_range: Optional[Tuple[int, int]] = None,
+) -> Optional[Dict]:
+    """
+    Datos decimados de la vista de espectros, independientes de la selección.
+
+    Para la ventana de píxeles visible:
+    - líneas: min/max por bucket (SPECTRA_PREVIEW), menos buckets cuantas
+      más muestras haya
+    - puntos seleccionables: LTTB, con tantos puntos por espectro como el
+      stride automático de siempre (50-100 para pocos espectros)
+
+    ``style_spectra_figure`` construye a partir de aquí las trazas Scattergl
+    por grupo; la conversión de la matriz y la decimación se hacen una vez.
+    """
+    pixel_cols, pixels = _pixel_columns(df, PIXEL_RE)
+    if not pixel_cols:
+        return None
+
+    # Matriz espectral: solo las columnas de texto pasan por el parseo con coma decimal
+    block = df[pixel_cols]
+    text_cols = [c for c in pixel_cols if not pd.api.types.is_numeric_dtype(block[c])]
+    if text_cols:
+        block = block.copy()
+        block[text_cols] = (
+            block[text_cols]
+            .astype(str)
+            .replace(",", ".", regex=True)
+            .apply(pd.to_numeric, errors="coerce")
+        )
+    spec = block.to_numpy(dtype=float)
+    spec = np.where(np.isfinite(spec), spec, np.nan)
+
+    valid = ~np.isnan(spec).all(axis=1)
+    spec = spec[valid]
+    rows = df.index[valid]
+
+    hover_id = df["ID"].astype(str).to_numpy()[valid] if "ID" in df.columns else rows.astype(str).to_numpy()
+    hover_date = df["Date"].astype(str).to_numpy()[valid] if "Date" in df.columns else np.full(len(rows), "")
+    hover_note = df["Note"].astype(str).to_numpy()[valid] if "Note" in df.columns else np.full(len(rows), "")
+    hover_rows = [
+        f"ID: {i}<br>Date: {d}<br>Note: {n}" for i, d, n in zip(hover_id, hover_date, hover_note)
+    ]
+
+    x_all = np.asarray(pixels)
+    window = window_slice(x_all, x_range)
+    x_win = x_all[window]
+    spec = spec[:, window]
+    if len(x_win) == 0:
+        return None
 
-    # ✅ STRIDE AUTO: optimiza rendimiento
-    n_spec = int(len(df))
+    # ✅ STRIDE AUTO: puntos seleccionables por espectro
+    n_spec = int(len(rows))
     if n_spec <= 250:
         stride = 6   # 300-600 px -> 50-100 puntos seleccionables por espectro
     elif n_spec <= 600:
         stride = 10
     else:
         stride = 15  # casos de 1000 espectros
+    n_sel = max(2, int(np.ceil(len(x_win) / stride)))
 
-    x_sel = x_full[::stride]  # puntos para selección
+    # Con muchas muestras se reparten los puntos de línea entre todas ellas
+    line_buckets = min(
+        SPECTRA_PREVIEW["line_buckets"],
+        max(SPECTRA_PREVIEW["min_line_buckets"], SPECTRA_PREVIEW["max_line_points"] // (2 * max(n_spec, 1))),
+    )
+    x_line, y_line = minmax_decimate(x_win, spec, line_buckets)
+    sel_idx = lttb_indices(x_win, spec, n_sel)
 
-    fig = go.Figure()
-    legend_added = set()
+    return {
+        "rows": rows,
+        "x_line": x_line,
+        "y_line": y_line,
+        "x_sel": x_win[sel_idx],
+        "y_sel": np.take_along_axis(spec, sel_idx, axis=1),
+        "hover_rows": hover_rows,
+        # Última asignación de grupos dibujada (para re-estilar sin reconstruir)
+        "legend_groups": None,
+        "fig": None,
+    }
 
-    for i in df.index:
-        y_np = spec.loc[i].to_numpy()
-        if np.all(np.isnan(y_np)):
-            continue
 
-        if i in valid_removed:
-            color = "red"
-            opacity = 0.7
-            width = 2
-            prefix = "⚠️ MARCADO - "
-            legend_name = "❌ Eliminar"
-            legend_group = "delete"
+def _spectra_row_styles(
+    removed_mask: np.ndarray,
+    groups: np.ndarray,
+    group_labels: Dict[str, str],
+    SAMPLE_GROUPS: Dict,
+) -> Tuple[np.ndarray, Dict[str, Tuple]]:
+    """Grupo de leyenda por fila y estilo (color, opacidad, ancho, nombre, prefijo) por grupo."""
+    legend_groups = np.where(np.isin(groups, list(SAMPLE_GROUPS.keys())), groups, "none")
+    legend_groups = np.where(removed_mask, "delete", legend_groups)
+
+    styles = {"delete": ("red", 0.7, 2, "❌ Eliminar", "⚠️ MARCADO - ")}
+    for group, group_config in SAMPLE_GROUPS.items():
+        color = group_config.get("color", "gray")
+        if group == "none":
+            styles[group] = (color, 0.35, 1, "Sin grupo", "")
         else:
-            group = sample_groups.get(i, "none")
-            group_config = SAMPLE_GROUPS.get(group, SAMPLE_GROUPS["none"])
-            color = group_config.get("color", "gray")
-            opacity = 0.5 if group != "none" else 0.35
-            width = 2 if group != "none" else 1
-            legend_group = group if group in SAMPLE_GROUPS else "none"
-
-            if group != "none" and group in SAMPLE_GROUPS:
-                custom_label = group_labels.get(group, group)
-                prefix = f"{group_config.get('emoji','')} {custom_label} - ".strip() + " "
-                legend_name = f"{group_config.get('emoji','')} {custom_label}".strip()
-            else:
-                prefix = ""
-                legend_name = "Sin grupo"
-
-        show_legend = legend_group not in legend_added
-        if show_legend:
-            legend_added.add(legend_group)
-
-        # y como lista Python
-        y_full = [float(v) if np.isfinite(v) else None for v in y_np]
-        y_sel = y_full[::stride]
-
-        # 1) ✅ LÍNEA COMPLETA (barata, sin markers)
-        fig.add_trace(
-            go.Scatter(
-                x=x_full,
-                y=y_full,
-                mode="lines",
-                showlegend=show_legend,
-                legendgroup=legend_group,
-                name=legend_name,
-                line={"width": width, "color": color},
-                opacity=opacity,
-                hoverinfo="skip",   # reduce peso
-            )
-        )
+            custom_label = group_labels.get(group, group)
+            legend_name = f"{group_config.get('emoji','')} {custom_label}".strip()
+            styles[group] = (color, 0.5, 2, legend_name, f"{legend_name} - ")
+    return legend_groups, styles
+
+
+def _spectra_hovertemplate(prefix: str) -> str:
+    return (
+        f"{prefix}RowIndex: %{{customdata}}<br>"
+        "%{hovertext}<br>"
+        "Pixel: %{x}<br>"
+        "Abs: %{y}<extra></extra>"
+    )
 
-        # 2) ✅ MARKERS DOWN-SAMPLED (solo para selección)
-        # customdata SOLO aquí, y 1 por punto
-        cd_sel = [int(i)] * len(x_sel)
 
-        fig.add_trace(
-            go.Scatter(
-                x=x_sel,
-                y=y_sel,
-                mode="markers",
-                showlegend=False,
-                legendgroup=legend_group,
-                marker={"size": 6, "opacity": 0.01},  # seleccionable pero invisible
-                opacity=1.0,
-                customdata=cd_sel,
-                hovertemplate=(
-                    f"{prefix}RowIndex: %{{customdata}}<br>"
-                    f"ID: {hover_id.loc[i]}<br>"
-                    f"Date: {hover_date.loc[i]}<br>"
-                    f"Note: {hover_note.loc[i]}<br>"
-                    "Pixel: %{x}<br>"
-                    "Abs: %{y}<extra></extra>"
-                ),
-            )
-        )
+def _spectra_group_traces(base: Dict, positions: np.ndarray, group: str, style: Tuple) -> List[Dict]:
+    """
+    Línea (todas las muestras del grupo en una traza, separadas por huecos)
+    y puntos seleccionables (customdata = RowIndex por punto) de un grupo.
+    """
+    color, opacity, width, legend_name, prefix = style
+    n_rows = len(positions)
+    if not n_rows:
+        return []
+
+    # Líneas: [x..., None] por muestra
+    x_line = np.append(base["x_line"].astype(float), np.nan)
+    y_line = np.hstack([base["y_line"][positions], np.full((n_rows, 1), np.nan)])
+
+    # Puntos: misma longitud por muestra => RowIndex/hover repetidos por punto
+    n_sel = base["x_sel"].shape[1]
+    row_ids = base["rows"][positions].to_numpy()
+    hover_rows = base["hover_rows"]
+
+    return [
+        dict(
+            type="scattergl",
+            x=_none_for_nan(np.tile(x_line, n_rows)),
+            y=_none_for_nan(y_line.ravel()),
+            mode="lines",
+            name=legend_name,
+            legendgroup=group,
+            showlegend=True,
+            line={"width": width, "color": color},
+            opacity=opacity,
+            hoverinfo="skip",   # reduce peso
+            connectgaps=False,
+        ),
+        dict(
+            type="scattergl",
+            x=base["x_sel"][positions].ravel().tolist(),
+            y=_none_for_nan(base["y_sel"][positions].ravel()),
+            mode="markers",
+            name=legend_name,
+            legendgroup=group,
+            showlegend=False,
+            marker={"size": 6, "opacity": 0.01},  # seleccionable pero invisible
+            customdata=np.repeat(row_ids, n_sel).tolist(),
+            hovertext=[hover_rows[p] for p in positions for _ in range(n_sel)],
+            hovertemplate=_spectra_hovertemplate(prefix),
+        ),
+    ]
+
+
+def style_spectra_figure(
+    base: Dict,
+    removed_indices: Set[int] = None,
+    sample_groups: Dict[int, str] = None,
+    group_labels: Dict[str, str] = None,
+    SAMPLE_GROUPS: Dict = None,
+) -> go.Figure:
+    """
+    Figura Scattergl de espectros para un estado de selección.
+
+    Dos trazas por grupo (línea + puntos seleccionables) en lugar de dos por
+    espectro. Si la asignación de grupos no cambió desde la última llamada
+    (solo etiquetas o colores), se actualizan las trazas existentes in situ.
+    """
+    if group_labels is None:
+        group_labels = {}
 
+    SAMPLE_GROUPS = _ensure_sample_groups(SAMPLE_GROUPS)
+
+    removed_mask, groups = selection_arrays(base["rows"], removed_indices, sample_groups)
+    legend_groups, styles = _spectra_row_styles(removed_mask, groups, group_labels, SAMPLE_GROUPS)
+
+    fig = base["fig"]
+    if fig is not None and np.array_equal(base["legend_groups"], legend_groups):
+        with fig.batch_update():
+            for trace in fig.data:
+                color, opacity, width, legend_name, prefix = styles[trace.legendgroup]
+                trace.name = legend_name
+                if trace.mode == "lines":
+                    trace.line.color = color
+                    trace.line.width = width
+                    trace.opacity = opacity
+                else:
+                    trace.hovertemplate = _spectra_hovertemplate(prefix)
+        return fig
+
+    # "none" debajo, grupos encima y eliminadas arriba del todo
+    order = ["none"] + [g for g in SAMPLE_GROUPS if g != "none"] + ["delete"]
+    traces: List[Dict] = []
+    for group in order:
+        positions = np.flatnonzero(legend_groups == group)
+        traces.extend(_spectra_group_traces(base, positions, group, styles[group]))
+
+    # Trazas como dicts y un único add_traces: plotly valida cada lista una sola vez
+    fig = go.Figure()
+    fig.add_traces(traces)
     fig.update_layout(
         title="Spectra Preview",
         xaxis_title="Pixel",
@@ -467,4 +622,22 @@ def build_spectra_figure_preview(
         showlegend=True,
         clickmode="event+select",
     )
+
+    base["fig"] = fig
+    base["legend_groups"] = legend_groups
     return fig
+
+
+def build_spectra_figure_preview(
+    df: pd.DataFrame,
+    removed_indices: Set[int] = None,
+    sample_groups: Dict[int, str] = None,
+    group_labels: Dict[str, str] = None,
+    SAMPLE_GROUPS: Dict = None,
+    PIXEL_RE=None,
+    x_range: Optional[Tuple[int, int]] = None,
+) -> Optional[go.Figure]:
+    base = spectra_base(df, PIXEL_RE, x_range)
+    if base is None:
+        return None
+    return style_spectra_figure(base, removed_indices, sample_groups, group_labels, SAMPLE_GROUPS)
@@ -10,6 +10,8 @@ import re
 import pandas as pd
 from dateutil import parser as date_parser
 
+from core.result_strings import parse_multi_values
+
 
 # =============================================================================
 # CONSTANTES Y REGEX
@@ -117,7 +119,22 @@ def filter_relevant_data(data: List[Dict]) -> List[Dict]:
     if not data:
         return []
     
-    all_columns = list(data[0].keys())
+    columns_to_keep = _relevant_columns(list(data[0].keys()))
+    
+    # Filtrar cada fila
+    filtered: List[Dict] = []
+    for row in data:
+        new_row = {}
+        for col in columns_to_keep:
+            v = row.get(col, None)
+            new_row[col] = v if v not in ("", None) else None
+        filtered.append(new_row)
+    
+    return filtered
+
+
+def _relevant_columns(all_columns: List[str]) -> List[str]:
+    """Columnas metadata hasta #X1 + columnas espectrales ordenadas por número."""
     stop_column = "#X1"
     
     # Extraer columnas metadata (hasta #X1)
@@ -133,18 +150,25 @@ def filter_relevant_data(data: List[Dict]) -> List[Dict]:
         key=pixel_number
     )
     
-    columns_to_keep = base_cols + pixel_cols
-    
-    # Filtrar cada fila
-    filtered: List[Dict] = []
-    for row in data:
-        new_row = {}
-        for col in columns_to_keep:
-            v = row.get(col, None)
-            new_row[col] = v if v not in ("", None) else None
-        filtered.append(new_row)
+    return list(dict.fromkeys(base_cols + pixel_cols))
+
+
+def filter_relevant_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Versión por DataFrame de ``filter_relevant_data``: mismas columnas y
+    celdas vacías ("") como valores nulos.
     
-    return filtered
+    Args:
+        df: DataFrame leído del TSV
+        
+    Returns:
+        DataFrame con solo columnas relevantes
+    """
+    df = df[_relevant_columns(list(df.columns))]
+    text_cols = [c for c in df.columns if not pd.api.types.is_numeric_dtype(df[c].dtype)]
+    if text_cols:
+        df = df.assign(**{c: df[c].replace("", None) for c in text_cols})
+    return df
 
 
 # =============================================================================
@@ -155,42 +179,53 @@ def delete_zero_rows(data: List[Dict]) -> List[Dict]:
     """
     Elimina filas donde Result esté vacío o todos los valores sean 0.
     
+    Versión por lista de filas de ``drop_zero_result_rows``.
+    
+    Args:
+        data: Lista de diccionarios (filas)
+        
+    Returns:
+        Lista filtrada sin filas inválidas
+    """
+    if not data:
+        return []
+    return drop_zero_result_rows(pd.DataFrame(data)).to_dict("records")
+
+
+def _clean_values(series: pd.Series, sep: Optional[str] = None) -> pd.DataFrame:
+    """
+    Equivalente vectorizado de ``clean_value`` sobre una columna (partida por
+    ``sep`` si se indica): los valores censurados ('>19.9') cuentan como no
+    convertibles, igual que en ``clean_value``.
+    """
+    parsed = parse_multi_values(series, sep=sep)
+    return parsed.values.mask(parsed.censored)
+
+
+def drop_zero_result_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Elimina filas donde Result esté vacío o todos los valores sean 0.
+    
     Criterios de eliminación:
     - Sin columna "Result"
     - Result vacío o None
     - Todos los valores Result son 0.0
     
     Args:
-        data: Lista de diccionarios (filas)
+        df: DataFrame (filas del TSV)
         
     Returns:
-        Lista filtrada sin filas inválidas
+        DataFrame filtrado sin filas inválidas
     """
-    out: List[Dict] = []
+    if "Result" not in df.columns:
+        return df.iloc[:0]
     
-    for row in data:
-        if "Result" not in row:
-            continue
-        
-        result_val = row.get("Result")
-        if result_val is None or str(result_val).strip() == "":
-            continue
-        
-        # Result puede tener múltiples valores separados por ";"
-        result_values = str(result_val).split(";")
-        cleaned = [clean_value(v) for v in result_values]
-        cleaned = [v for v in cleaned if v is not None]
-        
-        if not cleaned:
-            continue
-        
-        # Descartar si todos los valores son 0
-        if all(v == 0.0 for v in cleaned):
-            continue
-        
-        out.append(row)
+    # Result puede tener múltiples valores separados por ";"
+    values = _clean_values(df["Result"], sep=";")
+    has_value = values.notna().any(axis=1)
+    all_zero = values.fillna(0.0).eq(0.0).all(axis=1)
     
-    return out
+    return df[(has_value & ~all_zero).to_numpy()]
 
 
 # =============================================================================
@@ -201,11 +236,7 @@ def reorganize_results_and_reference(data: List[Dict]) -> List[Dict]:
     """
     Reorganiza columnas a formato: Reference <param>, Result <param>, Residuum <param>.
     
-    Lógica:
-    - Extrae parámetros entre "Reference" y "Begin"
-    - Para cada parámetro crea 3 columnas: Reference, Result, Residuum
-    - Result puede venir de columna "Result" (valores separados por ";")
-    - Residuum = Result - Reference
+    Versión por lista de filas de ``reorganize_results_frame``.
     
     Args:
         data: Lista de diccionarios (filas)
@@ -215,66 +246,66 @@ def reorganize_results_and_reference(data: List[Dict]) -> List[Dict]:
     """
     if not data:
         return []
+    return reorganize_results_frame(pd.DataFrame(data)).to_dict("records")
+
+
+def reorganize_results_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reorganiza columnas a formato: Reference <param>, Result <param>, Residuum <param>.
     
-    reorganized: List[Dict] = []
+    Lógica:
+    - Extrae parámetros entre "Reference" y "Begin"
+    - Para cada parámetro crea 3 columnas: Reference, Result, Residuum
+    - Result puede venir de columna "Result" (valores separados por ";")
+    - Residuum = Result - Reference
     
-    for row in data:
-        all_cols = list(row.keys())
-        
-        # Verificar que existan columnas clave
-        if "Reference" not in all_cols or "Begin" not in all_cols:
-            reorganized.append(row)
-            continue
-        
-        ref_i = all_cols.index("Reference")
-        begin_i = all_cols.index("Begin")
+    Args:
+        df: DataFrame (filas del TSV)
         
-        # Columnas de parámetros (entre Reference y Begin)
-        parameter_cols = all_cols[ref_i + 1: begin_i]
+    Returns:
+        DataFrame con columnas reorganizadas
+    """
+    all_cols = list(df.columns)
+    
+    # Verificar que existan columnas clave
+    if "Reference" not in all_cols or "Begin" not in all_cols:
+        return df
+    
+    ref_i = all_cols.index("Reference")
+    begin_i = all_cols.index("Begin")
+    
+    # Columnas de parámetros (entre Reference y Begin)
+    parameter_cols = all_cols[ref_i + 1: begin_i]
+    
+    # Copiar columnas que no son parámetros ni Result/Reference
+    keep_cols = [c for c in all_cols if c not in parameter_cols and c not in ("Result", "Reference")]
+    
+    # Extraer valores Result (separados por ";"), por posición
+    if "Result" in df.columns:
+        result_values = _clean_values(df["Result"], sep=";")
+    else:
+        result_values = pd.DataFrame(index=df.index)
+    
+    # Valores de referencia de todos los parámetros en una sola pasada
+    stacked = pd.Series(df[parameter_cols].to_numpy(dtype=object).ravel(order="F"))
+    references = _clean_values(stacked)[0].to_numpy().reshape(len(parameter_cols), len(df))
+    
+    # Para cada parámetro, crear Reference/Result/Residuum
+    new_cols: Dict[str, pd.Series] = {}
+    for idx, param in enumerate(parameter_cols):
+        ref = pd.Series(references[idx], index=df.index)
         
-        # Construir nueva fila
-        new_row: Dict = {}
+        # Result de la lista Result; si falta, valor directo de la columna del parámetro
+        if idx < result_values.shape[1]:
+            res = result_values[idx].fillna(ref)
+        else:
+            res = ref
         
-        # Copiar columnas que no son parámetros ni Result/Reference
-        for key in all_cols:
-            if key in parameter_cols or key in ("Result", "Reference"):
-                continue
-            new_row[key] = row.get(key)
-        
-        # Extraer valores Result (separados por ";")
-        result_values: List[str] = []
-        if row.get("Result") is not None:
-            result_values = [v.strip() for v in str(row["Result"]).split(";")]
-        
-        # Para cada parámetro, crear Reference/Result/Residuum
-        for idx, param in enumerate(parameter_cols):
-            ref_val = row.get(param)
-            ref_val_f = clean_value(ref_val) if (ref_val not in (None, "")) else None
-            
-            # Result puede venir de lista Result o de la columna del parámetro
-            res_val_f = None
-            if idx < len(result_values):
-                res_val_f = clean_value(result_values[idx])
-            
-            # Fallback: usar valor directo de la columna del parámetro
-            if res_val_f is None:
-                param_col_val = row.get(param)
-                if param_col_val is not None and param_col_val != "":
-                    res_val_f = clean_value(param_col_val)
-            
-            # Crear columnas
-            new_row[f"Reference {param}"] = ref_val_f
-            new_row[f"Result {param}"] = res_val_f
-            
-            # Calcular residuum
-            if ref_val_f is not None and res_val_f is not None:
-                new_row[f"Residuum {param}"] = res_val_f - ref_val_f
-            else:
-                new_row[f"Residuum {param}"] = None
-        
-        reorganized.append(new_row)
-    
-    return reorganized
+        new_cols[f"Reference {param}"] = ref
+        new_cols[f"Result {param}"] = res
+        new_cols[f"Residuum {param}"] = res - ref
+    
+    return pd.concat([df[keep_cols], pd.DataFrame(new_cols, index=df.index)], axis=1)
 
 
 # =============================================================================
@@ -391,12 +422,10 @@ def clean_tsv_file(uploaded_file, encodings_to_try: Optional[List[str]] = None)
         raise ValueError("❌ No se pudo leer el archivo con ningún encoding")
     
     # Pipeline de transformaciones
-    data = df_raw.to_dict("records")
-    data = filter_relevant_data(data)
-    data = delete_zero_rows(data)
-    data = reorganize_results_and_reference(data)
-    
-    df = pd.DataFrame(data)
+    df = filter_relevant_frame(df_raw)
+    if not df.empty:
+        df = drop_zero_result_rows(df).reset_index(drop=True)
+        df = reorganize_results_frame(df)
     
     # Convertir columnas espectrales a float
     if not df.empty:
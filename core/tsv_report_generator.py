@@ -7,23 +7,29 @@ ACTUALIZADO: Leyendas en gráfico de espectros + Estadísticas por Grupo + Filtr
 
 from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 import re
 import json
 
 import pandas as pd
 import plotly.graph_objs as go
+from plotly.offline import get_plotlyjs
 import numpy as np
 from sklearn.metrics import mean_squared_error, r2_score
 
-from core.report_utils import load_buchi_css, get_sidebar_styles, get_common_report_styles
+from core.report_utils import (
+    load_buchi_css, get_sidebar_styles, get_common_report_styles, generate_report_sidecar
+)
+from core.report_writer import ReportWriter
+from core.report_cache import cached_value
 from core.tsv_statistics import calculate_all_groups_statistics
 
 
 @dataclass
 class ReportResult:
     name: str
-    html: str
+    html: ReportWriter
     csv: pd.DataFrame
 
 
@@ -346,6 +352,45 @@ def build_spectra_figure_for_report(
     return fig
 
 
+# Columnas de hover usadas por las figuras (forman parte de la clave de caché)
+_HOVER_COLS = ("ID", "Date", "Note")
+
+
+@lru_cache(maxsize=1)
+def _plotlyjs_script() -> str:
+    """Bloque <script> con plotly.js embebido (se lee del paquete una vez)."""
+    return f'<script type="text/javascript">{get_plotlyjs()}</script>'
+
+
+def _render_spectra_html(df, sample_groups, group_labels, SAMPLE_GROUPS, PIXEL_RE) -> Optional[str]:
+    """Renderiza la figura de espectros a HTML (sin plotly.js)."""
+    fig = build_spectra_figure_for_report(df, sample_groups, group_labels, SAMPLE_GROUPS, PIXEL_RE)
+    if fig is None:
+        return None
+    return fig.to_html(full_html=False, include_plotlyjs=False)
+
+
+def _render_param_html(df, result_col, reference_col, residuum_col,
+                       sample_groups, group_labels, SAMPLE_GROUPS) -> Optional[Tuple]:
+    """
+    Renderiza las 3 figuras de un parámetro a HTML (sin plotly.js).
+
+    Returns:
+        (parity_html, residuum_html, histogram_html, r2, rmse, bias, n) o None
+    """
+    plots = plot_comparison_for_report(df, result_col, reference_col, residuum_col,
+                                       sample_groups, group_labels, SAMPLE_GROUPS)
+    if not plots:
+        return None
+    fig_parity, fig_residuum, fig_histogram, r2, rmse, bias, n = plots
+    return (
+        fig_parity.to_html(full_html=False, include_plotlyjs=False),
+        fig_residuum.to_html(full_html=False, include_plotlyjs=False),
+        fig_histogram.to_html(full_html=False, include_plotlyjs=False),
+        r2, rmse, bias, n,
+    )
+
+
 def generate_html_report(
     df: pd.DataFrame,
     file_name: str,
@@ -358,6 +403,25 @@ def generate_html_report(
     """
     Genera HTML con Bootstrap tabs + sidebar BUCHI + CSS corporativo + GRUPOS + ESTADÍSTICAS POR GRUPO + FILTRO VISUAL (Año/Mes/ID/Note).
     """
+    return write_html_report(
+        df, file_name, sample_groups, group_labels, group_descriptions, SAMPLE_GROUPS, PIXEL_RE
+    ).getvalue()
+
+
+def write_html_report(
+    df: pd.DataFrame,
+    file_name: str,
+    sample_groups: Dict[int, str] = None,
+    group_labels: Dict[str, str] = None,
+    group_descriptions: Dict[str, str] = None,
+    SAMPLE_GROUPS: Dict = None,
+    PIXEL_RE = None,
+    writer: Optional[ReportWriter] = None
+) -> ReportWriter:
+    """
+    Igual que generate_html_report, pero escribe el informe en un ReportWriter
+    (las figuras y el JSON de datos se añaden como fragmentos, sin copiarlos).
+    """
     if sample_groups is None:
         sample_groups = {}
     if group_labels is None:
@@ -370,25 +434,33 @@ def generate_html_report(
     columns_residuum = [c.replace("Result ", "Residuum ") for c in columns_result]
 
     summary_data: List[Dict] = []
-    fig_spectra = build_spectra_figure_for_report(df, sample_groups, group_labels, SAMPLE_GROUPS, PIXEL_RE)
-    plotly_already_included = False
+    group_inputs = (sample_groups, group_labels, SAMPLE_GROUPS)
 
-    def _fig_html(fig: go.Figure) -> str:
-        nonlocal plotly_already_included
-        include_js = "inline" if not plotly_already_included else False
-        html = fig.to_html(full_html=False, include_plotlyjs=include_js)
-        plotly_already_included = True
-        return html
+    # Las figuras se renderizan sin plotly.js (se incluye una sola vez más
+    # abajo) para que sus fragmentos sean reutilizables entre regeneraciones.
+    pixel_cols = [c for c in df.columns if _is_pixel_col(c, PIXEL_RE)]
+    spectra_html = cached_value(
+        "tsv_spectra",
+        (df[pixel_cols + [c for c in _HOVER_COLS if c in df.columns]],
+         group_inputs, getattr(PIXEL_RE, 'pattern', PIXEL_RE)),
+        lambda: _render_spectra_html(df, sample_groups, group_labels, SAMPLE_GROUPS, PIXEL_RE)
+    )
 
     # Build valid params list
     valid_params: List[Tuple[str, str, Tuple]] = []
     for result_col, reference_col, residuum_col in zip(columns_result, columns_reference, columns_residuum):
         param_name = str(result_col).replace("Result ", "")
         param_id = _safe_html_id(param_name)
-        plots = plot_comparison_for_report(df, result_col, reference_col, residuum_col, sample_groups, group_labels, SAMPLE_GROUPS)
+        param_cols = [c for c in (result_col, reference_col, residuum_col, *_HOVER_COLS[:2]) if c in df.columns]
+        plots = cached_value(
+            "tsv_param",
+            (df[param_cols], result_col, reference_col, residuum_col, group_inputs),
+            lambda: _render_param_html(df, result_col, reference_col, residuum_col,
+                                       sample_groups, group_labels, SAMPLE_GROUPS)
+        )
         if plots:
             valid_params.append((param_name, param_id, plots))
-            fig_parity, fig_res, fig_hist, r2, rmse, bias, n = plots
+            _, _, _, r2, rmse, bias, n = plots
             summary_data.append({"Parameter": param_name, "R2": r2, "RMSE": rmse, "BIAS": bias, "N": n})
 
     # Verificar si hay grupos asignados
@@ -420,7 +492,7 @@ def generate_html_report(
             <li><a href="#summary-stats">Resumen Estadístico</a></li>
     """
     
-    if fig_spectra:
+    if spectra_html is not None:
         sidebar_items += '<li><a href="#spectra-section">Espectros</a></li>\n'
     
     if valid_params:
@@ -504,7 +576,8 @@ def generate_html_report(
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     year = datetime.now().year
     
-    html_content = f"""<!DOCTYPE html>
+    html_content = writer if writer is not None else ReportWriter()
+    html_content += f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -659,9 +732,12 @@ def generate_html_report(
         </div>
 """
 
+    # plotly.js inline, una sola vez para todas las figuras
+    if spectra_html is not None or valid_params:
+        html_content += _plotlyjs_script()
+
     # SPECTRA
-    if fig_spectra is not None:
-        spectra_html = _fig_html(fig_spectra) if not plotly_already_included else fig_spectra.to_html(full_html=False, include_plotlyjs=False)
+    if spectra_html is not None:
         html_content += f"""
         <div class="info-box" id="spectra-section">
             <h2>Espectros</h2>
@@ -669,7 +745,9 @@ def generate_html_report(
                 <em>Overlay de todos los espectros NIR (columnas #1..#n). Los espectros coloreados pertenecen a grupos personalizados.</em>
             </p>
             <div class="plot-container">
-                {spectra_html}
+                """
+        html_content += spectra_html
+        html_content += """
             </div>
         </div>
 """
@@ -705,14 +783,10 @@ def generate_html_report(
 
         first_tab = True
         for param_name, param_id, plots in valid_params:
-            fig_parity, fig_residuum, fig_histogram, r2, rmse, bias, n = plots
+            fig_parity_html, fig_residuum_html, fig_histogram_html, r2, rmse, bias, n = plots
             active_class = "show active" if first_tab else ""
             first_tab = False
 
-            fig_parity_html = _fig_html(fig_parity) if not plotly_already_included else fig_parity.to_html(full_html=False, include_plotlyjs=False)
-            fig_residuum_html = fig_residuum.to_html(full_html=False, include_plotlyjs=False)
-            fig_histogram_html = fig_histogram.to_html(full_html=False, include_plotlyjs=False)
-
             html_content += f"""
                 <div class="tab-pane fade {active_class}" id="content-{param_id}" role="tabpanel">
                     <div class="stats-box">
@@ -741,13 +815,19 @@ def generate_html_report(
 
                         <div class="carousel-inner">
                             <div class="carousel-item active">
-                                <div class="plot-container">{fig_parity_html}</div>
+                                <div class="plot-container">"""
+            html_content += fig_parity_html
+            html_content += """</div>
                             </div>
                             <div class="carousel-item">
-                                <div class="plot-container">{fig_residuum_html}</div>
+                                <div class="plot-container">"""
+            html_content += fig_residuum_html
+            html_content += """</div>
                             </div>
                             <div class="carousel-item">
-                                <div class="plot-container">{fig_histogram_html}</div>
+                                <div class="plot-container">"""
+            html_content += fig_histogram_html
+            html_content += f"""</div>
                             </div>
                         </div>
 
@@ -907,6 +987,21 @@ def generate_html_report(
     """
 
 
+    # Sidecar JSON para el consolidador
+    html_content += generate_report_sidecar(
+        'tsv_validation',
+        summary={
+            'archivo': file_name,
+            'muestras': len(df),
+            'parametros': summary_data,
+            'grupos': {label: sum(1 for g in sample_groups.values() if g == label)
+                       for label in sorted(set(sample_groups.values()) - {'none'})},
+        },
+        metrics={row['Parameter']: {k: row[k] for k in ('R2', 'RMSE', 'BIAS', 'N')}
+                 for row in summary_data},
+        tool_name="COREF Suite",
+    )
+
     # FOOTER
     html_content += f"""
         <!-- FOOTER -->
@@ -919,7 +1014,9 @@ def generate_html_report(
 
 <script>
     // Embedded data
-    const fullData = JSON.parse({json.dumps(full_data_json)});
+    const fullData = JSON.parse("""
+    html_content += json.dumps(full_data_json)
+    html_content += f""");
     const availableYears = {json.dumps(available_years)};
     const availableMonths = {json.dumps(available_months)};
     const monthNames = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic'];
@@ -0,0 +1,487 @@
+"""
+COREF - TSV Selection State
+============================
+Estado de selección (grupos y muestras a eliminar) de un archivo TSV,
+guardado como arrays NumPy alineados con las filas del DataFrame:
+
+- ``codes``: código de grupo por fila (int8, 0 = sin grupo)
+- ``removed``: máscara booleana de muestras marcadas para eliminar
+- ``deleted``: máscara de muestras cuya eliminación ya se confirmó (las
+  filas siguen en el DataFrame hasta exportar)
+
+Asignar, marcar, deshacer y remapear tras una eliminación son operaciones
+vectorizadas O(N), también en archivos de decenas de miles de filas.
+
+Cada operación devuelve un SelectionDelta con solo las filas que cambió;
+SelectionHistory los apila para deshacer/rehacer con memoria
+O(filas cambiadas) en lugar de copiar el DataFrame o el estado completo.
+
+Para los consumidores existentes se exponen vistas de solo lectura con la
+misma API que antes: ``groups`` se comporta como ``{idx: "Set N"}`` y
+``removed_set`` como un ``set`` de índices.
+"""
+
+from collections.abc import Mapping, Set as AbstractSet
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+NO_GROUP = "none"
+
+
+@dataclass(frozen=True)
+class SelectionDelta:
+    """
+    Cambio aplicado por una operación: posiciones afectadas y sus valores
+    antes y después. Permite deshacer/rehacer con memoria O(filas cambiadas).
+    """
+    positions: np.ndarray
+    old_codes: np.ndarray
+    old_removed: np.ndarray
+    old_deleted: np.ndarray
+    new_codes: np.ndarray
+    new_removed: np.ndarray
+    new_deleted: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.positions, self.old_codes, self.old_removed,
+                                      self.old_deleted, self.new_codes, self.new_removed,
+                                      self.new_deleted))
+
+
+class SelectionState:
+    """
+    Grupos y marcas de eliminación de las filas de un DataFrame.
+
+    Args:
+        index: Índice del DataFrame (las etiquetas son los RowIndex usados por
+            tablas y gráficos)
+        group_keys: Claves de grupo conocidas (se añaden más bajo demanda)
+    """
+
+    def __init__(self, index: Iterable, group_keys: Optional[Iterable[str]] = None):
+        self.index = pd.Index(index)
+        n = len(self.index)
+        self.codes = np.zeros(n, dtype=np.int8)
+        self.removed = np.zeros(n, dtype=bool)
+        self.deleted = np.zeros(n, dtype=bool)
+        self.group_keys: List[str] = [NO_GROUP]
+        for key in group_keys or ():
+            self.group_code(key)
+
+    # ------------------------------------------------------------------
+    # Códigos y posiciones
+    # ------------------------------------------------------------------
+    def group_code(self, group: Optional[str]) -> int:
+        """Código del grupo (lo registra si es nuevo)."""
+        if not group or group == NO_GROUP:
+            return 0
+        try:
+            return self.group_keys.index(group)
+        except ValueError:
+            self.group_keys.append(group)
+            return len(self.group_keys) - 1
+
+    def positions(self, labels) -> np.ndarray:
+        """Posiciones de las etiquetas dadas (las que no existen se ignoran)."""
+        if isinstance(labels, (int, np.integer)):
+            labels = [labels]
+        pos = self.index.get_indexer(pd.Index(list(labels)))
+        return pos[pos >= 0]
+
+    def _key_array(self) -> np.ndarray:
+        return np.asarray(self.group_keys, dtype=object)
+
+    # ------------------------------------------------------------------
+    # Escritura (devuelve el delta para poder deshacer)
+    # ------------------------------------------------------------------
+    def _snapshot(self, pos: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return self.codes[pos].copy(), self.removed[pos].copy(), self.deleted[pos].copy()
+
+    def _apply(self, pos: np.ndarray, codes=None, removed=None, deleted=None) -> SelectionDelta:
+        pos = np.unique(pos)
+        old = self._snapshot(pos)
+        if codes is not None:
+            self.codes[pos] = codes
+        if removed is not None:
+            self.removed[pos] = removed
+        if deleted is not None:
+            self.deleted[pos] = deleted
+        return SelectionDelta(pos, *old, *self._snapshot(pos))
+
+    def combine(self, deltas: Iterable[SelectionDelta]) -> SelectionDelta:
+        """
+        Une varios deltas aplicados consecutivamente en uno solo (valores
+        previos del primero que tocó cada fila, valores actuales del estado).
+        """
+        deltas = list(deltas)
+        if not deltas:
+            return self._apply(np.array([], dtype=np.intp))
+        pos = np.unique(np.concatenate([d.positions for d in deltas]))
+        old_codes, old_removed, old_deleted = self._snapshot(pos)
+        # En orden inverso: el primer delta que tocó la fila fija su valor previo
+        for d in reversed(deltas):
+            at = np.searchsorted(pos, d.positions)
+            old_codes[at] = d.old_codes
+            old_removed[at] = d.old_removed
+            old_deleted[at] = d.old_deleted
+        return SelectionDelta(pos, old_codes, old_removed, old_deleted, *self._snapshot(pos))
+
+    def assign(self, labels, group: str) -> SelectionDelta:
+        """Asigna las filas a un grupo y las desmarca para eliminar."""
+        return self._apply(self.positions(labels), codes=self.group_code(group), removed=False)
+
+    def ungroup(self, labels) -> SelectionDelta:
+        """Quita las filas de cualquier grupo."""
+        return self._apply(self.positions(labels), codes=0)
+
+    def mark_removed(self, labels, clear_group: bool = False) -> SelectionDelta:
+        """Marca las filas para eliminar (opcionalmente quitándoles el grupo)."""
+        return self._apply(self.positions(labels),
+                           codes=0 if clear_group else None, removed=True)
+
+    def unmark_removed(self, labels) -> SelectionDelta:
+        """Desmarca las filas para eliminar."""
+        return self._apply(self.positions(labels), removed=False)
+
+    def clear_groups(self) -> SelectionDelta:
+        return self._apply(np.flatnonzero(self.codes), codes=0)
+
+    def clear_removed(self) -> SelectionDelta:
+        return self._apply(np.flatnonzero(self.removed), removed=False)
+
+    def clear(self) -> SelectionDelta:
+        return self._apply(np.flatnonzero((self.codes != 0) | self.removed), codes=0, removed=False)
+
+    def confirm_removed(self) -> SelectionDelta:
+        """
+        Confirma la eliminación de las filas marcadas: pasan a ``deleted``
+        (sin grupo ni marca) y dejan de formar parte de los datos de trabajo.
+        """
+        return self._apply(np.flatnonzero(self.removed), codes=0, removed=False, deleted=True)
+
+    def replace(self, labels, removed_values, group_values) -> SelectionDelta:
+        """
+        Sustituye todo el estado por el de las filas dadas (data_editor):
+        las filas no incluidas quedan sin grupo y sin marcar.
+
+        Args:
+            labels: Etiquetas de fila
+            removed_values: Bool por fila (marcada para eliminar)
+            group_values: Clave de grupo por fila ("none" = sin grupo)
+        """
+        labels = pd.Index(list(labels))
+        pos = self.index.get_indexer(labels)
+        valid = pos >= 0
+        pos = pos[valid]
+
+        new_codes = np.zeros(len(self.index), dtype=np.int8)
+        new_removed = np.zeros(len(self.index), dtype=bool)
+
+        groups = np.asarray(group_values, dtype=object)[valid]
+        inverse, uniques = pd.factorize(pd.Series(groups).fillna(NO_GROUP), sort=False)
+        unique_codes = np.array([self.group_code(g) for g in uniques], dtype=np.int8)
+        new_codes[pos] = unique_codes[inverse] if len(uniques) else 0
+        new_removed[pos] = np.asarray(removed_values, dtype=bool)[valid]
+
+        changed = np.flatnonzero((new_codes != self.codes) | (new_removed != self.removed))
+        return self._apply(changed, codes=new_codes[changed], removed=new_removed[changed])
+
+    def undo(self, delta: SelectionDelta) -> None:
+        """Restaura los valores previos de un delta."""
+        self.codes[delta.positions] = delta.old_codes
+        self.removed[delta.positions] = delta.old_removed
+        self.deleted[delta.positions] = delta.old_deleted
+
+    def redo(self, delta: SelectionDelta) -> None:
+        """Vuelve a aplicar un delta deshecho."""
+        self.codes[delta.positions] = delta.new_codes
+        self.removed[delta.positions] = delta.new_removed
+        self.deleted[delta.positions] = delta.new_deleted
+
+    # ------------------------------------------------------------------
+    # Remapeo
+    # ------------------------------------------------------------------
+    def compact(self, drop: Optional[np.ndarray] = None) -> Tuple[np.ndarray, "SelectionState"]:
+        """
+        Estado resultante de quitar filas y renumerar el índice (equivale a
+        ``df[~drop].reset_index(drop=True)``).
+
+        Args:
+            drop: Máscara de filas a quitar (por defecto, las ya eliminadas)
+
+        Returns:
+            (keep, state): máscara de filas conservadas y nuevo estado
+        """
+        keep = ~(self.deleted if drop is None else drop)
+        state = SelectionState(pd.RangeIndex(int(keep.sum())))
+        state.group_keys = list(self.group_keys)
+        state.codes = self.codes[keep].copy()
+        state.removed = self.removed[keep].copy()
+        return keep, state
+
+    def reindex(self, index: Iterable) -> "SelectionState":
+        """Estado alineado con otro índice (las filas nuevas quedan vacías)."""
+        index = pd.Index(index)
+        state = SelectionState(index)
+        state.group_keys = list(self.group_keys)
+        pos = self.index.get_indexer(index)
+        found = pos >= 0
+        state.codes[found] = self.codes[pos[found]]
+        state.removed[found] = self.removed[pos[found]]
+        state.deleted[found] = self.deleted[pos[found]]
+        return state
+
+    def copy(self) -> "SelectionState":
+        state = SelectionState(self.index)
+        state.group_keys = list(self.group_keys)
+        state.codes = self.codes.copy()
+        state.removed = self.removed.copy()
+        state.deleted = self.deleted.copy()
+        return state
+
+    # ------------------------------------------------------------------
+    # Lectura vectorizada
+    # ------------------------------------------------------------------
+    def group_array(self, index: Optional[Iterable] = None) -> np.ndarray:
+        """Clave de grupo por fila ("none" si no tiene), opcionalmente para otro índice."""
+        if index is None:
+            return self._key_array()[self.codes]
+        pos = self.index.get_indexer(pd.Index(index))
+        codes = np.where(pos >= 0, self.codes[pos], 0)
+        return self._key_array()[codes]
+
+    def removed_array(self, index: Optional[Iterable] = None) -> np.ndarray:
+        """Máscara de eliminación, opcionalmente para otro índice."""
+        if index is None:
+            return self.removed
+        pos = self.index.get_indexer(pd.Index(index))
+        return np.where(pos >= 0, self.removed[pos], False)
+
+    def group_mask(self, group: str, active_only: bool = True) -> np.ndarray:
+        """Filas del grupo (por defecto, solo las no marcadas para eliminar)."""
+        if group not in self.group_keys or group == NO_GROUP:
+            mask = np.zeros(len(self.index), dtype=bool)
+        else:
+            mask = self.codes == self.group_keys.index(group)
+        return mask & ~self.removed if active_only else mask
+
+    def counts(self, group_keys: Iterable[str], active_only: bool = True) -> Dict[str, int]:
+        """Número de filas por grupo."""
+        codes = self.codes[~self.removed] if active_only else self.codes
+        bins = np.bincount(codes, minlength=len(self.group_keys))
+        return {
+            g: int(bins[self.group_keys.index(g)]) if g in self.group_keys and g != NO_GROUP else 0
+            for g in group_keys
+        }
+
+    def active_groups(self) -> Set[str]:
+        """Grupos con al menos una fila no marcada para eliminar."""
+        used = np.unique(self.codes[~self.removed])
+        return {self.group_keys[c] for c in used if c != 0}
+
+    @property
+    def n_deleted(self) -> int:
+        return int(np.count_nonzero(self.deleted))
+
+    @property
+    def active_index(self) -> pd.Index:
+        """Etiquetas de las filas no eliminadas."""
+        return self.index[~self.deleted] if self.deleted.any() else self.index
+
+    @property
+    def groups(self) -> "GroupAssignments":
+        """Vista ``{idx: grupo}`` de las filas con grupo."""
+        return GroupAssignments(self)
+
+    @property
+    def removed_set(self) -> "RemovalSet":
+        """Vista tipo ``set`` de las filas marcadas para eliminar."""
+        return RemovalSet(self)
+
+
+# =============================================================================
+# HISTORIAL DESHACER / REHACER
+# =============================================================================
+
+class SelectionHistory:
+    """
+    Pilas de deshacer/rehacer de un SelectionState.
+
+    Solo guarda deltas (filas cambiadas y sus valores antes/después), de
+    modo que la memoria crece con el número de filas editadas y no con el
+    tamaño del archivo.
+
+    Args:
+        max_entries: Número máximo de operaciones que se pueden deshacer
+    """
+
+    def __init__(self, max_entries: int = 50):
+        self.max_entries = max_entries
+        self._undo: List[Tuple[str, SelectionDelta]] = []
+        self._redo: List[Tuple[str, SelectionDelta]] = []
+
+    def record(self, label: str, delta: SelectionDelta) -> None:
+        """Registra una operación ya aplicada (las vacías se ignoran)."""
+        if not len(delta):
+            return
+        self._undo.append((label, delta))
+        if len(self._undo) > self.max_entries:
+            del self._undo[0]
+        self._redo.clear()
+
+    def undo(self, state: SelectionState) -> Optional[str]:
+        """Deshace la última operación. Devuelve su etiqueta (None si no hay)."""
+        if not self._undo:
+            return None
+        label, delta = self._undo.pop()
+        state.undo(delta)
+        self._redo.append((label, delta))
+        return label
+
+    def redo(self, state: SelectionState) -> Optional[str]:
+        """Rehace la última operación deshecha. Devuelve su etiqueta."""
+        if not self._redo:
+            return None
+        label, delta = self._redo.pop()
+        state.redo(delta)
+        self._undo.append((label, delta))
+        return label
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def next_undo(self) -> Optional[str]:
+        return self._undo[-1][0] if self._undo else None
+
+    def next_redo(self) -> Optional[str]:
+        return self._redo[-1][0] if self._redo else None
+
+    def clear(self) -> None:
+        self._undo.clear()
+        self._redo.clear()
+
+    @property
+    def nbytes(self) -> int:
+        return sum(d.nbytes for _, d in self._undo + self._redo)
+
+
+# =============================================================================
+# VISTAS DE SOLO LECTURA (API de dict/set)
+# =============================================================================
+
+class GroupAssignments(Mapping):
+    """Vista ``{idx: "Set N"}`` sobre un SelectionState."""
+
+    def __init__(self, state: SelectionState):
+        self.state = state
+
+    def _pos(self, key) -> int:
+        try:
+            pos = self.state.index.get_loc(key)
+        except (KeyError, TypeError):
+            return -1
+        return pos if isinstance(pos, (int, np.integer)) else -1
+
+    def __getitem__(self, key) -> str:
+        pos = self._pos(key)
+        if pos < 0 or self.state.codes[pos] == 0:
+            raise KeyError(key)
+        return self.state.group_keys[self.state.codes[pos]]
+
+    def __contains__(self, key) -> bool:
+        pos = self._pos(key)
+        return pos >= 0 and self.state.codes[pos] != 0
+
+    def __iter__(self):
+        return iter(self.state.index[np.flatnonzero(self.state.codes)].tolist())
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.state.codes))
+
+    def items(self):
+        pos = np.flatnonzero(self.state.codes)
+        keys = self.state._key_array()[self.state.codes[pos]]
+        return list(zip(self.state.index[pos].tolist(), keys.tolist()))
+
+    def values(self):
+        return self.state._key_array()[self.state.codes[self.state.codes != 0]].tolist()
+
+    def __repr__(self) -> str:
+        return f"GroupAssignments({dict(self.items())!r})"
+
+
+class RemovalSet(AbstractSet):
+    """Vista tipo ``set`` de los índices marcados para eliminar."""
+
+    def __init__(self, state: SelectionState):
+        self.state = state
+
+    def __contains__(self, key) -> bool:
+        try:
+            pos = self.state.index.get_loc(key)
+        except (KeyError, TypeError):
+            return False
+        return isinstance(pos, (int, np.integer)) and bool(self.state.removed[pos])
+
+    def __iter__(self):
+        return iter(self.state.index[self.state.removed].tolist())
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.state.removed))
+
+    def intersection(self, other) -> Set:
+        return {k for k in other if k in self}
+
+    def __repr__(self) -> str:
+        return f"RemovalSet({set(self)!r})"
+
+
+# =============================================================================
+# HELPERS PARA CONSUMIDORES
+# =============================================================================
+
+def selection_arrays(
+    index: Iterable,
+    removed_indices=None,
+    sample_groups=None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Máscara de eliminación y clave de grupo por fila alineadas con ``index``.
+
+    Acepta tanto las vistas de SelectionState (sin recorrer elementos) como
+    los ``set``/``dict`` clásicos (resueltos con un join vectorizado).
+
+    Returns:
+        (removed_mask, groups): arrays bool y object de longitud len(index)
+    """
+    index = pd.Index(index)
+
+    if isinstance(removed_indices, RemovalSet):
+        removed_mask = removed_indices.state.removed_array(index)
+    elif removed_indices:
+        removed_mask = index.isin(list(removed_indices))
+    else:
+        removed_mask = np.zeros(len(index), dtype=bool)
+
+    if isinstance(sample_groups, GroupAssignments):
+        groups = sample_groups.state.group_array(index)
+    elif sample_groups:
+        groups = (pd.Series(dict(sample_groups), dtype=object)
+                  .reindex(index).fillna(NO_GROUP).to_numpy(dtype=object))
+    else:
+        groups = np.full(len(index), NO_GROUP, dtype=object)
+
+    return np.asarray(removed_mask, dtype=bool), groups
@@ -1,11 +1,25 @@
 """
 Gestión del estado de sesión para TSV Validation Reports
+
+Los grupos y las marcas de eliminación de cada archivo viven en un
+SelectionState (core.tsv_selection): arrays alineados con las filas del
+DataFrame en lugar de dict/set recorridos elemento a elemento.
+
+Cada operación sobre la selección se registra en un SelectionHistory
+(deltas de las filas cambiadas) para poder deshacerla o rehacerla. La
+confirmación de eliminación es lógica: las filas se ocultan con una máscara
+y solo se quitan del DataFrame al exportar (get_export_data).
 """
 
-from typing import Dict, List, Set, Optional
+from typing import Dict, List, Set, Optional, Tuple
 import streamlit as st
 import pandas as pd
 
+from core.tsv_selection import SelectionState, SelectionHistory, SelectionDelta
+from core.tsv_figure_cache import PreviewFigureCache, new_preview_figure_cache
+from core.tsv_filter_index import VisualFilterIndex
+from core.session_memory import enforce_memory_budget
+
 
 # =============================================================================
 # INICIALIZACIÓN
@@ -17,8 +31,8 @@ def initialize_tsv_session_state():
     Esta función se llama al inicio de cada ejecución de la app.
     """
     st.session_state.setdefault("processed_data", {})
-    st.session_state.setdefault("samples_to_remove", {})
-    st.session_state.setdefault("sample_groups", {})
+    st.session_state.setdefault("selection_state", {})
+    st.session_state.setdefault("selection_history", {})
     st.session_state.setdefault(
         "group_labels",
         {
@@ -41,6 +55,12 @@ def initialize_tsv_session_state():
     st.session_state.setdefault("pending_selections", {})
     st.session_state.setdefault("last_event_id", {})
     st.session_state.setdefault("last_apply_summary", {})
+    st.session_state.setdefault("data_version", {})
+    st.session_state.setdefault("data_version_seq", 0)
+    st.session_state.setdefault("visual_filter_index", {})
+    if "preview_figures" not in st.session_state:
+        st.session_state.preview_figures = new_preview_figure_cache()
+    enforce_memory_budget()
 
 
 # =============================================================================
@@ -56,8 +76,11 @@ def add_processed_file(file_name: str, df: pd.DataFrame):
         df: DataFrame con los datos procesados
     """
     st.session_state.processed_data[file_name] = df
-    st.session_state.samples_to_remove[file_name] = set()
-    st.session_state.sample_groups[file_name] = {}
+    # Versión única por carga: invalida las figuras cacheadas de cargas previas
+    st.session_state.data_version_seq += 1
+    st.session_state.data_version[file_name] = st.session_state.data_version_seq
+    st.session_state.selection_state[file_name] = SelectionState(df.index)
+    st.session_state.selection_history[file_name] = SelectionHistory()
     st.session_state.editor_version[file_name] = 0
     st.session_state.pending_selections[file_name] = []
     st.session_state.last_event_id[file_name] = {"spectra": "", "parity": ""}
@@ -71,23 +94,29 @@ def remove_processed_file(file_name: str):
         file_name: Nombre del archivo a eliminar
     """
     st.session_state.processed_data.pop(file_name, None)
-    st.session_state.samples_to_remove.pop(file_name, None)
-    st.session_state.sample_groups.pop(file_name, None)
+    st.session_state.selection_state.pop(file_name, None)
+    st.session_state.selection_history.pop(file_name, None)
     st.session_state.editor_version.pop(file_name, None)
     st.session_state.pending_selections.pop(file_name, None)
     st.session_state.last_event_id.pop(file_name, None)
     st.session_state.last_apply_summary.pop(file_name, None)
+    st.session_state.data_version.pop(file_name, None)
+    st.session_state.get("visual_filter_index", {}).pop(file_name, None)
+    get_figure_cache().invalidate(file_name)
 
 
 def clear_all_processed_data():
     """Limpia todos los datos procesados del estado de sesión."""
     st.session_state.processed_data = {}
-    st.session_state.samples_to_remove = {}
-    st.session_state.sample_groups = {}
+    st.session_state.selection_state = {}
+    st.session_state.selection_history = {}
     st.session_state.editor_version = {}
     st.session_state.pending_selections = {}
     st.session_state.last_event_id = {}
     st.session_state.last_apply_summary = {}
+    st.session_state.data_version = {}
+    st.session_state.visual_filter_index = {}
+    get_figure_cache().invalidate()
 
 
 def get_processed_files() -> List[str]:
@@ -108,6 +137,91 @@ def has_processed_data() -> bool:
     return bool(st.session_state.processed_data)
 
 
+def get_selection_state(file_name: str) -> SelectionState:
+    """
+    Obtiene el estado de selección (grupos + eliminados) de un archivo,
+    creándolo alineado con su DataFrame si no existe.
+    """
+    states = st.session_state.selection_state
+    state = states.get(file_name)
+    if state is None:
+        df = st.session_state.processed_data.get(file_name)
+        state = SelectionState(df.index if df is not None else [])
+        states[file_name] = state
+    return state
+
+
+def get_selection_history(file_name: str) -> SelectionHistory:
+    """Obtiene (o crea) el historial deshacer/rehacer de un archivo."""
+    return st.session_state.selection_history.setdefault(file_name, SelectionHistory())
+
+
+def _record(file_name: str, label: str, delta: SelectionDelta):
+    """Registra una operación aplicada en el historial del archivo."""
+    get_selection_history(file_name).record(label, delta)
+
+
+# =============================================================================
+# DATOS DE TRABAJO Y EXPORTACIÓN
+# =============================================================================
+
+def get_working_dataframe(file_name: str) -> pd.DataFrame:
+    """
+    DataFrame sin las filas cuya eliminación ya se confirmó.
+
+    Conserva las etiquetas de fila originales (RowIndex), de modo que grupos,
+    marcas y eventos de los gráficos siguen siendo válidos tras deshacer.
+    """
+    df = st.session_state.processed_data[file_name]
+    state = get_selection_state(file_name)
+    if not state.n_deleted:
+        return df
+    return df[~state.deleted]
+
+
+def get_export_data(file_name: str) -> Tuple[pd.DataFrame, Dict[int, str]]:
+    """
+    Materializa las eliminaciones confirmadas para exportar.
+
+    Returns:
+        (df, sample_groups): DataFrame sin las filas eliminadas, con índice
+        renumerado, y grupos remapeados a ese índice
+    """
+    df = st.session_state.processed_data[file_name]
+    state = get_selection_state(file_name)
+    if not state.n_deleted:
+        return df, state.groups
+
+    keep, compacted = state.compact()
+    return df[keep].reset_index(drop=True), compacted.groups
+
+
+def get_data_version(file_name: str) -> int:
+    """Versión de los datos cargados de un archivo (cambia al reprocesarlo)."""
+    return st.session_state.data_version.get(file_name, 0)
+
+
+def get_visual_filter_index(file_name: str) -> VisualFilterIndex:
+    """
+    Índice del filtro visual de un archivo (fechas parseadas, ID/Note
+    categóricos). Se construye una vez por versión de datos.
+    """
+    indexes = st.session_state.setdefault("visual_filter_index", {})
+    version = get_data_version(file_name)
+    cached = indexes.get(file_name)
+    if cached is None or cached[0] != version:
+        cached = (version, VisualFilterIndex(st.session_state.processed_data[file_name]))
+        indexes[file_name] = cached
+    return cached[1]
+
+
+def get_figure_cache() -> PreviewFigureCache:
+    """Caché de figuras de previsualización de la sesión."""
+    if "preview_figures" not in st.session_state:
+        st.session_state.preview_figures = new_preview_figure_cache()
+    return st.session_state.preview_figures
+
+
 # =============================================================================
 # GESTIÓN DE SELECCIONES PENDIENTES
 # =============================================================================
@@ -150,6 +264,33 @@ def add_pending_selection(file_name: str, idx: int, action: str, group: Optional
     pending.append({"idx": idx, "action": action, "group": group})
     st.session_state.pending_selections[file_name] = pending
 
+def add_pending_selections(file_name: str, indices: List[int], action: str, group: Optional[str] = None):
+    """
+    Versión en bloque de add_pending_selection (mismas reglas) para
+    selecciones box/lasso de muchas muestras: O(n) en lugar de recorrer la
+    lista de pendientes por cada índice.
+    """
+    pending = st.session_state.pending_selections.get(file_name, [])
+
+    if action != "Asignar a Grupo":
+        group = None
+
+    by_idx = {item.get("idx"): item for item in pending}
+    for idx in indices:
+        item = by_idx.get(idx)
+        if item is None:
+            by_idx[idx] = {"idx": idx, "action": action, "group": group}
+        elif item.get("action") == action and item.get("group") == group:
+            # "Undo": repetir la misma intención quita el pendiente
+            del by_idx[idx]
+        else:
+            # Overwrite: última intención gana
+            item["action"] = action
+            item["group"] = group
+
+    st.session_state.pending_selections[file_name] = list(by_idx.values())
+
+
 def clear_pending_selections(file_name: str) -> int:
     pending = st.session_state.pending_selections.get(file_name, [])
     n = len(pending) if pending else 0
@@ -207,30 +348,23 @@ def apply_pending_selections(file_name: str):
             continue
         last_by_idx[idx] = item
 
-    eliminar_count = 0
-    grupos_count = 0
-
-    # Asegurar estructuras
-    st.session_state.samples_to_remove.setdefault(file_name, set())
-    st.session_state.sample_groups.setdefault(file_name, {})
+    state = get_selection_state(file_name)
 
+    to_remove = [idx for idx, item in last_by_idx.items() if item.get("action") == "Marcar para Eliminar"]
+    by_group: Dict[str, List[int]] = {}
     for idx, item in last_by_idx.items():
-        action = item.get("action")
-
-        if action == "Marcar para Eliminar":
-            st.session_state.samples_to_remove[file_name].add(idx)
-            st.session_state.sample_groups[file_name].pop(idx, None)
-            eliminar_count += 1
-
-        elif action == "Asignar a Grupo":
-            grp = item.get("group")
-            if grp and grp != "none":
-                st.session_state.sample_groups[file_name][idx] = grp
-                st.session_state.samples_to_remove[file_name].discard(idx)
-                grupos_count += 1
-            else:
-                # Si llega grupo inválido, no hacemos nada (defensivo)
-                pass
+        grp = item.get("group")
+        # Si llega grupo inválido, no hacemos nada (defensivo)
+        if item.get("action") == "Asignar a Grupo" and grp and grp != "none":
+            by_group.setdefault(grp, []).append(idx)
+
+    deltas = [state.mark_removed(to_remove, clear_group=True)]
+    for grp, indices in by_group.items():
+        deltas.append(state.assign(indices, grp))
+    _record(file_name, f"Aplicar {len(last_by_idx)} selección(es)", state.combine(deltas))
+
+    eliminar_count = len(to_remove)
+    grupos_count = sum(len(indices) for indices in by_group.values())
 
     st.session_state.last_apply_summary[file_name] = {
         "count": len(last_by_idx),
@@ -263,23 +397,23 @@ def get_apply_summary(file_name: str) -> Optional[Dict]:
 # =============================================================================
 
 def get_samples_to_remove(file_name: str) -> Set[int]:
-    """Obtiene el conjunto de índices marcados para eliminar."""
-    return st.session_state.samples_to_remove.get(file_name, set())
+    """Obtiene el conjunto (vista de solo lectura) de índices marcados para eliminar."""
+    return get_selection_state(file_name).removed_set
 
 
 def mark_sample_for_removal(file_name: str, idx: int):
     """Marca una muestra para eliminar."""
-    st.session_state.samples_to_remove[file_name].add(idx)
+    _record(file_name, f"Marcar {idx}", get_selection_state(file_name).mark_removed([idx]))
 
 
 def unmark_sample_for_removal(file_name: str, idx: int):
     """Desmarca una muestra para eliminar."""
-    st.session_state.samples_to_remove[file_name].discard(idx)
+    _record(file_name, f"Desmarcar {idx}", get_selection_state(file_name).unmark_removed([idx]))
 
 
 def clear_samples_to_remove(file_name: str):
     """Limpia todas las muestras marcadas para eliminar."""
-    st.session_state.samples_to_remove[file_name] = set()
+    _record(file_name, "Limpiar marcas", get_selection_state(file_name).clear_removed())
 
 
 # =============================================================================
@@ -287,24 +421,23 @@ def clear_samples_to_remove(file_name: str):
 # =============================================================================
 
 def get_sample_groups(file_name: str) -> Dict[int, str]:
-    """Obtiene el diccionario de grupos de muestras."""
-    return st.session_state.sample_groups.get(file_name, {})
+    """Obtiene el diccionario (vista de solo lectura) de grupos de muestras."""
+    return get_selection_state(file_name).groups
 
 
 def assign_sample_to_group(file_name: str, idx: int, group: str):
     """Asigna una muestra a un grupo."""
-    st.session_state.sample_groups[file_name][idx] = group
-    st.session_state.samples_to_remove[file_name].discard(idx)
+    _record(file_name, f"Asignar {idx} a {group}", get_selection_state(file_name).assign([idx], group))
 
 
 def remove_sample_from_groups(file_name: str, idx: int):
     """Elimina una muestra de todos los grupos."""
-    st.session_state.sample_groups[file_name].pop(idx, None)
+    _record(file_name, f"Quitar {idx} de grupo", get_selection_state(file_name).ungroup([idx]))
 
 
 def clear_all_groups(file_name: str):
     """Limpia todos los grupos de un archivo."""
-    st.session_state.sample_groups[file_name] = {}
+    _record(file_name, "Limpiar grupos", get_selection_state(file_name).clear_groups())
 
 
 def update_groups_from_editor(file_name: str, edited_df: pd.DataFrame):
@@ -312,19 +445,12 @@ def update_groups_from_editor(file_name: str, edited_df: pd.DataFrame):
     Actualiza los grupos y muestras a eliminar desde el data_editor.
     (Para el flujo clásico Eliminar/Grupo)
     """
-    new_removed = set()
-    new_groups = {}
-
-    for idx in edited_df.index:
-        if bool(edited_df.at[idx, "Eliminar"]):
-            new_removed.add(idx)
-
-        grp_val = edited_df.at[idx, "Grupo"]
-        if grp_val != "none":
-            new_groups[idx] = grp_val
-
-    st.session_state.samples_to_remove[file_name] = new_removed
-    st.session_state.sample_groups[file_name] = new_groups
+    delta = get_selection_state(file_name).replace(
+        edited_df.index,
+        edited_df["Eliminar"].fillna(False).astype(bool).to_numpy(),
+        edited_df["Grupo"].to_numpy(),
+    )
+    _record(file_name, "Edición de tabla", delta)
     st.session_state.editor_version[file_name] += 1
 
 
@@ -334,43 +460,25 @@ def update_groups_from_editor(file_name: str, edited_df: pd.DataFrame):
 
 def confirm_sample_deletion(file_name: str) -> int:
     """
-    Confirma y ejecuta la eliminación de muestras marcadas.
-    Actualiza el DataFrame y remapia los índices de grupos.
+    Confirma la eliminación de las muestras marcadas.
+
+    La eliminación es lógica (máscara ``deleted`` del estado): el DataFrame
+    no se copia ni se renumera hasta exportar, y la operación se puede
+    deshacer como cualquier otra.
     """
-    df_current = st.session_state.processed_data[file_name]
-    removed_indices = st.session_state.samples_to_remove[file_name]
-    sample_groups = st.session_state.sample_groups[file_name]
+    state = get_selection_state(file_name)
 
-    if not removed_indices:
+    n_removed = int(state.removed.sum())
+    if not n_removed:
         return 0
 
-    old_to_new = {}
-    sorted_indices = sorted(df_current.index)
-    removed_sorted = sorted(removed_indices)
-    new_idx = 0
+    _record(file_name, f"Eliminar {n_removed} muestra(s)", state.confirm_removed())
 
-    for old_idx in sorted_indices:
-        if old_idx not in removed_sorted:
-            old_to_new[old_idx] = new_idx
-            new_idx += 1
-
-    df_updated = df_current.drop(index=list(removed_indices)).reset_index(drop=True)
-
-    new_groups = {}
-    for old_idx, grp in sample_groups.items():
-        if old_idx not in removed_indices:
-            mapped = old_to_new.get(old_idx)
-            if mapped is not None:
-                new_groups[mapped] = grp
-
-    st.session_state.processed_data[file_name] = df_updated
-    st.session_state.samples_to_remove[file_name] = set()
-    st.session_state.sample_groups[file_name] = new_groups
     st.session_state.pending_selections[file_name] = []
     st.session_state.last_event_id[file_name] = {"spectra": "", "parity": ""}
     st.session_state.editor_version[file_name] += 1
 
-    return len(removed_indices)
+    return n_removed
 
 
 # =============================================================================
@@ -379,28 +487,67 @@ def confirm_sample_deletion(file_name: str) -> int:
 
 def clear_all_selections(file_name: str):
     """Limpia todas las selecciones (grupos y eliminados) de un archivo."""
-    st.session_state.samples_to_remove[file_name] = set()
-    st.session_state.sample_groups[file_name] = {}
+    _record(file_name, "Limpiar todo", get_selection_state(file_name).clear())
     st.session_state.pending_selections[file_name] = []
     st.session_state.last_event_id[file_name] = {"spectra": "", "parity": ""}
     st.session_state.editor_version[file_name] += 1
 
 
 def clean_invalid_indices(file_name: str):
-    """Limpia índices inválidos de samples_to_remove y sample_groups."""
+    """
+    Realinea el estado de selección con el DataFrame actual (descarta los
+    índices que ya no existen).
+    """
     df_current = st.session_state.processed_data[file_name]
+    state = get_selection_state(file_name)
 
-    removed_indices = st.session_state.samples_to_remove[file_name]
-    valid_removed = {i for i in removed_indices if i in df_current.index}
+    if not state.index.equals(df_current.index):
+        st.session_state.selection_state[file_name] = state.reindex(df_current.index)
+        # Las posiciones de los deltas ya no corresponden al nuevo índice
+        get_selection_history(file_name).clear()
 
-    sample_groups = st.session_state.sample_groups[file_name]
-    valid_groups = {i: g for i, g in sample_groups.items() if i in df_current.index}
 
-    if len(valid_removed) != len(removed_indices):
-        st.session_state.samples_to_remove[file_name] = valid_removed
+# =============================================================================
+# DESHACER / REHACER
+# =============================================================================
+
+def _after_history_change(file_name: str):
+    st.session_state.pending_selections[file_name] = []
+    st.session_state.last_event_id[file_name] = {"spectra": "", "parity": ""}
+    st.session_state.editor_version[file_name] = st.session_state.editor_version.get(file_name, 0) + 1
+
+
+def undo_selection(file_name: str) -> Optional[str]:
+    """
+    Deshace la última operación de selección (aplicar, edición de tabla,
+    limpiar o confirmar eliminación).
+
+    Returns:
+        Etiqueta de la operación deshecha, o None si no había ninguna
+    """
+    label = get_selection_history(file_name).undo(get_selection_state(file_name))
+    if label is not None:
+        _after_history_change(file_name)
+    return label
+
+
+def redo_selection(file_name: str) -> Optional[str]:
+    """
+    Rehace la última operación deshecha.
+
+    Returns:
+        Etiqueta de la operación rehecha, o None si no había ninguna
+    """
+    label = get_selection_history(file_name).redo(get_selection_state(file_name))
+    if label is not None:
+        _after_history_change(file_name)
+    return label
 
-    if len(valid_groups) != len(sample_groups):
-        st.session_state.sample_groups[file_name] = valid_groups
+
+def get_history_labels(file_name: str) -> Tuple[Optional[str], Optional[str]]:
+    """Etiquetas de la próxima operación a deshacer y a rehacer."""
+    history = get_selection_history(file_name)
+    return history.next_undo(), history.next_redo()
 
 
 # =============================================================================
@@ -471,16 +618,15 @@ def get_file_statistics(file_name: str) -> Dict[str, int]:
     if df is None:
         return {"total": 0, "eliminar": 0, "agrupadas": 0, "finales": 0}
 
-    removed = st.session_state.samples_to_remove.get(file_name, set())
-    groups = st.session_state.sample_groups.get(file_name, {})
-
-    grouped_count = sum(1 for g in groups.values() if g != "none")
+    state = get_selection_state(file_name)
+    n_total = len(df) - state.n_deleted
+    n_removed = int(state.removed.sum())
 
     return {
-        "total": len(df),
-        "eliminar": len(removed),
-        "agrupadas": grouped_count,
-        "finales": len(df) - len(removed),
+        "total": n_total,
+        "eliminar": n_removed,
+        "agrupadas": int((state.codes != 0).sum()),
+        "finales": n_total - n_removed,
     }
 
 
@@ -14,6 +14,8 @@ import pandas as pd
 import numpy as np
 from sklearn.metrics import r2_score, mean_squared_error
 
+from core.tsv_selection import GroupAssignments, RemovalSet, selection_arrays, NO_GROUP
+
 
 def calculate_group_statistics(
     df: pd.DataFrame,
@@ -49,11 +51,17 @@ def calculate_group_statistics(
         return None
     
     # Filtrar: solo muestras del grupo, no eliminadas
-    mask = pd.Series(False, index=df.index)
-    for idx, grp in sample_groups.items():
-        if grp == group_key and idx not in removed_indices and idx in df.index:
-            mask.loc[idx] = True
-    
+    removed_mask, groups = selection_arrays(df.index, removed_indices, sample_groups)
+    return _masked_statistics(df, result_col, reference_col, (groups == group_key) & ~removed_mask)
+
+
+def _masked_statistics(
+    df: pd.DataFrame,
+    result_col: str,
+    reference_col: str,
+    mask: np.ndarray,
+) -> Optional[Dict[str, float]]:
+    """Estadísticas (R², RMSE, BIAS, N) de las filas seleccionadas por ``mask``."""
     df_group = df.loc[mask]
     
     if len(df_group) == 0:
@@ -116,11 +124,18 @@ def calculate_all_groups_statistics(
     """
     results = {}
     
+    result_col = f"Result {param_name}"
+    reference_col = f"Reference {param_name}"
+    if result_col not in df.columns or reference_col not in df.columns:
+        return {group_key: None for group_key in group_keys}
+    
+    # Resolver grupos/eliminados una sola vez para todos los grupos
+    removed_mask, groups = selection_arrays(df.index, removed_indices, sample_groups)
+    
     for group_key in group_keys:
-        stats = calculate_group_statistics(
-            df, param_name, removed_indices, sample_groups, group_key
+        results[group_key] = _masked_statistics(
+            df, result_col, reference_col, (groups == group_key) & ~removed_mask
         )
-        results[group_key] = stats
     
     return results
 
@@ -213,6 +228,19 @@ def get_best_worst_groups(
     return {"best": best, "worst": worst}
 
 
+def _active_group_series(sample_groups, removed_indices) -> pd.Series:
+    """Serie idx -> grupo de las muestras no marcadas para eliminar."""
+    if isinstance(sample_groups, GroupAssignments):
+        state = sample_groups.state
+        pos = np.flatnonzero(state.codes)
+        groups = pd.Series(state.group_array()[pos], index=state.index[pos], dtype=object)
+    else:
+        groups = pd.Series(dict(sample_groups), dtype=object)
+    if removed_indices:
+        groups = groups[~groups.index.isin(list(removed_indices))]
+    return groups
+
+
 def count_samples_per_group(
     sample_groups: Dict[int, str],
     removed_indices: Set[int],
@@ -233,13 +261,13 @@ def count_samples_per_group(
         >>> counts = count_samples_per_group(groups, removed, ["Set 1", "Set 2"])
         >>> st.write(f"Set 1: {counts['Set 1']} muestras")
     """
-    counts = {group_key: 0 for group_key in group_keys}
+    if isinstance(sample_groups, GroupAssignments) and \
+            isinstance(removed_indices, RemovalSet) and removed_indices.state is sample_groups.state:
+        return sample_groups.state.counts(group_keys)
     
-    for idx, grp in sample_groups.items():
-        if grp in counts and idx not in removed_indices:
-            counts[grp] += 1
-    
-    return counts
+    groups = _active_group_series(sample_groups, removed_indices)
+    value_counts = groups.value_counts()
+    return {group_key: int(value_counts.get(group_key, 0)) for group_key in group_keys}
 
 
 def get_active_groups(
@@ -261,13 +289,12 @@ def get_active_groups(
         >>> if "Set 1" in active:
         >>>     st.write("Set 1 tiene muestras asignadas")
     """
-    active = set()
-    
-    for idx, grp in sample_groups.items():
-        if grp != "none" and idx not in removed_indices:
-            active.add(grp)
+    if isinstance(sample_groups, GroupAssignments) and \
+            isinstance(removed_indices, RemovalSet) and removed_indices.state is sample_groups.state:
+        return sample_groups.state.active_groups()
     
-    return active
+    groups = _active_group_series(sample_groups, removed_indices)
+    return set(groups.unique()) - {NO_GROUP}
 
 
 def format_statistics_for_display(
@@ -21,10 +21,60 @@ from core.report_utils import (
     build_sidebar_html,
     evaluate_offset,
     generate_service_info_section,
+    service_info_rows,
+    generate_report_sidecar,
+    html_to_text,
     generate_footer,
     start_html_template,
     calculate_global_metrics
 )
+from core.report_writer import ReportWriter
+
+
+def _executive_status(n_warn, n_fail):
+    """
+    Estado general del kit (título, clase CSS y recomendación en HTML).
+    
+    Args:
+        n_warn (int): Estándares a revisar
+        n_fail (int): Estándares fallidos
+        
+    Returns:
+        tuple: (status, status_class, recommendation)
+    """
+    if n_fail > 0:
+        status = "❌ REQUIERE ATENCIÓN"
+        status_class = "warning-box"
+        recommendation = """
+            <p><strong>Se detectaron estándares que no pasaron la validación.</strong></p>
+            <p>Acciones recomendadas:</p>
+            <ul>
+                <li>Revisar las mediciones que fallaron en la sección de análisis individual</li>
+                <li>Verificar las condiciones ambientales durante las mediciones</li>
+                <li>Considerar repetir las mediciones de los estándares que fallaron</li>
+                <li>Revisar el estado del equipo y de los estándares ópticos</li>
+            </ul>
+        """
+    elif n_warn > 0:
+        status = "⚠️ ACEPTABLE CON OBSERVACIONES"
+        status_class = "warning-box"
+        recommendation = """
+            <p><strong>Algunos estándares requieren revisión adicional.</strong></p>
+            <p>Se recomienda:</p>
+            <ul>
+                <li>Revisar los estándares marcados para verificación</li>
+                <li>Monitorear el rendimiento en las próximas mediciones</li>
+                <li>Documentar cualquier tendencia observada</li>
+            </ul>
+        """
+    else:
+        status = "✅ VALIDACIÓN EXITOSA"
+        status_class = "success-box"
+        recommendation = """
+            <p><strong>Todos los estándares pasaron la validación correctamente.</strong></p>
+            <p>El equipo está correctamente alineado y listo para uso en producción.</p>
+        """
+    return status, status_class, recommendation
 
 
 def generate_executive_summary(report_data):
@@ -66,38 +116,7 @@ def generate_executive_summary(report_data):
     """
     
     # Determinar estado general
-    if n_fail > 0:
-        status = "❌ REQUIERE ATENCIÓN"
-        status_class = "warning-box"
-        recommendation = """
-            <p><strong>Se detectaron estándares que no pasaron la validación.</strong></p>
-            <p>Acciones recomendadas:</p>
-            <ul>
-                <li>Revisar las mediciones que fallaron en la sección de análisis individual</li>
-                <li>Verificar las condiciones ambientales durante las mediciones</li>
-                <li>Considerar repetir las mediciones de los estándares que fallaron</li>
-                <li>Revisar el estado del equipo y de los estándares ópticos</li>
-            </ul>
-        """
-    elif n_warn > 0:
-        status = "⚠️ ACEPTABLE CON OBSERVACIONES"
-        status_class = "warning-box"
-        recommendation = """
-            <p><strong>Algunos estándares requieren revisión adicional.</strong></p>
-            <p>Se recomienda:</p>
-            <ul>
-                <li>Revisar los estándares marcados para verificación</li>
-                <li>Monitorear el rendimiento en las próximas mediciones</li>
-                <li>Documentar cualquier tendencia observada</li>
-            </ul>
-        """
-    else:
-        status = "✅ VALIDACIÓN EXITOSA"
-        status_class = "success-box"
-        recommendation = """
-            <p><strong>Todos los estándares pasaron la validación correctamente.</strong></p>
-            <p>El equipo está correctamente alineado y listo para uso en producción.</p>
-        """
+    status, status_class, recommendation = _executive_status(n_warn, n_fail)
     
     html += f"""
             <div class="{status_class} status-box-top-margin">
@@ -110,6 +129,18 @@ def generate_executive_summary(report_data):
     return html
 
 
+def _criteria_rows(thresholds):
+    """Filas (parámetro, umbral, descripción) de los criterios de validación."""
+    return [
+        ('Correlación Espectral', f"≥ {thresholds['correlation']}",
+         'Similitud entre espectros de referencia y actual. Valores cercanos a 1.0 indican alta similitud.'),
+        ('Diferencia Máxima', f"≤ {thresholds['max_diff']} AU",
+         'Máxima desviación puntual permitida en cualquier canal espectral.'),
+        ('RMS', f"≤ {thresholds['rms']}",
+         'Error cuadrático medio. Mide la magnitud promedio de las diferencias entre espectros.'),
+    ]
+
+
 def generate_validation_criteria(thresholds):
     """
     Genera la sección de criterios de validación.
@@ -120,7 +151,7 @@ def generate_validation_criteria(thresholds):
     Returns:
         str: HTML de criterios
     """
-    html = f"""
+    html = """
         <div class="info-box" id="criterios-validacion">
             <h2>Criterios de Validación</h2>
             <table>
@@ -129,21 +160,18 @@ def generate_validation_criteria(thresholds):
                     <th>Umbral</th>
                     <th>Descripción</th>
                 </tr>
+    """
+    
+    for name, threshold, description in _criteria_rows(thresholds):
+        html += f"""
                 <tr>
-                    <td><strong>Correlación Espectral</strong></td>
-                    <td>≥ {thresholds['correlation']}</td>
-                    <td>Similitud entre espectros de referencia y actual. Valores cercanos a 1.0 indican alta similitud.</td>
-                </tr>
-                <tr>
-                    <td><strong>Diferencia Máxima</strong></td>
-                    <td>≤ {thresholds['max_diff']} AU</td>
-                    <td>Máxima desviación puntual permitida en cualquier canal espectral.</td>
-                </tr>
-                <tr>
-                    <td><strong>RMS</strong></td>
-                    <td>≤ {thresholds['rms']}</td>
-                    <td>Error cuadrático medio. Mide la magnitud promedio de las diferencias entre espectros.</td>
+                    <td><strong>{name}</strong></td>
+                    <td>{threshold}</td>
+                    <td>{description}</td>
                 </tr>
+        """
+    
+    html += """
             </table>
             <p class="text-muted-note">
                 <em>Un estándar pasa la validación si cumple TODOS los criterios simultáneamente. 
@@ -155,6 +183,34 @@ def generate_validation_criteria(thresholds):
     return html
 
 
+# Filas de estadísticas agregadas: (nombre, prefijo en calculate_global_metrics, formato)
+_GLOBAL_STAT_ROWS = [
+    ('Correlación', 'corr', '{:.6f}'),
+    ('Max Diferencia (AU)', 'max', '{:.6f}'),
+    ('RMS', 'rms', '{:.6f}'),
+    ('Offset Medio (AU)', 'offset', '{:.6f}')
+]
+
+
+def _key_metric_rows(metrics, thresholds):
+    """Filas (métrica, valor, evaluación HTML) de las métricas clave del kit."""
+    def _check(ok):
+        if ok:
+            return '<span class="status-good">✅ OK</span>'
+        return '<span class="status-warning">⚠️ Revisar</span>'
+    
+    global_offset = metrics['offset_mean']
+    return [
+        ('Offset Global del Kit', f"{global_offset:.6f} AU", evaluate_offset(global_offset)),
+        ('Correlación Media', f"{metrics['corr_mean']:.6f}",
+         _check(metrics['corr_mean'] >= thresholds['correlation'])),
+        ('Max Diferencia Media', f"{metrics['max_mean']:.6f} AU",
+         _check(metrics['max_mean'] <= thresholds['max_diff'])),
+        ('RMS Media', f"{metrics['rms_mean']:.6f}",
+         _check(metrics['rms_mean'] <= thresholds['rms'])),
+    ]
+
+
 def generate_global_statistics(validation_data, thresholds):
     """
     Genera la sección de estadísticas globales.
@@ -185,14 +241,7 @@ def generate_global_statistics(validation_data, thresholds):
                 </tr>
     """
     
-    rows = [
-        ('Correlación', 'corr', '{:.6f}'),
-        ('Max Diferencia (AU)', 'max', '{:.6f}'),
-        ('RMS', 'rms', '{:.6f}'),
-        ('Offset Medio (AU)', 'offset', '{:.6f}')
-    ]
-    
-    for name, key, fmt in rows:
+    for name, key, fmt in _GLOBAL_STAT_ROWS:
         html += f"""
                 <tr>
                     <td><strong>{name}</strong></td>
@@ -208,9 +257,7 @@ def generate_global_statistics(validation_data, thresholds):
     """
     
     # Offset global y métricas clave
-    global_offset = metrics['offset_mean']
-    
-    html += f"""
+    html += """
             <h3 class="metrics-key-section">Métricas Clave</h3>
             <table>
                 <tr>
@@ -218,26 +265,18 @@ def generate_global_statistics(validation_data, thresholds):
                     <th>Valor</th>
                     <th>Evaluación</th>
                 </tr>
+    """
+    
+    for name, value, evaluation in _key_metric_rows(metrics, thresholds):
+        html += f"""
                 <tr>
-                    <td><strong>Offset Global del Kit</strong></td>
-                    <td>{global_offset:.6f} AU</td>
-                    <td>{evaluate_offset(global_offset)}</td>
-                </tr>
-                <tr>
-                    <td><strong>Correlación Media</strong></td>
-                    <td>{metrics['corr_mean']:.6f}</td>
-                    <td>{'<span class="status-good">✅ OK</span>' if metrics['corr_mean'] >= thresholds['correlation'] else '<span class="status-warning">⚠️ Revisar</span>'}</td>
-                </tr>
-                <tr>
-                    <td><strong>Max Diferencia Media</strong></td>
-                    <td>{metrics['max_mean']:.6f} AU</td>
-                    <td>{'<span class="status-good">✅ OK</span>' if metrics['max_mean'] <= thresholds['max_diff'] else '<span class="status-warning">⚠️ Revisar</span>'}</td>
-                </tr>
-                <tr>
-                    <td><strong>RMS Media</strong></td>
-                    <td>{metrics['rms_mean']:.6f}</td>
-                    <td>{'<span class="status-good">✅ OK</span>' if metrics['rms_mean'] <= thresholds['rms'] else '<span class="status-warning">⚠️ Revisar</span>'}</td>
+                    <td><strong>{name}</strong></td>
+                    <td>{value}</td>
+                    <td>{evaluation}</td>
                 </tr>
+        """
+    
+    html += """
             </table>
             <p class="text-muted-small">
                 <em><strong>Offset Global:</strong> Desplazamiento sistemático promedio entre mediciones pre y post-mantenimiento. 
@@ -257,12 +296,12 @@ def generate_results_table(results_df):
         results_df (pd.DataFrame): DataFrame con resultados
         
     Returns:
-        str: HTML de la tabla
+        ReportWriter: HTML de la tabla
     """
-    html = """
+    html = ReportWriter("""
         <div class="info-box" id="resultados-detallados">
             <h2>Resultados Detallados por Estándar</h2>
-    """
+    """)
     
     html += results_df.to_html(index=False, classes='table', border=0)
     
@@ -281,7 +320,7 @@ def generate_global_overlay_plot(validation_data):
         validation_data (list): Datos de validación
         
     Returns:
-        str: HTML con el gráfico embebido
+        ReportWriter: HTML con el gráfico embebido
     """
     colors_ref = ['#1f77b4', '#2ca02c', '#9467bd', '#8c564b', '#e377c2', 
                   '#7f7f7f', '#bcbd22', '#17becf', '#ff9896', '#c5b0d5']
@@ -347,7 +386,7 @@ def generate_global_overlay_plot(validation_data):
         config={'displayModeBar': True, 'responsive': True}
     )
     
-    html = """
+    html = ReportWriter("""
         <div class="info-box" id="vista-global">
             <h2>Vista Global de Espectros</h2>
             <p class="text-caption">
@@ -355,7 +394,7 @@ def generate_global_overlay_plot(validation_data):
                 las mediciones de referencia (pre-mantenimiento) y las líneas punteadas las mediciones 
                 actuales (post-mantenimiento).</em>
             </p>
-    """
+    """)
     
     html += wrap_chart_in_expandable(
         chart_html,
@@ -378,18 +417,18 @@ def generate_individual_analysis(validation_data, num_channels):
         num_channels (int): Número de canales espectrales
         
     Returns:
-        str: HTML con análisis individual
+        ReportWriter: HTML con análisis individual
     """
     from app_config import CRITICAL_REGIONS
     
-    html = """
+    html = ReportWriter("""
         <div class="info-box" id="analisis-individual">
             <h2>Análisis Individual de Estándares</h2>
             <p class="text-caption">
                 <em>Análisis detallado de cada estándar validado con gráficos de espectros, 
                 diferencias y regiones críticas.</em>
             </p>
-    """
+    """)
     
     for data in validation_data:
         sample_id = data['id']
@@ -610,6 +649,126 @@ def generate_validation_report(data: Dict) -> str:
     Returns:
         String con contenido HTML del informe
     """
+    return write_validation_report(data).getvalue()
+
+
+def _result_status(estado: str) -> str:
+    """Normaliza la celda 'Estado' de la tabla de resultados a OK/WARNING/FAIL."""
+    if '✅' in estado or 'OK' in estado.upper():
+        return 'OK'
+    if '⚠️' in estado or 'WARNING' in estado.upper():
+        return 'WARNING'
+    if '❌' in estado or 'FAIL' in estado.upper():
+        return 'FAIL'
+    return 'UNKNOWN'
+
+
+def generate_validation_sidecar(data: Dict, service_info: Dict) -> str:
+    """
+    Genera el sidecar JSON del informe de validación.
+    
+    El resumen replica la estructura de ValidationParser.parse() para que el
+    consolidador no tenga que recorrer las tablas del HTML.
+    
+    Args:
+        data: Datos del informe (ver generate_validation_report)
+        service_info: Filas de información del servicio
+        
+    Returns:
+        str: Bloque <script type="application/json"> del informe
+    """
+    n_ok, n_warn, n_fail = data['n_ok'], data['n_warn'], data['n_fail']
+    thresholds = data['thresholds']
+    status_title, _, recommendation = _executive_status(n_warn, n_fail)
+    metrics = calculate_global_metrics(data['validation_data']) if data['validation_data'] else {}
+    
+    summary = {
+        'info_servicio': {k: html_to_text(v) for k, v in service_info.items()},
+        'resumen_ejecutivo': {
+            'metricas': {
+                'Total Estándares': str(len(data['validation_data'])),
+                'Validados': str(n_ok),
+                'Revisar': str(n_warn),
+                'Fallidos': str(n_fail),
+            },
+            'conclusion': status_title,
+            'descripcion': html_to_text(recommendation.split('</p>')[0]),
+        },
+        'criterios_validacion': {
+            'criterios': [
+                {'parametro': name, 'umbral': threshold, 'descripcion': description}
+                for name, threshold, description in _criteria_rows(thresholds)
+            ]
+        },
+        'estadisticas_globales': {},
+        'resultados_detallados': [],
+    }
+    
+    if metrics:
+        summary['estadisticas_globales'] = {
+            'metricas_agregadas': [
+                {
+                    'metrica': name,
+                    'minimo': fmt.format(metrics[f'{key}_min']),
+                    'maximo': fmt.format(metrics[f'{key}_max']),
+                    'media': fmt.format(metrics[f'{key}_mean']),
+                    'desv_est': fmt.format(metrics[f'{key}_std']),
+                }
+                for name, key, fmt in _GLOBAL_STAT_ROWS
+            ],
+            'metricas_clave': [
+                {'metrica': name, 'valor': value, 'evaluacion': html_to_text(evaluation)}
+                for name, value, evaluation in _key_metric_rows(metrics, thresholds)
+            ],
+        }
+    
+    # Misma lectura posicional que el parser: Estado, ID, Note (Ref), Note (Actual),
+    # Correlación, Max Δ, RMS, [Shift]
+    results_df = data['results_df']
+    if results_df is not None and results_df.shape[1] >= 7:
+        for row in results_df.astype(str).itertuples(index=False):
+            summary['resultados_detallados'].append({
+                'estandar': row[1],
+                'lampara_ref': row[2],
+                'lampara_nueva': row[3],
+                'correlacion': row[4],
+                'max_diff': row[5],
+                'rms': row[6],
+                'shift': row[7] if len(row) > 7 else 'N/A',
+                'estado': _result_status(row[0]),
+            })
+    
+    if n_fail > 0:
+        status = 'FAIL'
+    elif n_warn > 0:
+        status = 'WARNING'
+    else:
+        status = 'OK'
+    
+    return generate_report_sidecar(
+        'validation',
+        summary=summary,
+        metrics={'n_ok': n_ok, 'n_warn': n_warn, 'n_fail': n_fail, 'global': metrics},
+        status=status,
+        service_info=service_info,
+        thresholds=thresholds,
+        tool_name="COREF Suite - Standard Validation Tool",
+    )
+
+
+def write_validation_report(data: Dict, writer: ReportWriter = None) -> ReportWriter:
+    """
+    Escribe el informe de validación de estándares en un ReportWriter.
+    
+    Args:
+        data: Diccionario con la misma estructura que generate_validation_report
+        writer: Sumidero donde escribir (se crea uno nuevo si es None)
+        
+    Returns:
+        ReportWriter: Informe completo, listo para descargar con to_bytesio()
+    """
+    html = writer if writer is not None else ReportWriter()
+    
     # Construir sidebar usando función compartida
     sections = [
         ("info-servicio", "Información del Servicio"),
@@ -627,7 +786,7 @@ def generate_validation_report(data: Dict) -> str:
     )
     
     # Iniciar documento usando función compartida
-    html = start_html_template(
+    html += start_html_template(
         title=f"Informe de Validación - {data['sensor_serial']}",
         sidebar_html=sidebar_html
     )
@@ -639,12 +798,14 @@ def generate_validation_report(data: Dict) -> str:
         'Archivo Referencia': data['ref_filename'],
         'Archivo Post-Mantenimiento': data['curr_filename']
     }
+    report_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     html += generate_service_info_section(
         data['sensor_serial'],
         data['customer_name'],
         data['technician_name'],
         data['service_notes'],
-        additional_info
+        additional_info,
+        report_date=report_date
     )
     
     # Secciones específicas
@@ -655,6 +816,16 @@ def generate_validation_report(data: Dict) -> str:
     html += generate_global_overlay_plot(data['validation_data'])
     html += generate_individual_analysis(data['validation_data'], data['num_channels'])
     
+    # Sidecar JSON para el consolidador
+    html += generate_validation_sidecar(data, service_info_rows(
+        data['sensor_serial'],
+        data['customer_name'],
+        data['technician_name'],
+        data['service_notes'],
+        additional_info,
+        report_date=report_date
+    ))
+    
     # Footer usando función compartida
     html += generate_footer("COREF Suite - Standard Validation Tool")
     
@@ -7,10 +7,15 @@ Optimizaciones v2024.12:
 - CSS cargado desde buchi_report_styles.css
 - Sin CSS inline (todo en archivo CSS)
 - Funciones compartidas desde report_utils
+- Informes embebidos comprimidos (gzip) y sin assets duplicados
+  (plotly.js inline y CSS Buchi se guardan una sola vez)
 """
 from typing import Dict, Any
 from datetime import datetime
 import base64
+import gzip
+import hashlib
+import re
 
 # Importar funciones compartidas
 import sys
@@ -18,6 +23,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from core.report_utils import load_buchi_css, generate_footer
+from core.report_writer import ReportWriter
 
 
 class ReportConsolidatorV2:
@@ -26,7 +32,15 @@ class ReportConsolidatorV2:
     Genera un informe HTML unificado con resúmenes parseados y HTMLs originales embebidos
     """
     
-    def __init__(self):
+    def __init__(self, embed_mode: str = 'compressed'):
+        """
+        Args:
+            embed_mode: 'compressed' (gzip, por defecto) o 'base64' (sin comprimir)
+                para los informes completos embebidos
+        """
+        if embed_mode not in ('compressed', 'base64'):
+            raise ValueError(f"embed_mode no soportado: {embed_mode}")
+        self.embed_mode = embed_mode
         self.baseline_data = None
         self.baseline_html = None
         self.validation_data = None
@@ -34,6 +48,8 @@ class ReportConsolidatorV2:
         self.predictions_data = None
         self.predictions_html = None
         self.service_info = {}
+        self._buchi_css = ''
+        self._shared_assets = {}
         
     def add_baseline(self, data: Dict[str, Any], html: str):
         """Añade datos parseados y HTML completo del baseline"""
@@ -56,11 +72,23 @@ class ReportConsolidatorV2:
     
     def generate_html(self) -> str:
         """Genera el HTML del informe consolidado"""
+        return self.write_html().getvalue()
+    
+    def write_html(self, writer: ReportWriter = None) -> ReportWriter:
+        """
+        Escribe el informe consolidado en un ReportWriter.
+        Los informes embebidos se añaden como fragmentos, sin concatenarlos.
+        """
         sensor_id = self.service_info.get('sensor_id', 'N/A')
         
         # Construir índice dinámico
         index_items = self._generate_index()
         
+        # Assets compartidos entre sub-informes (se rellenan al embeberlos)
+        buchi_css = load_buchi_css()
+        self._buchi_css = buchi_css
+        self._shared_assets = {}
+        
         # Construir secciones colapsables
         sections_html = []
         
@@ -91,11 +119,9 @@ class ReportConsolidatorV2:
         # Añadir sección "Acerca de Este Informe" al final
         sections_html.append(self._generate_about_section())
         
-        # Cargar CSS (todo desde archivo)
-        buchi_css = load_buchi_css()
-        
         # Ensamblar HTML completo
-        html = f"""
+        html = writer if writer is not None else ReportWriter()
+        html += f"""
 <!DOCTYPE html>
 <html lang="es">
 <head>
@@ -103,7 +129,7 @@ class ReportConsolidatorV2:
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Informe Consolidado - {sensor_id}</title>
     <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
-    <style>
+    <style id="coref-asset-{_BUCHI_CSS_ASSET_ID}">
 {buchi_css}
     </style>
 </head>
@@ -118,7 +144,10 @@ class ReportConsolidatorV2:
     <div class="main-content">
 {self._generate_header()}
         
-{''.join(sections_html)}
+"""
+        html.writelines(sections_html)
+        html += self._generate_shared_assets()
+        html += f"""
         
 {generate_footer()}
     </div>
@@ -559,36 +588,17 @@ class ReportConsolidatorV2:
         return '\n'.join(items)
     
     def _generate_collapsible_section(self, section_id: str, title: str, 
-                                     parsed_summary: str, html_content: str) -> str:
-        """Genera sección colapsable con resumen + link a HTML completo"""
-        sidebar_fix_script = """
-        <script>
-        document.addEventListener('DOMContentLoaded', function() {
-            const sidebarLinks = document.querySelectorAll('.sidebar a[href^="#"]');
-            sidebarLinks.forEach(link => {
-                link.addEventListener('click', function(e) {
-                    e.preventDefault();
-                    const targetId = this.getAttribute('href').substring(1);
-                    const targetElement = document.getElementById(targetId);
-                    if (targetElement) {
-                        targetElement.scrollIntoView({ behavior: 'smooth', block: 'start' });
-                    }
-                });
-            });
-        });
-        </script>
-        """
-        
+                                     parsed_summary: str, html_content: str) -> ReportWriter:
+        """Genera sección colapsable con resumen + botón para abrir el HTML completo"""
         if '</body>' in html_content:
-            html_modified = html_content.replace('</body>', sidebar_fix_script + '</body>')
+            html_modified = html_content.replace('</body>', _SIDEBAR_FIX_SCRIPT + '</body>')
         else:
-            html_modified = html_content + sidebar_fix_script
+            html_modified = html_content + _SIDEBAR_FIX_SCRIPT
         
-        html_bytes = html_modified.encode('utf-8')
-        html_base64 = base64.b64encode(html_bytes).decode('ascii')
-        button_id = f"btn-{section_id}-{id(html_content) % 100000}"
+        html_modified = self._strip_shared_assets(html_modified)
+        payload_id = f"coref-report-{section_id}"
         
-        return f"""
+        section = ReportWriter(f"""
         <div class="consolidator-section" id="{section_id}">
             <details open>
                 <summary class="consolidator-section-header">
@@ -600,7 +610,7 @@ class ReportConsolidatorV2:
                 </div>
                 
                 <div class="consolidator-full-report-link">
-                    <button id="{button_id}" class="consolidator-open-btn">
+                    <button class="consolidator-open-btn" data-coref-report="{payload_id}">
                         📄 Abrir Informe Completo en Nueva Pestaña
                     </button>
                     <p class="consolidator-link-description">
@@ -609,31 +619,163 @@ class ReportConsolidatorV2:
                 </div>
             </details>
         </div>
+        """)
+        section += self._embed_payload(payload_id, html_modified)
+        return section
+    
+    # ------------------------------------------------------------------
+    # Embebido de informes
+    # ------------------------------------------------------------------
+    def _embed_payload(self, payload_id: str, content: str) -> ReportWriter:
+        """
+        Embebe un texto como bloque de datos no ejecutable.
+        
+        En modo 'compressed' se guarda gzip+base64 y el navegador lo
+        descomprime con DecompressionStream; en modo 'base64' se guarda sin
+        comprimir. En ambos casos la decodificación es nativa (fetch de data URL).
+        """
+        data = content.encode('utf-8')
+        if self.embed_mode == 'compressed':
+            data = gzip.compress(data, compresslevel=6, mtime=0)
+            encoding = 'gzip'
+        else:
+            encoding = 'identity'
+        
+        block = ReportWriter(
+            f'<script type="application/octet-stream" id="{payload_id}" '
+            f'data-encoding="{encoding}">'
+        )
+        block += base64.b64encode(data).decode('ascii')
+        block += '</script>\n'
+        return block
+    
+    def _strip_shared_assets(self, html_content: str) -> str:
+        """
+        Sustituye los assets compartidos de un sub-informe por marcadores.
+        
+        - plotly.js inline: se registra una vez por versión en self._shared_assets
+        - CSS Buchi: se reutiliza el <style> del propio informe consolidado
+        """
+        if self._buchi_css and self._buchi_css in html_content:
+            html_content = html_content.replace(self._buchi_css, _asset_marker(_BUCHI_CSS_ASSET_ID))
+        
+        def _replace_plotly(match: re.Match) -> str:
+            body = match.group(2)
+            asset_id = 'plotly-' + hashlib.blake2b(body.encode('utf-8'), digest_size=6).hexdigest()
+            self._shared_assets.setdefault(asset_id, body)
+            return match.group(1) + _asset_marker(asset_id) + match.group(3)
         
+        return _PLOTLY_INLINE_RE.sub(_replace_plotly, html_content)
+    
+    def _generate_shared_assets(self) -> ReportWriter:
+        """Bloques de datos con los assets compartidos + script de apertura"""
+        assets = ReportWriter()
+        for asset_id, body in self._shared_assets.items():
+            assets += self._embed_payload(f"coref-asset-{asset_id}", body)
+        assets += _EMBED_LOADER_SCRIPT
+        return assets
+
+
+# ============================================================================
+# EMBEBIDO DE INFORMES
+# ============================================================================
+
+_BUCHI_CSS_ASSET_ID = 'buchi-css'
+
+# Bloque <script> con el bundle de plotly.js inline (include_plotlyjs=True)
+_PLOTLY_INLINE_RE = re.compile(
+    r'(<script\b[^>]*>)(\s*/\*\*\s*\*\s*plotly\.js v.*?)(</script>)',
+    re.DOTALL
+)
+
+
+def _asset_marker(asset_id: str) -> str:
+    """Marcador que sustituye a un asset compartido dentro de un sub-informe."""
+    return f"/*@coref-asset:{asset_id}@*/"
+
+
+_SIDEBAR_FIX_SCRIPT = """
         <script>
-        (function() {{
-            const btn = document.getElementById('{button_id}');
-            const htmlBase64 = '{html_base64}';
-            
-            btn.addEventListener('click', function() {{
-                try {{
-                    const binaryString = atob(htmlBase64);
-                    const bytes = new Uint8Array(binaryString.length);
-                    for (let i = 0; i < binaryString.length; i++) {{
-                        bytes[i] = binaryString.charCodeAt(i);
-                    }}
-                    const htmlContent = new TextDecoder('utf-8').decode(bytes);
-                    const blob = new Blob([htmlContent], {{ type: 'text/html;charset=utf-8' }});
-                    const blobUrl = URL.createObjectURL(blob);
-                    window.open(blobUrl, '_blank');
-                    setTimeout(function() {{
-                        URL.revokeObjectURL(blobUrl);
-                    }}, 5000);
-                }} catch (error) {{
-                    console.error('Error:', error);
-                    alert('Error al abrir el informe.');
-                }}
-            }});
-        }})();
+        document.addEventListener('DOMContentLoaded', function() {
+            const sidebarLinks = document.querySelectorAll('.sidebar a[href^="#"]');
+            sidebarLinks.forEach(link => {
+                link.addEventListener('click', function(e) {
+                    e.preventDefault();
+                    const targetId = this.getAttribute('href').substring(1);
+                    const targetElement = document.getElementById(targetId);
+                    if (targetElement) {
+                        targetElement.scrollIntoView({ behavior: 'smooth', block: 'start' });
+                    }
+                });
+            });
+        });
+        </script>
+        """
+
+# Decodifica los bloques embebidos con APIs nativas (fetch de data URL +
+# DecompressionStream), restaura los assets compartidos y abre el informe.
+_EMBED_LOADER_SCRIPT = r"""
+        <script>
+        (function() {
+            const cache = {};
+
+            async function decodePayload(id) {
+                if (cache[id] === undefined) {
+                    const el = document.getElementById(id);
+                    if (!el) {
+                        throw new Error('Bloque embebido no encontrado: ' + id);
+                    }
+                    if (el.tagName === 'STYLE') {
+                        cache[id] = Promise.resolve(el.textContent);
+                    } else {
+                        cache[id] = (async function() {
+                            const res = await fetch('data:application/octet-stream;base64,' + el.textContent.trim());
+                            if (el.dataset.encoding === 'gzip') {
+                                const stream = res.body.pipeThrough(new DecompressionStream('gzip'));
+                                return await new Response(stream).text();
+                            }
+                            return await res.text();
+                        })();
+                    }
+                }
+                return cache[id];
+            }
+
+            async function buildReport(id) {
+                let html = await decodePayload(id);
+                const markerRe = /\/\*@coref-asset:([\w-]+)@\*\//g;
+                const assetIds = [...new Set([...html.matchAll(markerRe)].map(m => m[1]))];
+                for (const assetId of assetIds) {
+                    const asset = await decodePayload('coref-asset-' + assetId);
+                    html = html.split('/*@coref-asset:' + assetId + '@*/').join(asset);
+                }
+                return html;
+            }
+
+            document.querySelectorAll('button[data-coref-report]').forEach(function(btn) {
+                btn.addEventListener('click', function() {
+                    // Abrir la pestaña en el gesto del usuario (evita bloqueadores de popups)
+                    const win = window.open('', '_blank');
+                    buildReport(btn.dataset.corefReport).then(function(htmlContent) {
+                        const blob = new Blob([htmlContent], { type: 'text/html;charset=utf-8' });
+                        const blobUrl = URL.createObjectURL(blob);
+                        if (win) {
+                            win.location.href = blobUrl;
+                        } else {
+                            window.open(blobUrl, '_blank');
+                        }
+                        setTimeout(function() {
+                            URL.revokeObjectURL(blobUrl);
+                        }, 60000);
+                    }).catch(function(error) {
+                        if (win) {
+                            win.close();
+                        }
+                        console.error('Error:', error);
+                        alert('Error al abrir el informe.');
+                    });
+                });
+            });
+        })();
         </script>
-        """
\ No newline at end of file
+        """
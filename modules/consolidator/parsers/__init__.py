@@ -3,11 +3,15 @@ Parsers para informes HTML NIR
 Extraen información de los informes de Baseline, Validación y Predicciones
 """
 
+from .html_document import ReportDocument, get_report_document, read_report_sidecar
 from .baseline_parser import BaselineParser
 from .validation_parser import ValidationParser
 from .predictions_parser import PredictionsParser
 
 __all__ = [
+    'ReportDocument',
+    'get_report_document',
+    'read_report_sidecar',
     'BaselineParser',
     'ValidationParser', 
     'PredictionsParser'
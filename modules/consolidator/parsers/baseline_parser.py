@@ -1,18 +1,40 @@
 """
 Parser para extraer información del informe de Baseline Adjustment
 """
-from bs4 import BeautifulSoup
 import re
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
+
+from .html_document import ReportDocument, get_report_document, read_report_sidecar, has_class, text
 
 
 class BaselineParser:
-    def __init__(self, html_content: str):
-        self.soup = BeautifulSoup(html_content, 'html.parser')
+    def __init__(self, html_content: Union[str, ReportDocument]):
+        self._html = html_content
+        self._doc = None
+        self.sidecar = read_report_sidecar(html_content, 'baseline')
         self.data = {}
+    
+    @property
+    def doc(self) -> ReportDocument:
+        """Árbol HTML del informe (solo se parsea si hace falta scraping)."""
+        if self._doc is None:
+            self._doc = get_report_document(self._html)
+        return self._doc
         
     def parse(self) -> Dict[str, Any]:
         """Parse completo del HTML de baseline adjustment"""
+        if self.sidecar is not None:
+            # Informe con sidecar JSON: datos ya estructurados, sin scraping
+            self.data = {
+                'tipo_informe': 'Baseline Adjustment',
+                **self.sidecar['summary'],
+                'graficos': []
+            }
+            verification = self.data.get('verificacion') or {}
+            if verification.get('metricas'):
+                verification['estado'] = self._verification_status(verification['metricas'])
+            return self.data
+        
         self.data = {
             'tipo_informe': 'Baseline Adjustment',
             'info_cliente': self._extract_client_info(),
@@ -28,111 +50,111 @@ class BaselineParser:
     def _extract_client_info(self) -> Dict[str, str]:
         """Extrae información del cliente y equipo"""
         info = {}
-        info_section = self.soup.find('div', id='info-cliente')
-        if info_section:
-            table = info_section.find('table')
-            if table:
-                for row in table.find_all('tr'):
-                    cells = row.find_all('td')
+        info_section = self.doc.find_by_id('info-cliente', 'div')
+        if info_section is not None:
+            table = self.doc.find(info_section, 'table')
+            if table is not None:
+                for row in self.doc.find_all(table, 'tr'):
+                    cells = self.doc.find_all(row, 'td')
                     if len(cells) == 2:
-                        key = cells[0].get_text(strip=True).replace(':', '')
-                        value = cells[1].get_text(strip=True)
+                        key = text(cells[0]).replace(':', '')
+                        value = text(cells[1])
                         info[key] = value
         return info
     
     def _extract_wstd_diagnostics(self) -> Dict[str, Any]:
         """Extrae diagnóstico del White Standard inicial"""
         diagnostics = {}
-        wstd_section = self.soup.find('div', id='wstd-section')
-        if wstd_section:
+        wstd_section = self.doc.find_by_id('wstd-section', 'div')
+        if wstd_section is not None:
             # Buscar tabla de métricas
-            table = wstd_section.find('table')
-            if table:
+            table = self.doc.find(wstd_section, 'table')
+            if table is not None:
                 metrics = {}
-                for row in table.find_all('tr')[1:]:  # Skip header
-                    cells = row.find_all('td')
+                for row in self.doc.find_all(table, 'tr')[1:]:  # Skip header
+                    cells = self.doc.find_all(row, 'td')
                     if len(cells) >= 2:
-                        metric = cells[0].get_text(strip=True)
-                        value = cells[1].get_text(strip=True)
+                        metric = text(cells[0])
+                        value = text(cells[1])
                         metrics[metric] = value
                 diagnostics['metricas'] = metrics
             
             # Buscar estado (OK/Warning/Fail)
-            status_spans = wstd_section.find_all('span', class_=['status-good', 'status-warning', 'status-fail'])
-            if status_spans:
-                diagnostics['estado'] = status_spans[0].get_text(strip=True)
+            status_span = self.doc.find(wstd_section, 'span', ['status-good', 'status-warning', 'status-fail'])
+            if status_span is not None:
+                diagnostics['estado'] = text(status_span)
         
         return diagnostics
     
     def _extract_process_details(self) -> Dict[str, str]:
         """Extrae detalles del proceso de corrección"""
         details = {}
-        process_section = self.soup.find('div', id='process-details')
-        if process_section:
-            table = process_section.find('table')
-            if table:
-                for row in table.find_all('tr'):
-                    cells = row.find_all('td')
+        process_section = self.doc.find_by_id('process-details', 'div')
+        if process_section is not None:
+            table = self.doc.find(process_section, 'table')
+            if table is not None:
+                for row in self.doc.find_all(table, 'tr'):
+                    cells = self.doc.find_all(row, 'td')
                     if len(cells) == 2:
-                        key = cells[0].get_text(strip=True)
-                        value = cells[1].get_text(strip=True)
+                        key = text(cells[0])
+                        value = text(cells[1])
                         details[key] = value
         return details
     
     def _extract_correction_stats(self) -> Dict[str, str]:
         """Extrae estadísticas de la corrección aplicada"""
         stats = {}
-        stats_section = self.soup.find('div', id='correction-stats')
-        if stats_section:
-            table = stats_section.find('table')
-            if table:
-                for row in table.find_all('tr')[1:]:  # Skip header
-                    cells = row.find_all('td')
+        stats_section = self.doc.find_by_id('correction-stats', 'div')
+        if stats_section is not None:
+            table = self.doc.find(stats_section, 'table')
+            if table is not None:
+                for row in self.doc.find_all(table, 'tr')[1:]:  # Skip header
+                    cells = self.doc.find_all(row, 'td')
                     if len(cells) >= 2:
-                        metric = cells[0].get_text(strip=True)
-                        value = cells[1].get_text(strip=True)
+                        metric = text(cells[0])
+                        value = text(cells[1])
                         stats[metric] = value
         return stats
     
     def _extract_baseline_info(self) -> Dict[str, str]:
         """Extrae información del baseline generado"""
         info = {}
-        baseline_section = self.soup.find('div', id='baseline-info')
-        if baseline_section:
-            table = baseline_section.find('table')
-            if table:
-                for row in table.find_all('tr'):
-                    cells = row.find_all('td')
+        baseline_section = self.doc.find_by_id('baseline-info', 'div')
+        if baseline_section is not None:
+            table = self.doc.find(baseline_section, 'table')
+            if table is not None:
+                for row in self.doc.find_all(table, 'tr'):
+                    cells = self.doc.find_all(row, 'td')
                     if len(cells) == 2:
-                        key = cells[0].get_text(strip=True)
-                        value = cells[1].get_text(strip=True)
+                        key = text(cells[0])
+                        value = text(cells[1])
                         info[key] = value
         return info
     
     def _extract_verification(self) -> Dict[str, Any]:
         """Extrae datos de verificación post-ajuste"""
         verification = {}
-        verif_section = self.soup.find('div', id='verification-section')
+        verif_section = self.doc.find_by_id('verification-section', 'div')
         
-        if not verif_section:
+        if verif_section is None:
             return verification
         
         # ============================================
         # 1. EXTRAER MÉTRICAS DE LA TABLA
         # ============================================
-        info_boxes = verif_section.find_next_siblings('div', class_='info-box')
+        info_boxes = [div for div in verif_section.itersiblings('div') if has_class(div, 'info-box')]
         
         for box in info_boxes:
-            h2 = box.find('h2')
-            if h2 and 'Métricas de Verificación' in h2.get_text():
-                table = box.find('table')
-                if table:
+            h2 = self.doc.find(box, 'h2')
+            if h2 is not None and 'Métricas de Verificación' in h2.text_content():
+                table = self.doc.find(box, 'table')
+                if table is not None:
                     metrics = {}
-                    for row in table.find_all('tr')[1:]:  # Skip header
-                        cells = row.find_all('td')
+                    for row in self.doc.find_all(table, 'tr')[1:]:  # Skip header
+                        cells = self.doc.find_all(row, 'td')
                         if len(cells) >= 2:
-                            metric = cells[0].get_text(strip=True)
-                            value = cells[1].get_text(strip=True)
+                            metric = text(cells[0])
+                            value = text(cells[1])
                             metrics[metric] = value
                     verification['metricas'] = metrics
                 break
@@ -141,37 +163,16 @@ class BaselineParser:
         # 2. DETERMINAR ESTADO BASADO EN MÉTRICAS
         # ============================================
         if verification.get('metricas'):
-            try:
-                # Extraer valores numéricos
-                rms_str = verification['metricas'].get('RMS', '0')
-                max_diff_str = verification['metricas'].get('Diferencia Máxima', '0')
-                
-                # Limpiar y convertir a float
-                rms = float(rms_str.replace(',', '.'))
-                max_diff = float(max_diff_str.replace(',', '.'))
-                
-                # ⭐ UMBRALES ACTUALIZADOS - MÁS EXIGENTES
-                if rms < 0.005 and max_diff < 0.01:
-                    verification['estado'] = 'EXCELENTE'
-                elif rms < 0.01 and max_diff < 0.015:
-                    verification['estado'] = 'BUENO'
-                elif rms < 0.015 and max_diff < 0.03:
-                    verification['estado'] = 'ACEPTABLE'
-                else:
-                    verification['estado'] = 'REQUIERE REVISIÓN'
-                    
-            except (ValueError, AttributeError):
-                verification['estado'] = 'UNKNOWN'
+            verification['estado'] = self._verification_status(verification['metricas'])
         
         # ============================================
         # 3. EXTRAER CONCLUSIÓN DEL HTML
         # ============================================
-        status_divs = verif_section.find_all('div', class_=re.compile(r'status-(good|warning|bad|fail)'))
+        status_divs = self.doc.find_all(verif_section, 'div', re.compile(r'status-(good|warning|bad|fail)'))
         
         if not status_divs:
-            next_divs = verif_section.find_next_siblings('div')
-            for div in next_divs:
-                if any(cls in div.get('class', []) for cls in ['status-good', 'status-warning', 'status-bad', 'status-fail']):
+            for div in verif_section.itersiblings('div'):
+                if has_class(div, ['status-good', 'status-warning', 'status-bad', 'status-fail']):
                     status_divs = [div]
                     break
         
@@ -179,40 +180,66 @@ class BaselineParser:
             status_div = status_divs[0]
             
             # Extraer conclusión completa
-            paragraphs = status_div.find_all('p')
+            paragraphs = self.doc.find_all(status_div, 'p')
             if paragraphs:
                 conclusion_parts = []
                 for p in paragraphs:
-                    text = p.get_text(strip=True)
-                    if text:
-                        conclusion_parts.append(text)
+                    p_text = self.doc.paragraph_text(p)
+                    if p_text:
+                        conclusion_parts.append(p_text)
                 verification['conclusion'] = ' '.join(conclusion_parts)
             
             # Extraer recomendaciones
-            ul = status_div.find('ul')
-            if ul:
+            ul = self.doc.find(status_div, 'ul')
+            if ul is not None:
                 recommendations = []
-                for li in ul.find_all('li'):
-                    recommendations.append(li.get_text(strip=True))
+                for li in self.doc.find_all(ul, 'li'):
+                    recommendations.append(text(li))
                 if recommendations:
                     verification['recomendaciones'] = recommendations
         
         return verification        
         
+    @staticmethod
+    def _verification_status(metricas: Dict[str, str]) -> str:
+        """Estado de la verificación a partir de las métricas (RMS, Diferencia Máxima)"""
+        try:
+            # Extraer valores numéricos
+            rms_str = metricas.get('RMS', '0')
+            max_diff_str = metricas.get('Diferencia Máxima', '0')
+            
+            # Limpiar y convertir a float
+            rms = float(rms_str.replace(',', '.'))
+            max_diff = float(max_diff_str.replace(',', '.'))
+            
+            # ⭐ UMBRALES ACTUALIZADOS - MÁS EXIGENTES
+            if rms < 0.005 and max_diff < 0.01:
+                return 'EXCELENTE'
+            elif rms < 0.01 and max_diff < 0.015:
+                return 'BUENO'
+            elif rms < 0.015 and max_diff < 0.03:
+                return 'ACEPTABLE'
+            else:
+                return 'REQUIERE REVISIÓN'
+                
+        except (ValueError, AttributeError):
+            return 'UNKNOWN'
+    
     def _extract_plotly_charts(self) -> List[Dict[str, str]]:
         """Extrae scripts de gráficos Plotly embebidos"""
         charts = []
         
         # Buscar todos los divs que contienen gráficos Plotly
-        plot_divs = self.soup.find_all('div', id=re.compile(r'.*-plot$|plotly-.*'))
+        plot_id_re = re.compile(r'.*-plot$|plotly-.*')
+        plot_divs = [div for div in self.doc.root.iter('div') if plot_id_re.search(div.get('id', ''))]
         
         for plot_div in plot_divs:
             chart_id = plot_div.get('id', '')
             
             # Buscar el script asociado con Plotly.newPlot
-            script_tag = plot_div.find_next_sibling('script')
-            if script_tag:
-                script_content = script_tag.string
+            script_tag = next(plot_div.itersiblings('script'), None)
+            if script_tag is not None:
+                script_content = self.doc.script_text(script_tag)
                 if script_content and 'Plotly.newPlot' in script_content:
                     charts.append({
                         'id': chart_id,
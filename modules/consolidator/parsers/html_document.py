@@ -0,0 +1,231 @@
+"""
+Documento HTML compartido para los parsers del consolidador
+Tokeniza cada informe una sola vez con lxml (parser C de libxml2) y
+descarta el cuerpo de los <script>/<style> (megabytes de plotly.js y JSON
+de figuras) para que las búsquedas posteriores no los recorran.
+
+Los documentos se cachean por huella del contenido: BaselineParser,
+ValidationParser, PredictionsParser y extract_service_info de la página
+MetaReports comparten el mismo árbol aunque reciban el HTML por separado.
+
+Los informes recientes incluyen además un sidecar JSON
+(``<script type="application/json" id="coref-report-data">``) con los datos
+ya estructurados; ``read_report_sidecar`` lo localiza sin parsear el HTML.
+"""
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Union
+
+from lxml import etree, html as lxml_html
+
+from app_config import REPORT_SIDECAR
+
+
+# Número de documentos parseados que se mantienen en memoria
+_DOCUMENT_CACHE_SIZE = 6
+
+_P_OPEN_RE = re.compile(rb'<p[\s>]')
+
+_HTML_PARSER = lxml_html.HTMLParser(remove_comments=True, remove_pis=True,
+                                    encoding='utf-8')
+
+
+class ReportDocument:
+    """
+    Árbol lxml de un informe con helpers equivalentes a los de BeautifulSoup
+    (``find``, ``find_all``, ``text``) usados por los parsers.
+
+    Solo se conserva el texto de los <script> que inicializan gráficos
+    (``Plotly.newPlot``); el resto de scripts y estilos quedan vacíos.
+    """
+
+    def __init__(self, html_content: Union[str, bytes]):
+        if isinstance(html_content, str):
+            html_content = html_content.encode('utf-8')
+        self.root = lxml_html.document_fromstring(html_content, parser=_HTML_PARSER)
+        self._source = html_content
+        self._source_lines: Optional[List[bytes]] = None
+        self._chart_scripts: Dict[etree._Element, str] = {}
+
+        for el in self.root.iter('script', 'style'):
+            text = el.text
+            if text and el.tag == 'script' and 'Plotly.newPlot' in text:
+                self._chart_scripts[el] = text
+            el.text = None
+
+    # ------------------------------------------------------------------
+    # Búsqueda
+    # ------------------------------------------------------------------
+    def find_by_id(self, element_id: str, tag: str = None) -> Optional[etree._Element]:
+        """Primer elemento con el id dado (y etiqueta, si se indica)."""
+        found = self.root.xpath('//*[@id=$element_id]', element_id=element_id)
+        for el in found:
+            if tag is None or el.tag == tag:
+                return el
+        return None
+
+    @staticmethod
+    def find_all(el: etree._Element, tag: str = '*', cls=None) -> List[etree._Element]:
+        """
+        Descendientes con la etiqueta dada, filtrados por clase CSS.
+
+        Args:
+            el: Elemento raíz de la búsqueda
+            tag: Etiqueta ('*' = cualquiera)
+            cls: Clase, lista de clases (cualquiera) o regex compilada
+        """
+        matches = el.iterdescendants() if tag == '*' else el.iterdescendants(tag)
+        if cls is None:
+            return list(matches)
+        return [m for m in matches if has_class(m, cls)]
+
+    @staticmethod
+    def find(el: etree._Element, tag: str = '*', cls=None) -> Optional[etree._Element]:
+        """Primer descendiente con la etiqueta (y clase) dada."""
+        matches = el.iterdescendants() if tag == '*' else el.iterdescendants(tag)
+        for m in matches:
+            if cls is None or has_class(m, cls):
+                return m
+        return None
+
+    def paragraph_text(self, p: etree._Element) -> str:
+        """
+        Texto de un <p> incluyendo las listas anidadas en él en el fuente.
+
+        Los informes escriben ``<p>... <ul>...</ul></p>``; el parser HTML
+        (como un navegador) cierra el párrafo antes de la lista. Si en el
+        fuente no hay ``</p>`` antes de la lista, su texto se reincorpora
+        para obtener el mismo resultado que con html.parser.
+        """
+        parts = [text(p)]
+        for sibling in p.itersiblings():
+            if sibling.tag not in ('ul', 'ol') or not self._opened_inside(p, sibling):
+                break
+            parts.append(text(sibling))
+        return ''.join(parts)
+
+    def _opened_inside(self, p: etree._Element, block: etree._Element) -> bool:
+        """True si ``block`` empieza en el fuente antes del cierre de ``p``."""
+        if p.sourceline is None or block.sourceline is None:
+            return False
+        if self._source_lines is None:
+            self._source_lines = self._source.split(b'\n')
+        segment = b'\n'.join(self._source_lines[p.sourceline - 1:block.sourceline])
+        block_start = segment.rfind(b'<' + block.tag.encode())
+        p_start = max((m.start() for m in _P_OPEN_RE.finditer(segment, 0, block_start)), default=0)
+        return b'</p>' not in segment[p_start:block_start]
+
+    # ------------------------------------------------------------------
+    # Scripts de gráficos
+    # ------------------------------------------------------------------
+    def script_text(self, el: etree._Element) -> Optional[str]:
+        """Texto de un <script> de gráfico (None si se descartó)."""
+        return self._chart_scripts.get(el)
+
+    def chart_scripts(self) -> Iterator[etree._Element]:
+        """<script> con ``Plotly.newPlot``, en orden de documento."""
+        return iter(self._chart_scripts)
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def has_class(el: etree._Element, cls) -> bool:
+    """True si el elemento tiene la clase (o alguna de las clases) indicada."""
+    classes = (el.get('class') or '').split()
+    if isinstance(cls, str):
+        return cls in classes
+    if isinstance(cls, re.Pattern):
+        return any(cls.search(c) for c in classes)
+    return any(c in classes for c in cls)
+
+
+def text(el: Optional[etree._Element], separator: str = '') -> str:
+    """
+    Texto del elemento con cada fragmento recortado (como
+    ``get_text(separator, strip=True)`` de BeautifulSoup).
+    """
+    if el is None:
+        return ''
+    return separator.join(s.strip() for s in el.itertext() if s.strip())
+
+
+# ============================================================================
+# CACHÉ DE DOCUMENTOS
+# ============================================================================
+
+_documents: 'OrderedDict[str, ReportDocument]' = OrderedDict()
+
+
+def get_report_document(html_content: Union[str, bytes, ReportDocument]) -> ReportDocument:
+    """
+    Devuelve el documento parseado de un informe, reutilizándolo si el mismo
+    contenido ya se parseó antes (en este rerun o en uno anterior).
+    """
+    if isinstance(html_content, ReportDocument):
+        return html_content
+
+    data = html_content.encode('utf-8') if isinstance(html_content, str) else html_content
+    key = hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    document = _documents.get(key)
+    if document is None:
+        document = ReportDocument(data)
+        _documents[key] = document
+        while len(_documents) > _DOCUMENT_CACHE_SIZE:
+            _documents.popitem(last=False)
+    else:
+        _documents.move_to_end(key)
+    return document
+
+
+# ============================================================================
+# SIDECAR JSON
+# ============================================================================
+
+_SIDECAR_OPEN = f'id="{REPORT_SIDECAR["element_id"]}">'
+
+
+def read_report_sidecar(html_content: Union[str, bytes, ReportDocument],
+                        report_type: str) -> Optional[Dict]:
+    """
+    Lee el sidecar JSON de un informe sin construir el árbol HTML.
+
+    Args:
+        html_content: HTML del informe
+        report_type: Tipo esperado ('baseline', 'validation', 'predictions'...)
+
+    Returns:
+        Dict con el sidecar, o None si el informe no lo incluye (informes
+        antiguos), es de otro tipo o usa un esquema más nuevo que el soportado;
+        en ese caso el parser recurre al scraping del HTML.
+    """
+    if isinstance(html_content, ReportDocument):
+        html_content = html_content._source
+    if isinstance(html_content, bytes):
+        html_content = html_content.decode('utf-8', errors='replace')
+
+    # El sidecar va al final del documento, antes del footer
+    start = html_content.rfind(_SIDECAR_OPEN)
+    if start < 0:
+        return None
+    start += len(_SIDECAR_OPEN)
+    end = html_content.find('</script>', start)
+    if end < 0:
+        return None
+
+    try:
+        sidecar = json.loads(html_content[start:end])
+    except ValueError:
+        return None
+
+    if (not isinstance(sidecar, dict)
+            or sidecar.get('schema') != REPORT_SIDECAR['schema']
+            or sidecar.get('schema_version', 0) > REPORT_SIDECAR['schema_version']
+            or sidecar.get('report_type') != report_type
+            or not isinstance(sidecar.get('summary'), dict)):
+        return None
+    return sidecar
@@ -1,18 +1,40 @@
 """
 Parser para extraer información del informe de Predicciones con Muestras Reales
 """
-from bs4 import BeautifulSoup
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Union
+
+from .html_document import ReportDocument, get_report_document, read_report_sidecar, text
+
+
+_NEWPLOT_ID_RE = re.compile(r"Plotly\.newPlot\('([^']+)'")
 
 
 class PredictionsParser:
-    def __init__(self, html_content: str):
-        self.soup = BeautifulSoup(html_content, 'html.parser')
+    def __init__(self, html_content: Union[str, ReportDocument]):
+        self._html = html_content
+        self._doc = None
+        self.sidecar = read_report_sidecar(html_content, 'predictions')
         self.data = {}
+    
+    @property
+    def doc(self) -> ReportDocument:
+        """Árbol HTML del informe (solo se parsea si hace falta scraping)."""
+        if self._doc is None:
+            self._doc = get_report_document(self._html)
+        return self._doc
         
     def parse(self) -> Dict[str, Any]:
         """Parse completo del HTML de predicciones"""
+        if self.sidecar is not None:
+            # Informe con sidecar JSON: datos ya estructurados, sin scraping
+            self.data = {
+                'tipo_informe': 'Predicciones con Muestras Reales',
+                **self.sidecar['summary'],
+                'graficos': []
+            }
+            return self.data
+        
         self.data = {
             'tipo_informe': 'Predicciones con Muestras Reales',
             'info_general': self._extract_general_info(),
@@ -26,28 +48,28 @@ class PredictionsParser:
         info = {}
         
         # Buscar info-box con información general
-        info_box = self.soup.find('div', class_='info-box')
-        if info_box:
+        info_box = self.doc.find(self.doc.root, 'div', 'info-box')
+        if info_box is not None:
             # Extraer info-items (los conteos)
-            info_items = info_box.find_all('div', class_='info-item')
+            info_items = self.doc.find_all(info_box, 'div', 'info-item')
             for item in info_items:
-                label = item.find('span', class_='info-label')
-                value = item.find('span', class_='info-value')
-                if label and value:
+                label = self.doc.find(item, 'span', 'info-label')
+                value = self.doc.find(item, 'span', 'info-value')
+                if label is not None and value is not None:
                     # Limpiar emojis del label
-                    label_text = re.sub(r'[🔬📅📦💡]', '', label.get_text(strip=True)).strip()
+                    label_text = re.sub(r'[🔬📅📦💡]', '', text(label)).strip()
                     label_text = label_text.replace(':', '').strip()
-                    info[label_text] = value.get_text(strip=True)
+                    info[label_text] = text(value)
             
             # ⭐ NUEVO: Extraer tabla con listas de productos y lámparas
-            table = info_box.find('table')
-            if table:
-                for row in table.find_all('tr'):
-                    th = row.find('th')
-                    td = row.find('td')
-                    if th and td:
-                        key = th.get_text(strip=True)
-                        value_text = td.get_text(strip=True)
+            table = self.doc.find(info_box, 'table')
+            if table is not None:
+                for row in self.doc.find_all(table, 'tr'):
+                    th = self.doc.find(row, 'th')
+                    td = self.doc.find(row, 'td')
+                    if th is not None and td is not None:
+                        key = text(th)
+                        value_text = text(td)
                         
                         # Convertir texto separado por comas en lista
                         if key == 'Productos':
@@ -66,45 +88,45 @@ class PredictionsParser:
         productos = []
         
         # Buscar todas las secciones de producto
-        sections = self.soup.find_all('div', class_='section')
+        sections = self.doc.find_all(self.doc.root, 'div', 'section')
         
         for section in sections:
-            h3_tag = section.find('h3')
-            if not h3_tag:
+            h3_tag = self.doc.find(section, 'h3')
+            if h3_tag is None:
                 continue
             
-            producto_nombre = h3_tag.get_text(strip=True)
+            producto_nombre = text(h3_tag)
             
             # Buscar tabla de resultados
-            table = section.find('table')
-            if not table:
+            table = self.doc.find(section, 'table')
+            if table is None:
                 continue
             
             # Extraer headers (parámetros)
             headers = []
-            thead = table.find('thead')
-            if thead:
-                header_row = thead.find('tr')
-                if header_row:
-                    for th in header_row.find_all('th'):
+            thead = self.doc.find(table, 'thead')
+            if thead is not None:
+                header_row = self.doc.find(thead, 'tr')
+                if header_row is not None:
+                    for th in self.doc.find_all(header_row, 'th'):
                         # Extraer texto del header y subheader si existe
-                        text = th.get_text(separator='|', strip=True)
+                        header_text = text(th, separator='|')
                         # Limpiar formato
-                        text = text.replace('(Media ± SD)', '').strip()
-                        headers.append(text)
+                        header_text = header_text.replace('(Media ± SD)', '').strip()
+                        headers.append(header_text)
             
             # Extraer datos por lámpara
             lamparas_data = []
-            tbody = table.find('tbody')
-            if tbody:
-                for row in tbody.find_all('tr'):
-                    cells = row.find_all('td')
+            tbody = self.doc.find(table, 'tbody')
+            if tbody is not None:
+                for row in self.doc.find_all(tbody, 'tr'):
+                    cells = self.doc.find_all(row, 'td')
                     if len(cells) > 0:
                         lampara_dict = {}
                         for i, cell in enumerate(cells):
                             if i < len(headers):
                                 # Limpiar nombre de lámpara si es el primer cell
-                                value = cell.get_text(strip=True)
+                                value = text(cell)
                                 lampara_dict[headers[i]] = value
                         lamparas_data.append(lampara_dict)
             
@@ -120,18 +142,17 @@ class PredictionsParser:
         """Extrae scripts de gráficos Plotly embebidos"""
         charts = []
         
-        # Buscar scripts con Plotly
-        scripts = self.soup.find_all('script')
-        for script in scripts:
-            if script.string and 'Plotly.newPlot' in script.string:
-                # Intentar identificar el div asociado
-                match = re.search(r"Plotly\.newPlot\('([^']+)'", script.string)
-                if match:
-                    div_id = match.group(1)
-                    charts.append({
-                        'id': div_id,
-                        'script': script.string
-                    })
+        # Buscar scripts con Plotly (el documento ya los tiene indexados)
+        for script in self.doc.chart_scripts():
+            script_content = self.doc.script_text(script)
+            # Intentar identificar el div asociado
+            match = _NEWPLOT_ID_RE.search(script_content, script_content.find('Plotly.newPlot'))
+            if match:
+                div_id = match.group(1)
+                charts.append({
+                    'id': div_id,
+                    'script': script_content
+                })
         
         return charts
     
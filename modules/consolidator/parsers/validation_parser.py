@@ -1,18 +1,39 @@
 """
 Parser para extraer información del informe de Validación con Standards Ópticos
 """
-from bs4 import BeautifulSoup
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Union
+
+from lxml import etree
+
+from .html_document import ReportDocument, get_report_document, read_report_sidecar, text
 
 
 class ValidationParser:
-    def __init__(self, html_content: str):
-        self.soup = BeautifulSoup(html_content, 'html.parser')
+    def __init__(self, html_content: Union[str, ReportDocument]):
+        self._html = html_content
+        self._doc = None
+        self.sidecar = read_report_sidecar(html_content, 'validation')
         self.data = {}
+    
+    @property
+    def doc(self) -> ReportDocument:
+        """Árbol HTML del informe (solo se parsea si hace falta scraping)."""
+        if self._doc is None:
+            self._doc = get_report_document(self._html)
+        return self._doc
         
     def parse(self) -> Dict[str, Any]:
         """Parse completo del HTML de validación óptica"""
+        if self.sidecar is not None:
+            # Informe con sidecar JSON: datos ya estructurados, sin scraping
+            self.data = {
+                'tipo_informe': 'Validación Óptica',
+                **self.sidecar['summary'],
+                'graficos': []
+            }
+            return self.data
+        
         self.data = {
             'tipo_informe': 'Validación Óptica',
             'info_servicio': self._extract_service_info(),
@@ -27,65 +48,65 @@ class ValidationParser:
     def _extract_service_info(self) -> Dict[str, str]:
         """Extrae información del servicio"""
         info = {}
-        service_section = self.soup.find('div', id='info-servicio')
-        if service_section:
-            table = service_section.find('table')
-            if table:
-                for row in table.find_all('tr'):
-                    cells = row.find_all('td')
+        service_section = self.doc.find_by_id('info-servicio', 'div')
+        if service_section is not None:
+            table = self.doc.find(service_section, 'table')
+            if table is not None:
+                for row in self.doc.find_all(table, 'tr'):
+                    cells = self.doc.find_all(row, 'td')
                     if len(cells) == 2:
-                        key = cells[0].get_text(strip=True).replace(':', '')
-                        value = cells[1].get_text(strip=True)
+                        key = text(cells[0]).replace(':', '')
+                        value = text(cells[1])
                         info[key] = value
         return info
     
     def _extract_executive_summary(self) -> Dict[str, Any]:
         """Extrae resumen ejecutivo con métricas principales"""
         summary = {}
-        exec_section = self.soup.find('div', id='resumen-ejecutivo')
-        if exec_section:
+        exec_section = self.doc.find_by_id('resumen-ejecutivo', 'div')
+        if exec_section is not None:
             # Extraer métricas numéricas
-            metric_cards = exec_section.find_all('div', class_='metric-card')
+            metric_cards = self.doc.find_all(exec_section, 'div', 'metric-card')
             metrics = {}
             for card in metric_cards:
-                value_div = card.find('div', class_='metric-value')
-                label_div = card.find('div', class_='metric-label')
-                if value_div and label_div:
-                    label = label_div.get_text(strip=True)
-                    value = value_div.get_text(strip=True)
+                value_div = self.doc.find(card, 'div', 'metric-value')
+                label_div = self.doc.find(card, 'div', 'metric-label')
+                if value_div is not None and label_div is not None:
+                    label = text(label_div)
+                    value = text(value_div)
                     # Limpiar emojis del label
                     label_clean = re.sub(r'[✅⚠️❌]', '', label).strip()
                     metrics[label_clean] = value
             summary['metricas'] = metrics
             
             # Extraer conclusión
-            h3_tags = exec_section.find_all('h3')
+            h3_tags = self.doc.find_all(exec_section, 'h3')
             for h3 in h3_tags:
-                text = h3.get_text(strip=True)
-                if 'VALIDACIÓN' in text:
-                    summary['conclusion'] = text
+                h3_text = text(h3)
+                if 'VALIDACIÓN' in h3_text:
+                    summary['conclusion'] = h3_text
                     # Buscar descripción
-                    next_p = h3.find_next('p')
+                    next_p = h3.xpath('following::p[1]')
                     if next_p:
-                        summary['descripcion'] = next_p.get_text(strip=True)
+                        summary['descripcion'] = self.doc.paragraph_text(next_p[0])
         
         return summary
     
     def _extract_validation_criteria(self) -> Dict[str, List[Dict[str, str]]]:
         """Extrae criterios de validación utilizados"""
         criteria = {'criterios': []}
-        criteria_section = self.soup.find('div', id='criterios-validacion')
-        if criteria_section:
-            table = criteria_section.find('table')
-            if table:
-                rows = table.find_all('tr')[1:]  # Skip header
+        criteria_section = self.doc.find_by_id('criterios-validacion', 'div')
+        if criteria_section is not None:
+            table = self.doc.find(criteria_section, 'table')
+            if table is not None:
+                rows = self.doc.find_all(table, 'tr')[1:]  # Skip header
                 for row in rows:
-                    cells = row.find_all('td')
+                    cells = self.doc.find_all(row, 'td')
                     if len(cells) >= 3:
                         criteria['criterios'].append({
-                            'parametro': cells[0].get_text(strip=True),
-                            'umbral': cells[1].get_text(strip=True),
-                            'descripcion': cells[2].get_text(strip=True)
+                            'parametro': text(cells[0]),
+                            'umbral': text(cells[1]),
+                            'descripcion': text(cells[2])
                         })
         
         return criteria
@@ -93,33 +114,33 @@ class ValidationParser:
     def _extract_global_stats(self) -> Dict[str, Any]:
         """Extrae estadísticas globales del kit completo"""
         stats = {}
-        stats_section = self.soup.find('div', id='estadisticas-globales')
-        if stats_section:
+        stats_section = self.doc.find_by_id('estadisticas-globales', 'div')
+        if stats_section is not None:
             # Primera tabla: estadísticas agregadas
-            tables = stats_section.find_all('table')
+            tables = self.doc.find_all(stats_section, 'table')
             if len(tables) >= 1:
                 stats['metricas_agregadas'] = []
-                for row in tables[0].find_all('tr')[1:]:
-                    cells = row.find_all('td')
+                for row in self.doc.find_all(tables[0], 'tr')[1:]:
+                    cells = self.doc.find_all(row, 'td')
                     if len(cells) >= 5:
                         stats['metricas_agregadas'].append({
-                            'metrica': cells[0].get_text(strip=True),
-                            'minimo': cells[1].get_text(strip=True),
-                            'maximo': cells[2].get_text(strip=True),
-                            'media': cells[3].get_text(strip=True),
-                            'desv_est': cells[4].get_text(strip=True)
+                            'metrica': text(cells[0]),
+                            'minimo': text(cells[1]),
+                            'maximo': text(cells[2]),
+                            'media': text(cells[3]),
+                            'desv_est': text(cells[4])
                         })
             
             # Segunda tabla: métricas clave
             if len(tables) >= 2:
                 stats['metricas_clave'] = []
-                for row in tables[1].find_all('tr')[1:]:
-                    cells = row.find_all('td')
+                for row in self.doc.find_all(tables[1], 'tr')[1:]:
+                    cells = self.doc.find_all(row, 'td')
                     if len(cells) >= 3:
                         stats['metricas_clave'].append({
-                            'metrica': cells[0].get_text(strip=True),
-                            'valor': cells[1].get_text(strip=True),
-                            'evaluacion': cells[2].get_text(strip=True)
+                            'metrica': text(cells[0]),
+                            'valor': text(cells[1]),
+                            'evaluacion': text(cells[2])
                         })
         
         return stats
@@ -127,13 +148,13 @@ class ValidationParser:
     def _extract_detailed_results(self) -> List[Dict[str, Any]]:
         """Extrae resultados individuales por estándar"""
         results = []
-        results_section = self.soup.find('div', id='resultados-detallados')
-        if results_section:
-            table = results_section.find('table')
-            if table:
-                rows = table.find_all('tr')[1:]  # Skip header
+        results_section = self.doc.find_by_id('resultados-detallados', 'div')
+        if results_section is not None:
+            table = self.doc.find(results_section, 'table')
+            if table is not None:
+                rows = self.doc.find_all(table, 'tr')[1:]  # Skip header
                 for row in rows:
-                    cells = row.find_all('td')
+                    cells = self.doc.find_all(row, 'td')
                     if len(cells) >= 7:  # Al menos 7 columnas: Estado, ID, Note(Ref), Note(Actual), Correlación, Max Δ, RMS
                         # Estructura de columnas:
                         # 0: Estado (✅ OK, ⚠️ WARNING, ❌ FAIL)
@@ -145,7 +166,7 @@ class ValidationParser:
                         # 6: RMS (0.001674)
                         # 7: Shift (px) - opcional
                         
-                        estado_text = cells[0].get_text(strip=True)
+                        estado_text = text(cells[0])
                         # Determinar estado desde el texto
                         status = 'UNKNOWN'
                         if '✅' in estado_text or 'OK' in estado_text.upper():
@@ -156,13 +177,13 @@ class ValidationParser:
                             status = 'FAIL'
                         
                         results.append({
-                            'estandar': cells[1].get_text(strip=True),  # ID
-                            'lampara_ref': cells[2].get_text(strip=True),  # Note (Ref)
-                            'lampara_nueva': cells[3].get_text(strip=True),  # Note (Actual)
-                            'correlacion': cells[4].get_text(strip=True),  # Correlación
-                            'max_diff': cells[5].get_text(strip=True),  # Max Δ (AU)
-                            'rms': cells[6].get_text(strip=True),  # RMS
-                            'shift': cells[7].get_text(strip=True) if len(cells) > 7 else 'N/A',  # Shift (px)
+                            'estandar': text(cells[1]),  # ID
+                            'lampara_ref': text(cells[2]),  # Note (Ref)
+                            'lampara_nueva': text(cells[3]),  # Note (Actual)
+                            'correlacion': text(cells[4]),  # Correlación
+                            'max_diff': text(cells[5]),  # Max Δ (AU)
+                            'rms': text(cells[6]),  # RMS
+                            'shift': text(cells[7]) if len(cells) > 7 else 'N/A',  # Shift (px)
                             'estado': status
                         })
         
@@ -173,15 +194,16 @@ class ValidationParser:
         charts = []
         
         # Buscar divs de Plotly
-        plot_divs = self.soup.find_all('div', id=re.compile(r'.*-plot$|plotly-.*'))
+        plot_id_re = re.compile(r'.*-plot$|plotly-.*')
+        plot_divs = [div for div in self.doc.root.iter('div') if plot_id_re.search(div.get('id', ''))]
         
         for plot_div in plot_divs:
             chart_id = plot_div.get('id', '')
             
             # Buscar script asociado
-            script_tag = plot_div.find_next_sibling('script')
-            if script_tag:
-                script_content = script_tag.string
+            script_tag = next(plot_div.itersiblings('script'), None)
+            if script_tag is not None:
+                script_content = self.doc.script_text(script_tag)
                 if script_content and 'Plotly.newPlot' in script_content:
                     charts.append({
                         'id': chart_id,
@@ -256,7 +278,7 @@ class ValidationParser:
         charts = []
         
         # Buscar todos los divs que contienen gráficos Plotly
-        plotly_divs = self.soup.find_all('div', class_='plotly-graph-div')
+        plotly_divs = self.doc.find_all(self.doc.root, 'div', 'plotly-graph-div')
         
         for div in plotly_divs:
             chart_id = div.get('id', '')
@@ -267,25 +289,31 @@ class ValidationParser:
             chart_html = []
             
             # Buscar el script CDN de Plotly (solo una vez)
-            parent = div.parent
-            while parent:
-                cdn_script = parent.find('script', src=lambda x: x and 'plotly' in str(x).lower())
-                if cdn_script:
-                    chart_html.append(str(cdn_script))
+            for parent in div.iterancestors():
+                cdn_script = next((s for s in parent.iterdescendants('script')
+                                   if 'plotly' in s.get('src', '').lower()), None)
+                if cdn_script is not None:
+                    chart_html.append(_to_html(cdn_script))
                     break
-                parent = parent.parent if hasattr(parent, 'parent') else None
             
             # Agregar el div del gráfico
-            chart_html.append(str(div))
+            chart_html.append(_to_html(div))
             
             # Buscar el script que inicializa ESTE gráfico específico
-            all_scripts = self.soup.find_all('script', type='text/javascript')
-            for script in all_scripts:
-                if script.string and 'Plotly.newPlot' in script.string and chart_id in script.string:
-                    chart_html.append(str(script))
+            for script in self.doc.chart_scripts():
+                script_content = self.doc.script_text(script)
+                if script.get('type') == 'text/javascript' and chart_id in script_content:
+                    # El árbol no guarda el cuerpo del script: reinsertarlo
+                    empty_script = _to_html(script)
+                    chart_html.append(empty_script[:-len('</script>')] + script_content + '</script>')
                     break
             
             if len(chart_html) >= 2:  # Al menos div + script
                 charts.append('\n'.join(chart_html))
         
-        return charts
\ No newline at end of file
+        return charts
+
+
+def _to_html(el) -> str:
+    """Serializa un elemento a HTML (sin el texto que le sigue)."""
+    return etree.tostring(el, encoding='unicode', method='html', with_tail=False)
@@ -677,7 +677,7 @@ def generate_consolidated_report(baseline_html, validation_html, predictions_htm
             
             # Generar HTML consolidado
             with st.spinner("📝 Generando informe consolidado..."):
-                consolidated_html = consolidator.generate_html()
+                consolidated_report = consolidator.write_html()
             
             st.success("🎉 ¡Informe consolidado generado exitosamente!")
             
@@ -710,7 +710,7 @@ def generate_consolidated_report(baseline_html, validation_html, predictions_htm
             
             st.download_button(
                 label="📥 Descargar Informe Consolidado (HTML)",
-                data=consolidated_html,
+                data=consolidated_report.to_bytesio(),
                 file_name=filename,
                 mime="text/html",
                 use_container_width=True
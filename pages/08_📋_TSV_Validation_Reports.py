@@ -25,8 +25,8 @@ import streamlit as st
 
 from auth import check_password
 from buchi_streamlit_theme import apply_buchi_styles
-from core.tsv_plotting import plot_comparison_preview, build_spectra_figure_preview
-from core.tsv_report_generator import generate_html_report, ReportResult
+from core.tsv_plotting import spectra_pixel_bounds
+from core.tsv_report_generator import write_html_report, ReportResult
 from core.tsv_session_manager import (
     initialize_tsv_session_state,
     add_processed_file,
@@ -35,6 +35,7 @@ from core.tsv_session_manager import (
     apply_pending_selections,
     get_apply_summary,
     add_pending_selection,
+    add_pending_selections,
     clear_pending_selections,
     get_pending_selections,
     has_pending_selections,
@@ -44,6 +45,14 @@ from core.tsv_session_manager import (
     clear_all_selections,
     clear_all_groups,
     clean_invalid_indices,
+    get_working_dataframe,
+    get_export_data,
+    undo_selection,
+    redo_selection,
+    get_history_labels,
+    get_data_version,
+    get_figure_cache,
+    get_visual_filter_index,
     get_file_statistics,
     get_editor_version,
     increment_editor_version,
@@ -61,18 +70,21 @@ from core.tsv_session_manager import (
     get_group_options_display,
 )
 from core.tsv_processing import (
-    clean_tsv_file,
     get_parameter_columns,
     extract_parameter_names,
     PIXEL_RE,
     build_samples_by_month_dataframe,
 )
 from core.plotly_utils import create_samples_by_month_chart
+from core.spectral_workspace import open_tsv
+from ui.ui_helpers import render_session_memory_panel
 from core.selection_utils import (
     create_event_id,
     extract_row_index_from_click,
     extract_row_indices_from_spectra_events,
     extract_row_indices_from_parity_events,
+    extract_row_indices_from_parity_selection,
+    create_selection_id,
 )
 from core.tsv_statistics import (
     calculate_group_statistics,
@@ -105,33 +117,19 @@ def apply_visual_filter(df: pd.DataFrame, selected_file: str) -> pd.DataFrame:
     filter_id = st.session_state.get('visual_filter_id', {}).get(selected_file, "")
     filter_note = st.session_state.get('visual_filter_note', {}).get(selected_file, "")
     
+    # Máscara sobre el índice precalculado (fechas ya parseadas, ID/Note categóricos)
+    mask = get_visual_filter_index(selected_file).mask_for(
+        df.index,
+        years=filter_years,
+        months=filter_months,
+        id_text=filter_id,
+        note_text=filter_note,
+    )
+
     # If no filters active, return original
-    if not filter_years and not filter_months and not filter_id and not filter_note:
+    if mask is None:
         return df
-    
-    df_temp = df.copy()
-    mask = pd.Series(True, index=df_temp.index)
-    
-    # Date filters
-    if 'Date' in df_temp.columns and (filter_years or filter_months):
-        df_temp['Date'] = pd.to_datetime(df_temp['Date'], errors='coerce')
-        
-        if filter_years:
-            mask &= df_temp['Date'].dt.year.isin(filter_years)
-        
-        if filter_months:
-            mask &= df_temp['Date'].dt.month.isin(filter_months)
-    
-    # ID filter
-    if filter_id and "ID" in df_temp.columns:
-        mask &= df_temp["ID"].astype(str).str.contains(filter_id, case=False, na=False)
-
-    # Note filter
-    if filter_note and "Note" in df_temp.columns:
-        mask &= df_temp["Note"].astype(str).str.contains(filter_note, case=False, na=False)
-
-    
-    return df_temp.loc[mask].copy()
+    return df[mask]
 
 
 def get_filter_indicator(df_original: pd.DataFrame, df_filtered: pd.DataFrame) -> str:
@@ -295,7 +293,7 @@ if uploaded_files:
             status_text.text(f"Procesando {file_name}...")
 
             try:
-                df_clean = clean_tsv_file(uploaded_file)
+                df_clean = open_tsv(uploaded_file, kind='tsv_clean')
                 df_filtered = df_clean.copy()
                 rows_before = len(df_filtered)
 
@@ -353,6 +351,568 @@ if uploaded_files:
         status_text.text("✅ Procesamiento completado")
 
 
+# =============================================================================
+# FRAGMENTOS: SECCIONES CON RERUN PROPIO
+# =============================================================================
+# Cada sección pesada se re-ejecuta sola cuando cambia uno de sus widgets
+# (acción, grupo, Lasso/Box, ventana de píxeles, parámetro, clicks). Sus datos
+# llegan como argumentos desde la ejecución completa; todo lo que modifica la
+# selección (aplicar, limpiar, confirmar, añadir pendientes) hace st.rerun()
+# de la página entera para refrescar el resto de secciones.
+
+@st.fragment
+def render_spectra_section(selected_file, df_current, df_filtered, vf, figure_cache,
+                           figure_style_key, removed_indices, sample_groups):
+    """Selección desde espectros (figura, eventos y botones)."""
+    st.markdown("### 📈 Selección desde Espectros")
+
+    if not INTERACTIVE_SELECTION_AVAILABLE:
+        st.warning("⚠️ Selección interactiva no disponible. Instala: `pip install streamlit-plotly-events`")
+
+    spectra_action = "Marcar para Eliminar"
+    spectra_target = None
+    spectra_multi = False
+
+    if INTERACTIVE_SELECTION_AVAILABLE:
+        st.info("💡 Haz **click** para seleccionar espectros individuales o activa **Lasso/Box** para selección múltiple")
+
+        if has_pending_selections(selected_file):
+            pending = get_pending_selections(selected_file)
+            st.warning(f"⏳ **{len(pending)} acción(es) pendiente(s)**")
+            with st.expander("Ver selecciones pendientes", expanded=False):
+                for i, item in enumerate(pending):
+                    action_txt = item.get("action", "")
+                    if item.get("action") == "Asignar a Grupo":
+                        group_key = item.get("group", "Set 1")
+                        action_txt += f" → {get_group_display_name(group_key, SAMPLE_GROUPS)}"
+                    st.write(f"{i+1}. Muestra **{item.get('idx')}**: {action_txt}")
+
+        colA, colB, colC = st.columns([2, 2, 1])
+        with colA:
+            spectra_action = st.radio(
+                "Acción:",
+                ["Marcar para Eliminar", "Asignar a Grupo"],
+                key=f"spectra_action_{selected_file}",
+            )
+        with colB:
+            if spectra_action == "Asignar a Grupo":
+                options_disp = get_group_options_display(GROUP_KEYS, SAMPLE_GROUPS)
+                current_key = st.session_state.get(f"spectra_target_{selected_file}", "Set 1")
+                current_disp = (
+                    get_group_display_name(current_key, SAMPLE_GROUPS)
+                    if current_key in GROUP_KEYS
+                    else (options_disp[0] if options_disp else "Set 1")
+                )
+
+                spectra_target_disp = st.selectbox(
+                    "Grupo:",
+                    options_disp,
+                    index=options_disp.index(current_disp) if current_disp in options_disp else 0,
+                    key=f"spectra_target_disp_{selected_file}",
+                )
+                spectra_target = display_to_group_key(spectra_target_disp, GROUP_KEYS, SAMPLE_GROUPS)
+                st.session_state[f"spectra_target_{selected_file}"] = spectra_target
+
+        with colC:
+            spectra_multi = st.checkbox("Lasso/Box", value=False, key=f"spectra_multi_{selected_file}")
+
+    # Ventana de píxeles: las líneas se decimen sobre la zona visible,
+    # así que acotarla muestra más detalle
+    spectra_window = None
+    pixel_bounds = spectra_pixel_bounds(df_current, PIXEL_RE)
+    if pixel_bounds and pixel_bounds[0] < pixel_bounds[1]:
+        spectra_window = st.slider(
+            "🔎 Ventana de píxeles",
+            min_value=pixel_bounds[0],
+            max_value=pixel_bounds[1],
+            value=pixel_bounds,
+            key=f"spectra_window_{selected_file}",
+        )
+
+    try:
+        # Build spectra figure with FILTERED data for visualization
+        fig_spectra = figure_cache.spectra_figure(
+            figure_cache.data_key(selected_file, get_data_version(selected_file), vf, df_filtered, "spectra", spectra_window),
+            figure_style_key,
+            df_filtered,  # Use filtered data for visualization
+            removed_indices,
+            sample_groups,
+            st.session_state.group_labels,
+            SAMPLE_GROUPS,
+            PIXEL_RE,
+            x_range=spectra_window,
+        )
+
+        if fig_spectra:
+            if not INTERACTIVE_SELECTION_AVAILABLE:
+                st.plotly_chart(fig_spectra, use_container_width=True)
+            else:
+                # Figura cacheada: fijar dragmode en ambos sentidos
+                fig_spectra.update_layout(dragmode="lasso" if spectra_multi else "zoom")
+
+                events = plotly_events(
+                    fig_spectra,
+                    click_event=True,
+                    select_event=spectra_multi,
+                    hover_event=False,
+                    override_height=700,
+                    key=f"spectra_{selected_file}_v{get_editor_version(selected_file)}_f{vf}",
+                )
+
+                if events:
+                    context = f"{spectra_action}|{spectra_target if spectra_action=='Asignar a Grupo' else ''}"
+                    event_id = f"{create_event_id(events)}|{context}"
+                    last_id = get_last_event_id(selected_file, "spectra")
+
+                    if event_id != last_id:
+                        update_last_event_id(selected_file, "spectra", event_id)
+
+                        # Con tu plotting, tanto click como lasso devuelven customdata en markers
+                        clicked_indices = extract_row_indices_from_spectra_events(fig_spectra, events)
+
+
+                        # Map filtered indices back to original df_current indices
+                        original_clicked_indices = clicked_indices
+
+
+                        if original_clicked_indices:
+                            for clicked_idx in original_clicked_indices:
+                                add_pending_selection(
+                                    selected_file,
+                                    clicked_idx,
+                                    spectra_action,
+                                    spectra_target if spectra_action == "Asignar a Grupo" else None,
+                                )
+
+                            pending_count = len(get_pending_selections(selected_file))
+                            if spectra_action == "Asignar a Grupo" and spectra_target:
+                                st.toast(
+                                    f"➕ {len(original_clicked_indices)} muestra(s) a pendientes → grupo: {get_group_display_name(spectra_target, SAMPLE_GROUPS)} ({pending_count} pendientes)",
+                                    icon="📍",
+                                )
+                            else:
+                                st.toast(
+                                    f"➕ {len(original_clicked_indices)} muestra(s) a pendientes → acción: Eliminar ({pending_count} pendientes)",
+                                    icon="📍",
+                                )
+                            # Los pendientes se muestran también fuera del fragmento
+                            st.rerun()
+        else:
+            st.warning("No hay datos espectrales")
+
+    except Exception as e:
+        st.error(f"Error: {e}")
+        import traceback
+
+        st.code(traceback.format_exc())
+
+    # BOTONES DEBAJO DE ESPECTROS
+    if INTERACTIVE_SELECTION_AVAILABLE:
+        st.markdown("---")
+        b1, b2, b3 = st.columns(3)
+
+        with b1:
+            if st.button(
+                "✅ Aplicar Selecciones",
+                use_container_width=True,
+                type="primary",
+                disabled=not has_pending_selections(selected_file),
+                key=f"apply_spectra_{selected_file}",
+            ):
+                apply_pending_selections(selected_file)
+                st.rerun()
+
+        with b2:
+            if st.button(
+                "🗑️ Limpiar Pendientes",
+                use_container_width=True,
+                disabled=not has_pending_selections(selected_file),
+                key=f"clear_spectra_{selected_file}",
+            ):
+                n_cleared = clear_pending_selections(selected_file)
+                clear_last_event_ids(selected_file)
+                increment_editor_version(selected_file)
+                st.toast(f"🧹 {n_cleared} acción(es) eliminada(s) de pendientes", icon="🗑️")
+                st.rerun()
+
+        with b3:
+            if st.button(
+                "🔄 Confirmar Eliminación",
+                use_container_width=True,
+                disabled=(len(removed_indices) == 0),
+                key=f"delete_spectra_{selected_file}",
+            ):
+                deleted_count = confirm_sample_deletion(selected_file)
+                st.success(f"✅ {deleted_count} muestras eliminadas")
+                st.rerun()
+
+
+@st.fragment
+def render_parity_section(selected_file, df_current, df_filtered, vf, figure_cache,
+                          figure_style_key, removed_indices, sample_groups):
+    """Selección desde parity/residuum/histograma del parámetro elegido."""
+    st.markdown("### 📊 Selección desde Parity")
+
+    param_names = extract_parameter_names(df_current)
+    if not param_names:
+        st.warning("No hay parámetros Result")
+    else:
+        parity_action = "Marcar para Eliminar"
+        parity_target = None
+        parity_multi = False
+
+        if INTERACTIVE_SELECTION_AVAILABLE:
+            st.info("💡 Usa **click** para seleccionar puntos individuales o activa **Lasso/Box** para selección múltiple")
+
+            if has_pending_selections(selected_file):
+                pending = get_pending_selections(selected_file)
+                st.warning(f"⏳ **{len(pending)} acción(es) pendiente(s)**")
+                with st.expander("Ver selecciones pendientes", expanded=False):
+                    for i, item in enumerate(pending):
+                        action_txt = item.get("action", "")
+                        if item.get("action") == "Asignar a Grupo":
+                            group_key = item.get("group", "Set 1")
+                            action_txt += f" → {get_group_display_name(group_key, SAMPLE_GROUPS)}"
+                        st.write(f"{i+1}. Muestra **{item.get('idx')}**: {action_txt}")
+
+            colA, colB, colC = st.columns([2, 2, 1])
+            with colA:
+                parity_action = st.radio(
+                    "Acción:",
+                    ["Marcar para Eliminar", "Asignar a Grupo"],
+                    key=f"parity_action_{selected_file}",
+                )
+            with colB:
+                if parity_action == "Asignar a Grupo":
+                    options_disp = get_group_options_display(GROUP_KEYS, SAMPLE_GROUPS)
+                    current_key = st.session_state.get(f"parity_target_{selected_file}", "Set 1")
+                    current_disp = (
+                        get_group_display_name(current_key, SAMPLE_GROUPS)
+                        if current_key in GROUP_KEYS
+                        else (options_disp[0] if options_disp else "Set 1")
+                    )
+
+                    parity_target_disp = st.selectbox(
+                        "Grupo:",
+                        options_disp,
+                        index=options_disp.index(current_disp) if current_disp in options_disp else 0,
+                        key=f"parity_target_disp_{selected_file}",
+                    )
+                    parity_target = display_to_group_key(parity_target_disp, GROUP_KEYS, SAMPLE_GROUPS)
+                    st.session_state[f"parity_target_{selected_file}"] = parity_target
+
+            with colC:
+                parity_multi = st.checkbox("Lasso/Box", value=True, key=f"parity_multi_{selected_file}")
+
+        selected_param = st.selectbox("Parámetro:", param_names, key=f"param_{selected_file}")
+
+        result_col = f"Result {selected_param}"
+        reference_col = f"Reference {selected_param}"
+        residuum_col = f"Residuum {selected_param}"
+
+        try:
+            # Plot comparison with FILTERED data for visualization
+            parity_data_key = figure_cache.data_key(
+                selected_file, get_data_version(selected_file), vf, df_filtered, "parity", selected_param
+            )
+            plots = figure_cache.comparison_figures(
+                parity_data_key,
+                figure_style_key,
+                df_filtered,  # Use filtered data for visualization
+                result_col,
+                reference_col,
+                residuum_col,
+                removed_indices,
+                sample_groups,
+                st.session_state.group_labels,
+                SAMPLE_GROUPS,
+            )
+
+            if not plots:
+                st.error(f"No se pudieron generar gráficos para {selected_param}")
+            else:
+                fig_parity, fig_res, fig_hist, r2, rmse, bias, n = plots
+
+                m1, m2, m3, m4 = st.columns(4)
+                m1.metric("R²", f"{r2:.3f}")
+                m2.metric("RMSE", f"{rmse:.3f}")
+                m3.metric("BIAS", f"{bias:.3f}")
+                m4.metric("N", n)
+
+                tab1, tab2, tab3 = st.tabs(["Parity", "Residuum", "Histogram"])
+
+                with tab1:
+                    context = f"{parity_action}|{parity_target if parity_action=='Asignar a Grupo' else ''}|{selected_param}"
+                    parity_key = f"{selected_file}_{selected_param}_v{get_editor_version(selected_file)}_f{vf}"
+                    selection_id = ""
+                    clicked_indices: List[int] = []
+
+                    if not INTERACTIVE_SELECTION_AVAILABLE:
+                        st.plotly_chart(fig_parity, use_container_width=True)
+                    elif parity_multi:
+                        # Box/Lasso: el cliente devuelve solo la geometría y el
+                        # índice espacial del parámetro resuelve las filas
+                        fig_parity.update_layout(dragmode="lasso")
+                        parity_event = st.plotly_chart(
+                            fig_parity,
+                            use_container_width=True,
+                            on_select="rerun",
+                            selection_mode=("box", "lasso"),
+                            key=f"parity_sel_{parity_key}",
+                        )
+                        selection = parity_event.get("selection") if parity_event else None
+                        shape_id = create_selection_id(selection)
+                        if shape_id:
+                            selection_id = f"{shape_id}|{context}"
+                            if selection_id != get_last_event_id(selected_file, "parity"):
+                                clicked_indices = extract_row_indices_from_parity_selection(
+                                    figure_cache.parity_index(parity_data_key), selection
+                                )
+                    else:
+                        fig_parity.update_layout(dragmode="zoom")
+
+                        events = plotly_events(
+                            fig_parity,
+                            click_event=True,
+                            select_event=False,
+                            hover_event=False,
+                            override_height=600,
+                            key=f"parity_{parity_key}",
+                        )
+
+                        if events:
+                            selection_id = f"{create_event_id(events)}|{context}"
+                            if selection_id != get_last_event_id(selected_file, "parity"):
+                                clicked_indices = extract_row_indices_from_parity_events(fig_parity, events)
+
+                    if selection_id and selection_id != get_last_event_id(selected_file, "parity"):
+                        update_last_event_id(selected_file, "parity", selection_id)
+
+                        if clicked_indices:
+                            add_pending_selections(
+                                selected_file,
+                                clicked_indices,
+                                parity_action,
+                                parity_target if parity_action == "Asignar a Grupo" else None,
+                            )
+
+                            pending_count = len(get_pending_selections(selected_file))
+                            if parity_action == "Asignar a Grupo" and parity_target:
+                                st.toast(
+                                    f"➕ {len(clicked_indices)} muestra(s) a pendientes → grupo: {get_group_display_name(parity_target, SAMPLE_GROUPS)} ({pending_count} pendientes)",
+                                    icon="📍",
+                                )
+                            else:
+                                st.toast(
+                                    f"➕ {len(clicked_indices)} muestra(s) a pendientes → acción: Eliminar ({pending_count} pendientes)",
+                                    icon="📍",
+                                )
+                            # Los pendientes se muestran también fuera del fragmento
+                            st.rerun()
+
+                with tab2:
+                    st.plotly_chart(fig_res, use_container_width=True)
+                with tab3:
+                    st.plotly_chart(fig_hist, use_container_width=True)
+
+        except Exception as e:
+            st.error(f"Error: {e}")
+            import traceback
+
+            st.code(traceback.format_exc())
+
+        # BOTONES DEBAJO DE PARITY
+        if INTERACTIVE_SELECTION_AVAILABLE:
+            st.markdown("---")
+            b1, b2, b3 = st.columns(3)
+
+            with b1:
+                if st.button(
+                    "✅ Aplicar Selecciones",
+                    use_container_width=True,
+                    type="primary",
+                    disabled=not has_pending_selections(selected_file),
+                    key=f"apply_parity_{selected_file}",
+                ):
+                    apply_pending_selections(selected_file)
+                    st.rerun()
+
+            with b2:
+                if st.button(
+                    "🗑️ Limpiar Pendientes",
+                    use_container_width=True,
+                    disabled=not has_pending_selections(selected_file),
+                    key=f"clear_parity_{selected_file}",
+                ):
+                    n_cleared = clear_pending_selections(selected_file)
+                    clear_last_event_ids(selected_file)
+                    increment_editor_version(selected_file)
+                    st.toast(f"🧹 {n_cleared} acción(es) eliminada(s) de pendientes", icon="🗑️")
+                    st.rerun()
+
+            with b3:
+                if st.button(
+                    "🔄 Confirmar Eliminación",
+                    use_container_width=True,
+                    disabled=(len(removed_indices) == 0),
+                    key=f"delete_parity_{selected_file}",
+                ):
+                    deleted_count = confirm_sample_deletion(selected_file)
+                    st.success(f"✅ {deleted_count} muestras eliminadas")
+                    st.rerun()
+
+
+@st.fragment
+def render_group_statistics_section(selected_file, df_current, removed_indices, sample_groups):
+    """Estadísticas por grupo del parámetro elegido (sobre df_current completo)."""
+    st.markdown("### 📊 Estadísticas por Grupo")
+
+    # Verificar si hay grupos asignados
+    active_groups = get_active_groups(sample_groups, removed_indices)
+
+    if not active_groups:
+        st.info("ℹ️ No hay muestras asignadas a grupos todavía. Asigna muestras a grupos para ver sus estadísticas.")
+    else:
+        param_names = extract_parameter_names(df_current)
+
+        if not param_names:
+            st.warning("⚠️ No hay parámetros disponibles para mostrar estadísticas")
+        else:
+            # Selector de parámetro para estadísticas
+            stats_param = st.selectbox(
+                "Selecciona parámetro para estadísticas:",
+                param_names,
+                key=f"stats_param_{selected_file}",
+                help="Elige el parámetro para el cual mostrar estadísticas por grupo"
+            )
+
+            st.markdown("---")
+
+            # Calcular estadísticas para todos los grupos (ALWAYS on FULL df_current)
+            all_group_stats = calculate_all_groups_statistics(
+                df_current,  # Use full data for statistics
+                stats_param,
+                removed_indices,
+                sample_groups,
+                GROUP_KEYS
+            )
+
+            # Contar muestras por grupo
+            group_sample_counts = count_samples_per_group(sample_groups, removed_indices, GROUP_KEYS)
+
+            # Mostrar estadísticas de cada grupo activo en expandibles
+            for group_key in GROUP_KEYS:
+                if group_key not in active_groups:
+                    continue
+
+                n_samples = group_sample_counts.get(group_key, 0)
+
+                if n_samples == 0:
+                    continue
+
+                display_name = get_group_display_name_with_key(group_key, SAMPLE_GROUPS)
+                stats = all_group_stats.get(group_key)
+
+                with st.expander(f"{display_name} ({n_samples} muestras)", expanded=True):
+                    if stats is None:
+                        st.warning(f"⚠️ No hay suficientes datos válidos para calcular estadísticas (mínimo 2 muestras con valores válidos)")
+                    else:
+                        # Mostrar métricas en columnas
+                        col1, col2, col3, col4 = st.columns(4)
+                        col1.metric("R²", f"{stats['r2']:.4f}")
+                        col2.metric("RMSE", f"{stats['rmse']:.3f}")
+                        col3.metric("BIAS", f"{stats['bias']:.3f}")
+                        col4.metric("N", stats['n'])
+
+                        # Mostrar descripción del grupo si existe
+                        desc = get_group_description(group_key)
+                        if desc:
+                            st.caption(f"📝 {desc}")
+
+            # Tabla resumen comparativa (opcional)
+            st.markdown("---")
+            st.subheader("📋 Resumen Comparativo")
+
+            summary_df = get_statistics_summary(
+                all_group_stats,
+                st.session_state.group_labels,
+                SAMPLE_GROUPS
+            )
+
+            if not summary_df.empty:
+                st.dataframe(
+                    summary_df,
+                    use_container_width=True,
+                    hide_index=True
+                )
+            else:
+                st.info("No hay estadísticas disponibles para mostrar")
+
+
+@st.fragment
+def render_report_generation_section():
+    """Generación y descarga de los informes HTML de todos los archivos."""
+    if st.button("📥 Generar Informes HTML", type="primary", use_container_width=True):
+        results: List[ReportResult] = []
+        progress_bar = st.progress(0.0)
+
+        for idx, file_name in enumerate(get_processed_files(), start=1):
+            try:
+                # Aquí se materializan las eliminaciones confirmadas
+                df, sample_groups_file = get_export_data(file_name)
+
+                if len(df) == 0:
+                    st.warning(f"⚠️ {file_name}: No hay datos")
+                    continue
+
+                html = write_html_report(
+                    df,
+                    file_name,
+                    sample_groups_file,
+                    st.session_state.group_labels,
+                    st.session_state.group_descriptions,
+                    SAMPLE_GROUPS,
+                    PIXEL_RE,
+                )
+
+                results.append(ReportResult(name=file_name, html=html, csv=df))
+                st.success(f"✅ {file_name}")
+
+            except Exception as e:
+                st.error(f"❌ {file_name}: {e}")
+
+            progress_bar.progress(idx / float(len(get_processed_files())))
+
+        if results:
+            st.markdown("---")
+            if len(results) > 1:
+                zip_buffer = BytesIO()
+                with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+                    for r in results:
+                        with zf.open(f"{r.name}.html", "w") as fp:
+                            r.html.write_to(fp)
+
+                st.download_button(
+                    "📦 Descargar ZIP",
+                    data=zip_buffer.getvalue(),
+                    file_name="reports.zip",
+                    mime="application/zip",
+                    use_container_width=True,
+                )
+                st.markdown("---")
+
+            for r in results:
+                st.markdown(f"**{r.name}**")
+                st.download_button(
+                    "💾 Descargar HTML",
+                    data=r.html.to_bytesio(),
+                    file_name=f"{r.name}.html",
+                    mime="text/html",
+                    key=f"dl_{r.name}",
+                )
+                st.markdown("---")
+
+
 # =============================================================================
 # FASE 2: PREVISUALIZACIÓN Y SELECCIÓN
 # =============================================================================
@@ -363,11 +923,12 @@ if has_processed_data():
     selected_file = st.selectbox("Archivo:", options=get_processed_files())
 
     if selected_file:
-        df_current = st.session_state.processed_data[selected_file]
-
         # Limpieza defensiva
         clean_invalid_indices(selected_file)
 
+        # Sin las filas cuya eliminación ya se confirmó (se quitan al exportar)
+        df_current = get_working_dataframe(selected_file)
+
         removed_indices = get_samples_to_remove(selected_file)
         sample_groups = get_sample_groups(selected_file)
 
@@ -375,14 +936,13 @@ if has_processed_data():
         # SIDEBAR: FILTRO VISUAL
         # =============================================================================
         with st.sidebar:
+            render_session_memory_panel()
             st.markdown("### 📅 Filtro Visual")
             st.caption("Solo afecta visualización, no modifica datos")
             
             # Extract available years and months from data
             if 'Date' in df_current.columns:
-                df_temp = df_current.copy()
-                df_temp['Date'] = pd.to_datetime(df_temp['Date'], errors='coerce')
-                available_years = sorted(df_temp['Date'].dt.year.dropna().unique().astype(int).tolist())
+                available_years = get_visual_filter_index(selected_file).available_years(df_current.index)
                 available_months = list(range(1, 13))
                 month_names = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun',
                               'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
@@ -451,6 +1011,13 @@ if has_processed_data():
 
         vf = get_visual_filter_hash(selected_file)
 
+        # Figuras cacheadas: se reconstruyen solo si cambian datos/filtro/parámetro;
+        # si solo cambia la selección o las etiquetas se re-estilan
+        figure_cache = get_figure_cache()
+        figure_style_key = figure_cache.style_key(
+            get_editor_version(selected_file), st.session_state.group_labels, SAMPLE_GROUPS
+        )
+
         # Si cambia el filtro, resetea dedupe de eventos para que el siguiente click no se ignore
         prev_vf = st.session_state.get(f"_vf_prev_{selected_file}")
         if prev_vf != vf:
@@ -470,6 +1037,28 @@ if has_processed_data():
         # Filter indicator
         st.info(filter_indicator)
 
+        # Deshacer / rehacer operaciones de selección
+        next_undo, next_redo = get_history_labels(selected_file)
+        u1, u2 = st.columns(2)
+        with u1:
+            if st.button(
+                f"↶ Deshacer: {next_undo}" if next_undo else "↶ Deshacer",
+                use_container_width=True,
+                disabled=next_undo is None,
+                key=f"undo_{selected_file}",
+            ):
+                undo_selection(selected_file)
+                st.rerun()
+        with u2:
+            if st.button(
+                f"↷ Rehacer: {next_redo}" if next_redo else "↷ Rehacer",
+                use_container_width=True,
+                disabled=next_redo is None,
+                key=f"redo_{selected_file}",
+            ):
+                redo_selection(selected_file)
+                st.rerun()
+
         # Resumen de última aplicación
         summary = get_apply_summary(selected_file)
         if summary:
@@ -515,360 +1104,20 @@ if has_processed_data():
         # =============================================================================
         # ESPECTROS
         # =============================================================================
-        st.markdown("### 📈 Selección desde Espectros")
-
-        if not INTERACTIVE_SELECTION_AVAILABLE:
-            st.warning("⚠️ Selección interactiva no disponible. Instala: `pip install streamlit-plotly-events`")
-
-        spectra_action = "Marcar para Eliminar"
-        spectra_target = None
-        spectra_multi = False
-
-        if INTERACTIVE_SELECTION_AVAILABLE:
-            st.info("💡 Haz **click** para seleccionar espectros individuales o activa **Lasso/Box** para selección múltiple")
-
-            if has_pending_selections(selected_file):
-                pending = get_pending_selections(selected_file)
-                st.warning(f"⏳ **{len(pending)} acción(es) pendiente(s)**")
-                with st.expander("Ver selecciones pendientes", expanded=False):
-                    for i, item in enumerate(pending):
-                        action_txt = item.get("action", "")
-                        if item.get("action") == "Asignar a Grupo":
-                            group_key = item.get("group", "Set 1")
-                            action_txt += f" → {get_group_display_name(group_key, SAMPLE_GROUPS)}"
-                        st.write(f"{i+1}. Muestra **{item.get('idx')}**: {action_txt}")
-
-            colA, colB, colC = st.columns([2, 2, 1])
-            with colA:
-                spectra_action = st.radio(
-                    "Acción:",
-                    ["Marcar para Eliminar", "Asignar a Grupo"],
-                    key=f"spectra_action_{selected_file}",
-                )
-            with colB:
-                if spectra_action == "Asignar a Grupo":
-                    options_disp = get_group_options_display(GROUP_KEYS, SAMPLE_GROUPS)
-                    current_key = st.session_state.get(f"spectra_target_{selected_file}", "Set 1")
-                    current_disp = (
-                        get_group_display_name(current_key, SAMPLE_GROUPS)
-                        if current_key in GROUP_KEYS
-                        else (options_disp[0] if options_disp else "Set 1")
-                    )
-
-                    spectra_target_disp = st.selectbox(
-                        "Grupo:",
-                        options_disp,
-                        index=options_disp.index(current_disp) if current_disp in options_disp else 0,
-                        key=f"spectra_target_disp_{selected_file}",
-                    )
-                    spectra_target = display_to_group_key(spectra_target_disp, GROUP_KEYS, SAMPLE_GROUPS)
-                    st.session_state[f"spectra_target_{selected_file}"] = spectra_target
-
-            with colC:
-                spectra_multi = st.checkbox("Lasso/Box", value=False, key=f"spectra_multi_{selected_file}")
-
-        try:
-            # Build spectra figure with FILTERED data for visualization
-            fig_spectra = build_spectra_figure_preview(
-                df_filtered,  # Use filtered data for visualization
-                removed_indices,
-                sample_groups,
-                st.session_state.group_labels,
-                SAMPLE_GROUPS,
-                PIXEL_RE,
-            )
-
-            if fig_spectra:
-                if not INTERACTIVE_SELECTION_AVAILABLE:
-                    st.plotly_chart(fig_spectra, use_container_width=True)
-                else:
-                    if spectra_multi:
-                        fig_spectra.update_layout(dragmode="lasso")
-
-                    events = plotly_events(
-                        fig_spectra,
-                        click_event=True,
-                        select_event=spectra_multi,
-                        hover_event=False,
-                        override_height=700,
-                        key=f"spectra_{selected_file}_v{get_editor_version(selected_file)}_f{vf}",
-                    )
-
-                    if events:
-                        context = f"{spectra_action}|{spectra_target if spectra_action=='Asignar a Grupo' else ''}"
-                        event_id = f"{create_event_id(events)}|{context}"
-                        last_id = get_last_event_id(selected_file, "spectra")
-
-                        if event_id != last_id:
-                            update_last_event_id(selected_file, "spectra", event_id)
-
-                            # Con tu plotting, tanto click como lasso devuelven customdata en markers
-                            clicked_indices = extract_row_indices_from_spectra_events(fig_spectra, events)
-
-
-                            # Map filtered indices back to original df_current indices
-                            original_clicked_indices = clicked_indices
-
-
-                            if original_clicked_indices:
-                                for clicked_idx in original_clicked_indices:
-                                    add_pending_selection(
-                                        selected_file,
-                                        clicked_idx,
-                                        spectra_action,
-                                        spectra_target if spectra_action == "Asignar a Grupo" else None,
-                                    )
-
-                                pending_count = len(get_pending_selections(selected_file))
-                                if spectra_action == "Asignar a Grupo" and spectra_target:
-                                    st.toast(
-                                        f"➕ {len(original_clicked_indices)} muestra(s) a pendientes → grupo: {get_group_display_name(spectra_target, SAMPLE_GROUPS)} ({pending_count} pendientes)",
-                                        icon="📍",
-                                    )
-                                else:
-                                    st.toast(
-                                        f"➕ {len(original_clicked_indices)} muestra(s) a pendientes → acción: Eliminar ({pending_count} pendientes)",
-                                        icon="📍",
-                                    )
-            else:
-                st.warning("No hay datos espectrales")
-
-        except Exception as e:
-            st.error(f"Error: {e}")
-            import traceback
-
-            st.code(traceback.format_exc())
-
-        # BOTONES DEBAJO DE ESPECTROS
-        if INTERACTIVE_SELECTION_AVAILABLE:
-            st.markdown("---")
-            b1, b2, b3 = st.columns(3)
-
-            with b1:
-                if st.button(
-                    "✅ Aplicar Selecciones",
-                    use_container_width=True,
-                    type="primary",
-                    disabled=not has_pending_selections(selected_file),
-                    key=f"apply_spectra_{selected_file}",
-                ):
-                    apply_pending_selections(selected_file)
-                    st.rerun()
-
-            with b2:
-                if st.button(
-                    "🗑️ Limpiar Pendientes",
-                    use_container_width=True,
-                    disabled=not has_pending_selections(selected_file),
-                    key=f"clear_spectra_{selected_file}",
-                ):
-                    n_cleared = clear_pending_selections(selected_file)
-                    clear_last_event_ids(selected_file)
-                    increment_editor_version(selected_file)
-                    st.toast(f"🧹 {n_cleared} acción(es) eliminada(s) de pendientes", icon="🗑️")
-                    st.rerun()
-
-            with b3:
-                if st.button(
-                    "🔄 Confirmar Eliminación",
-                    use_container_width=True,
-                    disabled=(len(removed_indices) == 0),
-                    key=f"delete_spectra_{selected_file}",
-                ):
-                    deleted_count = confirm_sample_deletion(selected_file)
-                    st.success(f"✅ {deleted_count} muestras eliminadas")
-                    st.rerun()
+        render_spectra_section(
+            selected_file, df_current, df_filtered, vf,
+            figure_cache, figure_style_key, removed_indices, sample_groups,
+        )
 
         st.markdown("---")
 
         # =============================================================================
         # PARITY
         # =============================================================================
-        st.markdown("### 📊 Selección desde Parity")
-
-        param_names = extract_parameter_names(df_current)
-        if not param_names:
-            st.warning("No hay parámetros Result")
-        else:
-            parity_action = "Marcar para Eliminar"
-            parity_target = None
-            parity_multi = False
-
-            if INTERACTIVE_SELECTION_AVAILABLE:
-                st.info("💡 Usa **click** para seleccionar puntos individuales o activa **Lasso/Box** para selección múltiple")
-
-                if has_pending_selections(selected_file):
-                    pending = get_pending_selections(selected_file)
-                    st.warning(f"⏳ **{len(pending)} acción(es) pendiente(s)**")
-                    with st.expander("Ver selecciones pendientes", expanded=False):
-                        for i, item in enumerate(pending):
-                            action_txt = item.get("action", "")
-                            if item.get("action") == "Asignar a Grupo":
-                                group_key = item.get("group", "Set 1")
-                                action_txt += f" → {get_group_display_name(group_key, SAMPLE_GROUPS)}"
-                            st.write(f"{i+1}. Muestra **{item.get('idx')}**: {action_txt}")
-
-                colA, colB, colC = st.columns([2, 2, 1])
-                with colA:
-                    parity_action = st.radio(
-                        "Acción:",
-                        ["Marcar para Eliminar", "Asignar a Grupo"],
-                        key=f"parity_action_{selected_file}",
-                    )
-                with colB:
-                    if parity_action == "Asignar a Grupo":
-                        options_disp = get_group_options_display(GROUP_KEYS, SAMPLE_GROUPS)
-                        current_key = st.session_state.get(f"parity_target_{selected_file}", "Set 1")
-                        current_disp = (
-                            get_group_display_name(current_key, SAMPLE_GROUPS)
-                            if current_key in GROUP_KEYS
-                            else (options_disp[0] if options_disp else "Set 1")
-                        )
-
-                        parity_target_disp = st.selectbox(
-                            "Grupo:",
-                            options_disp,
-                            index=options_disp.index(current_disp) if current_disp in options_disp else 0,
-                            key=f"parity_target_disp_{selected_file}",
-                        )
-                        parity_target = display_to_group_key(parity_target_disp, GROUP_KEYS, SAMPLE_GROUPS)
-                        st.session_state[f"parity_target_{selected_file}"] = parity_target
-
-                with colC:
-                    parity_multi = st.checkbox("Lasso/Box", value=True, key=f"parity_multi_{selected_file}")
-
-            selected_param = st.selectbox("Parámetro:", param_names, key=f"param_{selected_file}")
-
-            result_col = f"Result {selected_param}"
-            reference_col = f"Reference {selected_param}"
-            residuum_col = f"Residuum {selected_param}"
-
-            try:
-                # Plot comparison with FILTERED data for visualization
-                plots = plot_comparison_preview(
-                    df_filtered,  # Use filtered data for visualization
-                    result_col,
-                    reference_col,
-                    residuum_col,
-                    removed_indices,
-                    sample_groups,
-                    st.session_state.group_labels,
-                    SAMPLE_GROUPS,
-                )
-
-                if not plots:
-                    st.error(f"No se pudieron generar gráficos para {selected_param}")
-                else:
-                    fig_parity, fig_res, fig_hist, r2, rmse, bias, n = plots
-
-                    m1, m2, m3, m4 = st.columns(4)
-                    m1.metric("R²", f"{r2:.3f}")
-                    m2.metric("RMSE", f"{rmse:.3f}")
-                    m3.metric("BIAS", f"{bias:.3f}")
-                    m4.metric("N", n)
-
-                    tab1, tab2, tab3 = st.tabs(["Parity", "Residuum", "Histogram"])
-
-                    with tab1:
-                        if not INTERACTIVE_SELECTION_AVAILABLE:
-                            st.plotly_chart(fig_parity, use_container_width=True)
-                        else:
-                            if parity_multi:
-                                fig_parity.update_layout(dragmode="lasso")
-
-                            events = plotly_events(
-                                fig_parity,
-                                click_event=True,
-                                select_event=parity_multi,
-                                hover_event=False,
-                                override_height=600,
-                                key=f"parity_{selected_file}_{selected_param}_v{get_editor_version(selected_file)}_f{vf}",
-                            )
-
-                            if events:
-                                context = f"{parity_action}|{parity_target if parity_action=='Asignar a Grupo' else ''}|{selected_param}"
-                                event_id = f"{create_event_id(events)}|{context}"
-                                last_id = get_last_event_id(selected_file, "parity")
-
-                                if event_id != last_id:
-                                    update_last_event_id(selected_file, "parity", event_id)
-
-                                    clicked_indices = extract_row_indices_from_parity_events(fig_parity, events)
-                                    
-                                    # Map filtered indices back to original df_current indices
-                                    original_clicked_indices = clicked_indices
-                                    
-                                    if original_clicked_indices:
-                                        for clicked_idx in original_clicked_indices:
-                                            add_pending_selection(
-                                                selected_file,
-                                                clicked_idx,
-                                                parity_action,
-                                                parity_target if parity_action == "Asignar a Grupo" else None,
-                                            )
-
-                                        pending_count = len(get_pending_selections(selected_file))
-                                        if parity_action == "Asignar a Grupo" and parity_target:
-                                            st.toast(
-                                                f"➕ {len(original_clicked_indices)} muestra(s) a pendientes → grupo: {get_group_display_name(parity_target, SAMPLE_GROUPS)} ({pending_count} pendientes)",
-                                                icon="📍",
-                                            )
-                                        else:
-                                            st.toast(
-                                                f"➕ {len(original_clicked_indices)} muestra(s) a pendientes → acción: Eliminar ({pending_count} pendientes)",
-                                                icon="📍",
-                                            )
-
-                    with tab2:
-                        st.plotly_chart(fig_res, use_container_width=True)
-                    with tab3:
-                        st.plotly_chart(fig_hist, use_container_width=True)
-
-            except Exception as e:
-                st.error(f"Error: {e}")
-                import traceback
-
-                st.code(traceback.format_exc())
-
-            # BOTONES DEBAJO DE PARITY
-            if INTERACTIVE_SELECTION_AVAILABLE:
-                st.markdown("---")
-                b1, b2, b3 = st.columns(3)
-
-                with b1:
-                    if st.button(
-                        "✅ Aplicar Selecciones",
-                        use_container_width=True,
-                        type="primary",
-                        disabled=not has_pending_selections(selected_file),
-                        key=f"apply_parity_{selected_file}",
-                    ):
-                        apply_pending_selections(selected_file)
-                        st.rerun()
-
-                with b2:
-                    if st.button(
-                        "🗑️ Limpiar Pendientes",
-                        use_container_width=True,
-                        disabled=not has_pending_selections(selected_file),
-                        key=f"clear_parity_{selected_file}",
-                    ):
-                        n_cleared = clear_pending_selections(selected_file)
-                        clear_last_event_ids(selected_file)
-                        increment_editor_version(selected_file)
-                        st.toast(f"🧹 {n_cleared} acción(es) eliminada(s) de pendientes", icon="🗑️")
-                        st.rerun()
-
-                with b3:
-                    if st.button(
-                        "🔄 Confirmar Eliminación",
-                        use_container_width=True,
-                        disabled=(len(removed_indices) == 0),
-                        key=f"delete_parity_{selected_file}",
-                    ):
-                        deleted_count = confirm_sample_deletion(selected_file)
-                        st.success(f"✅ {deleted_count} muestras eliminadas")
-                        st.rerun()
+        render_parity_section(
+            selected_file, df_current, df_filtered, vf,
+            figure_cache, figure_style_key, removed_indices, sample_groups,
+        )
 
         st.markdown("---")
 
@@ -919,13 +1168,9 @@ if has_processed_data():
         st.markdown("---")
 
         # Use FILTERED data for table display, pero con RowIndex real como índice
+        # (copia: se le insertan columnas y df_filtered puede ser el DataFrame procesado)
         df_for_edit = df_filtered.copy()
 
-        # RowIndex real: como df_filtered viene de df_current[mask], conserva el índice original
-        # Si por lo que sea tu apply_visual_filter devolviera vista, esto lo fuerza
-        df_for_edit = df_for_edit.copy()
-        df_for_edit.index = df_filtered.index  # explícito: RowIndex real
-
         df_for_edit.insert(0, "☑️ Seleccionar", False)
         df_for_edit.insert(1, "Estado Actual", "Normal")
 
@@ -1038,10 +1283,10 @@ if has_processed_data():
                     "🔄 Confirmar Eliminación",
                     use_container_width=True,
                     disabled=(len(removed_indices) == 0),
-                    help="Elimina definitivamente las muestras marcadas",
+                    help="Elimina las muestras marcadas (se puede deshacer hasta exportar)",
                 ):
                     deleted_count = confirm_sample_deletion(selected_file)
-                    st.success(f"✅ {deleted_count} muestras eliminadas definitivamente")
+                    st.success(f"✅ {deleted_count} muestras eliminadas")
                     st.rerun()
 
             with c5:
@@ -1075,88 +1320,7 @@ if has_processed_data():
         # ✨ NUEVA SECCIÓN: ESTADÍSTICAS POR GRUPO
         # =============================================================================
         st.markdown("---")
-        st.markdown("### 📊 Estadísticas por Grupo")
-
-        # Verificar si hay grupos asignados
-        active_groups = get_active_groups(sample_groups, removed_indices)
-
-        if not active_groups:
-            st.info("ℹ️ No hay muestras asignadas a grupos todavía. Asigna muestras a grupos para ver sus estadísticas.")
-        else:
-            param_names = extract_parameter_names(df_current)
-
-            if not param_names:
-                st.warning("⚠️ No hay parámetros disponibles para mostrar estadísticas")
-            else:
-                # Selector de parámetro para estadísticas
-                stats_param = st.selectbox(
-                    "Selecciona parámetro para estadísticas:",
-                    param_names,
-                    key=f"stats_param_{selected_file}",
-                    help="Elige el parámetro para el cual mostrar estadísticas por grupo"
-                )
-
-                st.markdown("---")
-
-                # Calcular estadísticas para todos los grupos (ALWAYS on FULL df_current)
-                all_group_stats = calculate_all_groups_statistics(
-                    df_current,  # Use full data for statistics
-                    stats_param,
-                    removed_indices,
-                    sample_groups,
-                    GROUP_KEYS
-                )
-
-                # Contar muestras por grupo
-                group_sample_counts = count_samples_per_group(sample_groups, removed_indices, GROUP_KEYS)
-
-                # Mostrar estadísticas de cada grupo activo en expandibles
-                for group_key in GROUP_KEYS:
-                    if group_key not in active_groups:
-                        continue
-
-                    n_samples = group_sample_counts.get(group_key, 0)
-
-                    if n_samples == 0:
-                        continue
-
-                    display_name = get_group_display_name_with_key(group_key, SAMPLE_GROUPS)
-                    stats = all_group_stats.get(group_key)
-
-                    with st.expander(f"{display_name} ({n_samples} muestras)", expanded=True):
-                        if stats is None:
-                            st.warning(f"⚠️ No hay suficientes datos válidos para calcular estadísticas (mínimo 2 muestras con valores válidos)")
-                        else:
-                            # Mostrar métricas en columnas
-                            col1, col2, col3, col4 = st.columns(4)
-                            col1.metric("R²", f"{stats['r2']:.4f}")
-                            col2.metric("RMSE", f"{stats['rmse']:.3f}")
-                            col3.metric("BIAS", f"{stats['bias']:.3f}")
-                            col4.metric("N", stats['n'])
-
-                            # Mostrar descripción del grupo si existe
-                            desc = get_group_description(group_key)
-                            if desc:
-                                st.caption(f"📝 {desc}")
-
-                # Tabla resumen comparativa (opcional)
-                st.markdown("---")
-                st.subheader("📋 Resumen Comparativo")
-
-                summary_df = get_statistics_summary(
-                    all_group_stats,
-                    st.session_state.group_labels,
-                    SAMPLE_GROUPS
-                )
-
-                if not summary_df.empty:
-                    st.dataframe(
-                        summary_df,
-                        use_container_width=True,
-                        hide_index=True
-                    )
-                else:
-                    st.info("No hay estadísticas disponibles para mostrar")
+        render_group_statistics_section(selected_file, df_current, removed_indices, sample_groups)
 
 
 # =============================================================================
@@ -1182,62 +1346,4 @@ if has_processed_data():
     st.dataframe(pd.DataFrame(summary_data), use_container_width=True, hide_index=True)
 
     st.markdown("---")
-    if st.button("📥 Generar Informes HTML", type="primary", use_container_width=True):
-        results: List[ReportResult] = []
-        progress_bar = st.progress(0.0)
-
-        for idx, file_name in enumerate(get_processed_files(), start=1):
-            try:
-                df = st.session_state.processed_data[file_name]
-
-                if len(df) == 0:
-                    st.warning(f"⚠️ {file_name}: No hay datos")
-                    continue
-
-                sample_groups_file = get_sample_groups(file_name)
-
-                html = generate_html_report(
-                    df,
-                    file_name,
-                    sample_groups_file,
-                    st.session_state.group_labels,
-                    st.session_state.group_descriptions,
-                    SAMPLE_GROUPS,
-                    PIXEL_RE,
-                )
-
-                results.append(ReportResult(name=file_name, html=html, csv=df))
-                st.success(f"✅ {file_name}")
-
-            except Exception as e:
-                st.error(f"❌ {file_name}: {e}")
-
-            progress_bar.progress(idx / float(len(get_processed_files())))
-
-        if results:
-            st.markdown("---")
-            if len(results) > 1:
-                zip_buffer = BytesIO()
-                with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-                    for r in results:
-                        zf.writestr(f"{r.name}.html", r.html)
-
-                st.download_button(
-                    "📦 Descargar ZIP",
-                    data=zip_buffer.getvalue(),
-                    file_name="reports.zip",
-                    mime="application/zip",
-                    use_container_width=True,
-                )
-                st.markdown("---")
-
-            for r in results:
-                st.markdown(f"**{r.name}**")
-                st.download_button(
-                    "💾 Descargar HTML",
-                    data=r.html,
-                    file_name=f"{r.name}.html",
-                    mime="text/html",
-                    key=f"dl_{r.name}",
-                )
-                st.markdown("---")
\ No newline at end of file
+    render_report_generation_section()
\ No newline at end of file
@@ -19,7 +19,9 @@ from datetime import datetime
 root_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(root_dir))
 
-from core.file_handlers import load_tsv_file, get_spectral_columns
+from core.file_handlers import get_spectral_columns
+from core.spectral_workspace import open_tsv
+from ui.ui_helpers import workspace_tsv_picker
 from auth import check_password
 from buchi_streamlit_theme import apply_buchi_styles
 from app_config import DEFAULT_VALIDATION_THRESHOLDS, CRITICAL_REGIONS, OFFSET_LIMITS
@@ -167,6 +169,7 @@ def main():
             key="ref_tsv_validation",
             help="Archivo TSV con mediciones de estándares ANTES del mantenimiento (con baseline antigua)"
         )
+        ref_file = ref_file or workspace_tsv_picker(key="ref_tsv_validation_workspace")
 
     with col2:
         curr_file = st.file_uploader(
@@ -175,6 +178,7 @@ def main():
             key="curr_tsv_validation",
             help="Archivo TSV con mediciones de estándares DESPUÉS del mantenimiento (con baseline nueva)"
         )
+        curr_file = curr_file or workspace_tsv_picker(key="curr_tsv_validation_workspace")
 
     st.divider()
     
@@ -217,8 +221,8 @@ def main():
     # Cargar archivos usando funciones compartidas
     try:
         with st.spinner("⏳ Cargando archivos y detectando estándares comunes..."):
-            df_ref = load_tsv_file(ref_file)
-            df_curr = load_tsv_file(curr_file)
+            df_ref = open_tsv(ref_file)
+            df_curr = open_tsv(curr_file)
             
             spectral_cols_ref = get_spectral_columns(df_ref)
             spectral_cols_curr = get_spectral_columns(df_curr)
@@ -717,7 +721,7 @@ def main():
             else:
                 with st.spinner("⏳ Generando informe completo..."):
                     try:
-                        from core.validation_kit_report_generator import generate_validation_report
+                        from core.validation_kit_report_generator import write_validation_report
                         
                         # Preparar datos para el reporte
                         report_data = {
@@ -736,7 +740,7 @@ def main():
                             'curr_filename': curr_file.name
                         }
                         
-                        html_content = generate_validation_report(report_data)
+                        report = write_validation_report(report_data)
                         
                         # Descargar
                         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -746,7 +750,7 @@ def main():
                         
                         st.download_button(
                             label="💾 Descargar Informe HTML",
-                            data=html_content,
+                            data=report.to_bytesio(),
                             file_name=filename,
                             mime="text/html",
                             use_container_width=True
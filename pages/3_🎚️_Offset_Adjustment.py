@@ -26,9 +26,12 @@ from core.file_handlers import (
     load_csv_baseline,
     export_ref_file,
     export_csv_file,
-    load_tsv_file,
     get_spectral_columns
 )
+from core.spectral_workspace import open_tsv
+from core.session_memory import enforce_memory_budget
+from core.report_cache import fingerprint
+from ui.ui_helpers import workspace_tsv_picker, render_session_memory_panel
 from utils.plotting import plot_baseline_comparison
 from auth import check_password
 from buchi_streamlit_theme import apply_buchi_styles
@@ -56,6 +59,9 @@ if not check_password():
 
 
 def main():
+    # Liberar resultados fríos (validation_results...) si la sesión supera el presupuesto
+    enforce_memory_budget()
+
     st.title("🎚️ Baseline Offset Adjustment")
     st.markdown("## Aplicar corrección de offset vertical al baseline")
     
@@ -102,6 +108,7 @@ def main():
     
     # ===== SIDEBAR: CONFIGURACIÓN =====
     with st.sidebar:
+        render_session_memory_panel()
         st.markdown("### ⚙️ Configuración")
         st.markdown("---")
         
@@ -293,6 +300,7 @@ def render_standards_upload_and_selection_section():
             key="ref_tsv_offset",
             help="Mediciones de referencia (baseline antigua)"
         )
+        ref_tsv = ref_tsv or workspace_tsv_picker(key="ref_tsv_offset_workspace")
     
     with col2:
         curr_tsv = st.file_uploader(
@@ -301,6 +309,7 @@ def render_standards_upload_and_selection_section():
             key="curr_tsv_offset",
             help="Mediciones actuales (baseline nueva)"
         )
+        curr_tsv = curr_tsv or workspace_tsv_picker(key="curr_tsv_offset_workspace")
     
     if not ref_tsv or not curr_tsv:
         return False
@@ -308,8 +317,8 @@ def render_standards_upload_and_selection_section():
     # Cargar archivos usando funciones compartidas
     try:
         with st.spinner("⏳ Cargando archivos TSV..."):
-            df_ref = load_tsv_file(ref_tsv)
-            df_curr = load_tsv_file(curr_tsv)
+            df_ref = open_tsv(ref_tsv)
+            df_curr = open_tsv(curr_tsv)
             
             spectral_cols_ref = get_spectral_columns(df_ref)
             spectral_cols_curr = get_spectral_columns(df_curr)
@@ -466,68 +475,82 @@ def render_standards_selection_interface(matches: pd.DataFrame) -> List[str]:
 # SECCIÓN 2: ANÁLISIS GLOBAL DEL KIT
 # ============================================================================
 
-def render_global_kit_analysis_section(thresholds: Dict):
+def get_original_kit_metrics(standards_data: Dict, thresholds: Dict) -> List[Dict]:
     """
-    Sección 2: Análisis global del kit con estándares.
-    MEJORADO: Ahora incluye evaluación contra umbrales
-    """
-    if 'standards_data' not in st.session_state:
-        return
+    Métricas sin offset de los estándares seleccionados.
     
-    standards_data = st.session_state.standards_data
+    No dependen del offset: se guardan en session_state con una huella de los
+    espectros y umbrales, y mover el offset solo recalcula las simuladas.
+    """
     df_ref = standards_data['df_ref']
     df_curr = standards_data['df_curr']
-    spectral_cols_ref = standards_data['spectral_cols_ref']
-    spectral_cols_curr = standards_data['spectral_cols_curr']
     matches_filtered = standards_data['matches_filtered']
     
-    offset_value = st.session_state.get('offset_value', 0.0)
+    # Extraer espectros de todos los estándares de una vez
+    references = df_ref.loc[matches_filtered['ref_idx'], standards_data['spectral_cols_ref']].to_numpy(dtype=float)
+    currents = df_curr.loc[matches_filtered['curr_idx'], standards_data['spectral_cols_curr']].to_numpy(dtype=float)
     
-    # Calcular validaciones para todos los estándares seleccionados
-    all_validation_original = []
-    all_validation_simulated = []
+    cache_key = fingerprint(
+        matches_filtered[['ID', 'ref_note', 'curr_note']],
+        references, currents, thresholds
+    )
+    cached = st.session_state.get('offset_original_metrics')
+    if cached is not None and cached['key'] == cache_key:
+        return cached['data']
     
+    all_validation_original = []
     with st.spinner(f"⏳ Calculando métricas para {len(matches_filtered)} estándar(es)..."):
-        for idx, row in matches_filtered.iterrows():
-            sample_id = row['ID']
-            ref_note = row['ref_note']
-            curr_note = row['curr_note']
-            ref_idx = row['ref_idx']
-            curr_idx = row['curr_idx']
-            
-            # Extraer espectros
-            reference = df_ref.loc[ref_idx, spectral_cols_ref].astype(float).values
-            current_original = df_curr.loc[curr_idx, spectral_cols_curr].astype(float).values
-            
-            # Simular espectro con offset aplicado
-            current_simulated = current_original + offset_value
+        for i, row in enumerate(matches_filtered.itertuples(index=False)):
+            reference = references[i]
+            current_original = currents[i]
             
             # Calcular métricas sin offset (CON UMBRALES)
             metrics_original = validate_standard(reference, current_original, thresholds)
             
-            # Calcular métricas con offset (CON UMBRALES)
-            metrics_simulated = validate_standard(reference, current_simulated, thresholds)
-            
-            # Guardar datos completos
             all_validation_original.append({
-                'id': sample_id,
-                'ref_note': ref_note,
-                'curr_note': curr_note,
+                'id': row.ID,
+                'ref_note': row.ref_note,
+                'curr_note': row.curr_note,
                 'reference': reference,
                 'current': current_original,
                 'diff': metrics_original['diff'],
                 'validation_results': metrics_original
             })
-            
-            all_validation_simulated.append({
-                'id': sample_id,
-                'ref_note': ref_note,
-                'curr_note': curr_note,
-                'reference': reference,
-                'current': current_simulated,
-                'diff': metrics_simulated['diff'],
-                'validation_results': metrics_simulated
-            })
+    
+    st.session_state.offset_original_metrics = {'key': cache_key, 'data': all_validation_original}
+    return all_validation_original
+
+
+def render_global_kit_analysis_section(thresholds: Dict):
+    """
+    Sección 2: Análisis global del kit con estándares.
+    MEJORADO: Ahora incluye evaluación contra umbrales
+    """
+    if 'standards_data' not in st.session_state:
+        return
+    
+    standards_data = st.session_state.standards_data
+    matches_filtered = standards_data['matches_filtered']
+    
+    offset_value = st.session_state.get('offset_value', 0.0)
+    
+    # Las métricas sin offset no dependen del offset: se reutilizan entre reruns
+    all_validation_original = get_original_kit_metrics(standards_data, thresholds)
+    
+    # Simular con el offset actual (lo único que cambia al mover el offset)
+    all_validation_simulated = []
+    for data_orig in all_validation_original:
+        current_simulated = data_orig['current'] + offset_value
+        metrics_simulated = validate_standard(data_orig['reference'], current_simulated, thresholds)
+        all_validation_simulated.append({
+            'id': data_orig['id'],
+            'ref_note': data_orig['ref_note'],
+            'curr_note': data_orig['curr_note'],
+            'reference': data_orig['reference'],
+            'current': current_simulated,
+            'diff': metrics_simulated['diff'],
+            'validation_results': metrics_simulated
+        })
     
     # Guardar en session_state para uso posterior
     st.session_state.validation_results = {
@@ -667,6 +690,54 @@ def render_global_kit_analysis_section(thresholds: Dict):
     st.markdown("---")
     st.markdown("#### 🔍 Análisis Individual por Estándar")
     
+    render_standard_detail(
+        matches_filtered,
+        all_validation_original,
+        all_validation_simulated,
+        offset_value
+    )
+    
+    # Exportar datos de simulación completa
+    st.markdown("---")
+    
+    export_data = []
+    for i, (orig, sim) in enumerate(zip(all_validation_original, all_validation_simulated)):
+        export_data.append({
+            'ID': orig['id'],
+            'Note': orig['ref_note'],
+            'Corr_Original': orig['validation_results']['correlation'],
+            'Corr_Simulado': sim['validation_results']['correlation'],
+            'MaxDiff_Original': orig['validation_results']['max_diff'],
+            'MaxDiff_Simulado': sim['validation_results']['max_diff'],
+            'RMS_Original': orig['validation_results']['rms'],
+            'RMS_Simulado': sim['validation_results']['rms'],
+            'Offset_Original': orig['validation_results']['mean_diff'],
+            'Offset_Simulado': sim['validation_results']['mean_diff'],
+            'Pass_Original': orig['validation_results'].get('pass', False),
+            'Pass_Simulado': sim['validation_results'].get('pass', False)
+        })
+    
+    df_export = pd.DataFrame(export_data)
+    csv_export = df_export.to_csv(index=False)
+    
+    st.download_button(
+        "📥 Descargar Resumen Completo de Simulación (CSV)",
+        data=csv_export,
+        file_name=f"simulation_summary_offset_{offset_value:+.6f}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        mime="text/csv",
+        use_container_width=True
+    )
+
+
+@st.fragment
+def render_standard_detail(matches_filtered: pd.DataFrame,
+                           all_validation_original: List[Dict],
+                           all_validation_simulated: List[Dict],
+                           offset_value: float):
+    """
+    Detalle de un estándar del kit. Es un fragmento: cambiar de estándar o de
+    pestaña solo vuelve a dibujar esta parte.
+    """
     # Selector de estándar
     selected_idx = st.selectbox(
         "Selecciona estándar para ver detalles:",
@@ -829,37 +900,6 @@ def render_global_kit_analysis_section(thresholds: Dict):
             offset_value
         )
         st.plotly_chart(fig_comparison, use_container_width=True)
-    
-    # Exportar datos de simulación completa
-    st.markdown("---")
-    
-    export_data = []
-    for i, (orig, sim) in enumerate(zip(all_validation_original, all_validation_simulated)):
-        export_data.append({
-            'ID': orig['id'],
-            'Note': orig['ref_note'],
-            'Corr_Original': orig['validation_results']['correlation'],
-            'Corr_Simulado': sim['validation_results']['correlation'],
-            'MaxDiff_Original': orig['validation_results']['max_diff'],
-            'MaxDiff_Simulado': sim['validation_results']['max_diff'],
-            'RMS_Original': orig['validation_results']['rms'],
-            'RMS_Simulado': sim['validation_results']['rms'],
-            'Offset_Original': orig['validation_results']['mean_diff'],
-            'Offset_Simulado': sim['validation_results']['mean_diff'],
-            'Pass_Original': orig['validation_results'].get('pass', False),
-            'Pass_Simulado': sim['validation_results'].get('pass', False)
-        })
-    
-    df_export = pd.DataFrame(export_data)
-    csv_export = df_export.to_csv(index=False)
-    
-    st.download_button(
-        "📥 Descargar Resumen Completo de Simulación (CSV)",
-        data=csv_export,
-        file_name=f"simulation_summary_offset_{offset_value:+.6f}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv",
-        use_container_width=True
-    )
 
 
 # ============================================================================
@@ -1301,8 +1341,12 @@ def render_export_section():
         )
 
 
+@st.fragment
 def render_report_generation_section():
-    """Sección 6: Generación de informe HTML"""
+    """
+    Sección 6: Generación de informe HTML.
+    Fragmento: escribir en los campos del servicio no recalcula el resto de la página.
+    """
     # Verificar que hay datos necesarios
     if 'standards_data' not in st.session_state:
         st.warning("⚠️ Necesitas cargar los archivos TSV primero")
@@ -1368,7 +1412,7 @@ def render_report_generation_section():
             else:
                 with st.spinner("⏳ Generando informe completo..."):
                     try:
-                        from core.offset_adjustment_report_generator import generate_offset_adjustment_report
+                        from core.offset_adjustment_report_generator import write_offset_adjustment_report
                         
                         # Obtener datos necesarios
                         standards_data = st.session_state.standards_data
@@ -1407,7 +1451,7 @@ def render_report_generation_section():
                             'baseline_filename': baseline_data['filename']
                         }
                         
-                        html_content = generate_offset_adjustment_report(report_data)
+                        report = write_offset_adjustment_report(report_data)
                         
                         # Descargar
                         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -1417,7 +1461,7 @@ def render_report_generation_section():
                         
                         st.download_button(
                             label="💾 Descargar Informe HTML",
-                            data=html_content,
+                            data=report.to_bytesio(),
                             file_name=filename,
                             mime="text/html",
                             use_container_width=True,
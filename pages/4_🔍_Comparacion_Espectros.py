@@ -21,7 +21,9 @@ root_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(root_dir))
 
 # Importar módulos de COREF
-from core.file_handlers import load_tsv_file, get_spectral_columns
+from core.file_handlers import get_spectral_columns
+from core.spectral_workspace import open_tsv
+from ui.ui_helpers import workspace_tsv_picker
 from core.spectrum_analysis import (
     validate_spectra_compatibility,
     calculate_statistics,
@@ -117,6 +119,8 @@ def main():
         help="Sube 1-10 archivos TSV. Puedes comparar espectros del mismo archivo o de varios."
     )
     
+    uploaded_files = uploaded_files or workspace_tsv_picker(key="comparison_workspace", multiple=True)
+
     if uploaded_files:
         n_files = len(uploaded_files)
         if n_files > 10:
@@ -145,7 +149,7 @@ def main():
         
         for uploaded_file in uploaded_files:
             try:
-                df = load_tsv_file(uploaded_file)
+                df = open_tsv(uploaded_file)
                 spectral_cols = get_spectral_columns(df)
                 all_data.append((df, spectral_cols, uploaded_file.name))
             except Exception as e:
@@ -19,7 +19,7 @@ from utils.prediction_charts import (
     create_detailed_comparison,
     create_box_plots,
 )
-from utils.prediction_reports import generate_html_report
+from utils.prediction_reports import write_html_report
 from datetime import datetime
 from buchi_streamlit_theme import apply_buchi_styles
 from auth import check_password
@@ -168,15 +168,13 @@ if st.session_state.pred_analyzer is not None:
                 help="Selecciona las lámparas a comparar"
             )
         
-        # Crear combinaciones
-        selected_combinations = [(id_val, note_val) 
-                                for id_val in selected_ids 
-                                for note_val in selected_notes]
-        
-        if selected_combinations:
+        # Cualquier ID seleccionado x cualquier lámpara seleccionada
+        if selected_ids and selected_notes:
             if st.button("🚀 Generar Análisis Completo", type="primary", key='generate_pred'):
                 with st.spinner("Generando análisis estadístico..."):
-                    filtered_data = analyzer.filter_data(selected_products, selected_combinations)
+                    filtered_data = analyzer.filter_data(
+                        selected_products, ids=selected_ids, notes=selected_notes
+                    )
                     st.session_state.pred_filtered_data = filtered_data
                     
                     stats = analyzer.calculate_statistics(filtered_data)
@@ -323,13 +321,13 @@ if st.session_state.pred_stats is not None:
                         if sensor_serial_input:
                             analyzer.sensor_serial = sensor_serial_input
                         
-                        html_content = generate_html_report(stats, analyzer, filename)
+                        report = write_html_report(stats, analyzer, filename)
                         
                         st.success("✅ Informe generado correctamente")
                         
                         st.download_button(
                             label="💾 Descargar Informe HTML",
-                            data=html_content,
+                            data=report.to_bytesio(),
                             file_name=filename,
                             mime="text/html",
                             use_container_width=True,
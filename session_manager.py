@@ -1,10 +1,15 @@
 """
 Gestión del estado de sesión de Streamlit
 """
+import uuid
 import streamlit as st
 import streamlit.components.v1 as components
 from datetime import datetime
 
+from core.session_memory import enforce_memory_budget
+from core.drift_store import get_drift_store, record_key, visit_key
+from core.alignment_convergence import AlignmentHistory
+
 
 def initialize_session_state():
     """
@@ -56,6 +61,9 @@ def initialize_session_state():
     if 'pending_navigation_name' not in st.session_state:
         st.session_state.pending_navigation_name = None
 
+    # Liberar informes y resultados fríos si la sesión supera el presupuesto
+    enforce_memory_budget()
+
 
 def reset_session_state():
     """
@@ -330,6 +338,95 @@ def save_baseline_data(ref_spectrum, header, df_baseline, origin):
     }
 
 
+def record_sensor_drift(kind, vector, label='', iteration=None):
+    """
+    Guarda un vector de la visita en el histórico de deriva del sensor
+    (``core.drift_store``). No hace nada si el histórico está desactivado o
+    si no hay N/S del sensor.
+    
+    Se guarda un solo registro por tipo, visita (sesión del asistente) e
+    iteración: re-ejecutar la página no añade filas, y un vector distinto
+    (p. ej. otro White Standard) sustituye al registro anterior.
+    
+    Args:
+        kind (str): 'wstd', 'validation' o 'correction'
+        vector (np.array): Vector espectral
+        label (str): Etiqueta (p. ej. ID del White Standard)
+        iteration (int): Iteración de alineamiento
+        
+    Returns:
+        bool: True si se guardó o actualizó el registro
+    """
+    store = get_drift_store()
+    sensor = (st.session_state.get('client_data') or {}).get('sensor_sn')
+    if store is None or not sensor:
+        return False
+    
+    if 'drift_visit_id' not in st.session_state:
+        st.session_state.drift_visit_id = uuid.uuid4().hex
+    if '_drift_recorded' not in st.session_state:
+        st.session_state._drift_recorded = {}
+    visit = st.session_state.drift_visit_id
+    slot = visit_key(sensor, kind, visit, iteration)
+    content = record_key(sensor, kind, label, iteration, vector)
+    if st.session_state._drift_recorded.get(slot) == content:
+        return False
+    
+    try:
+        saved = store.record(sensor, kind, vector, label=label, iteration=iteration, visit=visit)
+    except OSError:
+        # Sin permisos o disco lleno: el histórico no debe bloquear el proceso
+        return False
+    st.session_state._drift_recorded[slot] = content
+    return saved
+
+
+def get_alignment_history():
+    """
+    Obtiene el histórico de iteraciones de alineamiento (Pasos 4 y 5),
+    creándolo si no existe.
+    
+    Returns:
+        AlignmentHistory: Residuos medidos y correcciones aplicadas
+    """
+    if st.session_state.get('alignment_history') is None:
+        st.session_state.alignment_history = AlignmentHistory()
+    return st.session_state.alignment_history
+
+
+def set_pending_alignment_correction(iteration, correction, white_id):
+    """
+    Guarda la corrección elegida en el Paso 5, pendiente de aplicarse.
+    
+    Args:
+        iteration (int): Iteración de alineamiento
+        correction (np.array): Corrección aplicada al baseline
+        white_id (str): ID del White Standard
+    """
+    st.session_state.pending_alignment_correction = {
+        'iteration': iteration,
+        'correction': correction,
+        'white_id': white_id
+    }
+
+
+def commit_alignment_correction():
+    """
+    Registra la corrección pendiente como aplicada: al histórico de
+    iteraciones (estimación de la ganancia) y al histórico de deriva.
+    Se llama al exportar el baseline corregido o al volver al Paso 4, de
+    modo que solo cuenta la corrección que realmente se lleva al equipo.
+    """
+    pending = st.session_state.get('pending_alignment_correction')
+    if pending is None:
+        return
+    get_alignment_history().add_correction(pending['iteration'], pending['correction'])
+    record_sensor_drift(
+        'correction', pending['correction'],
+        label=pending['white_id'], iteration=pending['iteration']
+    )
+
+
 def update_selected_samples(selected_ids):
     """
     Actualiza la lista de muestras seleccionadas para la corrección.
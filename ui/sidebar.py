@@ -5,6 +5,7 @@ Componente de barra lateral con progreso del proceso
 import streamlit as st
 from app_config import STEPS
 from session_manager import get_current_step
+from ui.ui_helpers import render_session_memory_panel
 
 
 @st.dialog("⚠️ Cambios sin guardar")
@@ -132,6 +133,8 @@ def render_sidebar():
         # Leyenda
         st.caption("✓ Completado | → Actual | ○ Pendiente")
         st.caption("Haz clic en los pasos completados ✓ para revisarlos")
+
+        render_session_memory_panel()
         
         
     
@@ -11,8 +11,10 @@ from session_manager import (
     save_wstd_data,
     save_reference_tsv,
     go_to_next_step,
+    record_sensor_drift,
 )
-from core.file_handlers import load_tsv_file, get_spectral_columns
+from core.file_handlers import get_spectral_columns
+from core.spectral_workspace import open_tsv
 
 
 def render_wstd_step():
@@ -40,7 +42,7 @@ def render_wstd_step():
     
     if wstd_file:
         try:
-            df = load_tsv_file(wstd_file)
+            df = open_tsv(wstd_file)
             spectral_cols = get_spectral_columns(df)
             
             # Guardar el TSV completo para usar en Paso 5
@@ -107,6 +109,11 @@ def render_wstd_step():
                     spectral_cols=spectral_cols,
                     lamps=None
                 )
+                record_sensor_drift(
+                    'wstd',
+                    df_wstd[spectral_cols].mean().to_numpy(),
+                    label=', '.join(str(x) for x in selected_ids)
+                )
                 
                 wstd_processed = True
                 
@@ -7,15 +7,22 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from app_config import INSTRUCTIONS, MESSAGES, VALIDATION_THRESHOLDS
+from app_config import (
+    INSTRUCTIONS, MESSAGES, VALIDATION_THRESHOLDS, VALIDATION_RMS_THRESHOLD, DRIFT_STORE
+)
 from session_manager import (
     has_reference_tsv,
     get_reference_tsv,
     reset_session_state,
-    go_to_next_step
+    go_to_next_step,
+    record_sensor_drift,
+    get_alignment_history
 )
+from core.drift_store import get_drift_store
 from core.standards_analysis import create_white_comparison_plot
-from core.file_handlers import load_tsv_file, get_spectral_columns
+from core.file_handlers import get_spectral_columns
+from core.spectral_workspace import open_tsv
+from core.session_memory import load_session_value
 from core.spectral_processing import find_common_samples
 from utils.validators import validate_common_samples
 
@@ -128,7 +135,7 @@ def render_validation_step():
     
     # Cargar y procesar TSV
     try:
-        df_new = load_tsv_file(new_file)
+        df_new = open_tsv(new_file)
         spectral_cols_new = get_spectral_columns(df_new)
         
         st.success(f"✅ TSV cargado ({len(df_new)} mediciones)")
@@ -252,6 +259,15 @@ def render_validation_step():
         )
         st.plotly_chart(fig, use_container_width=True)
     
+    record_sensor_drift(
+        'validation', diff_white, label=white_id,
+        iteration=st.session_state.alignment_iterations
+    )
+    get_alignment_history().add_residual(
+        st.session_state.alignment_iterations, diff_white, white_id=white_id
+    )
+    render_sensor_trend()
+    
     st.markdown("---")
     
     # ==========================================
@@ -294,6 +310,47 @@ def render_validation_step():
         render_alignment_needed(rms_white, white_id)
 
 
+def render_sensor_trend():
+    """
+    Renderiza la tendencia del sensor entre visitas (histórico de deriva):
+    RMS del White Standard tal como se encontró en cada visita y fecha
+    estimada en la que superará el umbral de validación.
+    """
+    store = get_drift_store()
+    sensor = (st.session_state.get('client_data') or {}).get('sensor_sn')
+    if store is None or not sensor:
+        return
+    
+    try:
+        eta = store.time_to_threshold(VALIDATION_RMS_THRESHOLD, sensors=[sensor], iteration=0)
+    except OSError:
+        return
+    if eta.empty or eta['n'].iat[0] < DRIFT_STORE['trend_min_records']:
+        return
+    
+    row = eta.iloc[0]
+    with st.expander(f"📈 Tendencia del sensor {sensor} ({row['n']} visitas)", expanded=False):
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("RMS (tendencia)", f"{row['current']:.6f}")
+        
+        with col2:
+            st.metric("Deriva RMS / 30 días", f"{30 * row['slope_per_day']:+.6f}")
+        
+        with col3:
+            if row['days'] == 0:
+                st.metric("Umbral RMS", "Superado")
+            elif pd.isna(row['days']):
+                st.metric("Umbral RMS", "Sin deriva")
+            else:
+                st.metric("Umbral RMS estimado", row['eta'].strftime('%Y-%m-%d'),
+                          f"{row['days']:.0f} días", delta_color="off")
+        
+        st.caption("Diferencia media del White Standard por región espectral (canales)")
+        st.line_chart(store.region_drift(sensor, 'validation', iteration=0))
+
+
 def render_validation_success(rms, white_id):
     """
     Renderiza resultado de validación exitosa
@@ -432,7 +489,7 @@ def render_report_generation():
                 
                 # Insertar validación antes del footer
                 footer_html = generate_footer()
-                html_content = html_content.replace(footer_html, validation_html + footer_html)
+                html_content = html_content.replace(footer_html, validation_html.getvalue() + footer_html)
                 
             else:
                 # Caso: Sin alineamiento - Generar informe parcial (solo validación)
@@ -459,13 +516,14 @@ def render_report_generation():
             st.code(traceback.format_exc())
     
     # Botón de descarga
-    if st.session_state.validation_report_html:
+    report_html = load_session_value('validation_report_html')
+    if report_html:
         client_data = st.session_state.get('client_data', {})
         filename = f"BASELINE_CHECK_REPORT_{client_data.get('sensor_sn', 'sensor')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
         
         st.download_button(
             "⬇️ Descargar Informe HTML",
-            data=st.session_state.validation_report_html.encode("utf-8"),
+            data=report_html.encode("utf-8"),
             file_name=filename,
             mime="text/html",
             use_container_width=True
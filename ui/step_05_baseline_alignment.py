@@ -13,7 +13,10 @@ from session_manager import (
     has_reference_tsv,
     get_reference_tsv,
     save_kit_data,
-    update_kit_data_with_correction
+    update_kit_data_with_correction,
+    get_alignment_history,
+    set_pending_alignment_correction,
+    commit_alignment_correction
 )
 from core.file_handlers import (
     load_tsv_file, 
@@ -28,11 +31,13 @@ from core.spectral_processing import (
     calculate_spectral_correction,
     apply_baseline_correction
 )
+from core.alignment_convergence import propose_correction, predicted_residual
 from utils.plotting import (
     plot_kit_spectra,
     plot_correction_differences,
     plot_baseline_spectrum,
-    plot_baseline_comparison
+    plot_baseline_comparison,
+    plot_correction_proposal
 )
 from utils.validators import validate_common_samples, validate_dimension_match
 
@@ -113,13 +118,20 @@ def render_baseline_alignment_step():
         st.error(error_msg)
         return
     
+    # Elegir corrección: diferencia completa o propuesta según iteraciones previas
+    iteration = st.session_state.get('alignment_iterations', 0)
+    history = get_alignment_history()
+    correction = render_correction_proposal(history, diff_white, iteration)
+    
     # Aplicar corrección
-    ref_corrected = apply_baseline_correction(ref_spectrum, diff_white)
+    ref_corrected = apply_baseline_correction(ref_spectrum, correction)
+    # Se guarda en el histórico al exportar el baseline o volver al Paso 4
+    set_pending_alignment_correction(iteration, correction, white_id)
     
     st.success(INSTRUCTIONS['alignment_correction_applied'])
     
     # Guardar corrección para compatibilidad
-    st.session_state.correction_vector = diff_white
+    st.session_state.correction_vector = correction
     
     # Comparación visual
     with st.expander("📊 Comparación: Baseline Original vs Corregido", expanded=False):
@@ -131,7 +143,7 @@ def render_baseline_alignment_step():
         "Canal": range(1, len(ref_spectrum) + 1),
         "baseline_original": ref_spectrum,
         "baseline_corregido": ref_corrected,
-        "correccion_aplicada": diff_white
+        "correccion_aplicada": correction
     })
     
     csv_comp = io.StringIO()
@@ -175,6 +187,7 @@ def render_baseline_alignment_step():
                 file_name=new_filename,
                 mime="application/octet-stream",
                 key="download_ref_alignment",
+                on_click=commit_alignment_correction,
                 use_container_width=True
             )
         else:
@@ -204,6 +217,7 @@ def render_baseline_alignment_step():
             file_name=new_filename_csv,
             mime="text/csv",
             key="download_csv_alignment",
+            on_click=commit_alignment_correction,
             use_container_width=True
         )
     
@@ -215,6 +229,67 @@ def render_baseline_alignment_step():
     render_navigation_section()
 
 
+def render_correction_proposal(history, diff_white, iteration):
+    """
+    Propone la corrección a aplicar a partir de las iteraciones anteriores:
+    estima la ganancia de respuesta del equipo por región de píxeles y
+    compensa la diferencia del White Standard con ella.
+    
+    Args:
+        history (AlignmentHistory): Residuos y correcciones de la visita
+        diff_white (np.array): Diferencia del White Standard (Paso 4)
+        iteration (int): Iteración actual
+        
+    Returns:
+        np.array: Corrección a aplicar al baseline
+    """
+    gain = history.estimate_gain()
+    if gain.n_pairs == 0:
+        st.info(INSTRUCTIONS['alignment_first_iteration'])
+        return diff_white
+    
+    proposed = propose_correction(diff_white, gain)
+    
+    st.markdown("#### 🎯 Corrección propuesta")
+    st.info(INSTRUCTIONS['alignment_proposal_info'])
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Ganancia media estimada", f"{np.mean(gain.gain):.3f}")
+    
+    with col2:
+        rms_full = np.sqrt(np.mean(predicted_residual(diff_white, diff_white, gain) ** 2))
+        st.metric("RMS previsto (diferencia completa)", f"{rms_full:.6f}")
+    
+    with col3:
+        rms_proposed = np.sqrt(np.mean(predicted_residual(diff_white, proposed, gain) ** 2))
+        st.metric("RMS previsto (propuesta)", f"{rms_proposed:.6f}")
+    
+    with st.expander("📊 Ganancia por región e iteraciones anteriores", expanded=False):
+        fig = plot_correction_proposal(diff_white, proposed, gain.curve())
+        st.plotly_chart(fig, use_container_width=True)
+        
+        col_gain, col_hist = st.columns([1, 2])
+        with col_gain:
+            st.dataframe(gain.to_frame(), hide_index=True, use_container_width=True)
+        with col_hist:
+            st.dataframe(history.summary(), hide_index=True, use_container_width=True)
+    
+    mode = st.radio(
+        "Corrección a aplicar",
+        options=['proposed', 'full'],
+        format_func=lambda m: {
+            'proposed': f"🎯 Propuesta (ganancia estimada con {gain.n_pairs} iteración/es)",
+            'full': "Diferencia completa del White Standard",
+        }[m],
+        key=f"alignment_correction_mode_iter_{iteration}",
+        horizontal=True
+    )
+    
+    return proposed if mode == 'proposed' else diff_white
+
+
 def render_baseline_upload_section():
     """
     Sección 1: Carga del baseline (.ref o .csv).
@@ -343,7 +418,8 @@ def render_navigation_section():
     st.warning(INSTRUCTIONS['alignment_next_steps'])
     
     if st.button("⬅️ Volver a Validación (Paso 4)", type="primary", use_container_width=True):
-        # Marcar que venimos del alineamiento
+        # Registrar la corrección aplicada y marcar que venimos del alineamiento
+        commit_alignment_correction()
         st.session_state.came_from_alignment = True
         st.session_state.unsaved_changes = False
         
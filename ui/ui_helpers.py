@@ -9,6 +9,10 @@ Date: December 2024
 
 import streamlit as st
 
+from app_config import SESSION_MEMORY
+from core.session_memory import enforce_memory_budget, format_bytes, session_memory_report
+from core.spectral_workspace import get_workspace
+
 
 def show_success(message: str) -> None:
     """
@@ -210,4 +214,68 @@ def create_expander_with_info(title: str, content: str,
         ... )
     """
     with st.expander(title, expanded=expanded):
-        st.markdown(content)
\ No newline at end of file
+        st.markdown(content)
+
+def workspace_tsv_picker(key: str, kind: str = 'tsv', multiple: bool = False,
+                         label: str = "...o usa un archivo ya cargado en la sesión:"):
+    """
+    Selector de archivos ya registrados en el workspace de la sesión (cargados
+    en cualquier otra página), como alternativa a volver a subirlos.
+
+    Args:
+        key: Key único del widget
+        kind: Tipo de dataset (ver ``core.spectral_workspace.PARSERS``)
+        multiple: Permitir seleccionar varios archivos
+        label: Texto del selector
+
+    Returns:
+        WorkspaceDataset (o lista si ``multiple``); None/[] si no hay
+        archivos en el workspace o no se seleccionó ninguno
+
+    Example:
+        >>> ref_file = st.file_uploader("TSV Referencia:", type=['tsv'], key="ref")
+        >>> ref_file = ref_file or workspace_tsv_picker(key="ref_workspace")
+    """
+    datasets = get_workspace().datasets(kind)
+    if not datasets:
+        return [] if multiple else None
+
+    by_handle = {ds.handle: ds for ds in datasets}
+    if multiple:
+        handles = st.multiselect(
+            label, list(by_handle), key=key,
+            format_func=lambda h: by_handle[h].label,
+        )
+        return [by_handle[h] for h in handles]
+
+    handle = st.selectbox(
+        label, [None] + list(by_handle), key=key,
+        format_func=lambda h: "—" if h is None else by_handle[h].label,
+    )
+    return by_handle.get(handle)
+
+
+def render_session_memory_panel() -> None:
+    """
+    Panel de depuración con la memoria aproximada de la sesión por clave de
+    ``st.session_state``. Solo se muestra con ``SESSION_MEMORY['debug_panel']``
+    o con ``?debug=1`` en la URL.
+    """
+    if not (SESSION_MEMORY.get('debug_panel') or st.query_params.get('debug') == '1'):
+        return
+
+    with st.expander("🧠 Memoria de sesión", expanded=False):
+        report = session_memory_report()
+        total = int(report['bytes'].sum())
+        budget = SESSION_MEMORY['budget_bytes']
+        st.metric("Total aproximado", format_bytes(total), f"presupuesto {format_bytes(budget)}",
+                  delta_color="off")
+        st.progress(min(total / budget, 1.0) if budget else 0.0)
+
+        shown = report.head(15).assign(size=report['bytes'].head(15).map(format_bytes))
+        st.dataframe(shown[['key', 'type', 'size', 'age_s', 'policy']],
+                     hide_index=True, use_container_width=True)
+
+        if st.button("🧹 Liberar ahora", key="session_memory_enforce", use_container_width=True):
+            applied = enforce_memory_budget(force=True)
+            st.caption(", ".join(applied) if applied else "Dentro del presupuesto: nada que liberar")
@@ -6,8 +6,10 @@ import numpy as np
 import pandas as pd
 import io
 import json
+import zipfile
 from datetime import datetime
 from app_config import DEFAULT_CSV_METADATA
+from core.ref_baselines import load_ref_files, unique_names
 
 
 def render_utilities_section():
@@ -20,19 +22,35 @@ def render_utilities_section():
             "Convierte un archivo .ref (formato antiguo) a .csv (formato nuevo) con metadatos por defecto."
         )
 
-        util_ref_file = st.file_uploader(
-            "Selecciona archivo .ref",
+        util_ref_files = st.file_uploader(
+            "Selecciona uno o varios archivos .ref",
             type="ref",
+            accept_multiple_files=True,
             key="util_ref"
         )
 
-        if util_ref_file:
+        if util_ref_files:
             try:
-                process_ref_to_csv_conversion(util_ref_file)
+                if len(util_ref_files) == 1:
+                    process_ref_to_csv_conversion(util_ref_files[0])
+                else:
+                    process_bulk_ref_conversion(util_ref_files)
             except Exception as e:
                 st.error(f"Error: {str(e)}")
 
 
+def _ref_to_csv_text(ref_spectrum):
+    """CSV (formato nuevo, metadatos por defecto) con un espectro .ref."""
+    metadata = DEFAULT_CSV_METADATA.copy()
+    metadata["time_stamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    metadata["nir_pixels"] = len(ref_spectrum)
+    metadata["data"] = json.dumps(ref_spectrum.tolist())
+
+    csv_text = io.StringIO()
+    pd.DataFrame([metadata]).to_csv(csv_text, index=False)
+    return csv_text.getvalue()
+
+
 def process_ref_to_csv_conversion(file):
     """
     Procesa la conversión de .ref a .csv.
@@ -48,24 +66,47 @@ def process_ref_to_csv_conversion(file):
     st.write(f"Archivo cargado: {len(ref_spectrum)} puntos espectrales")
 
     if st.button("Generar CSV desde .ref", key="util_convert"):
-        # Crear DataFrame con metadatos por defecto
-        metadata = DEFAULT_CSV_METADATA.copy()
-        metadata["time_stamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        metadata["nir_pixels"] = len(ref_spectrum)
-        metadata["data"] = json.dumps(ref_spectrum.tolist())
-
-        df_export_csv = pd.DataFrame([metadata])
-
-        csv_bytes = io.StringIO()
-        df_export_csv.to_csv(csv_bytes, index=False)
-
         st.warning(
             "CSV generado con metadatos por defecto. Solo 'nir_pixels' y 'data' son valores reales."
         )
         st.download_button(
             "Descargar CSV convertido",
-            data=csv_bytes.getvalue(),
+            data=_ref_to_csv_text(ref_spectrum),
             file_name=file.name.replace(".ref", ".csv"),
             mime="text/csv",
             key="util_download_csv"
         )
+
+
+def process_bulk_ref_conversion(files):
+    """
+    Convierte varios .ref a .csv de una vez (un CSV por archivo, en un ZIP).
+
+    Args:
+        files: Archivos .ref subidos
+    """
+    stack = load_ref_files(files)
+
+    st.write(f"{len(stack)} archivos cargados")
+    st.dataframe(
+        stack.catalog[["name", "sensor", "lamp", "date", "n_channels"]],
+        hide_index=True,
+        use_container_width=True
+    )
+
+    if st.button("Generar CSVs desde .ref", key="util_convert_bulk"):
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+            for i, file_name in enumerate(unique_names(stack.names, "", ".csv")):
+                zf.writestr(file_name, _ref_to_csv_text(stack.spectrum(i)))
+
+        st.warning(
+            "CSVs generados con metadatos por defecto. Solo 'nir_pixels' y 'data' son valores reales."
+        )
+        st.download_button(
+            "Descargar CSVs convertidos (ZIP)",
+            data=zip_buffer.getvalue(),
+            file_name="ref_convertidos.zip",
+            mime="application/zip",
+            key="util_download_csv_bulk"
+        )
@@ -7,79 +7,43 @@ import re
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from app_config import CONTROL_SAMPLES_CONFIG
+from core.result_strings import parse_multi_values
 
 
-_NUM_RE = re.compile(r"[-+]?\d+(?:[.,]\d+)?")
-
-def _to_float_maybe(s: str):
-    """Devuelve float si puede; si no, np.nan. Limpia >, < y soporta coma decimal."""
-    if s is None:
-        return np.nan
-    s = str(s).strip()
-    if not s or s.lower() == "nan":
-        return np.nan
-    # quita símbolos tipo '>' '<'
-    s = s.replace(">", "").replace("<", "").strip()
-    # intenta regex por si hay texto alrededor
-    m = _NUM_RE.search(s)
-    if not m:
-        return np.nan
-    val = m.group(0).replace(",", ".")
-    try:
-        return float(val)
-    except ValueError:
-        return np.nan
-
-def extract_predictions_from_results(df: pd.DataFrame) -> pd.DataFrame:
+def extract_predictions_from_results(df: pd.DataFrame, return_censored: bool = False,
+                                     return_embedded: bool = False):
     """
     Extrae predicciones de la columna 'Result' o 'Results' cuando los valores
     vienen sin nombre, p. ej.:  '>19.9 ; 13.6 ; 16.6 ; 2.6 ; 4.3 ; 5.000 ; >19.9 ; >89.0 ; ...'
     Asigna columnas Param1, Param2, ... según posición.
+
+    Los valores censurados ('>19.9') se devuelven con su límite, y de los
+    tokens no numéricos se toma el primer número que contengan
+    ('Outlier (16)' -> 16), como siempre. Con ``return_censored`` y/o
+    ``return_embedded`` devuelve una tupla (pred_df, censored, embedded) con
+    las máscaras pedidas (mismas columnas Param1..ParamN): ``censored`` marca
+    los valores censurados y ``embedded`` los extraídos de un texto.
     """
     # detecta columna válida
     result_col = next((c for c in ("Result", "Results") if c in df.columns), None)
+    n_masks = int(return_censored) + int(return_embedded)
     if result_col is None:
-        return pd.DataFrame()
-
-    out = []
-    max_params = 0
-
-    for _, row in df.iterrows():
-        results_str = str(row.get(result_col, "")).strip()
-        rec = {"ID": row.get("ID", None)}
-
-        # separa por ';' y también por ','
-        raw_parts = []
-        for chunk in results_str.split(";"):
-            raw_parts.extend(chunk.split(","))
-
-        # limpia y convierte
-        values = []
-        for part in raw_parts:
-            part = part.strip()
-            if not part:
-                continue
-            values.append(_to_float_maybe(part))
-
-        # asigna Param1..ParamN
-        for i, val in enumerate(values, start=1):
-            rec[f"Param{i}"] = val
+        return (pd.DataFrame(),) * (n_masks + 1) if n_masks else pd.DataFrame()
 
-        max_params = max(max_params, len(values))
-        out.append(rec)
+    # separa por ';' y también por ','; los tokens vacíos no cuentan
+    parsed = parse_multi_values(df[result_col], sep="[;,]", skip_empty=True, embedded=True)
+    param_cols = [f"Param{i}" for i in range(1, parsed.width + 1)]
 
-    # construye DataFrame; pandas alinea claves y rellena faltantes con NaN
-    pred_df = pd.DataFrame(out)
+    values = parsed.values.set_axis(param_cols, axis=1)
+    ids = df["ID"] if "ID" in df.columns else pd.Series(None, index=df.index, dtype=object)
+    pred_df = pd.concat([ids.rename("ID"), values], axis=1).reset_index(drop=True)
 
-    # asegura columnas Param1..ParamN en orden
-    param_cols = [f"Param{i}" for i in range(1, max_params + 1)]
-    ordered_cols = ["ID"] + param_cols
-    for c in param_cols:
-        if c not in pred_df.columns:
-            pred_df[c] = np.nan
-    pred_df = pred_df[ordered_cols]
-
-    return pred_df
+    if not n_masks:
+        return pred_df
+    masks = [mask.set_axis(param_cols, axis=1).reset_index(drop=True)
+             for mask, wanted in ((parsed.censored, return_censored),
+                                  (parsed.embedded, return_embedded)) if wanted]
+    return (pred_df, *masks)
 
 _PARAM_RE = re.compile(r"^Param(\d+)$")
 
@@ -191,6 +155,36 @@ def get_prediction_status(diff_pct):
         return 'bad'
 
 
+def align_spectra(df_initial, df_final, spectral_cols, common_ids):
+    """
+    Alinea los espectros inicial y final de cada ID en dos matrices.
+    
+    Cada DataFrame se indexa una sola vez por ID (primera medida de cada ID)
+    y se reordena según ``common_ids``.
+    
+    Args:
+        df_initial (pd.DataFrame): Mediciones iniciales
+        df_final (pd.DataFrame): Mediciones finales
+        spectral_cols (list): Columnas espectrales
+        common_ids (list): IDs a alinear (en este orden)
+        
+    Returns:
+        tuple: (ids, initial, final, found) con ``initial`` y ``final``
+        matrices float (IDs x canales, NaN si falta el ID) y ``found`` el par
+        de máscaras (IDs presentes en inicial, IDs presentes en final)
+    """
+    ids = list(common_ids)
+    
+    def matrix(df):
+        by_id = df.drop_duplicates(subset=['ID'], keep='first').set_index('ID')
+        found = by_id.index.get_indexer(ids) >= 0
+        return by_id[spectral_cols].reindex(ids).to_numpy(dtype=float), found
+    
+    initial, found_initial = matrix(df_initial)
+    final, found_final = matrix(df_final)
+    return ids, initial, final, (found_initial, found_final)
+
+
 def plot_spectra_comparison(df_initial, df_final, spectral_cols, common_ids):
     """
     Genera un gráfico comparativo de espectros iniciales vs finales.
@@ -218,13 +212,17 @@ def plot_spectra_comparison(df_initial, df_final, spectral_cols, common_ids):
     channels = list(range(1, len(spectral_cols) + 1))
     colors = ['blue', 'red', 'green', 'orange', 'purple', 'brown', 'pink', 'gray']
     
-    for i, sample_id in enumerate(common_ids):
+    ids, initial, final, (found_initial, found_final) = align_spectra(
+        df_initial, df_final, spectral_cols, common_ids
+    )
+    diffs = final - initial
+    
+    for i, sample_id in enumerate(ids):
         color = colors[i % len(colors)]
         
         # Espectro inicial
-        initial_row = df_initial[df_initial['ID'] == sample_id]
-        if not initial_row.empty:
-            spectrum_initial = initial_row[spectral_cols].values[0]
+        if found_initial[i]:
+            spectrum_initial = initial[i]
             
             fig.add_trace(
                 go.Scatter(
@@ -240,9 +238,8 @@ def plot_spectra_comparison(df_initial, df_final, spectral_cols, common_ids):
             )
         
         # Espectro final
-        final_row = df_final[df_final['ID'] == sample_id]
-        if not final_row.empty:
-            spectrum_final = final_row[spectral_cols].values[0]
+        if found_final[i]:
+            spectrum_final = final[i]
             
             fig.add_trace(
                 go.Scatter(
@@ -258,13 +255,11 @@ def plot_spectra_comparison(df_initial, df_final, spectral_cols, common_ids):
             )
             
             # Diferencia
-            if not initial_row.empty:
-                diff = spectrum_final - spectrum_initial
-                
+            if found_initial[i]:
                 fig.add_trace(
                     go.Scatter(
                         x=channels,
-                        y=diff,
+                        y=diffs[i],
                         mode='lines',
                         name=f'{sample_id} (Δ)',
                         line=dict(color=color, width=1.5),
@@ -403,28 +398,32 @@ def calculate_spectral_metrics(df_initial, df_final, spectral_cols, common_ids):
     Returns:
         dict: Diccionario con métricas
     """
-    metrics = {}
+    ids, initial, final, found = align_spectra(df_initial, df_final, spectral_cols, common_ids)
+    both = found[0] & found[1]
+    if not both.any():
+        return {}
     
-    for sample_id in common_ids:
-        initial_row = df_initial[df_initial['ID'] == sample_id]
-        final_row = df_final[df_final['ID'] == sample_id]
-        
-        if initial_row.empty or final_row.empty:
-            continue
-        
-        spectrum_initial = initial_row[spectral_cols].values[0]
-        spectrum_final = final_row[spectral_cols].values[0]
-        
-        # Calcular diferencia
-        diff = spectrum_final - spectrum_initial
-        
-        # Métricas
-        metrics[sample_id] = {
-            'mean_diff': np.mean(diff),
-            'std_diff': np.std(diff),
-            'max_diff': np.max(np.abs(diff)),
-            'rmse': np.sqrt(np.mean(diff**2)),
-            'correlation': np.corrcoef(spectrum_initial, spectrum_final)[0, 1]
-        }
+    ids = [sample_id for sample_id, ok in zip(ids, both) if ok]
+    initial, final = initial[both], final[both]
+    
+    # Diferencia y métricas fila a fila (una fila por muestra)
+    diff = final - initial
+    with np.errstate(invalid='ignore', divide='ignore'):
+        centered_initial = initial - initial.mean(axis=1, keepdims=True)
+        centered_final = final - final.mean(axis=1, keepdims=True)
+        correlation = (centered_initial * centered_final).sum(axis=1) / np.sqrt(
+            (centered_initial ** 2).sum(axis=1) * (centered_final ** 2).sum(axis=1)
+        )
+    
+    columns = {
+        'mean_diff': diff.mean(axis=1),
+        'std_diff': diff.std(axis=1),
+        'max_diff': np.abs(diff).max(axis=1),
+        'rmse': np.sqrt((diff ** 2).mean(axis=1)),
+        'correlation': correlation,
+    }
     
-    return metrics
\ No newline at end of file
+    return {
+        sample_id: {name: values[i] for name, values in columns.items()}
+        for i, sample_id in enumerate(ids)
+    }
@@ -2,11 +2,14 @@
 NIR Analyzer - Clase para analizar datos NIR desde archivos XML
 """
 
+from collections.abc import Mapping
+
 import pandas as pd
 import numpy as np
-import xml.etree.ElementTree as ET
 import streamlit as st
 
+from .spreadsheet_xml import NON_PRODUCT_SHEETS, SPECTRA_SHEET, iter_worksheets
+
 
 class NIRAnalyzer:
     """Clase para analizar datos NIR desde archivos XML"""
@@ -15,100 +18,36 @@ class NIRAnalyzer:
         self.data = {}
         self.products = []
         self.sensor_serial = None
+        self.spectra = None
         
-    def parse_xml(self, uploaded_file):
-        """Parse XML file from NIR-Online software"""
+    def parse_xml(self, uploaded_file, include_spectra=False):
+        """
+        Parse XML file from NIR-Online software
+
+        Lectura en streaming (ver ``utils.spreadsheet_xml``). La worksheet
+        "Espectros" solo se procesa con ``include_spectra`` y queda en
+        ``self.spectra`` (no es un producto).
+        """
         try:
-            # Leer el contenido del archivo
-            content = uploaded_file.read()
-            
-            # Parse XML
-            root = ET.fromstring(content)
-            
-            # Namespace del XML
-            ns = {'ss': 'urn:schemas-microsoft-com:office:spreadsheet'}
+            skip = ['Summary'] if include_spectra else list(NON_PRODUCT_SHEETS)
             
             # Variable para almacenar el número de serie del sensor
             sensor_serial = None
             
-            # Encontrar todas las worksheets (productos)
-            worksheets = root.findall('.//ss:Worksheet', ns)
-            
-            for worksheet in worksheets:
-                product_name = worksheet.get('{urn:schemas-microsoft-com:office:spreadsheet}Name')
-                
-                # Saltar hojas que no son productos
-                if product_name in ['Espectros', 'Summary'] or product_name is None:
-                    continue
-                
-                # Extraer datos de la tabla
-                table = worksheet.find('.//ss:Table', ns)
-                if table is None:
+            for product_name, df in iter_worksheets(uploaded_file, skip=skip):
+                if product_name == SPECTRA_SHEET:
+                    self.spectra = df
                     continue
                 
-                rows = table.findall('.//ss:Row', ns)
-                
-                # Encontrar la fila de encabezado
-                headers = []
-                data_rows = []
-                start_data = False
-                
-                for row in rows:
-                    cells = row.findall('.//ss:Cell', ns)
-                    row_data = []
-                    
-                    for cell in cells:
-                        data_elem = cell.find('.//ss:Data', ns)
-                        if data_elem is not None:
-                            row_data.append(data_elem.text)
-                        else:
-                            row_data.append(None)
-                    
-                    # Detectar fila de encabezado
-                    if (not start_data and row_data and 
-                        'ID' in row_data and 'Note' in row_data and 
-                        ('Product' in row_data or 'Method' in row_data)):
-                        headers = row_data
-                        # Normalizar el nombre de la primera columna a "No"
-                        if headers[0] in ['#', 'No']:
-                            headers[0] = 'No'
-                        start_data = True
-                        continue
-                    
-                    # Recoger filas de datos
-                    if start_data and row_data:
-                        # Verificar si es una fila de datos
-                        if row_data[0] and str(row_data[0]).replace('.', '').isdigit():
-                            data_rows.append(row_data)
-                            
-                            # Extraer número de serie del sensor
-                            if sensor_serial is None and 'Unit' in headers:
-                                unit_idx = headers.index('Unit')
-                                if unit_idx < len(row_data) and row_data[unit_idx]:
-                                    sensor_serial = row_data[unit_idx]
-                        # Verificar si llegamos a las filas de estadísticas
-                        elif len(row_data) > 1 and row_data[1] in ['Average', 'Min', 'Max', 'Std.Dev.', 'Target']:
-                            break
+                # Número de serie del sensor: primera fila con Unit
+                if sensor_serial is None and 'Unit' in df.columns:
+                    units = df['Unit'].dropna()
+                    units = units[units != '']
+                    if len(units):
+                        sensor_serial = units.iloc[0]
                 
-                # Crear DataFrame
-                if headers and data_rows:
-                    # Asegurar que todas las filas tengan la misma longitud
-                    max_len = len(headers)
-                    data_rows = [row + [None] * (max_len - len(row)) if len(row) < max_len else row[:max_len] 
-                                for row in data_rows]
-                    
-                    df = pd.DataFrame(data_rows, columns=headers)
-                    
-                    # Convertir columnas numéricas
-                    for col in df.columns:
-                        if col not in ['No', 'ID', 'Note', 'Product', 'Method', 'Unit']:
-                            try:
-                                df[col] = pd.to_numeric(df[col], errors='coerce')
-                            except:
-                                pass
-                    
-                    self.data[product_name] = df
-                    self.products.append(product_name)
+                self.data[product_name] = df
+                self.products.append(product_name)
             
             # Guardar el número de serie del sensor
             self.sensor_serial = sensor_serial
@@ -121,33 +60,49 @@ class NIRAnalyzer:
     
     def get_id_note_combinations(self, products):
         """Obtener combinaciones únicas de ID y Note para productos seleccionados"""
-        combinations = set()
+        frames = [
+            self.data[product][['ID', 'Note']].astype(object)
+            for product in products if product in self.data
+        ]
+        if not frames:
+            return []
         
-        for product in products:
-            if product in self.data:
-                df = self.data[product]
-                for _, row in df.iterrows():
-                    id_val = row.get('ID', '')
-                    note_val = row.get('Note', '')
-                    if pd.notna(id_val) and pd.notna(note_val):
-                        combinations.add((id_val, note_val))
-        
-        return sorted(list(combinations))
+        pairs = pd.concat(frames, ignore_index=True).dropna().drop_duplicates()
+        return sorted(pairs.itertuples(index=False, name=None))
     
-    def filter_data(self, products, id_note_combinations):
-        """Filtrar datos por productos y combinaciones ID-Note"""
+    def filter_data(self, products, id_note_combinations=None, ids=None, notes=None):
+        """
+        Filtrar datos por productos y por ID/Note
+        
+        Args:
+            products: Productos a incluir
+            id_note_combinations: Pares (ID, Note) concretos (semi-join)
+            ids: IDs a incluir (con ``notes``: cualquier ID x Note seleccionados)
+            notes: Notes (lámparas) a incluir
+        
+        Con ``ids``/``notes`` no hace falta construir el producto cartesiano
+        de pares: se filtra con ``isin`` sobre cada columna.
+        """
         filtered_data = {}
         
+        pairs = None
+        if id_note_combinations is not None:
+            pairs = pd.MultiIndex.from_tuples(list(id_note_combinations), names=['ID', 'Note'])
+        
         for product in products:
             if product not in self.data:
                 continue
                 
-            df = self.data[product].copy()
+            df = self.data[product]
             
-            # Filtrar por combinaciones ID-Note
-            mask = pd.Series([False] * len(df))
-            for id_val, note_val in id_note_combinations:
-                mask |= ((df['ID'] == id_val) & (df['Note'] == note_val))
+            if pairs is not None:
+                mask = pd.MultiIndex.from_frame(df[['ID', 'Note']]).isin(pairs)
+            else:
+                mask = np.ones(len(df), dtype=bool)
+                if ids is not None:
+                    mask &= df['ID'].isin(ids).to_numpy()
+                if notes is not None:
+                    mask &= df['Note'].isin(notes).to_numpy()
             
             filtered_df = df[mask]
             
@@ -158,40 +113,142 @@ class NIRAnalyzer:
     
     def calculate_statistics(self, filtered_data):
         """Calcular estadísticas por producto y lámpara (Note)"""
-        stats = {}
+        return PredictionStats.from_frames(filtered_data)
+
+
+_AGGREGATES = ['count', 'mean', 'std', 'min', 'max']
+
+
+class PredictionStats(Mapping):
+    """
+    Estadísticas por producto, lámpara (Note) y parámetro.
+
+    - ``table``: tabla "tidy" con una fila por (product, note, param) con
+      datos: n (filas de la lámpara), count, mean, std, min, max y offset
+    - ``lamps``: (product, note, n) de todas las lámparas, incluidas las que
+      no tienen ningún parámetro con datos
+    - ``raw_values``: un único array float64 con los valores crudos; los de cada
+      fila de ``table`` son ``raw_values[offset:offset + count]``
+
+    Se calcula con un ``groupby('Note').agg`` por producto. Por compatibilidad
+    también se puede leer como ``stats[product][note][param]['mean']``
+    (diccionarios construidos bajo demanda; ``'values'`` es una vista del
+    array compartido, no una copia).
+    """
+
+    def __init__(self, table: pd.DataFrame, lamps: pd.DataFrame, raw_values: np.ndarray):
+        self.table = table
+        self.lamps = lamps
+        self.raw_values = raw_values
+        self._nested = {}
+
+    @classmethod
+    def from_frames(cls, filtered_data):
+        """Calcula las estadísticas de ``{producto: DataFrame}``."""
+        tables, lamp_tables, chunks = [], [], []
+        offset = 0
         
         for product, df in filtered_data.items():
-            product_stats = {}
+            # Parámetros numéricos en el orden de las columnas
+            params = [col for col in df.select_dtypes(include=[np.number], exclude=['timedelta']).columns if col != 'No']
+            grouped = df.groupby('Note', sort=False, observed=True)
+            sizes = grouped.size()
+            lamp_tables.append(pd.DataFrame({
+                'product': product, 'note': sizes.index.astype(object), 'n': sizes.to_numpy()
+            }))
+            if not params or sizes.empty:
+                continue
             
-            # Agrupar por Note (lámpara)
-            for note in df['Note'].unique():
-                note_df = df[df['Note'] == note]
-                
-                note_stats = {
-                    'n': len(note_df),
-                    'note': note
-                }
-                
-                # Calcular media y std para cada parámetro numérico
-                numeric_cols = note_df.select_dtypes(include=[np.number]).columns
-                
-                for col in numeric_cols:
-                    if col != 'No':
-                        values = note_df[col].dropna()
-                        if len(values) > 0:
-                            note_stats[col] = {
-                                'mean': values.mean(),
-                                'std': values.std(),
-                                'min': values.min(),
-                                'max': values.max(),
-                                'values': values.tolist()
-                            }
-                
-                product_stats[note] = note_stats
+            agg = grouped[params].agg(_AGGREGATES)
+            tidy = agg.stack(level=0, future_stack=True)
+            tidy.index.names = ['note', 'param']
+            tidy = tidy.reset_index()
+            tidy['note'] = tidy['note'].astype(object)
+            tidy.insert(0, 'product', product)
+            tidy.insert(2, 'n', np.repeat(sizes.to_numpy(), len(params)))
+            
+            # Valores crudos en el mismo orden (lámpara -> parámetro), sin NaN
+            codes = grouped.ngroup().to_numpy()
+            valid_rows = codes >= 0
+            order = np.argsort(codes[valid_rows], kind='stable')
+            block = df[params].to_numpy(dtype=float)[valid_rows][order]
+            bounds = np.concatenate([[0], np.cumsum(sizes.to_numpy())])
+            for g in range(len(sizes)):
+                sub = block[bounds[g]:bounds[g + 1]].T
+                chunks.append(sub[~np.isnan(sub)])
             
-            stats[product] = product_stats
+            counts = tidy['count'].to_numpy(dtype=np.int64)
+            tidy['count'] = counts
+            tidy['offset'] = offset + np.concatenate([[0], np.cumsum(counts)[:-1]])
+            offset += int(counts.sum())
+            tables.append(tidy[tidy['count'] > 0])
         
-        return stats
+        columns = ['product', 'note', 'n', 'param'] + _AGGREGATES + ['offset']
+        table = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=columns)
+        lamps = (pd.concat(lamp_tables, ignore_index=True) if lamp_tables
+                 else pd.DataFrame(columns=['product', 'note', 'n']))
+        values = np.concatenate(chunks) if chunks else np.empty(0)
+        return cls(table[columns], lamps, values)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    def product_table(self, product) -> pd.DataFrame:
+        """Filas de ``table`` de un producto."""
+        return self.table[self.table['product'] == product]
+
+    def lamp_names(self, product=None):
+        """Lámparas (ordenadas) de un producto o de todos."""
+        lamps = self.lamps if product is None else self.lamps[self.lamps['product'] == product]
+        return sorted(lamps['note'].unique())
+
+    def means(self, product) -> pd.DataFrame:
+        """Medias de un producto: parámetros x lámparas."""
+        return self.product_table(product).pivot(index='param', columns='note', values='mean')
+
+    def values_for(self, product, note, param) -> np.ndarray:
+        """Valores crudos de (producto, lámpara, parámetro); vista del array compartido."""
+        rows = self.table[(self.table['product'] == product) &
+                          (self.table['note'] == note) &
+                          (self.table['param'] == param)]
+        if rows.empty:
+            return self.raw_values[:0]
+        offset, count = int(rows['offset'].iloc[0]), int(rows['count'].iloc[0])
+        return self.raw_values[offset:offset + count]
+
+    # ------------------------------------------------------------------
+    # Vista stats[product][note][param]
+    # ------------------------------------------------------------------
+    def _product_dict(self, product):
+        nested = self._nested.get(product)
+        if nested is None:
+            nested = {}
+            for note, n in self.lamps.loc[self.lamps['product'] == product, ['note', 'n']].itertuples(index=False):
+                nested[note] = {'n': int(n), 'note': note}
+            for row in self.product_table(product).itertuples(index=False):
+                nested[row.note][row.param] = {
+                    'mean': row.mean,
+                    'std': row.std,
+                    'min': row.min,
+                    'max': row.max,
+                    'values': self.raw_values[row.offset:row.offset + row.count],
+                }
+            self._nested[product] = nested
+        return nested
+
+    def __getitem__(self, product):
+        if product not in self._products():
+            raise KeyError(product)
+        return self._product_dict(product)
+
+    def _products(self):
+        return list(dict.fromkeys(self.lamps['product']))
+
+    def __iter__(self):
+        return iter(self._products())
+
+    def __len__(self):
+        return len(self._products())
 
 
 def get_params_in_original_order(analyzer, products):
@@ -328,6 +328,63 @@ def plot_baseline_comparison(baseline_original, baseline_corrected, spectral_col
     return fig
 
 
+def plot_correction_proposal(diff_white, proposed, gain_curve):
+    """
+    Crea gráfico de la diferencia medida, la corrección propuesta y la
+    ganancia de respuesta estimada por canal.
+    
+    Args:
+        diff_white (np.array): Diferencia del White Standard (corrección completa)
+        proposed (np.array): Corrección propuesta
+        gain_curve (np.array): Ganancia estimada por canal
+        
+    Returns:
+        plotly.graph_objects.Figure: Figura con el gráfico
+    """
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    
+    channels = list(range(1, len(diff_white) + 1))
+    
+    fig.add_trace(go.Scatter(
+        x=channels,
+        y=diff_white,
+        mode='lines',
+        name='Diferencia completa',
+        line=dict(width=2, color='blue'),
+        hovertemplate='Canal: %{x}<br>Diferencia: %{y:.6f}<extra></extra>'
+    ), secondary_y=False)
+    
+    fig.add_trace(go.Scatter(
+        x=channels,
+        y=proposed,
+        mode='lines',
+        name='Corrección propuesta',
+        line=dict(width=2, dash='dash', color='red'),
+        hovertemplate='Canal: %{x}<br>Propuesta: %{y:.6f}<extra></extra>'
+    ), secondary_y=False)
+    
+    fig.add_trace(go.Scatter(
+        x=channels,
+        y=gain_curve,
+        mode='lines',
+        name='Ganancia estimada',
+        line=dict(width=1, dash='dot', color='gray'),
+        hovertemplate='Canal: %{x}<br>Ganancia: %{y:.3f}<extra></extra>'
+    ), secondary_y=True)
+    
+    fig.update_layout(
+        title='Corrección propuesta según la respuesta del equipo',
+        xaxis_title='Canal espectral',
+        height=450,
+        hovermode='x unified',
+        template='plotly_white'
+    )
+    fig.update_yaxes(title_text='Corrección', secondary_y=False)
+    fig.update_yaxes(title_text='Ganancia', secondary_y=True)
+    
+    return fig
+
+
 def plot_corrected_spectra_comparison(df_ref, df_corrected, spectral_cols,
                                      lamp_ref, lamp_new, sample_ids, title):
     """
@@ -17,11 +17,7 @@ def create_comparison_plots(stats, analyzer):
     products = list(stats.keys())
     
     # Obtener todas las lámparas
-    lamps = set()
-    for product_stats in stats.values():
-        lamps.update(product_stats.keys())
-    
-    lamps = sorted(list(lamps))
+    lamps = stats.lamp_names()
     
     if len(lamps) < 2:
         st.warning("Se necesitan al menos 2 lámparas diferentes para comparar.")
@@ -36,12 +32,11 @@ def create_comparison_plots(stats, analyzer):
     )
     
     # Verificar que el producto tenga lámparas disponibles
-    if selected_product not in stats or not stats[selected_product]:
+    available_lamps_for_product = stats.lamp_names(selected_product)
+    if not available_lamps_for_product:
         st.warning(f"No hay datos disponibles para {selected_product}")
         return None
     
-    available_lamps_for_product = sorted(list(stats[selected_product].keys()))
-    
     # Selector de lámparas (hasta 4)
     st.markdown("#### Selecciona las lámparas a comparar (mínimo 2, máximo 4)")
     
@@ -79,13 +74,12 @@ def create_comparison_plots(stats, analyzer):
         st.warning("Por favor selecciona al menos 2 lámparas para comparar.")
         return None
     
-    # Obtener todos los parámetros disponibles para el producto seleccionado
-    all_params = set()
-    for lamp in selected_lamps:
-        if lamp in stats[selected_product]:
-            all_params.update([k for k in stats[selected_product][lamp].keys() if k not in ['n', 'note']])
+    # Medias del producto seleccionado: parámetros x lámparas
+    means = stats.means(selected_product)
+    means = means[[lamp for lamp in selected_lamps if lamp in means.columns]]
     
-    all_params = sorted(list(all_params))
+    # Parámetros con datos en alguna de las lámparas seleccionadas
+    all_params = sorted(means.dropna(how='all').index)
     
     if not all_params:
         st.warning("No se encontraron parámetros para comparar.")
@@ -98,18 +92,15 @@ def create_comparison_plots(stats, analyzer):
     # Calcular diferencias para cada lámpara comparada con el baseline
     differences = {param: {} for param in all_params}
     
-    for param in all_params:
-        if param in stats[selected_product][baseline_lamp]:
-            baseline_value = stats[selected_product][baseline_lamp][param]['mean']
-            
-            for lamp in comparison_lamps:
-                if lamp in stats[selected_product] and param in stats[selected_product][lamp]:
-                    lamp_value = stats[selected_product][lamp][param]['mean']
-                    diff = lamp_value - baseline_value
+    if baseline_lamp in means.columns:
+        deltas = means.loc[all_params].sub(means.loc[all_params, baseline_lamp], axis=0)
+        for lamp in comparison_lamps:
+            if lamp in deltas.columns:
+                for param, diff in deltas[lamp].dropna().items():
                     differences[param][lamp] = diff
     
     # Filtrar parámetros que tienen al menos un valor
-    params_with_data = [p for p in all_params if any(differences[p].values() if differences[p] else [])]
+    params_with_data = [p for p in all_params if differences[p]]
     
     if not params_with_data:
         st.warning("No hay datos suficientes para comparar entre las lámparas seleccionadas.")
@@ -207,32 +198,23 @@ def create_comparison_plots(stats, analyzer):
 def create_detailed_comparison(stats, param='H'):
     """Crear gráfico de comparación detallada por producto"""
     
-    products = list(stats.keys())
-    lamps = set()
-    for product_stats in stats.values():
-        lamps.update(product_stats.keys())
-    lamps = sorted(list(lamps))
+    lamps = stats.lamp_names()
+    
+    # Filas del parámetro seleccionado (una por producto y lámpara con datos)
+    param_rows = stats.table[stats.table['param'] == param]
     
     # Filtrar productos que tienen datos para el parámetro seleccionado
-    products_with_data = []
-    for product in products:
-        has_data = False
-        for lamp in lamps:
-            if lamp in stats[product] and param in stats[product][lamp]:
-                has_data = True
-                break
-        if has_data:
-            products_with_data.append(product)
+    with_data = set(param_rows['product'])
+    products_with_data = [product for product in stats if product in with_data]
     
     if not products_with_data:
         return None
     
     # Calcular valor máximo para ajustar escala Y
-    max_val = 0
-    for product in products_with_data:
-        for lamp in lamps:
-            if lamp in stats[product] and param in stats[product][lamp]:
-                max_val = max(max_val, stats[product][lamp][param]['mean'])
+    max_val = max(0, param_rows['mean'].max())
+    
+    # Medias por (producto, lámpara)
+    param_means = param_rows.set_index(['product', 'note'])['mean']
     
     # Número de subplots
     n_products = len(products_with_data)
@@ -252,22 +234,21 @@ def create_detailed_comparison(stats, param='H'):
     
     for col_idx, product in enumerate(products_with_data):
         for lamp_idx, lamp in enumerate(lamps):
-            if lamp in stats[product]:
-                if param in stats[product][lamp]:
-                    mean_val = stats[product][lamp][param]['mean']
-                    
-                    fig.add_trace(
-                        go.Bar(
-                            name=lamp,
-                            x=[lamp],
-                            y=[mean_val],
-                            marker=dict(color=colors[lamp_idx % len(colors)]),
-                            showlegend=(col_idx == 0),
-                            text=[f"{mean_val:.2f}"],
-                            textposition='inside'
-                        ),
-                        row=1, col=col_idx+1
-                    )
+            if (product, lamp) in param_means.index:
+                mean_val = param_means[(product, lamp)]
+                
+                fig.add_trace(
+                    go.Bar(
+                        name=lamp,
+                        x=[lamp],
+                        y=[mean_val],
+                        marker=dict(color=colors[lamp_idx % len(colors)]),
+                        showlegend=(col_idx == 0),
+                        text=[f"{mean_val:.2f}"],
+                        textposition='inside'
+                    ),
+                    row=1, col=col_idx+1
+                )
         
         # Eliminar título del eje Y
         fig.update_yaxes(
@@ -319,23 +300,21 @@ def create_box_plots(stats, analyzer):
     # Colores BUCHI
     colors = PLOTLY_TEMPLATE['layout']['colorway']
     
-    lamps = set()
-    for product_stats in stats.values():
-        lamps.update(product_stats.keys())
-    lamps = sorted(list(lamps))
+    lamps = stats.lamp_names()
+    
+    # (producto, lámpara, parámetro) -> posición de sus valores en stats.raw_values
+    table = stats.table[stats.table['param'].isin(selected_params)]
+    slices = {
+        (product, lamp, param): (offset, count)
+        for product, lamp, param, offset, count in
+        table[['product', 'note', 'param', 'offset', 'count']].itertuples(index=False)
+    }
     
     # Para cada parámetro, verificar qué productos tienen datos
     params_products_data = {}
     for param in selected_params:
-        products_with_data = []
-        for product in products:
-            has_data = False
-            for lamp in lamps:
-                if lamp in stats[product] and param in stats[product][lamp]:
-                    has_data = True
-                    break
-            if has_data:
-                products_with_data.append(product)
+        with_data = set(table.loc[table['param'] == param, 'product'])
+        products_with_data = [product for product in products if product in with_data]
         
         if products_with_data:
             params_products_data[param] = products_with_data
@@ -374,8 +353,9 @@ def create_box_plots(stats, analyzer):
         
         for col_idx, product in enumerate(products_with_data):
             for lamp_idx, lamp in enumerate(lamps):
-                if lamp in stats[product] and param in stats[product][lamp]:
-                    values = stats[product][lamp][param]['values']
+                if (product, lamp, param) in slices:
+                    offset, count = slices[(product, lamp, param)]
+                    values = stats.raw_values[offset:offset + count]
                     
                     fig.add_trace(
                         go.Box(
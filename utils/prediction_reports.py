@@ -18,8 +18,10 @@ from core.report_utils import (
     start_html_template,
     build_sidebar_html,
     generate_footer,
-    generate_evaluated_table
+    generate_evaluated_table,
+    generate_report_sidecar
 )
+from core.report_writer import ReportWriter
 
 
 def calculate_lamp_differences(stats, analyzer):
@@ -27,16 +29,17 @@ def calculate_lamp_differences(stats, analyzer):
     Calcula diferencias entre lámparas para cada producto.
     
     Args:
-        stats (dict): Estadísticas por producto y lámpara
+        stats (PredictionStats): Estadísticas por producto y lámpara
         analyzer: Objeto analizador con los datos
         
     Returns:
         dict: Diferencias calculadas por producto
     """
     differences_by_product = {}
+    lamp_sizes = stats.lamps.set_index(['product', 'note'])['n']
     
-    for product, product_stats in stats.items():
-        lamps = sorted(list(product_stats.keys()))
+    for product in stats:
+        lamps = stats.lamp_names(product)
         
         if len(lamps) < 2:
             continue
@@ -44,44 +47,35 @@ def calculate_lamp_differences(stats, analyzer):
         baseline_lamp = lamps[0]
         comparison_lamps = lamps[1:]
         
-        # Obtener parámetros en orden original
-        if product in analyzer.data:
-            df = analyzer.data[product]
-            excluded_cols = ['No', 'ID', 'Note', 'Product', 'Method', 'Unit', 'Begin', 'End', 'Length']
-            if len(df.columns) > 1:
-                excluded_cols.append(df.columns[1])
-            params = [col for col in df.columns if col not in excluded_cols]
-        else:
-            params = set()
-            for lamp_stats in product_stats.values():
-                params.update([k for k in lamp_stats.keys() if k not in ['n', 'note']])
-            params = sorted(list(params))
+        # Medias del producto: parámetros x lámparas
+        means = stats.means(product)
+        
+        # Parámetros en orden original
+        params = [p for p in _product_params(product, stats, analyzer) if p in means.index]
         
         comparisons = []
         
         for comp_lamp in comparison_lamps:
             comparison = {
                 'lamp': comp_lamp,
-                'n_baseline': product_stats[baseline_lamp]['n'],
-                'n_compared': product_stats[comp_lamp]['n'],
+                'n_baseline': int(lamp_sizes[(product, baseline_lamp)]),
+                'n_compared': int(lamp_sizes[(product, comp_lamp)]),
                 'differences': {}
             }
             
-            for param in params:
-                if (param in product_stats[baseline_lamp] and 
-                    param in product_stats[comp_lamp]):
-                    
-                    baseline_mean = product_stats[baseline_lamp][param]['mean']
-                    compared_mean = product_stats[comp_lamp][param]['mean']
-                    
-                    abs_diff = compared_mean - baseline_mean
-                    percent_diff = (abs_diff / baseline_mean * 100) if baseline_mean != 0 else 0
-                    
+            if baseline_lamp in means.columns and comp_lamp in means.columns:
+                pair = means.loc[params, [baseline_lamp, comp_lamp]].dropna()
+                baseline_mean = pair[baseline_lamp]
+                compared_mean = pair[comp_lamp]
+                abs_diff = compared_mean - baseline_mean
+                percent_diff = (abs_diff / baseline_mean * 100).where(baseline_mean != 0, 0)
+                
+                for param in pair.index:
                     comparison['differences'][param] = {
-                        'baseline_mean': baseline_mean,
-                        'compared_mean': compared_mean,
-                        'absolute_diff': abs_diff,
-                        'percent_diff': percent_diff
+                        'baseline_mean': baseline_mean[param],
+                        'compared_mean': compared_mean[param],
+                        'absolute_diff': abs_diff[param],
+                        'percent_diff': percent_diff[param]
                     }
             
             comparisons.append(comparison)
@@ -105,9 +99,9 @@ def generate_differences_section(differences_data, stats, analyzer):
         analyzer: Objeto analizador
         
     Returns:
-        str: HTML de la sección
+        ReportWriter: HTML de la sección
     """
-    html = """
+    html = ReportWriter("""
     <div class="info-box" id="differences-by-product">
         <h2>📊 Diferencias por Producto</h2>
         <p class="text-caption section-description">
@@ -115,7 +109,7 @@ def generate_differences_section(differences_data, stats, analyzer):
         </p>
         
         <ul class="nav nav-tabs" id="differences-tabs" role="tablist">
-    """
+    """)
     
     # Generar pestañas
     for idx, product in enumerate(differences_data.keys()):
@@ -303,6 +297,98 @@ def generate_html_report(stats, analyzer, filename):
     Returns:
         str: HTML completo del reporte
     """
+    return write_html_report(stats, analyzer, filename).getvalue()
+
+
+def _product_params(product, stats, analyzer):
+    """
+    Parámetros de un producto en el orden de sus columnas originales.
+    
+    Args:
+        product (str): Nombre del producto
+        stats (dict): Estadísticas por producto y lámpara
+        analyzer: Objeto analizador con los datos
+        
+    Returns:
+        list: Nombres de los parámetros
+    """
+    if product in analyzer.data:
+        df = analyzer.data[product]
+        excluded_cols = ['No', 'ID', 'Note', 'Product', 'Method', 'Unit', 'Begin', 'End', 'Length']
+        if len(df.columns) > 1:
+            excluded_cols.append(df.columns[1])
+        return [col for col in df.columns if col not in excluded_cols]
+    
+    return sorted(stats.product_table(product)['param'].unique())
+
+
+def generate_predictions_sidecar(stats, analyzer, products, all_lamps, sensor_serial, timestamp):
+    """
+    Genera el sidecar JSON del reporte de predicciones.
+    
+    El resumen replica la estructura de PredictionsParser.parse() para que el
+    consolidador no tenga que recorrer las tablas del HTML.
+    
+    Returns:
+        str: Bloque <script type="application/json"> del reporte
+    """
+    productos = []
+    metrics = {}
+    for product in products:
+        params = _product_params(product, stats, analyzer)
+        lamparas = []
+        for lamp, lamp_stats in stats[product].items():
+            row = {'Lámpara': lamp, 'N': str(lamp_stats['n'])}
+            for param in params:
+                if param in lamp_stats:
+                    row[param] = f"{lamp_stats[param]['mean']:.3f} ± {lamp_stats[param]['std']:.3f}"
+                else:
+                    row[param] = '-'
+            lamparas.append(row)
+        productos.append({'nombre': product, 'parametros': list(params), 'lamparas': lamparas})
+        metrics[product] = {
+            lamp: {
+                'n': lamp_stats['n'],
+                **{param: {'mean': lamp_stats[param]['mean'], 'std': lamp_stats[param]['std']}
+                   for param in params if param in lamp_stats}
+            }
+            for lamp, lamp_stats in stats[product].items()
+        }
+    
+    summary = {
+        'info_general': {
+            'Sensor NIR': sensor_serial,
+            'Fecha del Reporte': timestamp,
+            'Productos Analizados': str(len(products)),
+            'Lámparas Comparadas': str(len(all_lamps)),
+            'Productos': list(products),
+            'Lámparas': list(all_lamps),
+        },
+        'productos': productos,
+    }
+    
+    return generate_report_sidecar(
+        'predictions',
+        summary=summary,
+        metrics=metrics,
+        status='OK' if productos else None,
+        service_info={'Sensor NIR': sensor_serial, 'Fecha del Reporte': timestamp},
+    )
+
+
+def write_html_report(stats, analyzer, filename, writer=None):
+    """
+    Escribe el reporte HTML de predicciones en un ReportWriter.
+    
+    Args:
+        stats (dict): Estadísticas por producto y lámpara
+        analyzer: Objeto analizador con los datos
+        filename (str): Nombre del archivo de salida
+        writer (ReportWriter, optional): Sumidero donde escribir
+        
+    Returns:
+        ReportWriter: Reporte completo, listo para descargar con to_bytesio()
+    """
     products = list(stats.keys())
     all_lamps = set()
     for product_stats in stats.values():
@@ -321,7 +407,8 @@ def generate_html_report(stats, analyzer, filename):
     ]
     
     # Iniciar HTML con template estandarizado (con Bootstrap)
-    html = start_html_template(
+    html = writer if writer is not None else ReportWriter()
+    html += start_html_template(
         title="Reporte de Predicciones NIR",
         sidebar_sections=sections,
         include_bootstrap=True
@@ -416,7 +503,9 @@ def generate_html_report(stats, analyzer, filename):
                 html += f"""
                 <div class="tab-pane fade {active_class}" id="chart-content-{param_id}" role="tabpanel">
                     <div class="plot-container" style="margin-top: 20px;">
-                        {chart_html}
+                        """
+                html += chart_html
+                html += """
                     </div>
                 </div>
                 """
@@ -464,7 +553,9 @@ def generate_html_report(stats, analyzer, filename):
                 html += f"""
                 <div class="tab-pane fade {active_class}" id="chart-maha-content-{param_id}" role="tabpanel">
                     <div class="plot-container" style="margin-top: 20px;">
-                        {chart_html}
+                        """
+                html += chart_html
+                html += """
                     </div>
                 </div>
                 """
@@ -513,17 +604,7 @@ def generate_html_report(stats, analyzer, filename):
         product_id = product.replace(' ', '-').replace('/', '-')
         
         # Obtener parámetros del producto
-        if product in analyzer.data:
-            df = analyzer.data[product]
-            excluded_cols = ['No', 'ID', 'Note', 'Product', 'Method', 'Unit', 'Begin', 'End', 'Length']
-            if len(df.columns) > 1:
-                excluded_cols.append(df.columns[1])
-            params = [col for col in df.columns if col not in excluded_cols]
-        else:
-            params = set()
-            for lamp_stats in stats[product].values():
-                params.update([k for k in lamp_stats.keys() if k not in ['n', 'note']])
-            params = sorted(list(params))
+        params = _product_params(product, stats, analyzer)
         
         html += f"""
                 <div class="tab-pane fade {active_class}" id="content-{product_id}" role="tabpanel">
@@ -581,6 +662,10 @@ def generate_html_report(stats, analyzer, filename):
     if differences_data:
         html += generate_differences_section(differences_data, stats, analyzer)
     
+    # Sidecar JSON para el consolidador
+    html += generate_predictions_sidecar(stats, analyzer, products, all_lamps,
+                                         sensor_serial, timestamp)
+    
     # Footer
     html += generate_footer()
     
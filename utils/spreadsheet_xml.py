@@ -0,0 +1,268 @@
+"""
+Lector en streaming de los XML SpreadsheetML (Excel 2003) de NIR-Online
+========================================================================
+Los exportes "Day" y "Custom" tienen una worksheet por producto (más
+"Espectros" y, a veces, "Summary"). Se recorren con ``lxml.etree.iterparse``:
+
+- cada ``Row`` se procesa al cerrarse y se libera junto con sus hermanas
+  anteriores, de modo que la memoria no crece con el tamaño del archivo
+- las worksheets no pedidas (``Espectros`` por defecto) se atraviesan sin
+  procesar sus filas
+- las celdas se colocan en su columna según ``ss:Index`` (celdas dispersas)
+- las celdas ``ss:Type="Number"`` van directamente a arrays float64; las
+  columnas de texto quedan como categóricas y las DateTime como datetime64
+  (fechas, p. ej. ``Begin``) o timedelta64 (duraciones como ``Length``, que
+  Excel guarda como horas del día 1899-12-31)
+"""
+
+import io
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from lxml import etree
+
+SS_NS = 'urn:schemas-microsoft-com:office:spreadsheet'
+_WORKSHEET = f'{{{SS_NS}}}Worksheet'
+_ROW = f'{{{SS_NS}}}Row'
+_CELL = f'{{{SS_NS}}}Cell'
+_DATA = f'{{{SS_NS}}}Data'
+_NAME = f'{{{SS_NS}}}Name'
+_INDEX = f'{{{SS_NS}}}Index'
+_MERGE_ACROSS = f'{{{SS_NS}}}MergeAcross'
+_TYPE = f'{{{SS_NS}}}Type'
+
+# Worksheets que no son productos
+SPECTRA_SHEET = 'Espectros'
+NON_PRODUCT_SHEETS = (SPECTRA_SHEET, 'Summary')
+
+# Columnas de texto aunque sus celdas sean Number (se guardan como categóricas)
+TEXT_COLUMNS = ('No', 'ID', 'Note', 'Product', 'Method', 'Unit')
+
+# Etiquetas de las filas de estadísticas que cierran la tabla de datos
+STAT_ROW_LABELS = ('Average', 'Min', 'Max', 'Std.Dev.', 'Target')
+
+# Excel guarda las duraciones como DateTime a partir de este día; ninguna
+# medida real tiene fecha anterior a DURATION_LIMIT
+EXCEL_TIME_EPOCH = pd.Timestamp('1899-12-31')
+DURATION_LIMIT = pd.Timestamp('1900-03-01')
+
+# Filas reservadas al empezar una tabla (la capacidad se duplica al llenarse)
+_INITIAL_ROWS = 256
+
+# Filas con ss:Index / ss:MergeAcross (requieren recorrer celda a celda)
+_has_sparse_cells = etree.XPath(
+    'boolean(ss:Cell[@ss:Index or @ss:MergeAcross])', namespaces={'ss': SS_NS}
+)
+
+# (columna 0-based, ss:Type, texto)
+Cell = Tuple[int, Optional[str], Optional[str]]
+
+
+class _TableBuilder:
+    """
+    Acumula las filas de datos de una worksheet.
+
+    Las celdas ``ss:Type="Number"`` se escriben directamente en un bloque
+    float64 preasignado (filas x columnas, NaN por defecto); el resto de
+    celdas se guardan por columna y fila. El tipo de cada columna se decide
+    al cerrar la tabla, sin una segunda pasada de conversión.
+    """
+
+    def __init__(self):
+        self.headers: List[Optional[str]] = []
+        self.done = False
+        self.n_rows = 0
+
+    def _start(self, headers: List[Optional[str]]) -> None:
+        self.headers = headers
+        # Normalizar el nombre de la primera columna a "No"
+        if self.headers[0] in ['#', 'No']:
+            self.headers[0] = 'No'
+        n_cols = len(self.headers)
+        self.is_text = [h in TEXT_COLUMNS for h in self.headers]
+        self.numbers = np.full((_INITIAL_ROWS, n_cols), np.nan)
+        self.texts: List[Dict[int, str]] = [{} for _ in range(n_cols)]
+        self.text_types: List[Set[Optional[str]]] = [set() for _ in range(n_cols)]
+
+    def add_row(self, cells: List[Cell]) -> None:
+        if self.done or not cells:
+            return
+
+        # Detectar fila de encabezado
+        if not self.headers:
+            row_data = _dense(cells)
+            if ('ID' in row_data and 'Note' in row_data and
+                    ('Product' in row_data or 'Method' in row_data)):
+                self._start(row_data)
+            return
+
+        # Filas de datos: la primera celda es el número de medida
+        first = cells[0][2] if cells[0][0] == 0 else None
+        if first and first.replace('.', '').isdigit():
+            self._add_data(cells)
+            return
+
+        # Filas de estadísticas: fin de la tabla
+        label = next((text for col, _, text in cells if col == 1), None)
+        if label in STAT_ROW_LABELS:
+            self.done = True
+
+    def _add_data(self, cells: List[Cell]) -> None:
+        row = self.n_rows
+        if row == len(self.numbers):
+            grown = np.full((2 * row, len(self.headers)), np.nan)
+            grown[:row] = self.numbers
+            self.numbers = grown
+
+        n_cols = len(self.headers)
+        numbers, texts, is_text = self.numbers[row], self.texts, self.is_text
+        for col, cell_type, text in cells:
+            if col >= n_cols or text is None:
+                continue
+            if cell_type == 'Number' and not is_text[col]:
+                try:
+                    numbers[col] = float(text)
+                except ValueError:
+                    pass
+            else:
+                texts[col][row] = text
+                self.text_types[col].add(cell_type)
+        self.n_rows = row + 1
+
+    def _column(self, col: int):
+        n = self.n_rows
+        texts = self.texts[col]
+
+        def text_values() -> np.ndarray:
+            values = np.full(n, None, dtype=object)
+            if texts:
+                values[list(texts)] = list(texts.values())
+            return values
+
+        if self.is_text[col]:
+            return pd.Categorical(text_values())
+
+        numbers = self.numbers[:n, col]
+        if not texts:
+            return numbers
+        if self.text_types[col] == {'DateTime'} and np.isnan(numbers).all():
+            dates = pd.to_datetime(text_values(), errors='coerce')
+            if (dates[dates.notna()] < DURATION_LIMIT).all():
+                return dates - EXCEL_TIME_EPOCH
+            return dates
+
+        # Texto en una columna de resultados ("-.---", números como String...)
+        parsed = numbers.copy()
+        any_parsed = False
+        for row, text in texts.items():
+            try:
+                parsed[row] = float(text)
+                any_parsed = True
+            except ValueError:
+                pass
+        if not any_parsed and np.isnan(numbers).all():
+            # Columna solo de texto (p. ej. la etiqueta de la medida)
+            return pd.Categorical(text_values())
+        return parsed
+
+    def to_frame(self) -> Optional[pd.DataFrame]:
+        if not self.headers or self.n_rows == 0:
+            return None
+        df = pd.DataFrame({i: self._column(i) for i in range(len(self.headers))})
+        df.columns = self.headers
+        return df
+
+
+def _dense(cells: List[Cell]) -> List[Optional[str]]:
+    """Textos de una fila por posición (None en los huecos)."""
+    values: List[Optional[str]] = [None] * (max(col for col, _, _ in cells) + 1) if cells else []
+    for col, _, text in cells:
+        values[col] = text
+    return values
+
+
+def _row_cells(row) -> List[Cell]:
+    """
+    Celdas de una fila con su columna real: ``ss:Index`` (1-based) salta
+    columnas vacías y ``ss:MergeAcross`` ocupa varias.
+    """
+    data = list(row.iter(_DATA))
+    if len(data) == len(row) and not _has_sparse_cells(row):
+        # Caso habitual: una celda con Data por columna, sin saltos
+        return [(col, d.get(_TYPE), d.text) for col, d in enumerate(data)]
+
+    cells = []
+    col = -1
+    for cell in row.iterchildren(_CELL):
+        index = cell.get(_INDEX)
+        col = int(index) - 1 if index is not None else col + 1
+        data = cell[0] if len(cell) else None
+        if data is not None and data.tag != _DATA:
+            data = cell.find(_DATA)
+        if data is None:
+            cells.append((col, None, None))
+        else:
+            cells.append((col, data.get(_TYPE), data.text))
+        merge = cell.get(_MERGE_ACROSS)
+        if merge is not None:
+            col += int(merge)
+    return cells
+
+
+def _release(elem) -> None:
+    """Libera un elemento ya procesado y sus hermanos anteriores."""
+    elem.clear()
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+def _as_binary_stream(source):
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source
+
+
+def iter_worksheets(source, skip: Iterable[str] = NON_PRODUCT_SHEETS
+                    ) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Recorre las worksheets de un XML de NIR-Online.
+
+    Args:
+        source: Archivo subido, ruta, objeto tipo archivo binario o bytes
+        skip: Nombres de worksheet que se atraviesan sin procesar
+
+    Yields:
+        (nombre de la worksheet, DataFrame con sus filas de datos). Las
+        worksheets sin encabezado reconocible o sin datos no se devuelven.
+    """
+    skip = set(skip)
+    context = etree.iterparse(
+        _as_binary_stream(source),
+        events=('start', 'end'),
+        tag=(_WORKSHEET, _ROW),
+        huge_tree=True,
+    )
+
+    builder: Optional[_TableBuilder] = None
+    name = None
+    for event, elem in context:
+        if elem.tag == _ROW:
+            if event == 'end':
+                if builder is not None and not builder.done:
+                    builder.add_row(_row_cells(elem))
+                _release(elem)
+        elif event == 'start':
+            name = elem.get(_NAME)
+            builder = None if name is None or name in skip else _TableBuilder()
+        else:
+            if builder is not None:
+                df = builder.to_frame()
+                if df is not None:
+                    yield name, df
+            builder = None
+            _release(elem)